@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+底图图层缓存与标记图层合成
+tile多边形、master颜色和orient角标在多次运行之间几乎不变，变化的通常只是Mapping.xlsx带来的
+debug/client/or-gate标记。PNG因此分两个图层渲染：
+    - 底图图层：白色背景 + tile多边形 + 坐标轴（网格线、刻度）+ orient角标，按目标DPI光栅化为RGBA数组，
+      以 .npy 保存在缓存目录（按布局内容、DPI、输出区域和坐标轴位置哈希），之后以内存映射方式读取
+    - 顶部图层：其余内容（标记点、tile名称、边框、标题、图例），在透明画布上光栅化，再按alpha合成到底图上
+单次渲染中底图图层的内容先于所有顶部图层的内容绘制（zorder 1~2，标记点zorder>=2且在其后添加），
+两层合成与单次渲染的绘制顺序一致；半透明像素因8位取整可能相差1~2个灰度级。底图命中时Figure中不创建tile多边形，只有标记相关的绘制、合成和PNG压缩。
+"""
+
+import hashlib
+import json
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+import numpy as np
+
+from dfd_logger import get_logger
+from render_cache import RenderCache, geometry_digest
+from strip_render import encode_strip, measure_output_bbox, render_strip_rgba, strip_bounds, text_row_spans, \
+    write_png_stream
+
+logger = get_logger('base_layer')
+
+BASE_LAYER_DIR = 'base'  # 渲染缓存目录下保存底图栅格的子目录
+BASE_LAYER_MAX_ENTRIES = 2  # 底图栅格较大（1200 DPI时数百MB），只保留少量变体
+BASE_LAYER_VERSION = 1
+COMPOSITE_BLOCK_ROWS = 512  # 合成与压缩时每次处理的行数
+
+
+def base_layer_key(geometry, fig, bbox, width_px, height_px, dpi):
+    """底图栅格的缓存键：布局内容 + DPI + 输出区域 + 坐标轴位置与范围"""
+    import matplotlib
+
+    payload = {
+        'version': BASE_LAYER_VERSION,
+        'matplotlib': matplotlib.__version__,
+        'geometry': geometry_digest(geometry),
+        'dpi': dpi,
+        'size': [width_px, height_px],
+        'bbox': [round(value, 6) for value in bbox.bounds],
+        'figsize': [round(float(value), 6) for value in fig.get_size_inches()],
+        'axes': [[round(float(value), 6) for value in (*ax.get_position().bounds, *ax.get_xlim(), *ax.get_ylim())]
+                 for ax in fig.axes],
+    }
+    return hashlib.blake2b(json.dumps(payload, sort_keys=True).encode('utf-8'), digest_size=16).hexdigest()
+
+
+@contextmanager
+def _layer_visibility(fig, collections, base):
+    """
+    临时只显示一个图层：base为True时只保留背景、坐标轴和底图集合，否则隐藏它们
+    """
+    base_artists = [*collections, *(axis for ax in fig.axes for axis in (ax.xaxis, ax.yaxis))]
+    base_ids = {id(artist) for artist in base_artists}
+    hidden = []
+
+    def hide(artist):
+        if artist.get_visible():
+            artist.set_visible(False)
+            hidden.append(artist)
+
+    if base:
+        for child in fig.get_children():
+            if child is not fig.patch and child not in fig.axes:
+                hide(child)
+        for ax in fig.axes:
+            for child in ax.get_children():
+                if child is not ax.patch and id(child) not in base_ids:
+                    hide(child)
+    else:
+        hide(fig.patch)
+        for ax in fig.axes:
+            hide(ax.patch)
+        for artist in base_artists:
+            hide(artist)
+    try:
+        yield
+    finally:
+        for artist in hidden:
+            artist.set_visible(True)
+
+
+def composite_over(top, base):
+    """
+    把非预乘alpha的RGBA顶部图层合成到不透明的RGBA底图上（顶部图层大部分透明，只混合alpha>0的像素）
+
+    Returns:
+        np.ndarray: 不透明的RGBA uint8数组
+    """
+    out = np.array(base, dtype=np.uint8)
+    ys, xs = np.nonzero(top[..., 3])
+    if len(ys):
+        alpha = top[ys, xs, 3:4].astype(np.uint16)
+        blended = top[ys, xs, :3].astype(np.uint16) * alpha
+        blended += out[ys, xs, :3] * (255 - alpha)
+        blended += 127
+        blended //= 255
+        out[ys, xs, :3] = blended
+    return out
+
+
+def render_base_layer(parser, fig, bbox, width_px, height_px, dpi, path, strips=1):
+    """
+    在fig中绘制底图集合，按行条带光栅化为 (height, width, 4) 的RGBA .npy 文件，绘制后移除底图集合
+
+    Returns:
+        Path: 写出的文件
+    """
+    artists = parser.draw_base_layer(fig.axes[0])
+    try:
+        raster = np.lib.format.open_memmap(path, mode='w+', dtype=np.uint8, shape=(height_px, width_px, 4))
+        with _layer_visibility(fig, artists, base=True):
+            for row_start, row_end in strip_bounds(height_px, strips):
+                rgba = render_strip_rgba(fig, bbox, height_px, dpi, row_start, row_end)
+                raster[row_start:row_end] = rgba
+                del rgba
+        raster.flush()
+        del raster
+    finally:
+        for artist in artists:
+            artist.remove()
+    return Path(path)
+
+
+def save_png_layered(parser, fig, save_path, dpi, cache_dir, strips=1, max_entries=BASE_LAYER_MAX_ENTRIES):
+    """
+    底图图层（缓存）+ 顶部图层合成并保存PNG，输出区域与 savefig(bbox_inches='tight', pad_inches=0.1) 相同
+
+    Args:
+        parser: TileParser
+        fig: parser.build_figure(..., draw_base=False) 构建的Figure（不含底图集合）
+        save_path: PNG路径
+        dpi: 分辨率
+        cache_dir: 底图栅格缓存目录
+        strips: 按行分几次光栅化（降低峰值内存）
+        max_entries: 最多保留的底图栅格数
+
+    Returns:
+        dict: {'width', 'height', 'bytes', 'seconds', 'base_cached'}
+    """
+    start = time.perf_counter()
+    save_path = Path(save_path)
+    cache = RenderCache(cache_dir, max_entries)
+    bbox, width_px, height_px = measure_output_bbox(fig, dpi)
+    key = base_layer_key(parser.geometry, fig, bbox, width_px, height_px, dpi)
+
+    base_path = cache.lookup(key, '.npy')
+    base_cached = base_path is not None
+    if base_cached:
+        logger.info(f"♻️ 使用缓存底图图层，只重绘标记图层: {width_px}x{height_px} 像素")
+    else:
+        cache.cache_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = cache.cache_dir / f"{key}.tmp.npy"
+        render_base_layer(parser, fig, bbox, width_px, height_px, dpi, tmp_path, strips=strips)
+        cache.store(key, tmp_path, move=True)
+        base_path = cache.lookup(key, '.npy')
+        logger.info(f"🧱 底图图层已渲染并缓存: {width_px}x{height_px} 像素")
+    base = np.load(base_path, mmap_mode='r')
+
+    def encoded_blocks():
+        text_spans = text_row_spans(fig, bbox, height_px, dpi)
+        previous_row = None
+        with _layer_visibility(fig, (), base=False):
+            for row_start, row_end in strip_bounds(height_px, strips):
+                top = render_strip_rgba(fig, bbox, height_px, dpi, row_start, row_end, text_spans)
+                for block_start in range(row_start, row_end, COMPOSITE_BLOCK_ROWS):
+                    block_end = min(block_start + COMPOSITE_BLOCK_ROWS, row_end)
+                    rgba = composite_over(top[block_start - row_start:block_end - row_start], base[block_start:block_end])
+                    yield encode_strip(rgba, block_end == height_px, previous_row=previous_row)
+                    previous_row = rgba[-1].copy()
+
+    size = write_png_stream(save_path, width_px, height_px, dpi, encoded_blocks())
+    del base
+    seconds = time.perf_counter() - start
+    logger.info(f"🧱 底图与标记图层合成完成，耗时 {seconds:.2f}s")
+    return {'width': width_px, 'height': height_px, 'bytes': size, 'seconds': seconds, 'base_cached': base_cached}
@@ -0,0 +1,14 @@
+"""
+DFD性能基准测试包
+功能：
+    - synthetic: 按可配置规模合成 CHIP.txt / MID.csv / Mapping.xlsx 输入
+    - runner: 对各公开入口计时，输出吞吐量与内存曲线
+
+用法（在 code/ 目录下）：
+    python -m benchmarks --scales 10000 100000
+"""
+
+from benchmarks.synthetic import generate_synthetic_inputs
+from benchmarks.runner import run_benchmarks, DEFAULT_SCALES, ENTRY_POINTS
+
+__all__ = ['generate_synthetic_inputs', 'run_benchmarks', 'DEFAULT_SCALES', 'ENTRY_POINTS']
@@ -0,0 +1,38 @@
+"""
+基准测试命令行入口
+
+    python -m benchmarks --scales 10000 100000 --no-memory
+"""
+
+import argparse
+
+from benchmarks.runner import run_benchmarks, DEFAULT_SCALES, DEFAULT_RENDER_LIMIT, ENTRY_POINTS
+
+
+def main():
+    parser = argparse.ArgumentParser(description="DFD规模化基准测试")
+    parser.add_argument('--scales', type=int, nargs='+', default=list(DEFAULT_SCALES),
+                        help="测试规模列表（默认: 10k 100k 1M 10M）")
+    parser.add_argument('--entries', nargs='+', choices=ENTRY_POINTS, default=list(ENTRY_POINTS),
+                        help="需要测量的入口")
+    parser.add_argument('--work-dir', default=None, help="合成数据与报告目录（默认: output/benchmark）")
+    parser.add_argument('--render-limit', type=int, default=DEFAULT_RENDER_LIMIT,
+                        help="plot与完整流程的最大测试规模")
+    parser.add_argument('--plot-dpi', type=int, default=100, help="单独测量plot时的DPI")
+    parser.add_argument('--no-memory', action='store_true', help="不测量峰值内存")
+    parser.add_argument('--verbose', action='store_true', help="显示被测函数自身的输出")
+    args = parser.parse_args()
+
+    run_benchmarks(
+        scales=args.scales,
+        work_dir=args.work_dir,
+        entry_points=args.entries,
+        measure_memory=not args.no_memory,
+        render_limit=args.render_limit,
+        plot_dpi=args.plot_dpi,
+        verbose=args.verbose
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+规模化基准测试
+对每个公开入口（parse_chip_file / TileParser.parse_from_csv / integrate_json_excel_data /
+TileParser.plot / DFDProcessor.run_complete_analysis）在不同规模下计时，
+输出吞吐量与峰值内存曲线（JSON + 文本 + PNG）。
+"""
+
+import contextlib
+import gc
+import json
+import logging
+import os
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+
+from benchmarks.synthetic import generate_synthetic_inputs
+from dfd_logger import get_logger, LOGGER_NAME
+
+logger = get_logger('benchmark')
+
+DEFAULT_SCALES = (10_000, 100_000, 1_000_000, 10_000_000)
+ENTRY_POINTS = ('parse_chip_file', 'parse_from_csv', 'integrate_json_excel_data', 'plot', 'run_complete_analysis')
+
+# 绘图相关入口默认只跑到该规模，更大规模的单次渲染耗时以小时计
+DEFAULT_RENDER_LIMIT = 1_000_000
+
+
+def scale_parameters(scale, dbg_per_block=4, vertices_per_tile=4, template_ratio=0.2, template_values=2):
+    """
+    将单一规模数值换算为各输入的生成参数：
+    展开后的DbgBlkId配对数 ≈ MID.csv的tile顶点行数 ≈ scale
+    """
+    expansion = (1 - template_ratio) + template_ratio * template_values
+    return {
+        'n_blocks': max(1, int(scale / (dbg_per_block * expansion))),
+        'dbg_per_block': dbg_per_block,
+        'n_tiles': max(1, scale // vertices_per_tile),
+        'vertices_per_tile': vertices_per_tile,
+        'template_ratio': template_ratio,
+        'template_values': template_values,
+    }
+
+
+def _measure(prepare, measure_memory):
+    """
+    计时并测量峰值内存
+
+    Args:
+        prepare: 无参函数，返回待测的无参函数；每一轮测量都重新调用，使被测对象（解析器、处理器）
+                 不带上一轮留下的缓存状态，准备过程本身不计入
+        measure_memory: 是否另起一轮在tracemalloc下测量峰值内存（避免tracemalloc的开销污染计时）
+
+    Returns:
+        tuple: (耗时秒, 峰值内存字节或None, 计时那一轮的返回值)
+    """
+    func = prepare()
+    gc.collect()
+    start = time.perf_counter()
+    value = func()
+    elapsed = time.perf_counter() - start
+
+    peak = None
+    if measure_memory:
+        func = prepare()
+        gc.collect()
+        tracemalloc.start()
+        try:
+            func()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+    return elapsed, peak, value
+
+
+@contextlib.contextmanager
+def _quiet_pipeline():
+    """被测函数运行期间只输出ERROR级别的流水线日志"""
+    root = logging.getLogger(LOGGER_NAME)
+    previous_level = root.level
+    root.setLevel(logging.ERROR)
+    try:
+        yield
+    finally:
+        root.setLevel(previous_level)
+
+
+def _write_chip_blocks_json(chip_file, json_file, expand_dict):
+    """按DFDProcessor的规则生成chip_blocks.json，作为整合入口的输入"""
+    from chip_parser import parse_chip_file
+    from dfd_processor import DFDProcessor
+
+    expander = DFDProcessor(expand_dict)
+    result = {}
+    for block in parse_chip_file(chip_file):
+        hier = block.get_hierarchical()
+        if hier:
+            for inst in expander.expand_instance_name(hier['instance']):
+                new_hier = hier.copy()
+                new_hier['instance'] = inst
+                result[f"{hier['module']}::{inst}"] = new_hier
+    with open(json_file, 'w', encoding='utf-8') as f:
+        json.dump(result, f, ensure_ascii=False, indent=2)
+
+
+def run_scale(scale, work_dir, entry_points=ENTRY_POINTS, measure_memory=True, render_limit=DEFAULT_RENDER_LIMIT,
+              plot_dpi=100, verbose=False):
+    """
+    在单一规模下生成输入并执行所有入口的计时
+
+    Returns:
+        list: [{entry, scale, items, seconds, throughput, peak_memory_mb}, ...]
+    """
+    import matplotlib
+    matplotlib.use('Agg')
+    from chip_parser import parse_chip_file
+    from tile_parser import TileParser
+    from excel_reader import read_excel_client_tile_mapping, read_excel_column_f
+    from json_excel_integrator import integrate_json_excel_data
+    from dfd_processor import DFDProcessor
+
+    input_dir = Path(work_dir) / f"scale_{scale}" / 'input'
+    output_dir = Path(work_dir) / f"scale_{scale}" / 'output'
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    logger.info(f"🧪 生成规模 {scale:,} 的合成输入...")
+    generated = generate_synthetic_inputs(input_dir, **scale_parameters(scale))
+    counts = generated['counts']
+    logger.info(f"   📦 块: {counts['blocks']:,}  配对: {counts['pairs']:,}  tile: {counts['tiles']:,}  "
+                f"CSV行: {counts['csv_rows']:,}  Mapping行: {counts['mapping_rows']:,}")
+
+    quiet = contextlib.nullcontext if verbose else _quiet_pipeline
+    results = []
+
+    def record(entry, items, prepare):
+        with quiet():
+            seconds, peak, value = _measure(prepare, measure_memory)
+        row = {
+            'entry': entry,
+            'scale': scale,
+            'items': items,
+            'seconds': round(seconds, 4),
+            'throughput': round(items / seconds, 1) if seconds > 0 else None,
+            'peak_memory_mb': round(peak / 2**20, 2) if peak is not None else None,
+        }
+        results.append(row)
+        mem = f", 峰值内存 {row['peak_memory_mb']} MB" if peak is not None else ""
+        logger.info(f"   ⏱️  {entry}: {seconds:.3f}s ({row['throughput']:,} items/s{mem})")
+        return value
+
+    def parsed_tiles():
+        with quiet():
+            return TileParser().parse_from_csv(generated['mid_file'])
+
+    if 'parse_chip_file' in entry_points:
+        record('parse_chip_file', counts['pairs'], lambda: lambda: parse_chip_file(generated['chip_file']))
+
+    if 'parse_from_csv' in entry_points:
+        record('parse_from_csv', counts['csv_rows'],
+               lambda: lambda: TileParser().parse_from_csv(generated['mid_file']))
+
+    if 'integrate_json_excel_data' in entry_points:
+        json_file = output_dir / 'chip_blocks.json'
+        _write_chip_blocks_json(generated['chip_file'], json_file, generated['expand_dict'])
+        record('integrate_json_excel_data', counts['pairs'], lambda: lambda: integrate_json_excel_data(
+            json_file_path=str(json_file),
+            excel_file_path=generated['mapping_file'],
+            output_file_path=str(output_dir / 'chip_blocks_integrated.json')
+        ))
+
+    if 'plot' in entry_points and scale <= render_limit:
+        with quiet():
+            highlight_client = read_excel_column_f(generated['mapping_file'])
+            mapping = read_excel_client_tile_mapping(generated['mapping_file'])
+
+        def prepare_plot():
+            # 每轮使用新解析的TileParser，几何缓存等状态不跨轮复用
+            parser = parsed_tiles()
+            return lambda: parser.plot(
+                save_path=str(output_dir / 'tiles_bench.png'),
+                dpi=plot_dpi,
+                highlight_client=highlight_client,
+                tile_client_mapping=mapping,
+                show=False
+            )
+        record('plot', counts['tiles'], prepare_plot)
+
+    if 'run_complete_analysis' in entry_points and scale <= render_limit:
+        def prepare_analysis():
+            # 每轮使用新的处理器，已解析输入等常驻缓存不跨轮复用；关闭渲染缓存（底图缓存默认关闭），
+            # 否则第二轮起直接复制上一轮的PNG，测到的不是完整流程
+            processor = DFDProcessor(generated['expand_dict'], input_dir=input_dir, output_dir=output_dir,
+                                     show_plot=False, render_cache_entries=0, base_layer_cache=False)
+            return processor.run_complete_analysis
+        record('run_complete_analysis', scale, prepare_analysis)
+
+    return results
+
+
+def write_benchmark_report(results, report_dir):
+    """将结果写为 JSON / 文本表格 / 吞吐量与内存曲线图"""
+    report_dir = Path(report_dir)
+    report_dir.mkdir(parents=True, exist_ok=True)
+
+    json_file = report_dir / 'benchmark_report.json'
+    with open(json_file, 'w', encoding='utf-8') as f:
+        json.dump({'generated_at': datetime.now().isoformat(timespec='seconds'), 'results': results},
+                  f, ensure_ascii=False, indent=2)
+
+    txt_file = report_dir / 'benchmark_report.txt'
+    with open(txt_file, 'w', encoding='utf-8') as f:
+        f.write("DFD性能基准测试报告\n")
+        f.write("=" * 60 + "\n")
+        f.write(f"生成时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n")
+        f.write(f"{'entry':<28}{'scale':>12}{'seconds':>12}{'items/s':>16}{'peak MB':>12}\n")
+        f.write("-" * 80 + "\n")
+        for row in results:
+            peak = '-' if row['peak_memory_mb'] is None else f"{row['peak_memory_mb']:.2f}"
+            f.write(f"{row['entry']:<28}{row['scale']:>12,}{row['seconds']:>12.3f}"
+                    f"{row['throughput'] or 0:>16,.1f}{peak:>12}\n")
+
+    curves_file = report_dir / 'benchmark_curves.png'
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+
+    fig, (ax_tp, ax_mem) = plt.subplots(1, 2, figsize=(12, 5))
+    for entry in ENTRY_POINTS:
+        rows = [r for r in results if r['entry'] == entry]
+        if not rows:
+            continue
+        scales = [r['scale'] for r in rows]
+        ax_tp.plot(scales, [r['throughput'] or 0 for r in rows], 'o-', label=entry)
+        if any(r['peak_memory_mb'] is not None for r in rows):
+            ax_mem.plot(scales, [r['peak_memory_mb'] or 0 for r in rows], 'o-', label=entry)
+    for ax, ylabel in ((ax_tp, 'items / s'), (ax_mem, 'peak memory (MB)')):
+        ax.set_xscale('log')
+        ax.set_yscale('log')
+        ax.set_xlabel('scale')
+        ax.set_ylabel(ylabel)
+        ax.grid(True, linestyle='--', alpha=0.3)
+        ax.legend(fontsize=7)
+    ax_tp.set_title('Throughput')
+    ax_mem.set_title('Peak memory')
+    fig.tight_layout()
+    fig.savefig(curves_file, dpi=150)
+    plt.close(fig)
+
+    logger.info(f"📄 基准测试报告已保存到: {txt_file}")
+    logger.info(f"📈 吞吐量/内存曲线已保存到: {curves_file}")
+    return txt_file
+
+
+def run_benchmarks(scales=DEFAULT_SCALES, work_dir=None, entry_points=ENTRY_POINTS, measure_memory=True,
+                   render_limit=DEFAULT_RENDER_LIMIT, plot_dpi=100, verbose=False):
+    """
+    依次在各规模下运行基准测试并生成报告
+
+    Args:
+        scales: 规模列表（每个规模约等于DbgBlkId配对数和MID.csv顶点行数）
+        work_dir: 合成数据与报告目录，默认为 output/benchmark
+        entry_points: 需要测量的入口
+        measure_memory: 是否额外用tracemalloc测量峰值内存
+        render_limit: plot / run_complete_analysis 的最大规模
+        plot_dpi: 单独测量plot时使用的DPI
+        verbose: 是否显示被测函数自身的输出
+
+    Returns:
+        list: 所有测量结果
+    """
+    if work_dir is None:
+        work_dir = Path(os.path.dirname(os.path.abspath(__file__))) / '..' / '..' / 'output' / 'benchmark'
+    work_dir = Path(work_dir)
+
+    logger.info("🚀 DFD基准测试启动")
+    logger.info("=" * 50)
+    results = []
+    for scale in scales:
+        results.extend(run_scale(scale, work_dir, entry_points, measure_memory, render_limit, plot_dpi, verbose))
+        write_benchmark_report(results, work_dir)
+    return results
@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+合成输入数据生成器
+在没有真实 CHIP.txt / MID.csv / Mapping.xlsx 的情况下，按可配置规模生成结构一致的输入文件，
+用于性能基准测试与回归检查。
+"""
+
+import csv
+import math
+import random
+from pathlib import Path
+
+# Excel单个sheet的最大行数（含表头）
+EXCEL_MAX_ROWS = 1048576
+
+ORIENTS = ['R0', 'MX', 'MY', 'R180']
+TEMPLATE_VAR = '$SYN'
+
+
+def _tile_vertices(x0, y0, width, height, vertices_per_tile, l_shape):
+    """
+    生成单个tile的顶点（逆时针）
+
+    Args:
+        x0, y0: 左下角坐标
+        width, height: tile尺寸
+        vertices_per_tile: 顶点数（>=4，多出的顶点以共线点的形式插入底边）
+        l_shape: 是否切掉右上角形成L形（6个顶点）
+
+    Returns:
+        list: [(x, y), ...]
+    """
+    if l_shape:
+        cut_w, cut_h = width / 2, height / 2
+        return [
+            (x0, y0), (x0 + width, y0), (x0 + width, y0 + height - cut_h),
+            (x0 + width - cut_w, y0 + height - cut_h), (x0 + width - cut_w, y0 + height), (x0, y0 + height)
+        ]
+
+    extra = max(0, vertices_per_tile - 4)
+    bottom = [(x0 + width * (k + 1) / (extra + 1), y0) for k in range(extra)]
+    return [(x0, y0)] + bottom + [(x0 + width, y0), (x0 + width, y0 + height), (x0, y0 + height)]
+
+
+def generate_chip_txt(file_path, n_blocks, dbg_per_block, template_ratio, seed=0):
+    """
+    生成CHIP.txt：每个块是一个模块实例化，包含若干DbgBlkId端口连接
+
+    Returns:
+        list: [(module, instance_template), ...] 供Mapping生成使用
+    """
+    rng = random.Random(seed)
+    n_modules = max(1, n_blocks // 8)
+    blocks = []
+
+    with open(file_path, 'w', encoding='utf-8') as f:
+        f.write("# synthetic CHIP.txt generated for benchmarking\n")
+        for b in range(n_blocks):
+            module = f"syn_dbg_client_wrapper_m{b % n_modules}"
+            instance = f"u_syn_blk{b}"
+            if rng.random() < template_ratio:
+                instance += "_{" + TEMPLATE_VAR + "}"
+            blocks.append((module, instance))
+
+            f.write(f"{module} {instance} (\n")
+            for j in range(dbg_per_block):
+                f.write(f"    .c{j}_dbg_client_DbgBlkId({j}),\n")
+                f.write(f"    .c{j}_func_port(syn_net_{b}_{j}),\n")
+            f.write(")\n")
+
+    return blocks
+
+
+def generate_mid_csv(file_path, n_tiles, vertices_per_tile, l_shape_ratio, non_tile_ratio, seed=0):
+    """
+    生成MID.csv：tile按网格排布，并混入一定比例的非tile结构行
+
+    Returns:
+        tuple: (tile_names, csv_row_count)
+    """
+    rng = random.Random(seed)
+    cols = max(1, math.ceil(math.sqrt(n_tiles)))
+    width, height = 1000.0, 800.0
+    tile_names = []
+    row_count = 0
+
+    with open(file_path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(['struct', 'tile', 'master', 'orient', 'vertex_index', 'vertex_x', 'vertex_y'])
+        for i in range(n_tiles):
+            tile_name = f"syn_tile{i}_mid_t"
+            tile_names.append(tile_name)
+            master = f"syn_master_{i % 20}"
+            orient = ORIENTS[i % len(ORIENTS)]
+            x0 = (i % cols) * width
+            y0 = (i // cols) * height
+            l_shape = rng.random() < l_shape_ratio
+            vertices = _tile_vertices(x0, y0, width, height, vertices_per_tile, l_shape)
+
+            rows = []
+            for idx, (x, y) in enumerate(vertices):
+                rows.append(['tile', tile_name, master, orient, idx, x, y])
+            for k in range(round(len(vertices) * non_tile_ratio)):
+                rows.append(['pin', tile_name, master, orient, k, x0 + k, y0])
+            writer.writerows(rows)
+            row_count += len(rows)
+
+    return tile_names, row_count
+
+
+def generate_mapping_xlsx(file_path, expanded_blocks, dbg_per_block, tile_names, clients_per_tile,
+                          unmatched_ratio, seed=0):
+    """
+    生成Mapping.xlsx：A~F列依次为 module / instance / DbgBlkId / flatten module / flatten instance / tile name
+
+    Returns:
+        int: 写入的数据行数（不含表头）
+    """
+    from openpyxl import Workbook
+
+    rng = random.Random(seed)
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet('Mapping')
+    ws.append(['BIA module', 'BIA instance', 'DbgBlkId', 'flatten module', 'flatten instance', 'tile name'])
+
+    max_rows = EXCEL_MAX_ROWS - 1
+    n_tiles = len(tile_names)
+    row_count = 0
+    for module, instance in expanded_blocks:
+        for j in range(dbg_per_block):
+            if row_count >= max_rows:
+                break
+            tile_name = tile_names[(row_count // max(1, clients_per_tile)) % n_tiles] if n_tiles else ""
+            row_module = module
+            roll = rng.random()
+            if roll < unmatched_ratio / 2:
+                row_module = module + "_renamed"            # Excel中存在、JSON中不存在的模块
+            elif roll < unmatched_ratio:
+                tile_name = f"syn_missing_tile{row_count}"  # MID.csv中不存在的tile
+            ws.append([row_module, instance, f"c{j}_dbg_client_DbgBlkId",
+                       f"{module}_flat", f"{instance}_flat", tile_name])
+            row_count += 1
+
+    wb.save(file_path)
+    return row_count
+
+
+def generate_synthetic_inputs(output_dir, n_blocks=1000, dbg_per_block=4, n_tiles=1000, vertices_per_tile=4,
+                              clients_per_tile=2, template_ratio=0.2, template_values=2, l_shape_ratio=0.1,
+                              non_tile_ratio=0.5, unmatched_ratio=0.05, with_mapping=True, seed=0):
+    """
+    按给定规模生成一组完整的合成输入
+
+    Args:
+        output_dir: 输出目录（生成 CHIP.txt / MID.csv / Mapping.xlsx）
+        n_blocks: CHIP.txt中的块数量
+        dbg_per_block: 每个块的DbgBlkId数量
+        n_tiles: MID.csv中的tile数量
+        vertices_per_tile: 每个矩形tile的顶点数
+        clients_per_tile: 每个tile映射的client数量
+        template_ratio: 实例名带 {$SYN} 模板变量的块比例
+        template_values: {$SYN} 展开的取值个数
+        l_shape_ratio: L形tile的比例
+        non_tile_ratio: 非tile结构行相对tile行的比例
+        unmatched_ratio: Mapping中故意不匹配的行比例
+        with_mapping: 是否生成Mapping.xlsx
+        seed: 随机种子
+
+    Returns:
+        dict: 生成文件的路径、expand_dict和各项计数
+    """
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    expand_dict = {TEMPLATE_VAR: list(range(template_values))}
+
+    chip_file = output_dir / 'CHIP.txt'
+    mid_file = output_dir / 'MID.csv'
+    mapping_file = output_dir / 'Mapping.xlsx'
+
+    blocks = generate_chip_txt(chip_file, n_blocks, dbg_per_block, template_ratio, seed)
+    placeholder = "{" + TEMPLATE_VAR + "}"
+    expanded_blocks = []
+    for module, instance in blocks:
+        if placeholder in instance:
+            expanded_blocks.extend((module, instance.replace(placeholder, str(v))) for v in expand_dict[TEMPLATE_VAR])
+        else:
+            expanded_blocks.append((module, instance))
+
+    tile_names, csv_rows = generate_mid_csv(mid_file, n_tiles, vertices_per_tile, l_shape_ratio, non_tile_ratio, seed)
+
+    mapping_rows = 0
+    if with_mapping:
+        mapping_rows = generate_mapping_xlsx(mapping_file, expanded_blocks, dbg_per_block, tile_names,
+                                             clients_per_tile, unmatched_ratio, seed)
+
+    return {
+        'chip_file': str(chip_file),
+        'mid_file': str(mid_file),
+        'mapping_file': str(mapping_file) if with_mapping else None,
+        'expand_dict': expand_dict,
+        'counts': {
+            'blocks': n_blocks,
+            'expanded_blocks': len(expanded_blocks),
+            'pairs': len(expanded_blocks) * dbg_per_block,
+            'tiles': n_tiles,
+            'csv_rows': csv_rows,
+            'mapping_rows': mapping_rows,
+        }
+    }
@@ -1,5 +1,6 @@
 # chip_parser.py
 import re
+from bisect import bisect_left
 from typing import Dict, List, Any
 
 
@@ -25,12 +26,9 @@ class ChipBlock:
             }
         return None
 
-def parse_chip_file(file_path: str) -> List[ChipBlock]:
-    """
-    全文件范围，查找所有 keyword name ( ... ) 块，括号匹配
-    """
+def _read_chip_lines(file_path: str) -> List[str]:
+    """读取CHIP文件的非空、非注释行（相对路径基于 input/）"""
     import os
-    from pathlib import Path
     
     # 转换为绝对路径
     if not os.path.isabs(file_path):
@@ -52,6 +50,14 @@ def parse_chip_file(file_path: str) -> List[ChipBlock]:
         except UnicodeDecodeError:
             with open(file_path, 'r', encoding='latin-1') as f:
                 lines = [line.rstrip() for line in f if line.strip() and not line.lstrip().startswith('#')]
+    return lines
+
+
+def parse_chip_file(file_path: str) -> List[ChipBlock]:
+    """
+    全文件范围，查找所有 keyword name ( ... ) 块，括号匹配
+    """
+    lines = _read_chip_lines(file_path)
 
     blocks = []
     i = 0
@@ -110,4 +116,150 @@ def parse_chip_file(file_path: str) -> List[ChipBlock]:
                 i += 1
         else:
             i += 1
-    return blocks
\ No newline at end of file
+    return blocks
+
+HEADER_PATTERN = re.compile(r'^(\w+)\s+([^\(]+)\s*\($')
+EXPAND_PATTERN = re.compile(r'\{\$(\w+)\}')
+PATH_SEPARATOR = '/'
+
+
+def expand_name(name: str, expand_dict: Dict[str, list]) -> List[str]:
+    """
+    展开名称中的所有 {$VAR}，多个变量取笛卡尔积；expand_dict中没有的变量保持原样
+    """
+    variables = []
+    for var in EXPAND_PATTERN.findall(name):
+        if f"${var}" in expand_dict and var not in variables:
+            variables.append(var)
+    expanded = [name]
+    for var in variables:
+        token = f"{{${var}}}"
+        expanded = [candidate.replace(token, str(value)) for candidate in expanded for value in expand_dict[f"${var}"]]
+    return expanded
+
+
+class BlockNode(ChipBlock):
+    """块树中的一个节点；content只包含本节点直接的内容行，不含子块"""
+    def __init__(self, keyword: str, name: str, content: str = '', parent: 'BlockNode' = None):
+        super().__init__(keyword, name, content)
+        self.parent = parent
+        self.children: List['BlockNode'] = []
+        self.paths: List[str] = []  # 本节点展开后的全部层次路径
+
+    def template_path(self) -> str:
+        """未展开的层次路径，如 CHIP_MID/ssb{$SSB}"""
+        names = []
+        node = self
+        while node is not None:
+            names.append(node.name)
+            node = node.parent
+        return PATH_SEPARATOR.join(reversed(names))
+
+    def dbg_blk_ids(self) -> List[str]:
+        """本节点直接包含的DbgBlkId行（与get_hierarchical相同的原始格式）"""
+        return [line.strip() for line in self.content.splitlines() if 'DbgBlkId' in line]
+
+
+class BlockTree:
+    """
+    CHIP文件的块树
+        - nodes: 按文件顺序排列的全部节点
+        - index: {展开后的层次路径: 节点}，例如 "CHIP_MID/ssb0/u_client"
+    路径按字典序排序保存，查询某路径下的全部DbgBlkId只需一次二分查找和一段连续切片。
+    """
+    def __init__(self, roots: List[BlockNode], nodes: List[BlockNode], expand_dict: Dict[str, list] = None):
+        self.roots = roots
+        self.nodes = nodes
+        # 保存副本：调用方之后原地修改展开规则不会让树与规则不一致
+        self.expand_dict = {var: list(values) for var, values in (expand_dict or {}).items()}
+        self.index: Dict[str, BlockNode] = {}
+        for node in nodes:  # 父节点总在子节点之前
+            own_names = expand_name(node.name, self.expand_dict)
+            parent_paths = node.parent.paths if node.parent is not None else ['']
+            node.paths = [f"{parent}{PATH_SEPARATOR}{own}" if parent else own
+                          for parent in parent_paths for own in own_names]
+            for path in node.paths:
+                self.index.setdefault(path, node)
+
+        self._sorted_paths = sorted(self.index)
+        self._under_cache: Dict[str, List[Any]] = {}
+
+    def __len__(self):
+        return len(self.index)
+
+    def __contains__(self, path):
+        return path in self.index
+
+    def get(self, path: str) -> BlockNode:
+        """按展开后的层次路径查找节点，不存在时返回None"""
+        return self.index.get(path)
+
+    def children(self, path: str) -> List[str]:
+        """路径下一层的子路径"""
+        node = self.index.get(path)
+        if node is None:
+            return []
+        return [child_path for child in node.children for child_path in child.paths
+                if child_path.startswith(path + PATH_SEPARATOR)]
+
+    def subtree_paths(self, path: str) -> List[str]:
+        """路径本身及其下全部后代路径（字典序）"""
+        if path not in self.index:
+            return []
+        prefix = path + PATH_SEPARATOR
+        start = bisect_left(self._sorted_paths, prefix)
+        # PATH_SEPARATOR之后的最大字符作为上界，得到前缀相同的连续区间
+        end = bisect_left(self._sorted_paths, prefix + '\U0010ffff', lo=start)
+        return [path] + self._sorted_paths[start:end]
+
+    def dbg_blk_ids_under(self, path: str) -> List[Any]:
+        """
+        路径及其全部后代中的DbgBlkId
+
+        Returns:
+            list: [(层次路径, DbgBlkId行), ...]；结果按路径缓存
+        """
+        cached = self._under_cache.get(path)
+        if cached is None:
+            cached = [(sub_path, dbg) for sub_path in self.subtree_paths(path)
+                      for dbg in self.index[sub_path].dbg_blk_ids()]
+            self._under_cache[path] = cached
+        return cached
+
+
+def parse_chip_tree(file_path: str, expand_dict: Dict[str, list] = None) -> BlockTree:
+    """
+    解析CHIP文件为块树：块内嵌套的模块实例成为子节点，并按expand_dict沿路径展开 {$VAR}
+
+    与parse_chip_file不同，匹配到的块不会整体跳过，块内的每个 keyword name ( 行都会成为子节点。
+    """
+    lines = _read_chip_lines(file_path)
+
+    roots: List[BlockNode] = []
+    nodes: List[BlockNode] = []
+    stack: List[Any] = []  # [(节点, 打开该节点前的括号深度, 内容行列表)]
+    depth = 0
+    for raw_line in lines:
+        line = raw_line.strip()
+        header = HEADER_PATTERN.match(line)
+        if header:
+            parent = stack[-1][0] if stack else None
+            node = BlockNode(header.group(1), header.group(2).strip(), parent=parent)
+            (parent.children if parent is not None else roots).append(node)
+            nodes.append(node)
+            stack.append((node, depth, []))
+        elif stack:
+            stack[-1][2].append(raw_line)
+
+        depth += line.count('(') - line.count(')')
+        while stack and depth <= stack[-1][1]:
+            node, _, content_lines = stack.pop()
+            # 最后一行是闭合括号，与parse_chip_file一致不计入内容
+            node.content = '\n'.join(content_lines[:-1]) if content_lines else ''
+
+    # 文件在块未闭合时结束
+    while stack:
+        node, _, content_lines = stack.pop()
+        node.content = '\n'.join(content_lines)
+
+    return BlockTree(roots, nodes, expand_dict)
@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+DFD命令行工具
+按阶段单独运行，每个子命令只导入自己用到的模块：
+    parse      解析CHIP.txt并展开，生成 chip_blocks.json                （不加载openpyxl/matplotlib）
+    integrate  展开 + 整合Mapping.xlsx，生成 chip_blocks_integrated.json （加载openpyxl）
+    render     读取MID.csv和Mapping.xlsx，绘制 tiles_high_res.png      （加载openpyxl/matplotlib）
+    report     根据输出目录中的JSON重新生成分析报告                     （不加载openpyxl/matplotlib）
+    export     导出tile几何 tiles.geojson / tiles.geom                 （加载openpyxl/matplotlib）
+    query      查询层次块树或 dfd.sqlite                              （不加载openpyxl/matplotlib）
+
+用法（在 code/ 目录下）：
+    python cli.py parse --expand '{"$SSB": [0, 1]}'
+    python cli.py integrate --input-dir ../input --output-dir ../output
+    python cli.py render --dpi 300
+    python cli.py export --format geojson
+    python cli.py query --block CHIP_MID/ssb0
+    python cli.py query --sql "SELECT COUNT(*) FROM unmatched_pairs"
+不指定 --expand / --expand-file 时使用 main.py 中的 expand_dict。
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+from dfd_logger import get_logger, setup_logging
+from render_cache import DEFAULT_MAX_ENTRIES
+
+logger = get_logger('cli')
+
+DEFAULT_CONFIG_FILE = Path(__file__).with_name('main.py')
+
+
+def resolve_expand_dict(args):
+    """依次从 --expand（JSON字面量）、--expand-file（JSON文件）、main.py 中取得expand_dict"""
+    if args.expand:
+        return json.loads(args.expand)
+    if args.expand_file:
+        with open(args.expand_file, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    from watch import load_expand_dict
+    return load_expand_dict(DEFAULT_CONFIG_FILE) or {}
+
+
+def make_processor(args, **kwargs):
+    from dfd_processor import DFDProcessor
+    return DFDProcessor(resolve_expand_dict(args), input_dir=args.input_dir, output_dir=args.output_dir,
+                        show_plot=False, **kwargs)
+
+
+def cmd_parse(args):
+    processor = make_processor(args)
+    processor.expand_chip_blocks()
+    return 0
+
+
+def cmd_integrate(args):
+    processor = make_processor(args)
+    processor.process_chip_blocks()
+    if args.sqlite:
+        processor.export_sqlite()
+    return 0
+
+
+def _dpi(value):
+    return value if value == 'auto' else int(value)
+
+
+def cmd_render(args):
+    processor = make_processor(args, plot_dpi=args.dpi, client_display=args.client_display,
+                               render_strips=args.strips, render_cache_entries=0 if args.no_cache else args.cache_entries,
+                               min_tile_pixels=args.min_tile_pixels, base_layer_cache=args.base_layer_cache)
+    success, _, _, _ = processor.process_visualization(args.show_client_tile_names)
+    return 0 if success else 1
+
+
+def cmd_report(args):
+    processor = make_processor(args)
+    warning_messages = processor.rebuild_analysis_report()
+    for warning in warning_messages:
+        logger.warning(f"   {warning}")
+    return 0
+
+
+def cmd_export(args):
+    processor = make_processor(args)
+    formats = ('geojson', 'binary') if args.format == 'all' else (args.format,)
+    processor.export_geometry(formats)
+    return 0
+
+
+def cmd_query(args):
+    if args.block is not None:
+        from chip_parser import parse_chip_tree
+
+        input_dir = Path(args.input_dir) if args.input_dir else Path(__file__).resolve().parent.parent / 'input'
+        tree = parse_chip_tree(str(input_dir / 'CHIP.txt'), resolve_expand_dict(args))
+        if not args.block:
+            for root in tree.roots:
+                for path in root.paths:
+                    print(f"{path}/")
+            return 0
+        if tree.get(args.block) is None:
+            logger.error(f"❌ 路径不存在: {args.block}")
+            return 1
+        for child in tree.children(args.block):
+            print(f"{child}/")
+        for path, dbg_blk_id in tree.dbg_blk_ids_under(args.block):
+            print(f"{path}\t{dbg_blk_id}")
+        return 0
+
+    import sqlite3
+    from sqlite_export import DEFAULT_DB_NAME
+
+    output_dir = Path(args.output_dir) if args.output_dir else Path(__file__).resolve().parent.parent / 'output'
+    db_path = Path(args.db) if args.db else output_dir / DEFAULT_DB_NAME
+    if not db_path.exists():
+        logger.error(f"❌ 数据库不存在: {db_path}（先运行 integrate --sqlite 或在main.py中开启export_sqlite）")
+        return 1
+    connection = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        cursor = connection.execute(args.sql)
+        if cursor.description:
+            print("\t".join(column[0] for column in cursor.description))
+            for row in cursor:
+                print("\t".join('' if value is None else str(value) for value in row))
+    except sqlite3.Error as e:
+        logger.error(f"❌ 查询失败: {e}")
+        return 1
+    finally:
+        connection.close()
+    return 0
+
+
+def build_arg_parser():
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument('--input-dir', help="输入目录，默认为 input/")
+    common.add_argument('--output-dir', help="输出目录，默认为 output/")
+    expand_group = common.add_mutually_exclusive_group()
+    expand_group.add_argument('--expand', help='expand_dict的JSON字面量，如 \'{"$SSB": [0, 1]}\'')
+    expand_group.add_argument('--expand-file', help="包含expand_dict的JSON文件")
+    common.add_argument('--log-level', default='INFO')
+    common.add_argument('--log-jsonl', help="JSON Lines日志文件")
+
+    arg_parser = argparse.ArgumentParser(description="DFD命令行工具")
+    subparsers = arg_parser.add_subparsers(dest='command', required=True)
+
+    parse_parser = subparsers.add_parser('parse', parents=[common], help="解析CHIP.txt并展开")
+    parse_parser.set_defaults(func=cmd_parse)
+
+    integrate_parser = subparsers.add_parser('integrate', parents=[common], help="展开并整合Mapping.xlsx")
+    integrate_parser.add_argument('--sqlite', action='store_true', help="同时导出 dfd.sqlite")
+    integrate_parser.set_defaults(func=cmd_integrate)
+
+    render_parser = subparsers.add_parser('render', parents=[common], help="绘制tile可视化图")
+    render_parser.add_argument('--dpi', type=_dpi, default=1200,
+                               help="tiles_high_res.png 的分辨率，auto=按布局范围和最小tile尺寸自动选择")
+    render_parser.add_argument('--min-tile-pixels', type=int, default=None,
+                               help="--dpi auto 时最小tile短边的目标像素数（默认12）")
+    render_parser.add_argument('--show-client-tile-names', type=int, default=0, choices=(0, 1))
+    render_parser.add_argument('--client-display', default='auto', choices=('markers', 'tile', 'grid', 'auto'),
+                               help="client显示方式：逐个标记 / tile热力图 / 网格热力图 / 自动")
+    render_parser.add_argument('--strips', type=int, default=0,
+                               help="大于1时按水平条带多进程渲染PNG并流式拼接（默认单次渲染）")
+    render_parser.add_argument('--cache-entries', type=int, default=DEFAULT_MAX_ENTRIES,
+                               help=f"渲染缓存最多保留的图像数（默认{DEFAULT_MAX_ENTRIES}）")
+    render_parser.add_argument('--no-cache', action='store_true', help="忽略渲染缓存，总是重新绘制")
+    render_parser.add_argument('--base-layer-cache', action='store_true',
+                               help="缓存tile多边形底图栅格，只有highlight/client变化时只重绘标记（占用较多磁盘）")
+    render_parser.set_defaults(func=cmd_render)
+
+    report_parser = subparsers.add_parser('report', parents=[common], help="根据输出目录中的JSON重新生成报告")
+    report_parser.set_defaults(func=cmd_report)
+
+    export_parser = subparsers.add_parser('export', parents=[common], help="导出tile几何（GeoJSON / 二进制）")
+    export_parser.add_argument('--format', default='all', choices=('geojson', 'binary', 'all'))
+    export_parser.set_defaults(func=cmd_export)
+
+    query_parser = subparsers.add_parser('query', parents=[common], help="查询层次块树或SQLite数据库")
+    query_target = query_parser.add_mutually_exclusive_group(required=True)
+    query_target.add_argument('--block', metavar='PATH', help="列出层次路径下的子块和DbgBlkId（空字符串列出顶层路径）")
+    query_target.add_argument('--sql', help="在 dfd.sqlite 上执行的SQL")
+    query_parser.add_argument('--db', help="SQLite数据库路径，默认为 output/dfd.sqlite")
+    query_parser.set_defaults(func=cmd_query)
+    return arg_parser
+
+
+def main(argv=None):
+    args = build_arg_parser().parse_args(argv)
+    setup_logging(level=args.log_level, jsonl_path=args.log_jsonl)
+    try:
+        return args.func(args)
+    except FileNotFoundError as e:
+        logger.error(f"❌ 文件错误: {e}")
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
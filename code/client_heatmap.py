@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Client密度热力图
+client数量很多时，逐个绘制的红点会连成一片且绘制很慢。热力图模式先统计每个tile上的client数量，再：
+    - tile: 按数量给tile着色（一个PolyCollection + 颜色映射）
+    - grid: 把各tile的数量按质心落入空间网格（加权二维直方图），绘制为tile轮廓下的一个imshow图层
+统计与绘制的代价只与tile数量/网格大小有关，与client总数无关。
+"""
+
+import numpy as np
+
+CLIENT_DISPLAY_MODES = ('markers', 'tile', 'grid', 'auto')
+HEATMAP_AUTO_THRESHOLD = 10000  # 'auto' 模式下client总数超过该值时改用tile热力图
+GRID_CELL_TILES = 2  # grid模式默认网格边长约为tile中位尺寸的2倍
+MAX_GRID_BINS = 512  # grid模式较长边网格数的上限
+HEATMAP_CMAP = 'YlOrRd'
+BASE_FACECOLOR = '#eeeeee'  # 热力图模式下没有client的tile的底色
+
+
+def resolve_display_mode(mode, total_clients):
+    """把 'auto' 解析为 'markers' 或 'tile'"""
+    if mode not in CLIENT_DISPLAY_MODES:
+        raise ValueError(f"不支持的client显示方式: {mode}，可选: {CLIENT_DISPLAY_MODES}")
+    if mode == 'auto':
+        return 'tile' if total_clients > HEATMAP_AUTO_THRESHOLD else 'markers'
+    return mode
+
+
+def tile_client_counts(geometry, highlight_tiles, tile_client_mapping=None, symbols=None):
+    """
+    每个tile上的client数量（与标记模式一致：有映射关系时为映射中的client数，否则为1）
+
+    Args:
+        geometry: TileGeometry
+        highlight_tiles: 需要标记client的tile名称集合
+        tile_client_mapping: 可选的ClientTileIndex
+        symbols: 可选的SymbolTable；给出时名称一次转为ID，与几何、映射（同一符号表时）的连接都按ID进行
+
+    Returns:
+        np.ndarray: (n_tiles,) 的client数量，不可绘制的tile为0
+    """
+    highlight_tiles = list(highlight_tiles)
+    if symbols is not None:
+        geometry.symbol_rows(symbols)  # 先登记tile名称，见TileGeometry.rows()
+        ids = symbols.ids(highlight_tiles)
+        rows = geometry.rows_of_ids(ids, symbols)
+    else:
+        rows = geometry.rows(highlight_tiles)
+    found = rows >= 0
+    if tile_client_mapping is None:
+        counts = np.zeros(int(found.sum()))
+    elif symbols is not None and tile_client_mapping.symbols is symbols:
+        counts = np.asarray(tile_client_mapping.client_counts_of_ids(ids[found]), dtype=float)
+    else:
+        counts = np.asarray([tile_client_mapping.client_count(name)
+                             for name, ok in zip(highlight_tiles, found) if ok], dtype=float)
+    counts[counts == 0] = 1
+    tile_counts = np.bincount(rows[found], weights=counts, minlength=len(geometry.names))
+    tile_counts[~geometry.valid] = 0
+    return tile_counts
+
+
+def default_grid_bins(geometry):
+    """较长边的网格数：网格边长约为tile中位尺寸的GRID_CELL_TILES倍"""
+    xmin, ymin, xmax, ymax = geometry.extent()
+    sizes = np.maximum(geometry.widths(), geometry.heights())[geometry.valid]
+    cell = GRID_CELL_TILES * float(np.median(sizes)) if len(sizes) else 0
+    if cell <= 0:
+        return MAX_GRID_BINS
+    return int(np.clip(np.ceil(max(xmax - xmin, ymax - ymin) / cell), 1, MAX_GRID_BINS))
+
+
+def grid_histogram(centroids, counts, extent, bins):
+    """
+    按质心把各tile的client数量累加到正方形网格中
+
+    Args:
+        centroids: (n, 2) tile质心
+        counts: (n,) client数量
+        extent: (xmin, ymin, xmax, ymax)
+        bins: 较长边的网格数
+
+    Returns:
+        tuple: (hist, edges_x, edges_y)，hist形状为 (ny, nx)，行对应y
+    """
+    xmin, ymin, xmax, ymax = extent
+    cell = max(xmax - xmin, ymax - ymin, 1e-12) / bins
+    nx = max(1, int(np.ceil((xmax - xmin) / cell)))
+    ny = max(1, int(np.ceil((ymax - ymin) / cell)))
+    edges_x = xmin + cell * np.arange(nx + 1)
+    edges_y = ymin + cell * np.arange(ny + 1)
+    hist, _, _ = np.histogram2d(centroids[:, 1], centroids[:, 0], bins=(edges_y, edges_x), weights=counts)
+    return hist, edges_x, edges_y
+
+
+def _norm(max_count):
+    from matplotlib.colors import LogNorm, Normalize
+    # 数量跨度大时使用对数色阶，避免少数密集tile把其余tile压成同一颜色
+    return LogNorm(vmin=1, vmax=max_count) if max_count >= 10 else Normalize(vmin=0, vmax=max(max_count, 1))
+
+
+def draw_tile_heatmap(ax, geometry, tile_counts, alpha=0.9):
+    """按client数量给tile着色，返回可用于colorbar的集合（没有client时返回None）"""
+    from matplotlib.collections import PolyCollection
+
+    hot = np.nonzero(tile_counts > 0)[0]
+    if not len(hot):
+        return None
+    collection = PolyCollection(geometry.polygons(hot), closed=True, cmap=HEATMAP_CMAP,
+                                norm=_norm(tile_counts[hot].max()), edgecolors='black', linewidths=0.2,
+                                alpha=alpha, zorder=2)
+    collection.set_array(tile_counts[hot])
+    ax.add_collection(collection)
+    return collection
+
+
+def draw_grid_heatmap(ax, geometry, tile_counts, bins=None, alpha=0.9):
+    """把网格直方图绘制为tile轮廓下的一个图层，返回AxesImage（没有client时返回None）"""
+    hot = np.nonzero(tile_counts > 0)[0]
+    if not len(hot):
+        return None
+    if bins is None:
+        bins = default_grid_bins(geometry)
+    hist, edges_x, edges_y = grid_histogram(geometry.centroids[hot], tile_counts[hot], geometry.extent(), bins)
+    return ax.imshow(np.ma.masked_equal(hist, 0), origin='lower', cmap=HEATMAP_CMAP, norm=_norm(hist.max()),
+                     extent=(edges_x[0], edges_x[-1], edges_y[0], edges_y[-1]), interpolation='nearest',
+                     alpha=alpha, zorder=0)
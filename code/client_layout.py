@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Client标记布局引擎
+为每个tile上任意数量的client计算标记位置：
+    - grid:   按tile宽高比排成网格
+    - spiral: 向日葵（黄金角）螺旋，适合client很多的tile
+所有tile的所有client在一次向量化运算中完成。标记以tile的内部代表点为锚点：矩形tile的偏移按包围盒缩放，
+L形、凹形等非矩形tile的偏移限制在锚点处内切圆的内接正方形中，保证标记落在tile内部。
+"""
+
+import numpy as np
+
+LAYOUT_PATTERNS = ('grid', 'spiral')
+DEFAULT_FILL = 0.8  # 标记区域占tile包围盒的比例
+GOLDEN_ANGLE = np.pi * (3 - np.sqrt(5))
+
+
+def marker_boxes(geometry, indices=None, fill=DEFAULT_FILL):
+    """
+    标记的锚点与排布区域
+
+    Args:
+        geometry: TileGeometry
+        indices: tile下标，None表示全部
+        fill: 传给compute_client_offsets的填充比例
+
+    Returns:
+        tuple: (anchors (n, 2), widths, heights)；矩形tile为质心和包围盒尺寸，非矩形tile为内部代表点和
+               换算后的尺寸（乘以fill后恰为内切圆的内接正方形）
+    """
+    points, distances = geometry.interior_points(indices)
+    widths, heights = geometry.widths(), geometry.heights()
+    if indices is not None:
+        widths, heights = widths[indices], heights[indices]
+    bbox_areas = widths * heights
+    areas = geometry.areas if indices is None else geometry.areas[indices]
+    rectangular = areas >= bbox_areas * (1 - 1e-9)
+    side = distances * np.sqrt(2) / fill
+    return points, np.where(rectangular, widths, side), np.where(rectangular, heights, side)
+
+
+def compute_client_offsets(counts, widths, heights, pattern='grid', fill=DEFAULT_FILL):
+    """
+    计算每个client相对于所在tile锚点的偏移
+
+    Args:
+        counts: 每个tile的client数量 (n_tiles,)
+        widths, heights: 每个tile包围盒的宽和高 (n_tiles,)
+        pattern: 'grid' 或 'spiral'
+        fill: 标记区域占包围盒的比例
+
+    Returns:
+        tuple: (tile_index, offset_x, offset_y)，长度均为client总数，按tile顺序、tile内按client顺序排列
+    """
+    if pattern not in LAYOUT_PATTERNS:
+        raise ValueError(f"不支持的布局方式: {pattern}，可选: {LAYOUT_PATTERNS}")
+
+    counts = np.asarray(counts, dtype=int)
+    widths = np.asarray(widths, dtype=float)
+    heights = np.asarray(heights, dtype=float)
+    total = int(counts.sum())
+    if total == 0:
+        empty = np.array([], dtype=float)
+        return np.array([], dtype=int), empty, empty
+
+    tile_index = np.repeat(np.arange(len(counts)), counts)
+    starts = np.cumsum(counts) - counts
+    rank = np.arange(total) - starts[tile_index]  # client在所在tile内的序号
+    n = counts[tile_index].astype(float)
+    w = widths[tile_index] * fill
+    h = heights[tile_index] * fill
+
+    if pattern == 'grid':
+        # 列数按宽高比分配，使网格单元接近正方形
+        aspect = np.divide(w, h, out=np.ones_like(w), where=h > 0)
+        cols = np.clip(np.ceil(np.sqrt(n * aspect)), 1, n)
+        rows = np.ceil(n / cols)
+        col = rank % cols
+        row = rank // cols
+        offset_x = (col - (cols - 1) / 2) * (w / cols)
+        offset_y = ((rows - 1) / 2 - row) * (h / rows)
+    else:
+        # 等面积螺旋：半径 ∝ sqrt(k)，单个client时落在中心
+        radius = np.where(n > 1, np.sqrt(rank / np.maximum(n - 1, 1)), 0.0)
+        theta = rank * GOLDEN_ANGLE
+        offset_x = radius * np.cos(theta) * w / 2
+        offset_y = radius * np.sin(theta) * h / 2
+
+    return tile_index, offset_x, offset_y
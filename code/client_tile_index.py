@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+client <-> tile 双向索引
+一次遍历同时建立三个方向的索引，每个方向都用dict作为保序集合（插入顺序 + O(1)去重）：
+    - tile   -> clients
+    - client -> tiles
+    - module -> tiles
+ClientTileIndex 实现了只读Mapping接口（tile -> clients），可以直接替代原来的
+{tile_name: [client, ...]} 字典传给 TileParser.plot、RegionRenderer 等；
+"client X 落在哪些tile上" 之类的反向查询是一次字典查找，不再扫描整个映射。
+"""
+
+from collections.abc import Mapping
+
+CLIENT_SEPARATOR = '::'  # client标识格式: module::instance::dbg_blk_id
+
+
+def client_module(client_id):
+    """client标识中的模块名"""
+    return client_id.split(CLIENT_SEPARATOR, 1)[0]
+
+
+class ClientTileIndex(Mapping):
+    """tile -> clients 的只读映射，附带 client -> tiles 与 module -> tiles 反向索引"""
+
+    def __init__(self, pairs=(), symbols=None):
+        """
+        Args:
+            pairs: 可选的 (tile_name, client_id) 序列
+            symbols: 可选的SymbolTable；给出时三个索引都以名称的整数ID为键，接口仍以名称出入
+        """
+        self.symbols = symbols
+        self._tile_clients = {}  # {tile: {client: None}}
+        self._client_tiles = {}  # {client: {tile: None}}
+        self._module_tiles = {}  # {module: {tile: None}}
+        for tile_name, client_id in pairs:
+            self.add(tile_name, client_id)
+
+    @classmethod
+    def from_mapping(cls, tile_client_mapping, symbols=None):
+        """由 {tile_name: [client, ...]} 字典建立索引；已经是ClientTileIndex时原样返回"""
+        if isinstance(tile_client_mapping, cls):
+            return tile_client_mapping
+        return cls(((tile_name, client_id) for tile_name, clients in (tile_client_mapping or {}).items()
+                    for client_id in clients), symbols=symbols)
+
+    def _key(self, name):
+        """登记用的键：有符号表时为名称的ID"""
+        return name if self.symbols is None else self.symbols.intern(name)
+
+    def _find(self, name):
+        """查找用的键：未登记的名称返回None"""
+        return name if self.symbols is None else self.symbols.lookup(name)
+
+    def _names(self, keys):
+        return tuple(keys) if self.symbols is None else tuple(map(self.symbols.name, keys))
+
+    def add(self, tile_name, client_id, module=None):
+        """
+        登记一条client-tile关系
+
+        Args:
+            tile_name: tile名称
+            client_id: client标识
+            module: client所属模块，默认取client标识的第一段
+
+        Returns:
+            bool: 是否为新的关系（重复关系忽略）
+        """
+        if module is None:
+            module = client_module(client_id)
+        tile_key, client_key = self._key(tile_name), self._key(client_id)
+        clients = self._tile_clients.get(tile_key)
+        if clients is None:
+            clients = self._tile_clients[tile_key] = {}
+        elif client_key in clients:
+            return False
+        clients[client_key] = None
+        self._client_tiles.setdefault(client_key, {})[tile_key] = None
+        self._module_tiles.setdefault(self._key(module), {})[tile_key] = None
+        return True
+
+    def remap(self, rename):
+        """返回tile名称和client标识都经过rename()转换的新索引"""
+        return ClientTileIndex(((rename(tile_name), rename(client_id)) for tile_name in self
+                                for client_id in self[tile_name]), symbols=self.symbols)
+
+    def with_symbols(self, symbols):
+        """返回以symbols的ID为键的新索引（如子进程中读取的索引登记到处理器的符号表）"""
+        return ClientTileIndex(((tile_name, client_id) for tile_name in self for client_id in self[tile_name]),
+                               symbols=symbols)
+
+    # Mapping接口：tile -> clients（按插入顺序的元组）
+    def __getitem__(self, tile_name):
+        clients = self._tile_clients.get(self._find(tile_name))
+        if clients is None:
+            raise KeyError(tile_name)
+        return self._names(clients)
+
+    def __iter__(self):
+        return iter(self._names(self._tile_clients))
+
+    def __len__(self):
+        return len(self._tile_clients)
+
+    def __contains__(self, tile_name):
+        return self._find(tile_name) in self._tile_clients
+
+    def __repr__(self):
+        return (f"ClientTileIndex({len(self._tile_clients)} tiles, {len(self._client_tiles)} clients, "
+                f"{len(self._module_tiles)} modules)")
+
+    def clients(self, tile_name):
+        """tile上的client（不存在时为空元组）"""
+        return self._names(self._tile_clients.get(self._find(tile_name), ()))
+
+    def client_count(self, tile_name):
+        """tile上的client数量"""
+        return len(self._tile_clients.get(self._find(tile_name), ()))
+
+    def tile_keys(self):
+        """全部tile的键（有符号表时为ID，否则为名称），与__iter__顺序一致"""
+        return list(self._tile_clients)
+
+    def client_counts(self):
+        """每个tile上的client数量，与tile_keys()顺序一致"""
+        return [len(clients) for clients in self._tile_clients.values()]
+
+    def client_counts_of_ids(self, tile_ids):
+        """按符号表ID给出的tile上的client数量（整数查找，不经过名称）"""
+        get = self._tile_clients.get
+        return [len(get(tile_id, ())) for tile_id in tile_ids]
+
+    def tiles_of_client(self, client_id):
+        """client落在的tile"""
+        return self._names(self._client_tiles.get(self._find(client_id), ()))
+
+    def tiles_of_module(self, module):
+        """模块的所有client落在的tile"""
+        return self._names(self._module_tiles.get(self._find(module), ()))
+
+    def client_ids(self):
+        """全部client（按首次出现顺序）"""
+        return self._names(self._client_tiles)
+
+    def modules(self):
+        """全部模块（按首次出现顺序）"""
+        return self._names(self._module_tiles)
+
+    def multi_client_tiles(self):
+        """有多个client的tile -> client数量"""
+        name = (lambda key: key) if self.symbols is None else self.symbols.name
+        return {name(tile): len(clients) for tile, clients in self._tile_clients.items() if len(clients) > 1}
@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+MID.csv分块读取
+逐行扫描CSV，只保留 struct='tile' 的行，每累积chunk_rows行就转换为紧凑的NumPy数组
+（tile编号 int32、vertex_index int64、x/y float64，每行28字节），不再为每一行保留Python对象。
+累积的数组超过内存预算时整体写入临时目录的 .npy 文件；读取结束后落盘的块经 np.memmap 合并，
+再按 (tile, vertex_index) 稳定排序为扁平坐标数组 + 每个tile的起始偏移，直接交给TileGeometry。
+CSV未按tile排列时不对整个数组建立排序下标，而是分块计数排序：按每个tile的写入游标把顶点分散到
+所在tile的位置，再在每组tile内按vertex_index排序。
+扫描和合并阶段的临时数组由预算限定，与CSV总行数（含非tile行）无关；结果只占每个顶点16字节，
+tiles_dict（每个顶点一个Python元组）只在调用方访问时才生成，见TileParser.tiles_dict。
+"""
+
+import csv
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+from dfd_logger import get_logger
+
+logger = get_logger('csv_ingest')
+
+DEFAULT_CHUNK_ROWS = 100000
+DEFAULT_MEMORY_BUDGET = 256 * 1024 * 1024  # 字节
+COPY_ROWS = 1 << 20  # 排序复制、有序检查时每次处理的行数上限
+BYTES_PER_SORT_ROW = 64  # 分块计数排序时每行临时数组的大致字节数，与内存预算一起决定每块的行数
+REQUIRED_COLUMNS = ('struct', 'tile', 'master', 'orient', 'vertex_index', 'vertex_x', 'vertex_y')
+_FIELDS = (('tile_id', np.int32), ('vertex_index', np.int64), ('x', np.float64), ('y', np.float64))
+
+
+class VertexSpillStore:
+    """按块累积tile顶点数组；内存中的数组超过预算时写入临时 .npy 文件"""
+
+    def __init__(self, memory_budget=DEFAULT_MEMORY_BUDGET, spill_dir=None):
+        """
+        Args:
+            memory_budget: 内存中累积数组的字节上限
+            spill_dir: 临时文件的父目录，默认为系统临时目录
+        """
+        self.memory_budget = memory_budget
+        self.spill_dir = spill_dir
+        self._tmp_dir = None
+        self._pending = []  # 内存中的块: [(tile_id, vertex_index, x, y), ...]
+        self._pending_bytes = 0
+        self._spills = []  # 已落盘的块: [[path, ...], ...]，与_FIELDS一一对应
+        self.rows = 0
+
+    def append(self, *arrays):
+        self._pending.append(arrays)
+        self._pending_bytes += sum(array.nbytes for array in arrays)
+        self.rows += len(arrays[0])
+        if self._pending_bytes > self.memory_budget:
+            self.spill()
+
+    def spill(self):
+        """把内存中的块合并后写入磁盘"""
+        if not self._pending:
+            return
+        if self._tmp_dir is None:
+            self._tmp_dir = tempfile.mkdtemp(prefix='dfd_mid_', dir=self.spill_dir)
+        paths = []
+        for column, (field, _) in enumerate(_FIELDS):
+            path = os.path.join(self._tmp_dir, f"{len(self._spills):05d}_{field}.npy")
+            np.save(path, np.concatenate([chunk[column] for chunk in self._pending]))
+            paths.append(path)
+        self._spills.append(paths)
+        self._pending = []
+        self._pending_bytes = 0
+
+    @property
+    def spill_count(self):
+        return len(self._spills)
+
+    def _chunks(self):
+        """按写入顺序产出所有块（落盘的块以内存映射方式读取）"""
+        for paths in self._spills:
+            yield [np.load(path, mmap_mode='r') for path in paths]
+        yield from self._pending
+
+    def arrays(self):
+        """
+        按写入顺序拼接所有块，返回 (tile_id, vertex_index, x, y)
+
+        发生过落盘时剩余的块也写入磁盘，合并结果是临时目录中的 np.memmap 文件，不占用内存，
+        在close()之前有效；否则在内存中拼接（总量不超过预算）
+        """
+        if self._spills:
+            self.spill()
+            merged = [np.memmap(os.path.join(self._tmp_dir, f"merged_{field}.dat"), dtype=dtype, mode='w+',
+                                shape=(self.rows,)) for field, dtype in _FIELDS]
+        else:
+            merged = [np.empty(self.rows, dtype=dtype) for _, dtype in _FIELDS]
+        position = 0
+        for chunk in self._chunks():
+            size = len(chunk[0])
+            for target, values in zip(merged, chunk):
+                target[position:position + size] = values
+            position += size
+        return merged
+
+    def scratch(self, name, dtype, rows):
+        """与合并结果同样存放的临时数组：发生过落盘时为临时目录中的 np.memmap，否则在内存中"""
+        if self._spills:
+            return np.memmap(os.path.join(self._tmp_dir, f"scratch_{name}.dat"), dtype=dtype, mode='w+',
+                             shape=(rows,))
+        return np.empty(rows, dtype=dtype)
+
+    def close(self):
+        """删除临时文件"""
+        self._pending = []
+        self._spills = []
+        if self._tmp_dir is not None:
+            shutil.rmtree(self._tmp_dir, ignore_errors=True)
+            self._tmp_dir = None
+
+
+def _column_indices(header):
+    missing = [column for column in REQUIRED_COLUMNS if column not in header]
+    if missing:
+        raise ValueError(f"MID.csv缺少列: {', '.join(missing)}")
+    return [header.index(column) for column in REQUIRED_COLUMNS]
+
+
+def _flush(store, columns):
+    """把一块Python列表转换为数组交给store，并清空列表"""
+    if columns[0]:
+        store.append(*(np.array(values, dtype=dtype) for values, (_, dtype) in zip(columns, _FIELDS)))
+        for values in columns:
+            values.clear()
+
+
+def _is_sorted(tile_id, vertex_index, block_rows=COPY_ROWS):
+    """(tile, vertex_index) 是否已按非降序排列（按块检查，内存映射数组不整体读入）"""
+    for start in range(0, max(len(tile_id) - 1, 0), block_rows):
+        end = min(start + block_rows + 1, len(tile_id))
+        tile_step = np.diff(tile_id[start:end])
+        if (tile_step < 0).any() or ((tile_step == 0) & (np.diff(vertex_index[start:end]) < 0)).any():
+            return False
+    return True
+
+
+def _scatter_by_tile(tile_id, vertex_index, x, y, offsets, coords, scattered_index, block_rows):
+    """
+    计数排序的分散步骤：每块内按tile稳定排序，依次写到所在tile的游标处，块之间保持文件顺序
+    """
+    cursor = offsets[:-1].copy()
+    for start in range(0, len(tile_id), block_rows):
+        ids = np.asarray(tile_id[start:start + block_rows])
+        order = np.argsort(ids, kind='stable')
+        sorted_ids = ids[order]
+        group_start = np.flatnonzero(np.r_[True, sorted_ids[1:] != sorted_ids[:-1]])
+        group_size = np.diff(np.r_[group_start, len(ids)])
+        rank = np.arange(len(ids)) - np.repeat(group_start, group_size)  # 同一tile在块内的序号
+        positions = cursor[sorted_ids] + rank
+        rows = order + start
+        coords[positions, 0] = x[rows]
+        coords[positions, 1] = y[rows]
+        scattered_index[positions] = vertex_index[rows]
+        cursor[sorted_ids[group_start]] += group_size
+
+
+def _sort_within_tiles(coords, offsets, scattered_index, block_rows):
+    """按连续的若干tile分组，在每组内按 (tile, vertex_index) 稳定排序（单个tile超过block_rows时单独成组）"""
+    tile_count = len(offsets) - 1
+    first = 0
+    while first < tile_count:
+        last = max(int(np.searchsorted(offsets, offsets[first] + block_rows, side='right')) - 1, first + 1)
+        last = min(last, tile_count)
+        begin, end = offsets[first], offsets[last]
+        keys = np.asarray(scattered_index[begin:end])
+        local_tile = np.repeat(np.arange(last - first), np.diff(offsets[first:last + 1]))
+        if not _is_sorted(local_tile, keys, block_rows=max(len(keys), 1)):
+            coords[begin:end] = coords[begin:end][np.lexsort((keys, local_tile))]
+        first = last
+
+
+def _sorted_coords(tile_id, vertex_index, x, y, tile_count, store=None, memory_budget=DEFAULT_MEMORY_BUDGET):
+    """
+    按 (tile, vertex_index) 稳定排序，得到扁平坐标数组和每个tile的起始偏移
+
+    CSV通常已按tile和顶点顺序排列，此时直接分块复制；否则分块计数排序（见模块说明）。
+    每块的行数按内存预算确定（最多COPY_ROWS行），分散用的vertex_index副本由store分配（落盘时为memmap）
+
+    Returns:
+        tuple: (coords (n_vertices, 2) float64, offsets (tile_count + 1,) int64)
+    """
+    block_rows = int(min(COPY_ROWS, max(memory_budget // BYTES_PER_SORT_ROW, 1024)))
+    counts = np.zeros(tile_count, dtype=np.int64)
+    for start in range(0, len(tile_id), block_rows):
+        counts += np.bincount(tile_id[start:start + block_rows], minlength=tile_count)
+    offsets = np.zeros(tile_count + 1, dtype=np.int64)
+    np.cumsum(counts, out=offsets[1:])
+    del counts
+
+    coords = np.empty((len(x), 2))
+    if _is_sorted(tile_id, vertex_index, block_rows):
+        for start in range(0, len(x), block_rows):
+            coords[start:start + block_rows, 0] = x[start:start + block_rows]
+            coords[start:start + block_rows, 1] = y[start:start + block_rows]
+        return coords, offsets
+
+    scattered_index = (store.scratch('vertex_index', np.int64, len(x)) if store is not None
+                       else np.empty(len(x), dtype=np.int64))
+    _scatter_by_tile(tile_id, vertex_index, x, y, offsets, coords, scattered_index, block_rows)
+    _sort_within_tiles(coords, offsets, scattered_index, block_rows)
+    del scattered_index
+    return coords, offsets
+
+
+def read_tile_arrays(file, canonical=None, chunk_rows=DEFAULT_CHUNK_ROWS, memory_budget=DEFAULT_MEMORY_BUDGET,
+                     spill_dir=None):
+    """
+    分块读取MID.csv中的tile顶点，返回扁平数组（TileGeometry.from_arrays的参数）
+
+    Args:
+        file: 已打开的文本文件
+        canonical: 可选的名称规范化函数（如SymbolTable.canonical）
+        chunk_rows: 每块转换为数组的tile行数
+        memory_budget: 扫描阶段累积顶点数组的字节上限，超出后写入临时文件
+        spill_dir: 临时文件的父目录
+
+    Returns:
+        dict: {names, masters, orients, coords, offsets}，tile按首次出现顺序；
+              第i个tile的顶点为 coords[offsets[i]:offsets[i + 1]]，按vertex_index稳定排序
+    """
+    canonical = canonical or (lambda name: name)
+    start = time.perf_counter()
+    reader = csv.reader(file)
+    header = next(reader, None)
+    names, masters, orients = [], [], []
+    if header is None:
+        return {'names': names, 'masters': masters, 'orients': orients,
+                'coords': np.empty((0, 2)), 'offsets': np.zeros(1, dtype=np.int64)}
+    struct_col, tile_col, master_col, orient_col, index_col, x_col, y_col = _column_indices(header)
+
+    tile_ids = {}  # 原始名称 -> 编号
+    store = VertexSpillStore(memory_budget=memory_budget, spill_dir=spill_dir)
+    try:
+        scanned = 0
+        columns = ([], [], [], [])  # tile编号, vertex_index, x, y
+        ids, indices, xs, ys = columns
+        for row in reader:
+            scanned += 1
+            if len(row) <= struct_col or row[struct_col] != 'tile':
+                continue
+            tile_name = row[tile_col]
+            tile_id = tile_ids.get(tile_name)
+            if tile_id is None:
+                tile_id = tile_ids[tile_name] = len(names)
+                names.append(canonical(tile_name))
+                masters.append(canonical(row[master_col]))
+                orients.append(canonical(row[orient_col]))
+            ids.append(tile_id)
+            indices.append(int(row[index_col]))
+            xs.append(float(row[x_col]))
+            ys.append(float(row[y_col]))
+            if len(ids) >= chunk_rows:
+                _flush(store, columns)
+        _flush(store, columns)
+        del tile_ids
+
+        spill_count = store.spill_count
+        tile_id, vertex_index, x, y = store.arrays()
+        coords, offsets = _sorted_coords(tile_id, vertex_index, x, y, len(names), store, memory_budget)
+        del tile_id, vertex_index, x, y
+    finally:
+        store.close()
+
+    if spill_count:
+        logger.info(f"💽 顶点数组超出内存预算 {memory_budget / 2 ** 20:.0f}MB，{spill_count} 次写入临时文件")
+    logger.debug(f"📥 扫描 {scanned} 行，{len(coords)} 个tile顶点，耗时 {time.perf_counter() - start:.2f}s")
+    return {'names': names, 'masters': masters, 'orients': orients, 'coords': coords, 'offsets': offsets}
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+DFD日志工具
+基于标准库logging：
+    - 分级输出（DEBUG/INFO/WARNING/ERROR），控制台保持原有的emoji消息格式
+    - 可选的JSON Lines日志文件，每条记录附带结构化数据
+    - 批量诊断信息聚合为“数量 + 前N个示例”，完整列表写入报告文件
+"""
+
+import json
+import logging
+import sys
+from datetime import datetime
+from pathlib import Path
+
+LOGGER_NAME = 'dfd'
+
+# 聚合摘要中默认展示的示例数量
+DEFAULT_SUMMARY_LIMIT = 5
+
+
+class ConsoleHandler(logging.StreamHandler):
+    """始终写入当前的sys.stdout（兼容contextlib.redirect_stdout）"""
+
+    def __init__(self):
+        logging.Handler.__init__(self)
+
+    @property
+    def stream(self):
+        return sys.stdout
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """将日志记录格式化为单行JSON"""
+
+    def format(self, record):
+        entry = {
+            'time': datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        data = getattr(record, 'data', None)
+        if data is not None:
+            entry['data'] = data
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+def _ensure_default_handler():
+    """未显式配置时，提供与print等价的控制台输出"""
+    root = logging.getLogger(LOGGER_NAME)
+    if not root.handlers:
+        handler = ConsoleHandler()
+        handler.setFormatter(logging.Formatter('%(message)s'))
+        root.addHandler(handler)
+        root.setLevel(logging.INFO)
+        root.propagate = False
+    return root
+
+
+def get_logger(name=None):
+    """
+    获取DFD日志记录器
+
+    Args:
+        name: 子模块名称，如 'tile_parser'；None返回根记录器
+
+    Returns:
+        logging.Logger
+    """
+    _ensure_default_handler()
+    return logging.getLogger(LOGGER_NAME if not name else f"{LOGGER_NAME}.{name}")
+
+
+def setup_logging(level='INFO', jsonl_path=None, console=True):
+    """
+    配置DFD日志输出
+
+    Args:
+        level: 控制台日志级别（'DEBUG' / 'INFO' / 'WARNING' / 'ERROR'）
+        jsonl_path: JSON Lines日志文件路径，None表示不写文件（文件中记录所有DEBUG及以上级别）
+        console: 是否输出到控制台
+
+    Returns:
+        logging.Logger: 根记录器
+    """
+    root = logging.getLogger(LOGGER_NAME)
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+        handler.close()
+    root.propagate = False
+
+    level = logging.getLevelName(level.upper()) if isinstance(level, str) else level
+    root.setLevel(logging.DEBUG if jsonl_path else level)
+
+    if console:
+        console_handler = ConsoleHandler()
+        console_handler.setLevel(level)
+        console_handler.setFormatter(logging.Formatter('%(message)s'))
+        root.addHandler(console_handler)
+
+    if jsonl_path:
+        jsonl_path = Path(jsonl_path)
+        jsonl_path.parent.mkdir(parents=True, exist_ok=True)
+        file_handler = logging.FileHandler(jsonl_path, mode='a', encoding='utf-8')
+        file_handler.setLevel(logging.DEBUG)
+        file_handler.setFormatter(JsonLinesFormatter())
+        root.addHandler(file_handler)
+
+    if not root.handlers:
+        root.addHandler(logging.NullHandler())
+    return root
+
+
+def log_summary(logger, level, title, items, limit=DEFAULT_SUMMARY_LIMIT, item_prefix="     • ", detail_hint=None):
+    """
+    以一条日志输出批量诊断信息：数量 + 前N个示例
+
+    Args:
+        logger: 日志记录器
+        level: 日志级别
+        title: 标题，会自动追加数量，如 "仅在Excel中存在的模块" -> "仅在Excel中存在的模块 (12个):"
+        items: 诊断条目（任意可迭代对象）
+        limit: 最多展示的示例数量
+        item_prefix: 每个示例的行前缀
+        detail_hint: 完整列表所在位置的提示（如报告文件名）
+    """
+    if not logger.isEnabledFor(level):
+        return
+    items = list(items)
+    examples = items[:limit]
+    lines = [f"{title} ({len(items)}个):"]
+    lines.extend(f"{item_prefix}{item}" for item in examples)
+    if len(items) > limit:
+        more = f"{item_prefix.replace('• ', '')}... 还有 {len(items) - limit} 个"
+        if detail_hint:
+            more += f"，完整列表见 {detail_hint}"
+        lines.append(more)
+    logger.log(level, "\n".join(lines), extra={'data': {
+        'title': title,
+        'count': len(items),
+        'examples': [str(item) for item in examples],
+    }})
@@ -1,32 +1,115 @@
 """
 DFD核心处理模块
 包含所有主要的数据处理功能
+
+openpyxl / matplotlib / numpy 只在用到它们的阶段内导入（Excel整合、可视化），
+只做芯片块展开或查询的命令不需要加载这些库。
 """
 
 import json
 import re
 import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from pathlib import Path
-from datetime import datetime
-from tile_parser import TileParser
-from chip_parser import parse_chip_file
-from excel_reader import read_excel_column_f, read_excel_client_tile_mapping
-from json_excel_integrator import integrate_json_excel_data
+from chip_parser import parse_chip_file, parse_chip_tree
+from report_builder import AnalysisReportBuilder
+from sqlite_export import export_sqlite, DEFAULT_DB_NAME
+from render_cache import RenderCache, render_key, RENDER_CACHE_DIR, DEFAULT_MAX_ENTRIES
+from symbol_table import SymbolTable
+from dfd_logger import get_logger
+
+logger = get_logger('dfd_processor')
 
 
 class DFDProcessor:
     """DFD数据处理核心类"""
     
-    def __init__(self, expand_dict):
+    # 输入文件 -> 依赖它的缓存属性，见invalidate()
+    INPUT_CACHES = {
+        'chip': ('blocks', 'block_tree'),
+        'mapping': ('excel_mapping', 'highlight_client_list', 'tile_client_mapping'),
+        'mid': ('parser', 'floorplan_check'),
+    }
+
+    def __init__(self, expand_dict, input_dir=None, output_dir=None, show_plot=True, plot_dpi=1200,
+                 client_display='auto', render_strips=0, render_cache_entries=DEFAULT_MAX_ENTRIES,
+                 min_tile_pixels=None, render_memory_budget=None, base_layer_cache=False):
         """
         初始化处理器
         
         Args:
             expand_dict: 变量展开规则字典
+            input_dir: 输入文件目录，默认为项目下的 input/
+            output_dir: 输出文件目录，默认为项目下的 output/
+            show_plot: 绘图完成后是否弹出预览窗口（显示2秒）
+            plot_dpi: tiles_high_res.png 的分辨率；'auto' 时按布局范围和最小tile尺寸选择figsize与DPI（见resolution_planner）
+            client_display: client的显示方式 'markers' / 'tile' / 'grid' / 'auto'（client很多时自动改用tile热力图）
+            render_strips: 大于1时 tiles_high_res.png 按水平条带多进程渲染并流式拼接，0为单次渲染
+            render_cache_entries: output/.render_cache 中最多保留的渲染结果数；输入与绘图参数不变时直接复用，0为不缓存
+            min_tile_pixels: plot_dpi='auto' 时最小tile短边的目标像素数，默认见resolution_planner
+            render_memory_budget: plot_dpi='auto' 时单张图像RGBA画布的字节上限，超出时另输出区域图像
+            base_layer_cache: 为True时tile多边形底图按目标DPI光栅化缓存在 output/.render_cache/base/，
+                只有highlight/client变化时只重绘标记图层（每个栅格为 宽x高x4 字节，1200 DPI时约400MB，默认关闭）
         """
         self.expand_dict = expand_dict
         self.unmatched_analysis = None
-        self.output_dir = Path(os.path.dirname(__file__)) / '..' / 'output'
+        base_dir = Path(os.path.dirname(os.path.abspath(__file__))) / '..'
+        self.input_dir = (Path(input_dir) if input_dir else base_dir / 'input').resolve()
+        self.output_dir = (Path(output_dir) if output_dir else base_dir / 'output').resolve()
+        self.show_plot = show_plot
+        self.skipped_tiles = []
+        self.report_builder = None
+        self.floorplan_check = None  # 最近一次可视化中的布局重叠/空隙检查结果
+        self.plot_dpi = plot_dpi
+        self.client_display = client_display
+        self.render_strips = render_strips
+        self.render_cache_entries = render_cache_entries
+        self.min_tile_pixels = min_tile_pixels
+        self.render_memory_budget = render_memory_budget
+        self.base_layer_cache = base_layer_cache
+
+        # 已解析的输入，处理器常驻（如watch模式）时跨多次运行复用；输入文件变化后调用invalidate()
+        self.blocks = None  # CHIP.txt解析结果
+        self.block_tree = None  # CHIP.txt的层次块树，见get_block_tree()
+        self._block_tree_rules = None  # 建树时expand_dict的快照
+        self.excel_mapping = None  # Mapping.xlsx的A/B/C/F列（整合用；未预先读取时整合阶段流式连接，不保留）
+        self.highlight_client_list = None  # Mapping.xlsx的F列
+        self.tile_client_mapping = None  # Mapping.xlsx的client-tile双向索引（ClientTileIndex）
+        self.parser = None  # 已解析MID.csv的TileParser
+        self.chip_data = None  # 最近一次展开并整合后的芯片块数据（导出SQLite用）
+
+        # 各数据源共享的名称符号表：模块/实例/DbgBlkId/tile名称只登记一次（共享字符串对象），
+        # 跨数据源的连接（JSON-Excel整合、client-tile索引、highlight与几何）使用整数ID
+        self.symbols = SymbolTable()
+
+    def invalidate(self, *inputs):
+        """
+        丢弃依赖指定输入文件的缓存
+
+        Args:
+            inputs: 'chip'、'mapping'、'mid' 中的任意几个；不传时丢弃全部缓存
+        """
+        for name in inputs or self.INPUT_CACHES:
+            for attribute in self.INPUT_CACHES[name]:
+                setattr(self, attribute, None)
+        self._rebuild_symbols()
+
+    def _rebuild_symbols(self):
+        """
+        重建符号表，只登记仍缓存的输入中的名称：常驻进程（watch模式）中改名前的模块/tile/DbgBlkId不再保留。
+        仍缓存的Mapping视图和解析器改用新表（ClientTileIndex按新ID重建，几何的ID->行号表在下次连接时重建）
+        """
+        self.symbols = symbols = SymbolTable()
+        if self.excel_mapping is not None:
+            self.excel_mapping = [{field: symbols.canonical(value) for field, value in entry.items()}
+                                  for entry in self.excel_mapping]
+        if self.highlight_client_list is not None:
+            self.highlight_client_list = [symbols.canonical(value) for value in self.highlight_client_list]
+        if self.tile_client_mapping is not None:
+            self.tile_client_mapping = self.tile_client_mapping.with_symbols(symbols)
+        if self.parser is not None:
+            self.parser.symbols = symbols
         
     def expand_instance_name(self, name):
         """展开实例名称中的变量"""
@@ -41,24 +124,130 @@ class DFDProcessor:
         expanded = [pattern.sub(str(v), name) for v in values]
         return expanded
 
-    def process_chip_blocks(self):
-        """处理芯片块解析和JSON生成"""
-        print("🔧 开始处理芯片块解析...")
+    def get_block_tree(self):
+        """
+        返回CHIP.txt的层次块树（首次调用时解析并缓存；expand_dict变化后自动重建）
+
+        用法示例：processor.get_block_tree().dbg_blk_ids_under("CHIP_MID/ssb0")
+        """
+        # 与建树时展开规则的快照比较（副本，原地修改expand_dict也能发现；None与{}各自保持原样）
+        rules = None if self.expand_dict is None else {var: list(values) for var, values in self.expand_dict.items()}
+        if self.block_tree is None or self._block_tree_rules != rules:
+            self.block_tree = parse_chip_tree(str(self.input_dir / "CHIP.txt"), self.expand_dict)
+            self._block_tree_rules = rules
+            logger.info(f"🌳 块树已建立: {len(self.block_tree.nodes)} 个块，展开后 {len(self.block_tree)} 条层次路径")
+        return self.block_tree
+
+    def load_inputs(self):
+        """并发读取三个输入文件，结果写入缓存属性（已缓存的输入跳过）
+        
+        Mapping.xlsx 只读取一遍（read_mapping_views），同时得到整合用的映射记录、F列和client-tile映射。
+        这一遍是纯Python的openpyxl流式解析，多核时放到一个子进程中与 CHIP.txt、MID.csv 的解析线程并行，
+        结果只传回一次；单核时并行只会增加进程/线程开销，三个文件在当前线程中依次读取。
+        Excel中读取的名称回到主线程后再登记到符号表。文件不存在或读取失败时对应缓存保持为None，
+        由后续阶段按原有方式处理。
+        """
+        chip_file = self.input_dir / "CHIP.txt"
+        mapping_file = self.input_dir / "Mapping.xlsx"
+        mid_file = self.input_dir / "MID.csv"
+        
+        load_mapping = mapping_file.exists() and any(getattr(self, attribute) is None
+                                                     for attribute in self.INPUT_CACHES['mapping'])
+        load_chip = self.blocks is None and chip_file.exists()
+        load_mid = self.parser is None and mid_file.exists()
+        if not (load_mapping or load_chip or load_mid):
+            return
+        
+        from excel_reader import read_mapping_views
+        
+        tasks = {}
+        if load_mapping:
+            tasks['mapping'] = (read_mapping_views, str(mapping_file))
+        if load_chip:
+            tasks['blocks'] = (parse_chip_file, str(chip_file))
+        if load_mid:
+            tasks['parser'] = (self._load_mid, mid_file)
+        
+        start = time.perf_counter()
+        results = {}
+        if (os.cpu_count() or 1) == 1:
+            logger.info("📥 依次加载输入文件...")
+            for name, (reader, path) in tasks.items():
+                try:
+                    results[name] = reader(path, symbols=self.symbols) if name == 'mapping' else reader(path)
+                except Exception as e:
+                    logger.warning(f"⚠️ 加载 {name} 失败，将在对应阶段重试: {e}")
+        else:
+            logger.info("📥 并发加载输入文件...")
+            with ProcessPoolExecutor(max_workers=1) as excel_worker, ThreadPoolExecutor(max_workers=2) as threads:
+                futures = {name: (excel_worker if name == 'mapping' else threads).submit(reader, path)
+                           for name, (reader, path) in tasks.items()}
+                for name, future in futures.items():
+                    try:
+                        results[name] = future.result()
+                    except Exception as e:
+                        logger.warning(f"⚠️ 加载 {name} 失败，将在对应阶段重试: {e}")
+            
+            # 子进程中读取的字符串登记到符号表（MID线程已结束，此处不存在并发访问）
+            if 'mapping' in results:
+                canonical = self.symbols.canonical
+                views = results['mapping']
+                views['excel_mapping'] = [{field: canonical(value) for field, value in entry.items()}
+                                          for entry in views['excel_mapping']]
+                views['highlight_client_list'] = [canonical(value) for value in views['highlight_client_list']]
+                views['tile_client_mapping'] = views['tile_client_mapping'].with_symbols(self.symbols)
+        
+        loaded = list(results)
+        for attribute, value in results.pop('mapping', {}).items():
+            if getattr(self, attribute) is None:
+                setattr(self, attribute, value)
+        if 'parser' in results:
+            self.parser, self.floorplan_check = results['parser']
+        if 'blocks' in results:
+            self.blocks = results['blocks']
+        
+        logger.info(f"✅ 输入加载完成: {', '.join(loaded)}，耗时 {time.perf_counter() - start:.2f}s")
+
+    def _load_mapping_views(self):
+        """读取一遍Mapping.xlsx，补齐尚未缓存的映射记录、F列和client-tile映射"""
+        from excel_reader import read_mapping_views
+        logger.info("📊 读取Mapping.xlsx...")
+        views = read_mapping_views(str(self.input_dir / 'Mapping.xlsx'), symbols=self.symbols)
+        for attribute, value in views.items():
+            if getattr(self, attribute) is None:
+                setattr(self, attribute, value)
+
+    def _load_mid(self, mid_file):
+        """解析MID.csv并检查tile重叠与空隙"""
+        from tile_parser import TileParser
+        parser = TileParser(symbols=self.symbols).parse_from_csv(str(mid_file))
+        return parser, parser.check_floorplan()
+
+    def expand_chip_blocks(self):
+        """解析CHIP.txt并按expand_dict展开，生成原始chip_blocks.json
+        
+        Returns:
+            tuple: (原始块列表, 展开结果 {module::instance: {module, instance, pairs}}, 输出文件路径)
+        """
+        logger.info("🔧 开始处理芯片块解析...")
         
         # 确保输出目录存在
-        output_dir = Path(os.path.dirname(__file__)) / '..' / 'output'
+        output_dir = self.output_dir
         output_dir.mkdir(parents=True, exist_ok=True)
         
-        # 第一步：生成原始chip_blocks.json
-        blocks = parse_chip_file("CHIP.txt")
+        if self.blocks is None:
+            self.blocks = parse_chip_file(str(self.input_dir / "CHIP.txt"))
+        blocks = self.blocks
         result = {}
         for block in blocks:
             hier = block.get_hierarchical()
             if hier:
+                hier['module'] = self.symbols.canonical(hier['module'])
                 expanded_instances = self.expand_instance_name(hier['instance'])
                 for inst in expanded_instances:
                     new_hier = hier.copy()
-                    new_hier['instance'] = inst
+                    new_hier['instance'] = self.symbols.canonical(inst)
+                    new_hier['pairs'] = [pair.copy() for pair in hier['pairs']]  # 各实例独立，整合时原地填充tile_name
                     key = f"{hier['module']}::{inst}"
                     result[key] = new_hier
         
@@ -66,32 +255,65 @@ class DFDProcessor:
         with open(output_file, "w", encoding="utf-8") as f:
             json.dump(result, f, ensure_ascii=False, indent=2)
         
-        print(f"✅ 成功处理 {len(blocks)} 个块，生成 {len(result)} 个展开结果")
-        print(f"✅ 原始JSON已保存到: {output_file}")
+        logger.info(f"✅ 成功处理 {len(blocks)} 个块，生成 {len(result)} 个展开结果")
+        logger.info(f"✅ 原始JSON已保存到: {output_file}")
+        return blocks, result, output_file
+
+    def process_chip_blocks(self):
+        """处理芯片块解析和JSON生成"""
+        # 第一步：生成原始chip_blocks.json
+        blocks, result, output_file = self.expand_chip_blocks()
+        output_dir = self.output_dir
         
         # 第二步：如果Mapping.xlsx存在，则进行整合
-        input_dir = Path(os.path.dirname(__file__)) / '..' / 'input'
+        input_dir = self.input_dir
         mapping_file = input_dir / "Mapping.xlsx"
         
+        # 报告统计在整合的同一遍遍历中收集
+        self.report_builder = AnalysisReportBuilder()
+        
         if mapping_file.exists():
-            print("\n🔄 开始整合Excel数据...")
+            from json_excel_integrator import integrate_json_excel_data
+            
+            logger.info("\n🔄 开始整合Excel数据...")
             integrated_file = output_dir / "chip_blocks_integrated.json"
+            views = None
+            excel_mapping = self.excel_mapping
+            if excel_mapping is None:
+                # 未预先读取（如只运行整合阶段）时边读边连接，F列和client-tile映射在同一遍中收集，不保留映射记录
+                from excel_reader import iter_mapping_views
+                logger.info("📊 流式读取Excel mapping数据...")
+                views = {}
+                excel_mapping = iter_mapping_views(str(mapping_file), views, symbols=self.symbols)
             
             success, self.unmatched_analysis = integrate_json_excel_data(
                 json_file_path=str(output_file),
                 excel_file_path=str(mapping_file),
-                output_file_path=str(integrated_file)
+                output_file_path=str(integrated_file),
+                report_builder=self.report_builder,
+                json_data=result,
+                excel_mapping=excel_mapping,
+                symbols=self.symbols
             )
+            if success and views is not None:
+                for attribute, value in views.items():
+                    if getattr(self, attribute) is None:
+                        setattr(self, attribute, value)
             
             if success:
-                print(f"✅ 整合版本已保存到: {integrated_file}")
+                logger.info(f"✅ 整合版本已保存到: {integrated_file}")
                 if self.unmatched_analysis:
-                    print(f"📊 未匹配Excel模块数: {self.unmatched_analysis['unmatched_excel_modules_count']}")
+                    logger.info(f"📊 未匹配Excel模块数: {self.unmatched_analysis['unmatched_excel_modules_count']}")
             else:
-                print("⚠️ Excel整合失败，但原始JSON文件已成功生成")
+                logger.warning("⚠️ Excel整合失败，但原始JSON文件已成功生成")
         else:
-            print(f"\n💡 提示：如果需要tile_name整合，请将Mapping.xlsx放在 {input_dir} 目录下")
+            logger.info(f"\n💡 提示：如果需要tile_name整合，请将Mapping.xlsx放在 {input_dir} 目录下")
         
+        if self.report_builder.total_pairs == 0:
+            # 未进行整合（或整合失败），直接统计原始结果
+            self.report_builder.add_json_data(result)
+        
+        self.chip_data = result
         return len(blocks), len(result)
 
     def process_visualization(self, show_client_tile_names=0):
@@ -100,218 +322,226 @@ class DFDProcessor:
         Args:
             show_client_tile_names: 是否在有client的tile上显示tile名称 (0=不显示, 1=显示)
         """
-        print("\n🎨 开始处理Tile可视化...")
+        logger.info("\n🎨 开始处理Tile可视化...")
         
         # 如果开启了tile名称显示，输出提示信息
         if show_client_tile_names:
-            print("🏷️ 已启用client tile名称显示功能")
+            logger.info("🏷️ 已启用client tile名称显示功能")
         
         # 确保输出目录存在
-        output_dir = Path(os.path.dirname(__file__)) / '..' / 'output'
+        output_dir = self.output_dir
         output_dir.mkdir(parents=True, exist_ok=True)
         
+        from base_layer import BASE_LAYER_DIR
+        
         try:
-            # 读取Excel文件F列作为highlight_client输入
-            print("📊 读取Mapping.xlsx文件F列...")
-            highlight_client_list = read_excel_column_f('Mapping.xlsx')
-            print(f"✅ 成功读取到 {len(highlight_client_list)} 个client标记")
+            if self.highlight_client_list is None or self.tile_client_mapping is None:
+                # Excel文件F列作为highlight_client输入，并读取完整的client-tile映射关系
+                self._load_mapping_views()
+                logger.info(f"✅ 成功读取到 {len(self.highlight_client_list)} 个client标记")
+            highlight_client_list = self.highlight_client_list
+            tile_client_mapping = self.tile_client_mapping
             
-            # 读取完整的client-tile映射关系
-            print("📊 读取client-tile映射关系...")
-            tile_client_mapping = read_excel_client_tile_mapping('Mapping.xlsx')
-            
-            # 创建解析器
-            parser = TileParser()
-
-            # 解析数据
-            parser.parse_from_csv('MID.csv')
+            if self.parser is None:
+                # 解析MID.csv并检查tile重叠与空隙
+                self.parser, self.floorplan_check = self._load_mid(self.input_dir / 'MID.csv')
+            parser = self.parser
             
-            # 检查highlight_client_list中不存在的tile
-            available_tiles = set(parser.tiles_dict.keys())
+            # 检查highlight_client_list中不存在的tile（名称一次转为ID，按整数数组与几何连接）
+            available_tiles = parser.geometry.names
             highlight_client_set = set(highlight_client_list) if highlight_client_list else set()
-            missing_client_tiles = highlight_client_set - available_tiles
+            highlight_names = list(highlight_client_set)
+            highlight_rows = parser.geometry.rows(highlight_names, self.symbols)
+            missing_client_tiles = {name for name, row in zip(highlight_names, highlight_rows) if row < 0}
             
             if missing_client_tiles:
-                print(f"⚠️ 检测到 {len(missing_client_tiles)} 个未匹配的tile")
+                logger.warning(f"⚠️ 检测到 {len(missing_client_tiles)} 个未匹配的tile")
             else:
-                print("✅ 所有highlight_client中的tile都已成功匹配")
+                logger.info("✅ 所有highlight_client中的tile都已成功匹配")
 
-            # 绘图并保存高分辨率图像
+            # 绘图并保存高分辨率图像；tile几何与绘图参数都未变化时复用渲染缓存
             save_path = output_dir / "tiles_high_res.png"
-            print("🎨 开始绘制tile可视化图...")
-            parser.plot(
+            figsize = (12, 8)
+            resolution_options = {}
+            if self.plot_dpi == 'auto':
+                from resolution_planner import plan_figsize
+                figsize = plan_figsize(parser.geometry)
+                resolution_options = dict(min_tile_pixels=self.min_tile_pixels, memory_budget=self.render_memory_budget)
+            plot_options = dict(
                 title="Tile Visualization by Master & Orient",
-                save_path=str(save_path),
-                dpi=1200,
+                figsize=figsize,
+                dpi=self.plot_dpi,
                 highlight_dbg=['soc_df_rpt4_mid_t','soc_df_rpt12_mid_t','soc_df_rpt8_mid_t'],
                 highlight_client=highlight_client_list,
                 tile_client_mapping=tile_client_mapping,  # 传递映射关系
                 show_client_tile_names=show_client_tile_names,  # 传递开关参数
+                client_display=self.client_display,
                 #highlight_or_gate='pciess_xgmi4_1x8_pcs_ss0_mid_t5'
+                **resolution_options,
             )
-            print(f"✅ 图像可视化完成")
+            render_cache = cache_key = None
+            if self.render_cache_entries:
+                render_cache = RenderCache(output_dir / RENDER_CACHE_DIR, self.render_cache_entries)
+                cache_key = render_key(parser.geometry, **plot_options)
+
+            cached = render_cache.fetch(cache_key, save_path) if render_cache is not None else None
+            if cached is not None:
+                logger.info(f"♻️ 输入与绘图参数未变化，复用渲染缓存: {save_path}")
+                geometry = parser.geometry
+                parser.skipped_tiles = [name for name, valid in zip(geometry.names, geometry.valid) if not valid]
+                parser.resolution_plan = cached.get('resolution_plan')  # 区域图像按缓存时的规划检查/重写
+            else:
+                logger.info("🎨 开始绘制tile可视化图...")
+                previous_mtime = save_path.stat().st_mtime_ns if save_path.exists() else None
+                # 开启底图缓存时，只有highlight/client变化的运行从 .render_cache/base 中复用tile多边形底图栅格
+                base_cache_dir = output_dir / RENDER_CACHE_DIR / BASE_LAYER_DIR if self.base_layer_cache else None
+                parser.plot(
+                    save_path=str(save_path),
+                    strips=self.render_strips,
+                    show=self.show_plot,
+                    base_cache_dir=base_cache_dir,
+                    **plot_options,
+                )
+                # 没有可绘制的tile时plot()不保存图像，不能把上一次的旧图缓存到新的键下
+                if render_cache is not None and save_path.exists() and save_path.stat().st_mtime_ns != previous_mtime:
+                    meta = {'resolution_plan': parser.resolution_plan} if self.plot_dpi == 'auto' else None
+                    render_cache.store(cache_key, save_path, meta=meta)
+            # 单张图像达不到目标分辨率时，按目标分辨率另外输出区域图像；复用渲染缓存时只在区域图像缺失或过期时重写
+            if self.plot_dpi == 'auto' and parser.resolution_plan and parser.resolution_plan['mode'] == 'regions':
+                from resolution_planner import region_images_current, write_region_images
+                if cache_key is None or not region_images_current(output_dir, cache_key):
+                    write_region_images(parser, parser.resolution_plan, output_dir,
+                                        tile_client_mapping, highlight_client_list, key=cache_key)
+            self.skipped_tiles = list(parser.skipped_tiles)
+            logger.info(f"✅ 图像可视化完成")
             
             # 返回分析数据用于报告生成
             return True, missing_client_tiles, len(available_tiles), len(highlight_client_set)
             
         except FileNotFoundError as e:
-            print(f"⚠️ 可视化文件错误: {e}")
+            logger.warning(f"⚠️ 可视化文件错误: {e}")
             return False, set(), 0, 0
         except Exception as e:
-            print(f"⚠️ 可视化处理错误: {e}")
+            logger.warning(f"⚠️ 可视化处理错误: {e}")
             return False, set(), 0, 0
 
-    def analyze_unmatched_json_entries(self):
-        """分析JSON中未匹配的条目（空tile_name）"""
-        print("\n🔍 分析JSON中未匹配的条目...")
+    def load_report_builder(self):
+        """从输出目录中的JSON文件重建报告统计（未在本进程中运行整合时使用）"""
+        logger.info("\n🔍 分析JSON中未匹配的条目...")
         
         json_file_path = Path(self.output_dir) / "chip_blocks_integrated.json"
         if not json_file_path.exists():
             json_file_path = Path(self.output_dir) / "chip_blocks.json"
         
-        unmatched_json_entries = []
-        total_pairs = 0
-        filled_pairs = 0
-        
         with open(json_file_path, 'r', encoding='utf-8') as f:
             json_data = json.load(f)
         
-        for json_key, json_entry in json_data.items():
-            module = json_entry.get('module', '')
-            instance = json_entry.get('instance', '')
-            
-            if 'pairs' in json_entry:
-                for pair in json_entry['pairs']:
-                    total_pairs += 1
-                    tile_name = pair.get('tile_name', '').strip()
-                    dbg_blk_id = pair.get('DbgBlkId', '').strip()
-                    
-                    if tile_name:
-                        filled_pairs += 1
-                    else:
-                        # 记录未匹配的条目
-                        unmatched_json_entries.append({
-                            'module': module,
-                            'instance': instance,
-                            'dbg_blk_id': dbg_blk_id,
-                            'json_key': json_key
-                        })
-        
-        return {
-            'unmatched_entries': unmatched_json_entries,
-            'total_pairs': total_pairs,
-            'filled_pairs': filled_pairs,
-            'unmatched_count': len(unmatched_json_entries)
-        }
+        return AnalysisReportBuilder().add_json_data(json_data)
 
     def generate_analysis_report(self, missing_client_tiles=None, available_tiles_count=0, highlight_client_count=0):
-        """生成数据分析报告"""
-        output_dir = Path(os.path.dirname(__file__)) / '..' / 'output'
+        """生成数据分析报告（文本版 + JSON版）"""
+        if self.report_builder is None:
+            self.report_builder = self.load_report_builder()
         
-        # 分析JSON未匹配条目
-        json_unmatch_analysis = self.analyze_unmatched_json_entries()
+        self.report_builder.set_tile_analysis(
+            missing_client_tiles=missing_client_tiles,
+            available_tiles_count=available_tiles_count,
+            highlight_client_count=highlight_client_count,
+            skipped_tiles=self.skipped_tiles,
+            client_tile_index=self.tile_client_mapping
+        )
+        if self.floorplan_check is not None:
+            self.report_builder.set_floorplan_check(self.floorplan_check)
+        combined_report_file, json_report_file = self.report_builder.write_reports(self.output_dir)
         
-        # 创建合并报告
-        combined_report_file = output_dir / "data_analysis_report.txt"
+        logger.info(f"📄 合并分析报告已保存到: {combined_report_file}")
+        logger.info(f"📄 JSON版分析报告已保存到: {json_report_file}")
+        return self.report_builder.warning_messages()
+
+    def rebuild_analysis_report(self):
+        """
+        只根据输出目录中已有的结果重新生成报告（cli.py report）：JSON配对统计从整合后的JSON重新计算，
+        Tile匹配分析、布局检查和疑似匹配从上一次完整运行写出的 data_analysis_report.json 恢复
+        """
+        self.report_builder = self.load_report_builder()
+        previous_report = self.output_dir / "data_analysis_report.json"
+        if previous_report.exists():
+            with open(previous_report, 'r', encoding='utf-8') as f:
+                self.report_builder.restore_analysis(json.load(f))
+        else:
+            logger.warning(f"⚠️ 未找到 {previous_report}，报告中不包含Tile匹配分析、布局检查和疑似匹配")
+        combined_report_file, json_report_file = self.report_builder.write_reports(self.output_dir)
+
+        logger.info(f"📄 合并分析报告已保存到: {combined_report_file}")
+        logger.info(f"📄 JSON版分析报告已保存到: {json_report_file}")
+        return self.report_builder.warning_messages()
+
+    def export_sqlite(self, db_path=None):
+        """把已解析/整合的数据导出到带索引的SQLite数据库（直接使用内存中的结果，不重新解析）
         
-        warning_messages = []
+        Args:
+            db_path: 数据库路径，默认为 output/dfd.sqlite
+        """
+        db_path = Path(db_path) if db_path else self.output_dir / DEFAULT_DB_NAME
+        logger.info("\n🗄️ 开始导出SQLite数据库...")
+        excel_mapping = self.excel_mapping
+        mapping_file = self.input_dir / "Mapping.xlsx"
+        if excel_mapping is None and mapping_file.exists():
+            # 整合阶段流式连接后不保留映射记录，导出时再流式读取一遍
+            from excel_reader import iter_mapping_views
+            excel_mapping = iter_mapping_views(str(mapping_file), {}, symbols=self.symbols)
+        return export_sqlite(
+            db_path,
+            chip_data=self.chip_data,
+            excel_mapping=excel_mapping,
+            parser=self.parser,
+            tile_client_mapping=self.tile_client_mapping
+        )
+
+    def export_geometry(self, formats=('geojson', 'binary')):
+        """把tile几何及其client导出为 output/tiles.geojson 和/或 output/tiles.geom（尚未解析时先读取MID.csv）
         
-        with open(combined_report_file, 'w', encoding='utf-8') as f:
-            f.write("DFD数据分析报告\n")
-            f.write("=" * 60 + "\n")
-            f.write(f"生成时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n")
-            
-            # 第一部分：JSON未填充条目分析
-            f.write("第一部分：JSON中未填充tile_name的条目分析\n")
-            f.write("-" * 50 + "\n")
-            
-            f.write(f"JSON数据统计：\n")
-            f.write(f"• 总配对数 (pairs): {json_unmatch_analysis['total_pairs']}\n")
-            f.write(f"• 已填充tile_name数: {json_unmatch_analysis['filled_pairs']}\n")
-            f.write(f"• 未填充tile_name数: {json_unmatch_analysis['unmatched_count']}\n")
-            if json_unmatch_analysis['total_pairs'] > 0:
-                fill_rate = (json_unmatch_analysis['filled_pairs'] / json_unmatch_analysis['total_pairs']) * 100
-                f.write(f"• 填充成功率: {fill_rate:.1f}%\n\n")
-            
-            # 添加警告信息
-            if json_unmatch_analysis['unmatched_count'] > 0:
-                warning_messages.append(f"⚠️ JSON未填充条目: {json_unmatch_analysis['unmatched_count']}个")
-            
-            # 详细列出未匹配的条目
-            if json_unmatch_analysis['unmatched_entries']:
-                f.write(f"未填充tile_name的详细条目 (前50个):\n")
-                f.write("-" * 30 + "\n")
-                
-                # 按模块分组显示
-                entries_by_module = {}
-                for entry in json_unmatch_analysis['unmatched_entries']:
-                    module = entry['module']
-                    if module not in entries_by_module:
-                        entries_by_module[module] = []
-                    entries_by_module[module].append(entry)
-                
-                count = 0
-                for module, entries in entries_by_module.items():
-                    if count >= 50:
-                        break
-                    f.write(f"\n模块: {module}\n")
-                    for entry in entries[:10]:  # 每个模块最多显示10个
-                        if count >= 50:
-                            break
-                        f.write(f"  • 实例: {entry['instance']}, DbgBlkId: {entry['dbg_blk_id']}\n")
-                        count += 1
-                    if len(entries) > 10:
-                        f.write(f"  ... 该模块还有 {len(entries) - 10} 个未匹配条目\n")
-                
-                if json_unmatch_analysis['unmatched_count'] > 50:
-                    f.write(f"\n... 总计还有 {json_unmatch_analysis['unmatched_count'] - 50} 个未显示的未匹配条目\n")
-            
-            # 第二部分：Tile绘图匹配分析
-            f.write("\n第二部分：Tile绘图数据匹配分析\n")
-            f.write("-" * 40 + "\n")
-            
-            if missing_client_tiles is not None:
-                f.write(f"总计：{len(missing_client_tiles)} 个highlight_client中的tile在绘图数据中不存在\n\n")
-                
-                if missing_client_tiles:
-                    f.write("详细列表：\n")
-                    for i, missing_tile in enumerate(sorted(missing_client_tiles), 1):
-                        f.write(f"{i:3d}. {missing_tile}\n")
-                        
-                    # 添加警告信息
-                    warning_messages.append(f"⚠️ 未匹配Tile数量: {len(missing_client_tiles)}个")
-                
-                f.write(f"\n可用tile总数：{available_tiles_count}\n")
-                f.write(f"请求highlight数量：{highlight_client_count}\n")
-                matched_count = highlight_client_count - len(missing_client_tiles)
-                f.write(f"匹配成功数量：{matched_count}\n")
-                if highlight_client_count > 0:
-                    f.write(f"匹配成功率：{(matched_count / highlight_client_count * 100):.1f}%\n")
+        Args:
+            formats: 'geojson' / 'binary' 的组合
+        
+        Returns:
+            list: 写出的文件路径
+        """
+        from geometry_export import DEFAULT_GEOJSON_NAME, DEFAULT_BINARY_NAME
+        
+        logger.info("\n🗺️ 开始导出tile几何...")
+        if self.parser is None:
+            self.parser, self.floorplan_check = self._load_mid(self.input_dir / 'MID.csv')
+        if self.tile_client_mapping is None:
+            mapping_file = self.input_dir / 'Mapping.xlsx'
+            if mapping_file.exists():
+                self._load_mapping_views()
             else:
-                f.write("未找到Tile匹配分析数据\n")
-                
-            # 第三部分：总结和建议
-            f.write("\n第三部分：总结和建议\n")
-            f.write("-" * 40 + "\n")
-            f.write("建议处理步骤：\n")
-            f.write("1. 检查Excel文件(Mapping.xlsx)中的模块命名是否与JSON数据一致\n")
-            f.write("2. 检查Excel文件中的instance名称是否与JSON数据匹配\n")
-            f.write("3. 检查Excel文件中的DbgBlkId是否与JSON数据中的DbgBlkId匹配\n")
-            f.write("4. 验证Excel文件F列的Tile名称在MID.csv文件中是否存在\n")
-            f.write("5. 确保数据源之间的同步性\n")
-            f.write("6. 考虑更新数据映射规则以提高匹配率\n")
-            f.write("7. 检查测试数据是否已正确清理\n")
-        
-        print(f"📄 合并分析报告已保存到: {combined_report_file}")
-        return warning_messages
+                logger.warning(f"⚠️ 未找到 {mapping_file}，导出的几何不包含client")
+        
+        written = []
+        if 'geojson' in formats:
+            path = self.output_dir / DEFAULT_GEOJSON_NAME
+            self.parser.export_geojson(path, self.tile_client_mapping)
+            written.append(path)
+        if 'binary' in formats:
+            path = self.output_dir / DEFAULT_BINARY_NAME
+            self.parser.export_geometry(path, self.tile_client_mapping)
+            written.append(path)
+        return written
 
-    def run_complete_analysis(self, show_client_tile_names=0):
+    def run_complete_analysis(self, show_client_tile_names=0, export_sqlite=False, export_geometry=False):
         """运行完整的DFD分析流程
         
         Args:
             show_client_tile_names: 是否在有client的tile上显示tile名称 (0=不显示, 1=显示)
+            export_sqlite: 是否在分析结束后导出 output/dfd.sqlite
+            export_geometry: 是否在分析结束后导出 output/tiles.geojson 和 output/tiles.geom
         """
         try:
+            # 并发读取CHIP.txt / Mapping.xlsx / MID.csv，后续阶段直接使用缓存
+            self.load_inputs()
+            
             # 处理芯片块解析和JSON生成
             blocks_count, result_count = self.process_chip_blocks()
             
@@ -325,6 +555,11 @@ class DFDProcessor:
                 highlight_client_count=highlight_client_count
             )
             
+            if export_sqlite:
+                self.export_sqlite()
+            if export_geometry:
+                self.export_geometry()
+            
             return {
                 'success': True,
                 'blocks_count': blocks_count,
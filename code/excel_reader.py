@@ -5,134 +5,163 @@ Excel文件读取工具
 用于读取Mapping.xlsx文件中的数据
 """
 
-import pandas as pd
-import os
-from pathlib import Path
+import logging
+from dfd_logger import get_logger, log_summary
+from excel_stream import iter_mapping_chunks, is_mapping_entry, resolve_excel_paths
+from client_tile_index import ClientTileIndex
 
-def read_excel_column_f(excel_file_path):
+logger = get_logger('excel_reader')
+
+def read_excel_column_f(excel_file_path, symbols=None, sheets=None):
     """
     读取Excel文件F列的内容（跳过表头）
     
     Args:
-        excel_file_path: Excel文件路径
+        excel_file_path: Excel文件路径，或多个路径的列表
+        symbols: 可选的SymbolTable，读入的tile名称在其中登记并共享同一字符串对象
+        sheets: 读取的工作表，见excel_stream.iter_mapping_chunks()，默认为第一个工作表
         
     Returns:
         list: F列中有内容的值列表
     """
-    # 转换为绝对路径
-    if not os.path.isabs(excel_file_path):
-        excel_file_path = os.path.join(os.path.dirname(__file__), '..', 'input', excel_file_path)
-    
-    excel_file_path = os.path.abspath(excel_file_path)
-    
-    if not os.path.exists(excel_file_path):
-        raise FileNotFoundError(f"Excel文件不存在: {excel_file_path}")
+    excel_file_path = resolve_excel_paths(excel_file_path)
     
     try:
-        # 读取Excel文件，指定F列（索引为5）
-        # 使用usecols=[5]只读取F列，skiprows=1跳过表头
-        df = pd.read_excel(excel_file_path, usecols=[5], skiprows=1, header=None)
-        
-        # 获取F列数据（列索引为5，但由于只读取了一列，所以是索引0）
-        f_column = df.iloc[:, 0]
-        
-        # 过滤掉空值（NaN, None, 空字符串）
+        # 逐块流式读取，只保留F列中有内容的值
         valid_values = []
-        for value in f_column:
-            if pd.notna(value) and str(value).strip():  # 不是NaN且不是空字符串
-                valid_values.append(str(value).strip())
+        for chunk in iter_mapping_chunks(excel_file_path, sheets=sheets):
+            for record in chunk:
+                value = record['tile_name']
+                if value:
+                    valid_values.append(symbols.canonical(value) if symbols is not None else value)
         
-        print(f"✅ 从Excel文件读取到 {len(valid_values)} 个有效的F列值")
+        logger.info(f"✅ 从Excel文件读取到 {len(valid_values)} 个有效的F列值")
         return valid_values
         
     except Exception as e:
-        print(f"❌ 读取Excel文件时出错: {e}")
+        logger.error(f"❌ 读取Excel文件时出错: {e}")
         return []
 
-def read_excel_client_tile_mapping(excel_file_path):
+def read_excel_client_tile_mapping(excel_file_path, symbols=None, sheets=None):
     """
     读取Excel文件，返回client到tile_name的映射关系
     
     Args:
-        excel_file_path: Excel文件路径
+        excel_file_path: Excel文件路径，或多个路径的列表
+        symbols: 可选的SymbolTable，tile名称和client标识在其中登记，索引以它们的ID为键
+        sheets: 读取的工作表，见excel_stream.iter_mapping_chunks()，默认为第一个工作表
         
     Returns:
-        dict: {tile_name: [client1, client2, ...]} 映射关系
+        ClientTileIndex: tile -> clients 映射（Mapping接口），同时可按client、模块反查tile
     """
-    # 转换为绝对路径
-    if not os.path.isabs(excel_file_path):
-        excel_file_path = os.path.join(os.path.dirname(__file__), '..', 'input', excel_file_path)
-    
-    excel_file_path = os.path.abspath(excel_file_path)
-    
-    if not os.path.exists(excel_file_path):
-        raise FileNotFoundError(f"Excel文件不存在: {excel_file_path}")
+    excel_file_path = resolve_excel_paths(excel_file_path)
     
     try:
-        # 读取A列(BIA module)、B列(BIA instance)和F列(tile name)
-        df = pd.read_excel(excel_file_path, usecols=[0, 1, 5], skiprows=1, header=None)
-        
-        # 重命名列
-        df.columns = ['module', 'instance', 'tile_name']
+        # 一遍建立tile、client、模块三个方向的索引（A列module、B列instance、C列DbgBlkId、F列tile name）
+        client_tile_index = ClientTileIndex(symbols=symbols)
+        for chunk in iter_mapping_chunks(excel_file_path, sheets=sheets):
+            for record in chunk:
+                _add_client_record(client_tile_index, record)
         
-        # 过滤掉空值
-        df = df.dropna()
+        _log_client_tile_index(client_tile_index)
+        return client_tile_index
         
-        # 读取更多列来更好地区分client
-        df_full = pd.read_excel(excel_file_path, usecols=[0, 1, 2, 3, 4, 5], skiprows=1, header=None)
-        df_full.columns = ['module', 'instance', 'dbg_blk_id', 'flatten_module', 'flatten_instance', 'tile_name']
-        df_full = df_full.dropna(subset=['tile_name'])
-        
-        # 创建tile_name到client的映射
-        tile_clients = {}
-        for _, row in df_full.iterrows():
-            module = str(row['module']).strip()
-            instance = str(row['instance']).strip() 
-            dbg_blk_id = str(row['dbg_blk_id']).strip()
-            flatten_module = str(row['flatten_module']).strip()
-            tile_name = str(row['tile_name']).strip()
-            
-            if tile_name and module and instance and dbg_blk_id != 'nan':
-                # 使用DbgBlkId作为更精确的client标识
-                client_id = f"{module}::{instance}::{dbg_blk_id}"
-                
-                if tile_name not in tile_clients:
-                    tile_clients[tile_name] = []
-                
-                if client_id not in tile_clients[tile_name]:
-                    tile_clients[tile_name].append(client_id)
-        
-        # 统计信息
-        multi_client_tiles = {k: v for k, v in tile_clients.items() if len(v) > 1}
-        
-        print(f"✅ 读取到 {len(tile_clients)} 个tile的映射关系")
-        if multi_client_tiles:
-            print(f"📊 其中 {len(multi_client_tiles)} 个tile有多个client:")
-            for tile, clients in list(multi_client_tiles.items())[:5]:  # 只显示前5个
-                print(f"  {tile}: {len(clients)} 个client")
-            if len(multi_client_tiles) > 5:
-                print(f"  ... 还有 {len(multi_client_tiles) - 5} 个")
-        
-        return tile_clients
+    except Exception as e:
+        logger.error(f"❌ 读取Excel映射关系时出错: {e}")
+        return ClientTileIndex(symbols=symbols)
+
+def read_mapping_views(excel_file_path, symbols=None, sheets=None):
+    """
+    只读取一遍Excel文件，同时得到整合用的映射记录、F列和client-tile映射
+    （等价于read_excel_mapping_data()、read_excel_column_f()、read_excel_client_tile_mapping()三者的结果）
+    
+    Args:
+        excel_file_path: Excel文件路径，或多个路径的列表
+        symbols: 可选的SymbolTable，读入的名称在其中登记并共享同一字符串对象
+        sheets: 读取的工作表，见excel_stream.iter_mapping_chunks()，默认为第一个工作表
         
+    Returns:
+        dict: {'excel_mapping': 映射记录列表, 'highlight_client_list': F列值列表,
+               'tile_client_mapping': ClientTileIndex}
+    
+    Raises:
+        FileNotFoundError: Excel文件不存在
+    """
+    excel_file_path = resolve_excel_paths(excel_file_path)
+    
+    views = {}
+    try:
+        views['excel_mapping'] = list(iter_mapping_views(excel_file_path, views, symbols=symbols, sheets=sheets))
     except Exception as e:
-        print(f"❌ 读取Excel映射关系时出错: {e}")
-        return {}
+        logger.error(f"❌ 读取Excel文件时出错: {e}")
+        views = {'excel_mapping': [], 'highlight_client_list': [], 'tile_client_mapping': ClientTileIndex(symbols=symbols)}
+    
+    logger.info(f"✅ 从Excel文件读取到 {len(views['excel_mapping'])} 条有效的mapping数据、"
+                f"{len(views['highlight_client_list'])} 个有效的F列值")
+    _log_client_tile_index(views['tile_client_mapping'])
+    return views
+
+def iter_mapping_views(excel_file_path, views, symbols=None, sheets=None):
+    """
+    流式读取Excel文件，逐条产出整合用的映射记录（同read_excel_mapping_data()的元素），
+    同时把F列和client-tile映射收集到views中：边读边连接的调用方一遍得到三种视图，不保留整个工作簿
+    
+    Args:
+        excel_file_path: Excel文件路径，或多个路径的列表
+        views: dict，读取过程中填充 'highlight_client_list'（list）和 'tile_client_mapping'（ClientTileIndex），
+            读完之后才完整
+        symbols: 可选的SymbolTable，读入的名称在其中登记并共享同一字符串对象
+        sheets: 读取的工作表，见excel_stream.iter_mapping_chunks()，默认为第一个工作表
+        
+    Yields:
+        dict: module、instance、dbg_blk_id均不为空的映射记录
+    """
+    canonical = symbols.canonical if symbols is not None else (lambda value: value)
+    valid_values = views.setdefault('highlight_client_list', [])
+    client_tile_index = views.setdefault('tile_client_mapping', ClientTileIndex(symbols=symbols))
+    for chunk in iter_mapping_chunks(excel_file_path, sheets=sheets):
+        for record in chunk:
+            if record['tile_name']:
+                valid_values.append(canonical(record['tile_name']))
+            _add_client_record(client_tile_index, record)
+            if is_mapping_entry(record):
+                yield {field: canonical(value) for field, value in record.items()}
+
+def _add_client_record(client_tile_index, record):
+    """把一条映射记录加入client-tile索引（tile、module、instance、DbgBlkId任一为空的行跳过）"""
+    tile_name = record['tile_name']
+    module = record['module']
+    if not (tile_name and module and record['instance'] and record['dbg_blk_id']):
+        return
+    
+    # 使用DbgBlkId作为更精确的client标识（索引带符号表时按ID登记）
+    client_id = f"{module}::{record['instance']}::{record['dbg_blk_id']}"
+    client_tile_index.add(tile_name, client_id, module)
+
+def _log_client_tile_index(client_tile_index):
+    """输出client-tile映射的统计信息"""
+    multi_client_tiles = client_tile_index.multi_client_tiles()
+    
+    logger.info(f"✅ 读取到 {len(client_tile_index)} 个tile的映射关系")
+    if multi_client_tiles:
+        log_summary(logger, logging.INFO, "📊 有多个client的tile",
+                    (f"{tile}: {count} 个client" for tile, count in multi_client_tiles.items()),
+                    item_prefix="  ")
 
 def test_excel_reader():
     """测试Excel读取功能"""
     try:
         # 测试F列读取
         values = read_excel_column_f("Mapping.xlsx")
-        print(f"F列读取测试 - 读取到 {len(values)} 个值")
+        logger.info(f"F列读取测试 - 读取到 {len(values)} 个值")
         
         # 测试完整映射读取
         mapping = read_excel_client_tile_mapping("Mapping.xlsx")
-        print(f"映射关系读取测试 - 读取到 {len(mapping)} 个tile映射")
+        logger.info(f"映射关系读取测试 - 读取到 {len(mapping)} 个tile映射")
         
         return values, mapping
     except Exception as e:
-        print(f"测试失败: {e}")
+        logger.error(f"测试失败: {e}")
         return [], {}
 
 if __name__ == "__main__":
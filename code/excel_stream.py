@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Mapping.xlsx 流式读取
+用openpyxl的只读模式逐行读取工作表（read_only=True + iter_rows(values_only=True)），
+不构建DataFrame，内存占用与行数无关。每行规范化为一条映射记录：
+    {'module': A列, 'instance': B列, 'dbg_blk_id': C列, 'tile_name': F列}
+所有值都是去掉首尾空白的字符串，空单元格为 ""。与原来的读取方式一致，每个工作表的第一行视为表头跳过。
+
+单元格转换与原来的 pd.read_excel 保持一致：pandas默认当作缺失值的文本（"NA"、"N/A"、"NaN"、"NULL"、
+"None" 等，见 NA_VALUES）同样读为 ""。与pandas不同之处（pandas按整列推断类型，逐行读取时无法复现）：
+    - 含空单元格的数值列中的整数按单元格显示读取，例如 1 读为 "1"，pandas会读为 "1.0"
+    - client-tile映射跳过模块或实例为空的行，pandas读取时会生成 "mod::nan::5.0" 这样的client标识
+
+支持一次读取多个工作簿和多个工作表（按给定顺序依次输出），记录按块（chunk）产出，
+调用方可以边读边处理，例如整合阶段在读取的同时完成连接。
+"""
+
+import os
+
+from dfd_logger import get_logger
+
+logger = get_logger('excel_stream')
+
+DEFAULT_CHUNK_SIZE = 10000
+ALL_SHEETS = '*'
+
+# 映射记录字段 -> 列序号（A=0）
+MAPPING_COLUMNS = {
+    'module': 0,
+    'instance': 1,
+    'dbg_blk_id': 2,
+    'tile_name': 5,
+}
+_READ_COLUMNS = max(MAPPING_COLUMNS.values()) + 1
+
+
+def resolve_excel_paths(sources):
+    """
+    把一个或多个Excel路径解析为绝对路径（相对路径按 input/ 目录解析）
+
+    Raises:
+        FileNotFoundError: 任一文件不存在
+    """
+    if isinstance(sources, (str, os.PathLike)):
+        sources = [sources]
+    paths = []
+    for excel_file_path in sources:
+        excel_file_path = str(excel_file_path)
+        if not os.path.isabs(excel_file_path):
+            excel_file_path = os.path.join(os.path.dirname(__file__), '..', 'input', excel_file_path)
+        excel_file_path = os.path.abspath(excel_file_path)
+        if not os.path.exists(excel_file_path):
+            raise FileNotFoundError(f"Excel文件不存在: {excel_file_path}")
+        paths.append(excel_file_path)
+    return paths
+
+
+# pandas.read_excel 默认的缺失值文本
+NA_VALUES = frozenset({
+    '', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan', '1.#IND', '1.#QNAN',
+    '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None', 'n/a', 'nan', 'null',
+})
+
+
+def _cell_text(value):
+    if value is None or isinstance(value, str) and value in NA_VALUES:
+        return ""
+    return str(value).strip()
+
+
+def _selected_sheets(workbook, sheets):
+    if sheets is None:
+        return [workbook.worksheets[0]]
+    if sheets == ALL_SHEETS:
+        return list(workbook.worksheets)
+    if isinstance(sheets, str):
+        sheets = [sheets]
+    return [workbook[name] for name in sheets]
+
+
+def iter_mapping_chunks(sources, sheets=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    按块流式读取映射记录
+
+    Args:
+        sources: Excel文件路径，或多个路径的列表（按顺序读取）
+        sheets: None表示每个工作簿的第一个工作表；工作表名称或名称列表；ALL_SHEETS表示全部工作表
+        chunk_size: 每块的记录数
+
+    Yields:
+        list: 映射记录字典的列表（最多chunk_size条）；整行为空的行不输出
+    """
+    from openpyxl import load_workbook
+
+    chunk = []
+    for path in resolve_excel_paths(sources):
+        workbook = load_workbook(path, read_only=True, data_only=True)
+        try:
+            for worksheet in _selected_sheets(workbook, sheets):
+                for row in worksheet.iter_rows(min_row=2, max_col=_READ_COLUMNS, values_only=True):
+                    if len(row) < _READ_COLUMNS:
+                        row = tuple(row) + (None,) * (_READ_COLUMNS - len(row))
+                    record = {field: _cell_text(row[column]) for field, column in MAPPING_COLUMNS.items()}
+                    if not any(record.values()):
+                        continue
+                    chunk.append(record)
+                    if len(chunk) >= chunk_size:
+                        yield chunk
+                        chunk = []
+        finally:
+            workbook.close()
+    if chunk:
+        yield chunk
+
+
+def iter_mapping_records(sources, sheets=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """逐条产出映射记录，参数同iter_mapping_chunks()"""
+    for chunk in iter_mapping_chunks(sources, sheets=sheets, chunk_size=chunk_size):
+        yield from chunk
+
+
+def is_mapping_entry(record):
+    """整合使用的行：模块、实例、DbgBlkId均不为空"""
+    return bool(record['module'] and record['instance'] and record['dbg_blk_id'])
@@ -1,5 +1,8 @@
 import json
 import re
+from dfd_logger import get_logger
+
+logger = get_logger('expand_chip_blocks')
 
 def expand_instance_name(name, expand_dict):
     # 匹配 {...} 结构
@@ -54,5 +57,5 @@ def expand_chip_blocks(input_json, output_json, expand_dict):
     with open(output_json, 'w', encoding='utf-8') as f:
         json.dump(expanded_data, f, ensure_ascii=False, indent=2)
     
-    print(f"✅ 展开完成: {len(data)} -> {len(expanded_data)} 个块")
-    print(f"✅ 结果已保存到: {output_json}")
+    logger.info(f"✅ 展开完成: {len(data)} -> {len(expanded_data)} 个块")
+    logger.info(f"✅ 结果已保存到: {output_json}")
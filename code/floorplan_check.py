@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tile布局校验引擎
+    - 重叠检查：把tile分解为矩形，按网格分桶只比较同一网格单元内的矩形，找出所有内部相交的tile对
+    - 空隙检查：沿y方向扫描线，逐条带合并已覆盖的x区间，找出die轮廓内未被任何tile覆盖的矩形，
+      再用并查集把共享边的空隙矩形合并为连通的空隙区域（L形空隙算一处）
+相邻tile共享边界不算重叠。非直角（非曼哈顿）多边形以包围盒近似，并在结果中列出。
+"""
+
+import time
+
+import numpy as np
+
+
+def _decompose_rectilinear(points):
+    """
+    将直角多边形按y条带分解为矩形
+
+    Returns:
+        list: [(x0, y0, x1, y1), ...]；多边形含斜边时返回None
+    """
+    nxt = np.roll(points, -1, axis=0)
+    dx = nxt[:, 0] - points[:, 0]
+    dy = nxt[:, 1] - points[:, 1]
+    if np.any((dx != 0) & (dy != 0)):
+        return None
+
+    vertical = dx == 0
+    edge_x = points[vertical, 0]
+    edge_y0 = np.minimum(points[vertical, 1], nxt[vertical, 1])
+    edge_y1 = np.maximum(points[vertical, 1], nxt[vertical, 1])
+
+    rects = []
+    ys = np.unique(points[:, 1])
+    for y0, y1 in zip(ys[:-1], ys[1:]):
+        mid = (y0 + y1) / 2
+        crossing = np.sort(edge_x[(edge_y0 < mid) & (edge_y1 > mid)])
+        for x0, x1 in zip(crossing[0::2], crossing[1::2]):
+            if x1 > x0:
+                rects.append((x0, y0, x1, y1))
+    return rects
+
+
+def tile_rectangles(geometry):
+    """
+    将所有可绘制的tile分解为矩形
+
+    Returns:
+        tuple: (rects (m, 4) 数组, owner (m,) 所属tile下标, 以包围盒近似的tile下标列表)
+    """
+    drawable = np.nonzero(geometry.valid)[0]
+    bboxes = geometry.bboxes[drawable]
+    bbox_areas = (bboxes[:, 2] - bboxes[:, 0]) * (bboxes[:, 3] - bboxes[:, 1])
+    # 面积等于包围盒面积的多边形本身就是矩形（绝大多数tile），无需逐个分解
+    is_box = np.abs(geometry.areas[drawable] - bbox_areas) <= 1e-9 * np.maximum(bbox_areas, 1.0)
+
+    rect_list = [bboxes[is_box]]
+    owner_list = [drawable[is_box]]
+    approximated = []
+    for i in drawable[~is_box]:
+        rects = _decompose_rectilinear(geometry.polygons([i])[0])
+        if rects is None:
+            approximated.append(int(i))
+            rects = [tuple(geometry.bboxes[i])]
+        rect_list.append(np.asarray(rects, dtype=float).reshape(-1, 4))
+        owner_list.append(np.full(len(rects), i))
+
+    return np.vstack(rect_list), np.concatenate(owner_list).astype(np.int64), approximated
+
+
+def find_overlaps(rects, owner, tolerance=1e-9):
+    """
+    网格分桶找出所有内部相交的矩形对（属于不同tile）
+
+    Returns:
+        list: [(tile_a, tile_b, overlap_area), ...]，tile_a < tile_b
+    """
+    m = len(rects)
+    if m < 2:
+        return []
+
+    widths = rects[:, 2] - rects[:, 0]
+    heights = rects[:, 3] - rects[:, 1]
+    cell = max(float(np.median(np.maximum(widths, heights))), 1e-9)
+    origin = rects[:, :2].min(axis=0)
+
+    # 缩进容差后再分桶，只接触边界的矩形不会落入同一单元
+    cx0 = np.floor((rects[:, 0] + tolerance - origin[0]) / cell).astype(np.int64)
+    cy0 = np.floor((rects[:, 1] + tolerance - origin[1]) / cell).astype(np.int64)
+    cx1 = np.floor((rects[:, 2] - tolerance - origin[0]) / cell).astype(np.int64)
+    cy1 = np.floor((rects[:, 3] - tolerance - origin[1]) / cell).astype(np.int64)
+    cx1 = np.maximum(cx1, cx0)
+    cy1 = np.maximum(cy1, cy0)
+
+    # 展开每个矩形覆盖的全部单元
+    span_x = cx1 - cx0 + 1
+    span_y = cy1 - cy0 + 1
+    cells_per_rect = span_x * span_y
+    rect_id = np.repeat(np.arange(m), cells_per_rect)
+    local = np.arange(len(rect_id)) - np.repeat(np.cumsum(cells_per_rect) - cells_per_rect, cells_per_rect)
+    cell_x = cx0[rect_id] + local % span_x[rect_id]
+    cell_y = cy0[rect_id] + local // span_x[rect_id]
+    cell_key = (cell_y - cell_y.min()) * (int(cell_x.max() - cell_x.min()) + 1) + (cell_x - cell_x.min())
+
+    order = np.argsort(cell_key, kind='stable')
+    sorted_keys = cell_key[order]
+    sorted_rects = rect_id[order]
+    # 同一单元内两两配对：每个元素与同组中排在它之后的所有元素组成一对
+    boundaries = np.flatnonzero(np.diff(sorted_keys)) + 1
+    group_end = np.repeat(np.concatenate([boundaries, [len(sorted_keys)]]),
+                          np.diff(np.concatenate([[0], boundaries, [len(sorted_keys)]])))
+    later = group_end - np.arange(len(sorted_keys)) - 1
+    total = int(later.sum())
+    if total == 0:
+        return []
+    first = np.repeat(np.arange(len(sorted_keys)), later)
+    second = first + 1 + np.arange(total) - np.repeat(np.cumsum(later) - later, later)
+    a = sorted_rects[first]
+    b = sorted_rects[second]
+    lo, hi = np.minimum(a, b), np.maximum(a, b)
+    unique_pairs = np.unique(lo * m + hi)
+    a, b = unique_pairs // m, unique_pairs % m
+
+    overlap_w = np.minimum(rects[a, 2], rects[b, 2]) - np.maximum(rects[a, 0], rects[b, 0])
+    overlap_h = np.minimum(rects[a, 3], rects[b, 3]) - np.maximum(rects[a, 1], rects[b, 1])
+    hit = (overlap_w > tolerance) & (overlap_h > tolerance) & (owner[a] != owner[b])
+
+    totals = {}
+    for ta, tb, area in zip(owner[a[hit]].tolist(), owner[b[hit]].tolist(), (overlap_w * overlap_h)[hit].tolist()):
+        key = (ta, tb) if ta < tb else (tb, ta)
+        totals[key] = totals.get(key, 0.0) + area
+    return [(ta, tb, area) for (ta, tb), area in sorted(totals.items())]
+
+
+def find_gaps(rects, outline, tolerance=1e-9):
+    """
+    y方向扫描线，找出轮廓内未被覆盖的区域
+
+    Args:
+        rects: (m, 4) 矩形数组
+        outline: die轮廓包围盒 (xmin, ymin, xmax, ymax)
+
+    Returns:
+        list: [(x0, y0, x1, y1), ...] 空隙矩形（纵向相邻且x区间相同的条带已合并）
+    """
+    ox0, oy0, ox1, oy1 = outline
+    ys = np.unique(np.clip(np.concatenate([rects[:, 1], rects[:, 3], [oy0, oy1]]), oy0, oy1))
+
+    by_start = np.argsort(rects[:, 1], kind='stable')
+    by_end = np.argsort(rects[:, 3], kind='stable')
+    start_ptr = end_ptr = 0
+    active = set()
+
+    gaps = []
+    open_gaps = {}  # {(x0, x1): 起始y}，上一条带中仍在延续的空隙
+    for y0, y1 in zip(ys[:-1], ys[1:]):
+        while start_ptr < len(by_start) and rects[by_start[start_ptr], 1] <= y0:
+            active.add(int(by_start[start_ptr]))
+            start_ptr += 1
+        while end_ptr < len(by_end) and rects[by_end[end_ptr], 3] <= y0:
+            active.discard(int(by_end[end_ptr]))
+            end_ptr += 1
+
+        slab_gaps = []
+        if active:
+            ids = np.fromiter(active, dtype=np.int64, count=len(active))
+            x0 = np.clip(rects[ids, 0], ox0, ox1)
+            x1 = np.clip(rects[ids, 2], ox0, ox1)
+            order = np.argsort(x0)
+            x0, x1 = x0[order], x1[order]
+            covered_to = np.maximum.accumulate(x1)
+            # 第k个区间的起点超过之前所有区间的最远终点 -> 中间是空隙
+            previous_end = np.concatenate([[ox0], covered_to[:-1]])
+            gap_mask = x0 - previous_end > tolerance
+            slab_gaps.extend(zip(previous_end[gap_mask].tolist(), x0[gap_mask].tolist()))
+            if ox1 - covered_to[-1] > tolerance:
+                slab_gaps.append((float(covered_to[-1]), ox1))
+        elif y1 - y0 > tolerance:
+            slab_gaps.append((ox0, ox1))
+
+        current = {}
+        for key in slab_gaps:
+            current[key] = open_gaps.pop(key, float(y0))
+        for (gx0, gx1), gy0 in open_gaps.items():
+            gaps.append((gx0, gy0, gx1, float(y0)))
+        open_gaps = current
+
+    last_y = float(ys[-1]) if len(ys) else oy1
+    for (gx0, gx1), gy0 in open_gaps.items():
+        gaps.append((gx0, gy0, gx1, last_y))
+    return [g for g in gaps if g[2] - g[0] > tolerance and g[3] - g[1] > tolerance]
+
+
+def _find(parent, i):
+    while parent[i] != i:
+        parent[i] = parent[parent[i]]
+        i = parent[i]
+    return i
+
+
+def gap_regions(gaps, tolerance=1e-9):
+    """
+    把共享一段边（长度大于容差）的空隙矩形合并为连通区域（并查集）；只有角点相接的矩形不连通
+
+    扫描线得到的空隙矩形只会在条带边界上纵向相接（同一条带内的空隙之间隔着已覆盖区间），
+    因此只需在每个y坐标上比较在此结束和从此开始的矩形的x区间
+
+    Args:
+        gaps: find_gaps()的结果
+
+    Returns:
+        list: [{'bbox': [x0, y0, x1, y1], 'area', 'rectangles'}, ...]，按包围盒左下角排序
+    """
+    parent = list(range(len(gaps)))
+    ending, starting = {}, {}
+    for i, (x0, y0, x1, y1) in enumerate(gaps):
+        ending.setdefault(y1, []).append(i)
+        starting.setdefault(y0, []).append(i)
+
+    for y, lower in ending.items():
+        upper = starting.get(y)
+        if not upper:
+            continue
+        lower = sorted(lower, key=lambda i: gaps[i][0])
+        upper = sorted(upper, key=lambda i: gaps[i][0])
+        a = b = 0
+        while a < len(lower) and b < len(upper):
+            below, above = gaps[lower[a]], gaps[upper[b]]
+            if min(below[2], above[2]) - max(below[0], above[0]) > tolerance:
+                root_a, root_b = _find(parent, lower[a]), _find(parent, upper[b])
+                if root_a != root_b:
+                    parent[root_b] = root_a
+            # 终点较小的区间不会再与另一侧之后的区间相交
+            if below[2] <= above[2]:
+                a += 1
+            else:
+                b += 1
+
+    regions = {}
+    for i, (x0, y0, x1, y1) in enumerate(gaps):
+        region = regions.setdefault(_find(parent, i), {'bbox': [x0, y0, x1, y1], 'area': 0.0, 'rectangles': 0})
+        bbox = region['bbox']
+        bbox[:] = [min(bbox[0], x0), min(bbox[1], y0), max(bbox[2], x1), max(bbox[3], y1)]
+        region['area'] += (x1 - x0) * (y1 - y0)
+        region['rectangles'] += 1
+    return sorted(regions.values(), key=lambda region: (region['bbox'][1], region['bbox'][0]))
+
+
+def check_floorplan(geometry, outline=None, tolerance=1e-9):
+    """
+    检查tile布局中的重叠与空隙
+
+    Args:
+        geometry: TileGeometry
+        outline: die轮廓包围盒 (xmin, ymin, xmax, ymax)，默认取所有tile的总包围盒
+        tolerance: 坐标容差
+
+    Returns:
+        dict: 检查结果
+    """
+    start = time.perf_counter()
+    if outline is None:
+        outline = geometry.extent()
+    outline = tuple(float(v) for v in outline)
+
+    rects, owner, approximated = tile_rectangles(geometry)
+    overlaps = find_overlaps(rects, owner, tolerance) if len(rects) else []
+    gaps = [tuple(float(v) for v in g) for g in find_gaps(rects, outline, tolerance)] if len(rects) else []
+    regions = gap_regions(gaps, tolerance)
+
+    outline_area = (outline[2] - outline[0]) * (outline[3] - outline[1])
+    gap_area = sum((g[2] - g[0]) * (g[3] - g[1]) for g in gaps)
+    names = geometry.names
+    return {
+        'tiles_checked': int(geometry.valid.sum()),
+        'rectangles': int(len(rects)),
+        'outline': list(outline),
+        'overlap_count': len(overlaps),
+        'overlap_area': float(sum(area for _, _, area in overlaps)),
+        'overlaps': [{'tile_a': names[a], 'tile_b': names[b], 'area': area} for a, b, area in overlaps],
+        'gap_count': len(regions),  # 连通的空隙区域数
+        'gap_rectangles': len(gaps),
+        'gap_area': float(gap_area),
+        'coverage': float((1 - gap_area / outline_area) * 100) if outline_area > 0 else None,
+        'gap_regions': regions,
+        'gaps': [list(g) for g in gaps],
+        'approximated_tiles': [names[i] for i in approximated],
+        'seconds': time.perf_counter() - start,
+    }
@@ -0,0 +1,427 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Floorplan / Mapping 版本对比
+加载两个版本的MID.csv（以及可选的Mapping.xlsx），用逐tile的哈希键分类变化：
+    - added / removed：只在新 / 旧版本中存在的tile
+    - moved：形状不变、位置变化
+    - reshaped：形状变化
+    - retyped：形状和位置都不变，master或orient变化
+    - 重新映射的client：client所在的tile集合发生变化
+再在缓存的底图（新版本完整布局的栅格图）上只绘制发生变化的tile，生成变化叠加图。
+
+用法（在 code/ 目录下）：
+    python floorplan_diff.py --old-csv MID_v1.csv --new-csv MID_v2.csv \\
+        --old-mapping Mapping_v1.xlsx --new-mapping Mapping_v2.xlsx
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+from pathlib import Path
+
+import matplotlib.pyplot as plt
+import numpy as np
+from matplotlib.collections import LineCollection, PolyCollection
+from matplotlib.lines import Line2D
+from matplotlib.patches import Patch
+
+from dfd_logger import get_logger, log_summary
+from client_tile_index import ClientTileIndex
+from region_render import RegionRenderer
+
+logger = get_logger('floorplan_diff')
+
+COORD_PRECISION = 1e-6  # 坐标量化精度，小于该值的差异视为相同
+BASE_LAYER_ALPHA = 0.35  # 底图淡化程度，突出变化的tile
+MAX_LISTED_CHANGES = 100  # 文本报告中每类最多列出的条目数
+
+CHANGE_STYLES = {
+    'added': {'color': '#2ca02c', 'label': '新增tile', 'legend': 'Added'},
+    'removed': {'color': '#d62728', 'label': '删除tile', 'legend': 'Removed'},
+    'moved': {'color': '#1f77b4', 'label': '移动tile', 'legend': 'Moved'},
+    'reshaped': {'color': '#ff7f0e', 'label': '形状变化tile', 'legend': 'Reshaped'},
+    'retyped': {'color': '#bcbd22', 'label': 'master/orient变化tile', 'legend': 'Master/Orient changed'},
+}
+CLIENT_CHANGE_COLOR = '#9467bd'
+
+_HASH_WEIGHT_SEED = 20251031
+
+
+def _hash_weights(size):
+    """固定种子的奇数随机权重，使哈希在不同进程/版本间稳定"""
+    rng = np.random.default_rng(_HASH_WEIGHT_SEED)
+    return rng.integers(0, 2 ** 62, size=(2, max(size, 1)), dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+
+
+def _canonical_ranks(geometry, quantized):
+    """
+    每个顶点在规范化环中的序号：环统一为逆时针方向，并从相对坐标字典序最小的顶点开始，
+    使同一多边形换一个起点或反向列出顶点时得到相同的序号
+    """
+    segment, counts = geometry.segment, geometry.counts
+    rank = np.arange(len(geometry.coords)) - geometry.offsets[segment]
+
+    # 有向面积（相对坐标）为负的环是顺时针，反向后序号为 n-1-rank
+    relative = geometry.coords - geometry.bboxes[segment, :2]
+    nxt = geometry._next_vertex()
+    cross = relative[:, 0] * relative[nxt, 1] - relative[nxt, 0] * relative[:, 1]
+    clockwise = np.bincount(segment, weights=cross, minlength=len(geometry)) < 0
+    reversed_rank = np.where(clockwise[segment], counts[segment] - 1 - rank, rank)
+
+    # 每个tile字典序最小的顶点（相同时取反向后序号最小的一个）作为起点
+    order = np.lexsort((reversed_rank, quantized[:, 1], quantized[:, 0], segment))
+    has_vertices = counts > 0
+    start = np.zeros(len(geometry), dtype=np.int64)
+    start[has_vertices] = reversed_rank[order[geometry.offsets[:-1][has_vertices]]]
+    return (reversed_rank - start[segment]) % counts[segment]
+
+
+def tile_keys(geometry, precision=COORD_PRECISION):
+    """
+    为每个tile计算与平移无关的形状哈希，以及位置键
+
+    形状哈希：顶点相对包围盒左下角的量化坐标，按顶点在规范化环中的序号加权后在uint64上求和（溢出回绕），
+    与顶点列出的起点和方向无关（见_canonical_ranks）；整个计算对所有tile一次完成。
+
+    Returns:
+        tuple: (shape_keys (n,) uint64, positions (n, 2) int64 量化后的包围盒左下角)
+    """
+    n = len(geometry)
+    shape_keys = np.zeros(n, dtype=np.uint64)
+    positions = np.round(geometry.bboxes[:, :2] / precision).astype(np.int64)
+    if not len(geometry.coords):
+        return shape_keys, positions
+
+    relative = geometry.coords - geometry.bboxes[geometry.segment, :2]
+    quantized = np.round(relative / precision).astype(np.int64)
+    rank = _canonical_ranks(geometry, quantized)
+    quantized = quantized.view(np.uint64)
+    weights = _hash_weights(int(geometry.counts.max()))
+    terms = quantized[:, 0] * weights[0][rank] + quantized[:, 1] * weights[1][rank]
+
+    has_vertices = geometry.counts > 0
+    shape_keys[has_vertices] = np.add.reduceat(terms, geometry.offsets[:-1][has_vertices])
+    shape_keys ^= geometry.counts.astype(np.uint64) * np.uint64(0x9E3779B97F4A7C15)
+    return shape_keys, positions
+
+
+def geometry_fingerprint(geometry):
+    """整个布局的内容指纹，用作底图缓存键"""
+    shape_keys, positions = tile_keys(geometry)
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update("\n".join(geometry.names).encode('utf-8'))
+    digest.update("\n".join(geometry.masters).encode('utf-8'))
+    digest.update(shape_keys.tobytes())
+    digest.update(positions.tobytes())
+    return digest.hexdigest()
+
+
+def diff_geometry(old_geometry, new_geometry, precision=COORD_PRECISION):
+    """
+    对比两个版本的tile几何
+
+    Returns:
+        dict: {'added', 'removed', 'moved', 'reshaped', 'retyped'}，moved为
+              [{'tile', 'dx', 'dy'}, ...]，其余为tile名称列表
+    """
+    old_shape, old_pos = tile_keys(old_geometry, precision)
+    new_shape, new_pos = tile_keys(new_geometry, precision)
+
+    common = [name for name in new_geometry.names if name in old_geometry.index]
+    old_idx = np.fromiter((old_geometry.index[name] for name in common), dtype=np.int64, count=len(common))
+    new_idx = np.fromiter((new_geometry.index[name] for name in common), dtype=np.int64, count=len(common))
+
+    same_shape = old_shape[old_idx] == new_shape[new_idx]
+    same_position = np.all(old_pos[old_idx] == new_pos[new_idx], axis=1)
+    same_attributes = np.array([old_geometry.masters[o] == new_geometry.masters[m] and
+                                old_geometry.orients[o] == new_geometry.orients[m]
+                                for o, m in zip(old_idx, new_idx)], dtype=bool).reshape(-1)
+
+    moved = np.nonzero(same_shape & ~same_position)[0]
+    delta = new_geometry.bboxes[new_idx[moved], :2] - old_geometry.bboxes[old_idx[moved], :2]
+
+    return {
+        'added': [name for name in new_geometry.names if name not in old_geometry.index],
+        'removed': [name for name in old_geometry.names if name not in new_geometry.index],
+        'moved': [{'tile': common[i], 'dx': float(dx), 'dy': float(dy)} for i, (dx, dy) in zip(moved, delta)],
+        'reshaped': [common[i] for i in np.nonzero(~same_shape)[0]],
+        'retyped': [common[i] for i in np.nonzero(same_shape & same_position & ~same_attributes)[0]],
+    }
+
+
+def _client_tiles(tile_client_mapping):
+    """{client: set(tile, ...)}，由ClientTileIndex的反向索引直接得到"""
+    index = ClientTileIndex.from_mapping(tile_client_mapping)
+    return {client: set(index.tiles_of_client(client)) for client in index.client_ids()}
+
+
+def diff_client_mappings(old_mapping, new_mapping):
+    """
+    对比两个版本的client-tile映射
+
+    Returns:
+        dict: {'added_clients', 'removed_clients', 'remapped_clients', 'changed_tiles'}
+    """
+    old_clients = _client_tiles(old_mapping or {})
+    new_clients = _client_tiles(new_mapping or {})
+
+    remapped = []
+    for client, new_tiles in new_clients.items():
+        old_tiles = old_clients.get(client)
+        if old_tiles is not None and old_tiles != new_tiles:
+            remapped.append({'client': client, 'old_tiles': sorted(old_tiles), 'new_tiles': sorted(new_tiles)})
+
+    # client列表发生变化的tile（顺序无关）
+    old_mapping = old_mapping or {}
+    new_mapping = new_mapping or {}
+    changed_tiles = sorted(tile for tile in set(old_mapping) | set(new_mapping)
+                           if set(old_mapping.get(tile, ())) != set(new_mapping.get(tile, ())))
+
+    return {
+        'added_clients': sorted(set(new_clients) - set(old_clients)),
+        'removed_clients': sorted(set(old_clients) - set(new_clients)),
+        'remapped_clients': remapped,
+        'changed_tiles': changed_tiles,
+    }
+
+
+def diff_floorplans(old_parser, new_parser, old_mapping=None, new_mapping=None):
+    """
+    对比两个版本的布局与client映射
+
+    Args:
+        old_parser, new_parser: 已解析的TileParser
+        old_mapping, new_mapping: {tile_name: [client, ...]}，可选
+
+    Returns:
+        dict: 变化结果，含'summary'计数
+    """
+    diff = diff_geometry(old_parser.geometry, new_parser.geometry)
+    diff['clients'] = diff_client_mappings(old_mapping, new_mapping)
+    diff['summary'] = {
+        'old_tiles': len(old_parser.geometry),
+        'new_tiles': len(new_parser.geometry),
+        **{category: len(diff[category]) for category in CHANGE_STYLES},
+        'remapped_clients': len(diff['clients']['remapped_clients']),
+        'added_clients': len(diff['clients']['added_clients']),
+        'removed_clients': len(diff['clients']['removed_clients']),
+        'client_changed_tiles': len(diff['clients']['changed_tiles']),
+    }
+    return diff
+
+
+def _union_extent(*geometries):
+    extents = np.array([geometry.extent() for geometry in geometries if len(geometry.coords)])
+    if not len(extents):
+        return (0.0, 0.0, 1.0, 1.0)
+    return (float(extents[:, 0].min()), float(extents[:, 1].min()), float(extents[:, 2].max()), float(extents[:, 3].max()))
+
+
+def load_base_layer(parser, extent, width, cache_dir):
+    """
+    返回布局的底图栅格，按布局指纹、区域和像素尺寸缓存为PNG
+
+    Args:
+        parser: 底图使用的TileParser
+        extent: 渲染区域 (xmin, ymin, xmax, ymax)
+        width: 底图像素宽度，高度按区域纵横比计算
+        cache_dir: 缓存目录
+
+    Returns:
+        np.ndarray: RGBA图像
+    """
+    xmin, ymin, xmax, ymax = extent
+    height = max(1, int(round(width * (ymax - ymin) / max(xmax - xmin, 1e-9))))
+    key = hashlib.blake2b(f"{geometry_fingerprint(parser.geometry)}|{extent}|{width}x{height}".encode('utf-8'),
+                          digest_size=16).hexdigest()
+
+    cache_dir = Path(cache_dir)
+    cache_file = cache_dir / f"base_{key}.png"
+    if cache_file.exists():
+        logger.info(f"♻️ 使用缓存底图: {cache_file.name}")
+    else:
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        png = RegionRenderer(parser).render_png(xmin, ymin, xmax, ymax, width=width, height=height, draw_clients=False)
+        cache_file.write_bytes(png)
+        logger.info(f"🧱 底图已渲染并缓存: {cache_file.name} ({width}x{height})")
+    return plt.imread(str(cache_file))
+
+
+def render_diff_overlay(old_parser, new_parser, diff, save_path, cache_dir, figsize=(12, 8), dpi=300,
+                        title="Floorplan Diff"):
+    """
+    在缓存底图上只绘制发生变化的tile
+
+    删除的tile用旧版本几何绘制；移动和形状变化的tile同时绘制旧轮廓（虚线）和新多边形，
+    移动的tile另用箭头线连接新旧质心；client映射变化的tile用紫色叉号标出。
+    """
+    old_geometry, new_geometry = old_parser.geometry, new_parser.geometry
+    extent = _union_extent(old_geometry, new_geometry)
+    base = load_base_layer(new_parser, extent, int(figsize[0] * dpi), cache_dir)
+
+    fig, ax = plt.subplots(figsize=figsize)
+    xmin, ymin, xmax, ymax = extent
+    ax.imshow(base, extent=(xmin, xmax, ymin, ymax), origin='upper', alpha=BASE_LAYER_ALPHA,
+              interpolation='nearest', zorder=0)
+
+    def indices(geometry, names):
+        return [geometry.index[name] for name in names if geometry.counts[geometry.index[name]] >= 3]
+
+    moved_names = [item['tile'] for item in diff['moved']]
+    new_layers = {
+        'added': indices(new_geometry, diff['added']),
+        'moved': indices(new_geometry, moved_names),
+        'reshaped': indices(new_geometry, diff['reshaped']),
+        'retyped': indices(new_geometry, diff['retyped']),
+    }
+    for category, tile_indices in new_layers.items():
+        if tile_indices:
+            ax.add_collection(PolyCollection(new_geometry.polygons(tile_indices), closed=True,
+                                             facecolors=CHANGE_STYLES[category]['color'], edgecolors='black',
+                                             linewidths=0.3, alpha=0.8, zorder=2))
+
+    removed = indices(old_geometry, diff['removed'])
+    if removed:
+        ax.add_collection(PolyCollection(old_geometry.polygons(removed), closed=True,
+                                         facecolors=CHANGE_STYLES['removed']['color'], edgecolors='black',
+                                         linewidths=0.3, alpha=0.6, hatch='//', zorder=2))
+
+    previous = indices(old_geometry, moved_names + diff['reshaped'])
+    if previous:
+        ax.add_collection(PolyCollection(old_geometry.polygons(previous), closed=True, facecolors='none',
+                                         edgecolors='dimgray', linewidths=0.5, linestyles='--', zorder=3))
+
+    moved_pairs = [(old_geometry.index[name], new_geometry.index[name]) for name in moved_names]
+    if moved_pairs:
+        segments = np.stack([old_geometry.centroids[[o for o, _ in moved_pairs]],
+                             new_geometry.centroids[[m for _, m in moved_pairs]]], axis=1)
+        ax.add_collection(LineCollection(segments, colors=CHANGE_STYLES['moved']['color'], linewidths=0.6, zorder=4))
+
+    client_anchors = [new_geometry.interior_points([new_geometry.index[tile]])[0][0] if tile in new_geometry.index
+                      else old_geometry.interior_points([old_geometry.index[tile]])[0][0]
+                      for tile in diff['clients']['changed_tiles']
+                      if tile in new_geometry.index or tile in old_geometry.index]
+    if client_anchors:
+        client_anchors = np.asarray(client_anchors)
+        ax.plot(client_anchors[:, 0], client_anchors[:, 1], 'x', color=CLIENT_CHANGE_COLOR, markersize=4,
+                markeredgewidth=0.8, zorder=5)
+
+    legend_handles = [Patch(facecolor=style['color'], edgecolor='black', label=f"{style['legend']} ({len(diff[category])})")
+                      for category, style in CHANGE_STYLES.items()]
+    legend_handles.append(Line2D([], [], marker='x', linestyle='None', color=CLIENT_CHANGE_COLOR,
+                                 label=f"Client mapping changed ({len(diff['clients']['changed_tiles'])})"))
+
+    ax.set_xlim(xmin - 1, xmax + 1)
+    ax.set_ylim(ymin - 1, ymax + 1)
+    ax.set_title(title, fontsize=14)
+    ax.set_aspect('equal')
+    ax.legend(handles=legend_handles, loc='upper left', bbox_to_anchor=(1, 1), fontsize=8)
+    plt.tight_layout()
+    plt.savefig(save_path, dpi=dpi, bbox_inches='tight')
+    plt.close(fig)
+    logger.info(f"💾 变化叠加图已保存至: {save_path}")
+    return save_path
+
+
+def write_diff_report(diff, output_dir, base_name="floorplan_diff"):
+    """
+    写出对比报告（文本版 + JSON版）
+
+    Returns:
+        tuple: (文本报告路径, JSON报告路径)
+    """
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    txt_file = output_dir / f"{base_name}.txt"
+    json_file = output_dir / f"{base_name}.json"
+
+    summary = diff['summary']
+    with open(txt_file, 'w', encoding='utf-8') as f:
+        f.write("Floorplan版本对比报告\n")
+        f.write("=" * 60 + "\n")
+        f.write(f"旧版本tile数: {summary['old_tiles']}，新版本tile数: {summary['new_tiles']}\n\n")
+
+        for category, style in CHANGE_STYLES.items():
+            items = diff[category]
+            f.write(f"{style['label']}: {len(items)}\n")
+            for i, item in enumerate(items[:MAX_LISTED_CHANGES], 1):
+                if category == 'moved':
+                    f.write(f"{i:3d}. {item['tile']} (dx={item['dx']:g}, dy={item['dy']:g})\n")
+                else:
+                    f.write(f"{i:3d}. {item}\n")
+            if len(items) > MAX_LISTED_CHANGES:
+                f.write(f"... 还有 {len(items) - MAX_LISTED_CHANGES} 个未显示\n")
+            f.write("\n")
+
+        clients = diff['clients']
+        f.write(f"新增client: {len(clients['added_clients'])}，删除client: {len(clients['removed_clients'])}\n")
+        f.write(f"重新映射的client: {len(clients['remapped_clients'])}\n")
+        for i, item in enumerate(clients['remapped_clients'][:MAX_LISTED_CHANGES], 1):
+            f.write(f"{i:3d}. {item['client']}: {', '.join(item['old_tiles'])} -> {', '.join(item['new_tiles'])}\n")
+        if len(clients['remapped_clients']) > MAX_LISTED_CHANGES:
+            f.write(f"... 还有 {len(clients['remapped_clients']) - MAX_LISTED_CHANGES} 个未显示\n")
+
+    with open(json_file, 'w', encoding='utf-8') as f:
+        json.dump(diff, f, ensure_ascii=False, indent=2)
+
+    return txt_file, json_file
+
+
+def _load_version(csv_file, mapping_file=None):
+    """解析一个版本的MID.csv和（可选的）Mapping.xlsx"""
+    from tile_parser import TileParser
+
+    parser = TileParser().parse_from_csv(csv_file)
+    mapping = None
+    if mapping_file:
+        from excel_reader import read_excel_client_tile_mapping
+        mapping = read_excel_client_tile_mapping(mapping_file)
+    return parser, mapping
+
+
+def run_diff(old_csv, new_csv, old_mapping_file=None, new_mapping_file=None, output_dir=None,
+             figsize=(12, 8), dpi=300):
+    """
+    对比两个版本并输出报告和变化叠加图
+
+    Returns:
+        dict: 变化结果
+    """
+    output_dir = Path(output_dir) if output_dir else Path(__file__).resolve().parent.parent / 'output'
+    old_parser, old_mapping = _load_version(old_csv, old_mapping_file)
+    new_parser, new_mapping = _load_version(new_csv, new_mapping_file)
+
+    diff = diff_floorplans(old_parser, new_parser, old_mapping, new_mapping)
+    summary = diff['summary']
+    logger.info("🔀 版本对比: " + ", ".join(f"{CHANGE_STYLES[c]['label']} {summary[c]}" for c in CHANGE_STYLES)
+                + f", 重新映射的client {summary['remapped_clients']}")
+    if diff['clients']['remapped_clients']:
+        log_summary(logger, logging.INFO, "🔀 重新映射的client",
+                    [f"{item['client']}: {item['old_tiles']} -> {item['new_tiles']}"
+                     for item in diff['clients']['remapped_clients']],
+                    detail_hint="floorplan_diff.txt")
+
+    txt_file, json_file = write_diff_report(diff, output_dir)
+    logger.info(f"📄 对比报告已保存到: {txt_file}")
+    render_diff_overlay(old_parser, new_parser, diff, str(output_dir / "floorplan_diff.png"),
+                        cache_dir=output_dir / '.base_cache', figsize=figsize, dpi=dpi)
+    return diff
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Floorplan / Mapping 版本对比")
+    arg_parser.add_argument('--old-csv', required=True, help="旧版本Tile数据文件（相对路径基于input/）")
+    arg_parser.add_argument('--new-csv', required=True, help="新版本Tile数据文件（相对路径基于input/）")
+    arg_parser.add_argument('--old-mapping', help="旧版本Excel映射文件（相对路径基于input/）")
+    arg_parser.add_argument('--new-mapping', help="新版本Excel映射文件（相对路径基于input/）")
+    arg_parser.add_argument('--output-dir', help="输出目录，默认为 output/")
+    arg_parser.add_argument('--dpi', type=int, default=300)
+    args = arg_parser.parse_args()
+
+    run_diff(args.old_csv, args.new_csv, args.old_mapping, args.new_mapping, args.output_dir, dpi=args.dpi)
+
+
+if __name__ == "__main__":
+    main()
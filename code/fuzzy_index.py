@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+模糊匹配索引
+对JSON中的模块名、实例名和清理后的DbgBlkId建立字符n-gram倒排索引，
+为未匹配的Excel行给出最相近的候选（top-k），用于定位命名不一致的问题。
+
+查询使用前缀过滤：按n-gram在索引中的出现频率从低到高排序，只需扫描最稀有的一部分n-gram
+即可找到所有可能达到相似度阈值的候选，再对候选精确计算相似度。
+出现在大量值中的公共n-gram（命名模板的固定部分）尽量不参与候选生成，
+查询代价主要取决于稀有n-gram的倒排表长度，而不是与候选总数成正比；
+只有稀有n-gram不足以保证找全候选时（如模板名中的拼写错误），才把最稀有的停用n-gram加回前缀。
+"""
+
+import heapq
+import math
+
+NGRAM_SIZE = 3
+DEFAULT_TOP_K = 3
+DEFAULT_MIN_SIMILARITY = 0.5  # Dice系数阈值
+STOP_GRAM_RATIO = 0.003  # 出现在超过该比例的值中的n-gram视为停用n-gram
+STOP_GRAM_MIN_POSTINGS = 64  # 值较少时不启用停用n-gram
+
+
+def ngrams(text, n=NGRAM_SIZE):
+    """小写化并在首尾补位后提取n-gram集合，使短字符串和首尾字符同样参与比较"""
+    padded = f"{'^' * (n - 1)}{text.lower()}{'$' * (n - 1)}"
+    return {padded[i:i + n] for i in range(len(padded) - n + 1)}
+
+
+class NGramIndex:
+    """字符串集合上的n-gram倒排索引"""
+
+    def __init__(self, values=(), n=NGRAM_SIZE):
+        self.n = n
+        self.values = []
+        self.grams = []  # 每个值的n-gram集合
+        self.postings = {}  # {gram: [值下标, ...]}
+        self.positions = {}  # {值: 下标}，用于判断精确存在
+        for value in values:
+            self.add(value)
+
+    def __len__(self):
+        return len(self.values)
+
+    def __contains__(self, value):
+        return value in self.positions
+
+    def add(self, value):
+        """加入一个值（重复值忽略）"""
+        if not value or value in self.positions:
+            return
+        index = len(self.values)
+        self.positions[value] = index
+        self.values.append(value)
+        grams = ngrams(value, self.n)
+        self.grams.append(grams)
+        for gram in grams:
+            self.postings.setdefault(gram, []).append(index)
+
+    def query(self, text, k=DEFAULT_TOP_K, min_similarity=DEFAULT_MIN_SIMILARITY, exclude_exact=True):
+        """
+        返回与text最相近的k个值
+
+        Args:
+            text: 查询字符串
+            k: 最多返回的候选数
+            min_similarity: Dice系数下限 (0, 1]
+            exclude_exact: 是否排除与text完全相同的值
+
+        Returns:
+            list: [(值, 相似度), ...]，按相似度从高到低
+        """
+        if not text or not self.values:
+            return []
+        query_grams = ngrams(text, self.n)
+
+        # Dice >= s 且 |交集| <= |B| 可推出 |交集| >= s*|A|/(2-s)
+        required = max(1, math.ceil(min_similarity * len(query_grams) / (2 - min_similarity)))
+
+        # 出现在大量值中的n-gram（如公共前缀）几乎不区分候选，只用于计算相似度，不用于生成候选
+        stop_limit = max(STOP_GRAM_MIN_POSTINGS, int(len(self.values) * STOP_GRAM_RATIO))
+        ordered = sorted(query_grams, key=lambda gram: len(self.postings.get(gram, ())))
+        informative = [gram for gram in ordered if len(self.postings.get(gram, ())) <= stop_limit]
+        stop = ordered[len(informative):]
+
+        # 合格候选至少包含 required - 停用n-gram数 个信息n-gram，
+        # 因此必然包含最稀有的 |信息n-gram| - 该数量 + 1 个之一（前缀过滤）；
+        # 该数量小于1时前缀无法排除任何候选，依次把最稀有的停用n-gram作为信息n-gram使用
+        needed = required - len(stop)
+        while needed < 1:
+            informative.append(stop.pop(0))
+            needed += 1
+        prefix = informative[:len(informative) - needed + 1]
+        candidates = set()
+        for gram in prefix:
+            candidates.update(self.postings.get(gram, ()))
+
+        scored = []
+        for index in candidates:
+            value = self.values[index]
+            if exclude_exact and value == text:
+                continue
+            grams = self.grams[index]
+            similarity = 2 * len(query_grams & grams) / (len(query_grams) + len(grams))
+            if similarity >= min_similarity:
+                scored.append((similarity, value))
+        return [(value, similarity) for similarity, value in heapq.nlargest(k, scored)]
+
+
+class MatchSuggester:
+    """为未匹配的Excel行在JSON数据中查找疑似的模块 / 实例 / DbgBlkId"""
+
+    def __init__(self, json_data, k=DEFAULT_TOP_K, min_similarity=DEFAULT_MIN_SIMILARITY):
+        """
+        Args:
+            json_data: JSON数据字典（DbgBlkId已清理）
+            k: 每个字段最多给出的候选数
+            min_similarity: Dice系数下限
+        """
+        self.k = k
+        self.min_similarity = min_similarity
+        self.modules = NGramIndex()
+        self.instances = NGramIndex()
+        self.dbg_blk_ids = NGramIndex()
+        self.entry_dbg_blk_ids = {}  # {(module, instance): {DbgBlkId, ...}}
+        self.entry_indexes = {}  # {(module, instance): NGramIndex}，首次查询该条目时建立
+
+        for json_entry in json_data.values():
+            module = json_entry.get('module', '')
+            instance = json_entry.get('instance', '')
+            self.modules.add(module)
+            self.instances.add(instance)
+            dbg_ids = self.entry_dbg_blk_ids.setdefault((module, instance), set())
+            for pair in json_entry.get('pairs', []):
+                dbg_blk_id = pair.get('DbgBlkId', '')
+                self.dbg_blk_ids.add(dbg_blk_id)
+                if dbg_blk_id:
+                    dbg_ids.add(dbg_blk_id)
+
+    def _query(self, index, text):
+        return [{'value': value, 'similarity': round(similarity, 3)}
+                for value, similarity in index.query(text, self.k, self.min_similarity)]
+
+    def _query_dbg_blk_id(self, module, instance, dbg_blk_id):
+        """模块::实例存在时只在该条目的DbgBlkId中比较，否则查全局索引"""
+        entry_ids = self.entry_dbg_blk_ids.get((module, instance))
+        if not entry_ids:
+            return [] if dbg_blk_id in self.dbg_blk_ids else self._query(self.dbg_blk_ids, dbg_blk_id)
+        if dbg_blk_id in entry_ids:
+            return []
+        index = self.entry_indexes.get((module, instance))
+        if index is None:
+            index = self.entry_indexes[(module, instance)] = NGramIndex(sorted(entry_ids))
+        return self._query(index, dbg_blk_id)
+
+    def suggest(self, excel_entry):
+        """
+        为一条Excel行给出建议；字段在JSON中精确存在时不给该字段的建议
+
+        Returns:
+            dict: {'module', 'instance', 'dbg_blk_id', 'module_suggestions', 'instance_suggestions',
+                   'dbg_blk_id_suggestions'}，没有任何建议时返回None
+        """
+        module = excel_entry.get('module', '')
+        instance = excel_entry.get('instance', '')
+        dbg_blk_id = excel_entry.get('dbg_blk_id', '')
+
+        suggestion = {
+            'module': module,
+            'instance': instance,
+            'dbg_blk_id': dbg_blk_id,
+            'module_suggestions': [] if module in self.modules else self._query(self.modules, module),
+            'instance_suggestions': [] if instance in self.instances else self._query(self.instances, instance),
+            'dbg_blk_id_suggestions': self._query_dbg_blk_id(module, instance, dbg_blk_id),
+        }
+        if not (suggestion['module_suggestions'] or suggestion['instance_suggestions']
+                or suggestion['dbg_blk_id_suggestions']):
+            return None
+        return suggestion
+
+    def suggest_all(self, excel_entries):
+        """对多条Excel行给出建议（相同的模块/实例/DbgBlkId组合只计算一次）"""
+        suggestions = []
+        seen = set()
+        for entry in excel_entries:
+            key = (entry.get('module', ''), entry.get('instance', ''), entry.get('dbg_blk_id', ''))
+            if key in seen:
+                continue
+            seen.add(key)
+            suggestion = self.suggest(entry)
+            if suggestion is not None:
+                suggestions.append(suggestion)
+        return suggestions
+
+
+def format_suggestion(suggestion):
+    """把一条模糊匹配建议格式化为单行文本，如 m_x::u0 [dbg] -> 模块: m (0.91); DbgBlkId: d (0.85)"""
+    parts = []
+    for field, label in (('module_suggestions', '模块'), ('instance_suggestions', '实例'),
+                         ('dbg_blk_id_suggestions', 'DbgBlkId')):
+        if suggestion[field]:
+            candidates = ", ".join(f"{item['value']} ({item['similarity']:.2f})" for item in suggestion[field])
+            parts.append(f"{label}: {candidates}")
+    return f"{suggestion['module']}::{suggestion['instance']} [{suggestion['dbg_blk_id']}] -> {'; '.join(parts)}"
@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+布局几何导出
+把MID.csv解析出的tile几何导出为其他工具可以直接读取的格式，无需再解析MID.csv：
+    - GeoJSON（tiles.geojson）: FeatureCollection，每个tile一个Polygon要素，
+      properties包含 name / master / orient / area / centroid / bbox / clients；逐个要素流式写出
+    - 二进制几何（tiles.geom）: 扁平坐标数组 + 偏移数组，可用np.memmap零拷贝加载
+
+二进制格式（全部为小端）：
+    0   8字节魔数 b'DFDGEOM\\0'
+    8   uint32 版本号
+    12  uint32 头部长度 L
+    16  L字节UTF-8 JSON头部: {version, tile_count, vertex_count, arrays, names, masters, orients, clients}
+        arrays: {数组名: {dtype, shape, offset}}，offset为相对文件开头的字节偏移（64字节对齐）
+    之后依次为各数组的原始数据：
+        coords          <f8 (vertex_count, 2)   所有tile的顶点，按tile依次排列
+        offsets         <i8 (tile_count + 1,)   第i个tile的顶点为 coords[offsets[i]:offsets[i+1]]
+        centroids       <f8 (tile_count, 2)
+        bboxes          <f8 (tile_count, 4)     xmin, ymin, xmax, ymax
+        areas           <f8 (tile_count,)
+        master_index    <i4 (tile_count,)       masters表中的下标
+        orient_index    <i4 (tile_count,)       orients表中的下标
+        client_offsets  <i8 (tile_count + 1,)   第i个tile的client为 client_index[client_offsets[i]:client_offsets[i+1]]
+        client_index    <i4 (client_refs,)      clients表中的下标
+"""
+
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+
+from dfd_logger import get_logger
+
+logger = get_logger('geometry_export')
+
+DEFAULT_GEOJSON_NAME = "tiles.geojson"
+DEFAULT_BINARY_NAME = "tiles.geom"
+BINARY_MAGIC = b'DFDGEOM\0'
+BINARY_VERSION = 1
+_ALIGN = 64
+
+
+def _string_table(values):
+    """把字符串序列转为 (去重后的表, 每个值在表中的下标)"""
+    table, index = {}, np.empty(len(values), dtype='<i4')
+    for i, value in enumerate(values):
+        index[i] = table.setdefault(value, len(table))
+    return list(table), index
+
+
+def _client_arrays(names, tile_client_mapping):
+    """每个tile的client按CSR形式展开为 (clients表, client_offsets, client_index)"""
+    client_table = {}
+    counts = np.zeros(len(names), dtype='<i8')
+    refs = []
+    if tile_client_mapping:
+        for i, name in enumerate(names):
+            clients = tile_client_mapping.get(name, ())
+            counts[i] = len(clients)
+            refs.extend(client_table.setdefault(client_id, len(client_table)) for client_id in clients)
+    client_offsets = np.zeros(len(names) + 1, dtype='<i8')
+    np.cumsum(counts, out=client_offsets[1:])
+    return list(client_table), client_offsets, np.asarray(refs, dtype='<i4')
+
+
+def write_geojson(path, geometry, tile_client_mapping=None):
+    """
+    以GeoJSON FeatureCollection流式写出所有tile（顶点少于3个的tile几何为null）
+
+    Args:
+        path: 输出文件路径
+        geometry: TileGeometry
+        tile_client_mapping: 可选的 {tile_name: [client, ...]} 映射或ClientTileIndex
+
+    Returns:
+        int: 写出的要素数
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + '.tmp')
+    tile_client_mapping = tile_client_mapping or {}
+    dumps = json.JSONEncoder(ensure_ascii=False, separators=(',', ':')).encode
+
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write('{"type":"FeatureCollection","features":[\n')
+        for i, name in enumerate(geometry.names):
+            if geometry.valid[i]:
+                ring = geometry.coords[geometry.offsets[i]:geometry.offsets[i + 1]].tolist()
+                ring.append(ring[0])
+                shape = {'type': 'Polygon', 'coordinates': [ring]}
+            else:
+                shape = None
+            feature = {
+                'type': 'Feature',
+                'id': name,
+                'geometry': shape,
+                'properties': {
+                    'name': name,
+                    'master': geometry.masters[i],
+                    'orient': geometry.orients[i],
+                    'area': float(geometry.areas[i]),
+                    'centroid': geometry.centroids[i].tolist(),
+                    'bbox': geometry.bboxes[i].tolist(),
+                    'clients': list(tile_client_mapping.get(name, ())),
+                },
+            }
+            if i:
+                f.write(',\n')
+            f.write(dumps(feature))
+        f.write('\n]}\n')
+
+    os.replace(tmp_path, path)
+    logger.info(f"🗺️ GeoJSON已保存到: {path} ({len(geometry.names)} 个tile)")
+    return len(geometry.names)
+
+
+def write_binary_geometry(path, geometry, tile_client_mapping=None):
+    """
+    写出二进制几何文件（格式见模块说明）
+
+    Args:
+        path: 输出文件路径
+        geometry: TileGeometry
+        tile_client_mapping: 可选的 {tile_name: [client, ...]} 映射或ClientTileIndex
+
+    Returns:
+        dict: 头部信息（不含字符串表）
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + '.tmp')
+
+    masters, master_index = _string_table(geometry.masters)
+    orients, orient_index = _string_table(geometry.orients)
+    clients, client_offsets, client_index = _client_arrays(geometry.names, tile_client_mapping)
+    arrays = {
+        'coords': geometry.coords.astype('<f8', copy=False),
+        'offsets': geometry.offsets.astype('<i8', copy=False),
+        'centroids': geometry.centroids.astype('<f8', copy=False),
+        'bboxes': geometry.bboxes.astype('<f8', copy=False),
+        'areas': geometry.areas.astype('<f8', copy=False),
+        'master_index': master_index,
+        'orient_index': orient_index,
+        'client_offsets': client_offsets,
+        'client_index': client_index,
+    }
+
+    # 头部长度决定数组的起始位置，先用占位偏移计算一次长度，再以足够的余量对齐
+    layout = {name: {'dtype': array.dtype.str, 'shape': list(array.shape), 'offset': 0}
+              for name, array in arrays.items()}
+    header = {
+        'version': BINARY_VERSION,
+        'tile_count': len(geometry.names),
+        'vertex_count': int(len(geometry.coords)),
+        'arrays': layout,
+        'names': geometry.names,
+        'masters': masters,
+        'orients': orients,
+        'clients': clients,
+    }
+    reserve = len(json.dumps(header, ensure_ascii=False).encode('utf-8')) + 32 * len(arrays)
+    position = -(-(16 + reserve) // _ALIGN) * _ALIGN
+    for name, array in arrays.items():
+        layout[name]['offset'] = position
+        position += -(-array.nbytes // _ALIGN) * _ALIGN
+    header_bytes = json.dumps(header, ensure_ascii=False).encode('utf-8')
+
+    with open(tmp_path, 'wb') as f:
+        f.write(BINARY_MAGIC)
+        f.write(np.array([BINARY_VERSION, len(header_bytes)], dtype='<u4').tobytes())
+        f.write(header_bytes)
+        for name, array in arrays.items():
+            f.seek(layout[name]['offset'])
+            f.write(np.ascontiguousarray(array).tobytes())
+        f.truncate(position)
+
+    os.replace(tmp_path, path)
+    logger.info(f"🗺️ 二进制几何已保存到: {path} ({header['tile_count']} 个tile, "
+                f"{header['vertex_count']} 个顶点, {len(client_index)} 条client关系)")
+    return {key: value for key, value in header.items() if key not in ('names', 'masters', 'orients', 'clients')}
+
+
+class BinaryGeometry:
+    """write_binary_geometry() 写出的文件的只读视图，数值数组为np.memmap（零拷贝）"""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        with open(self.path, 'rb') as f:
+            if f.read(len(BINARY_MAGIC)) != BINARY_MAGIC:
+                raise ValueError(f"不是二进制几何文件: {self.path}")
+            version, header_length = np.frombuffer(f.read(8), dtype='<u4')
+            if version != BINARY_VERSION:
+                raise ValueError(f"不支持的二进制几何版本: {version}")
+            header = json.loads(f.read(int(header_length)).decode('utf-8'))
+
+        self.header = header
+        self.names = header['names']
+        self.masters = header['masters']
+        self.orients = header['orients']
+        self.clients = header['clients']
+        self.index = {name: i for i, name in enumerate(self.names)}
+        for name, spec in header['arrays'].items():
+            shape = tuple(spec['shape'])
+            if np.prod(shape) == 0:
+                array = np.zeros(shape, dtype=spec['dtype'])
+            else:
+                array = np.memmap(self.path, dtype=spec['dtype'], mode='r', offset=spec['offset'], shape=shape)
+            setattr(self, name, array)
+
+    def __len__(self):
+        return len(self.names)
+
+    def polygon(self, i):
+        """第i个tile的顶点 (k, 2)"""
+        return self.coords[self.offsets[i]:self.offsets[i + 1]]
+
+    def tile_clients(self, i):
+        """第i个tile上的client"""
+        return [self.clients[j] for j in self.client_index[self.client_offsets[i]:self.client_offsets[i + 1]]]
+
+
+def load_binary_geometry(path):
+    """加载二进制几何文件，见BinaryGeometry"""
+    return BinaryGeometry(path)
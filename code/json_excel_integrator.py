@@ -5,59 +5,49 @@ JSON和Excel数据整合工具
 用于整合chip_blocks.json和Mapping.xlsx的数据
 """
 
-import pandas as pd
 import json
+import logging
 import os
 import re
+from itertools import chain
 from pathlib import Path
+from dfd_logger import get_logger, log_summary
+from excel_stream import is_mapping_entry, iter_mapping_chunks, iter_mapping_records, resolve_excel_paths
+from fuzzy_index import MatchSuggester, format_suggestion
+from symbol_table import SymbolTable
 
-def read_excel_mapping_data(excel_file_path):
+logger = get_logger('json_excel_integrator')
+
+def read_excel_mapping_data(excel_file_path, symbols=None, sheets=None):
     """
     读取Excel文件的A、B、C、F列数据（跳过表头）
     
     Args:
-        excel_file_path: Excel文件路径
+        excel_file_path: Excel文件路径，或多个路径的列表
+        symbols: 可选的SymbolTable，读入的名称在其中登记并共享同一字符串对象
+        sheets: 读取的工作表，见excel_stream.iter_mapping_chunks()，默认为第一个工作表
         
     Returns:
         list: 包含mapping数据的字典列表
     """
-    # 转换为绝对路径
-    if not os.path.isabs(excel_file_path):
-        excel_file_path = os.path.join(os.path.dirname(__file__), '..', 'input', excel_file_path)
-    
-    excel_file_path = os.path.abspath(excel_file_path)
-    
-    if not os.path.exists(excel_file_path):
-        raise FileNotFoundError(f"Excel文件不存在: {excel_file_path}")
+    excel_file_path = resolve_excel_paths(excel_file_path)
     
     try:
-        # 读取Excel文件的A、B、C、F列（索引为0、1、2、5）
-        df = pd.read_excel(excel_file_path, usecols=[0, 1, 2, 5], skiprows=1, header=None)
-        
-        # 重命名列
-        df.columns = ['module', 'instance', 'dbg_blk_id', 'tile_name']
-        
-        # 过滤掉所有列都为空的行
+        # 逐块流式读取，只保留module、instance、dbg_blk_id均不为空的行
         mapping_data = []
-        for _, row in df.iterrows():
-            # 检查是否有有效数据（至少module、instance、dbg_blk_id不为空）
-            if (pd.notna(row['module']) and str(row['module']).strip() and
-                pd.notna(row['instance']) and str(row['instance']).strip() and
-                pd.notna(row['dbg_blk_id']) and str(row['dbg_blk_id']).strip()):
-                
-                mapping_entry = {
-                    'module': str(row['module']).strip(),
-                    'instance': str(row['instance']).strip(),
-                    'dbg_blk_id': str(row['dbg_blk_id']).strip(),
-                    'tile_name': str(row['tile_name']).strip() if pd.notna(row['tile_name']) and str(row['tile_name']).strip() else ""
-                }
+        for chunk in iter_mapping_chunks(excel_file_path, sheets=sheets):
+            for mapping_entry in chunk:
+                if not is_mapping_entry(mapping_entry):
+                    continue
+                if symbols is not None:
+                    mapping_entry = {field: symbols.canonical(value) for field, value in mapping_entry.items()}
                 mapping_data.append(mapping_entry)
         
-        print(f"✅ 从Excel文件读取到 {len(mapping_data)} 条有效的mapping数据")
+        logger.info(f"✅ 从Excel文件读取到 {len(mapping_data)} 条有效的mapping数据")
         return mapping_data
         
     except Exception as e:
-        print(f"❌ 读取Excel文件时出错: {e}")
+        logger.error(f"❌ 读取Excel文件时出错: {e}")
         return []
 
 def clean_dbg_blk_id(dbg_blk_id_str):
@@ -92,7 +82,7 @@ def analyze_unmatched_data(json_data, unmatched_excel_entries):
     Returns:
         dict: 分析结果
     """
-    print("\n🔍 开始分析未匹配的数据...")
+    logger.info("\n🔍 开始分析未匹配的数据...")
     
     # 提取JSON中的所有模块
     json_modules = set()
@@ -113,6 +103,9 @@ def analyze_unmatched_data(json_data, unmatched_excel_entries):
     excel_only_modules = unmatched_excel_modules - json_modules
     common_modules = json_modules & unmatched_excel_modules
     
+    # 为未匹配的Excel行查找JSON中最相近的模块/实例/DbgBlkId
+    suggestions = MatchSuggester(json_data).suggest_all(unmatched_excel_entries)
+    
     analysis_result = {
         'unmatched_excel_modules': sorted(list(unmatched_excel_modules)),
         'json_modules': sorted(list(json_modules)),
@@ -120,31 +113,32 @@ def analyze_unmatched_data(json_data, unmatched_excel_entries):
         'json_only_modules': sorted(list(json_only_modules)),
         'common_modules': sorted(list(common_modules)),
         'unmatched_excel_entries_count': len(unmatched_excel_entries),
-        'unmatched_excel_modules_count': len(unmatched_excel_modules)
+        'unmatched_excel_modules_count': len(unmatched_excel_modules),
+        'suggestions': suggestions
     }
     
     # 输出分析结果
-    print(f"📊 未匹配分析结果:")
-    print(f"   📝 未匹配的Excel条目数: {len(unmatched_excel_entries)}")
-    print(f"   🏷️  未匹配的Excel模块数（去重）: {len(unmatched_excel_modules)}")
-    print(f"   📦 JSON中的总模块数: {len(json_modules)}")
+    logger.info(f"📊 未匹配分析结果:")
+    logger.info(f"   📝 未匹配的Excel条目数: {len(unmatched_excel_entries)}")
+    logger.info(f"   🏷️  未匹配的Excel模块数（去重）: {len(unmatched_excel_modules)}")
+    logger.info(f"   📦 JSON中的总模块数: {len(json_modules)}")
     
     if excel_only_modules:
-        print(f"\n❌ 仅在Excel中存在的模块 ({len(excel_only_modules)}个):")
-        for module in excel_only_modules:
-            print(f"     • {module}")
+        log_summary(logger, logging.WARNING, "\n❌ 仅在Excel中存在的模块", sorted(excel_only_modules),
+                    detail_hint="unmatched_analysis_report.txt")
     
     if common_modules:
-        print(f"\n⚠️  Excel和JSON都有但未匹配的模块 ({len(common_modules)}个):")
-        for module in common_modules:
-            print(f"     • {module}")
+        log_summary(logger, logging.WARNING, "\n⚠️  Excel和JSON都有但未匹配的模块", sorted(common_modules),
+                    detail_hint="unmatched_analysis_report.txt")
     
     if json_only_modules:
-        print(f"\n✅ 仅在JSON中存在的模块 ({len(json_only_modules)}个):")
-        for module in list(json_only_modules)[:10]:  # 只显示前10个
-            print(f"     • {module}")
-        if len(json_only_modules) > 10:
-            print(f"     ... 还有 {len(json_only_modules) - 10} 个")
+        log_summary(logger, logging.INFO, "\n✅ 仅在JSON中存在的模块", sorted(json_only_modules),
+                    detail_hint="unmatched_analysis_report.txt")
+    
+    if suggestions:
+        log_summary(logger, logging.INFO, "\n💡 未匹配Excel行的疑似对应项",
+                    [format_suggestion(suggestion) for suggestion in suggestions],
+                    detail_hint="unmatched_analysis_report.txt")
     
     return analysis_result
 
@@ -161,7 +155,7 @@ def save_unmatched_analysis_report(analysis_result, output_dir):
     with open(report_file, 'w', encoding='utf-8') as f:
         json.dump(analysis_result, f, ensure_ascii=False, indent=2)
     
-    print(f"📄 未匹配分析报告已保存到: {report_file}")
+    logger.info(f"📄 未匹配分析报告已保存到: {report_file}")
     
     # 同时保存为文本格式，便于阅读
     txt_report_file = Path(output_dir) / "unmatched_analysis_report.txt"
@@ -190,114 +184,148 @@ def save_unmatched_analysis_report(analysis_result, output_dir):
             f.write("-" * 30 + "\n")
             for module in analysis_result['common_modules']:
                 f.write(f"  • {module}\n")
+        
+        if analysis_result['json_only_modules']:
+            f.write(f"\n仅在JSON中存在的模块 ({len(analysis_result['json_only_modules'])}个):\n")
+            f.write("-" * 30 + "\n")
+            for module in analysis_result['json_only_modules']:
+                f.write(f"  • {module}\n")
+        
+        suggestions = analysis_result.get('suggestions')
+        if suggestions:
+            f.write(f"\n未匹配Excel行的疑似对应项 ({len(suggestions)}个，括号内为相似度):\n")
+            f.write("-" * 30 + "\n")
+            for suggestion in suggestions:
+                f.write(f"  • {format_suggestion(suggestion)}\n")
     
-    print(f"📄 文本版分析报告已保存到: {txt_report_file}")
+    logger.info(f"📄 文本版分析报告已保存到: {txt_report_file}")
 
-def integrate_json_excel_data(json_file_path, excel_file_path, output_file_path):
+def integrate_json_excel_data(json_file_path, excel_file_path, output_file_path, report_builder=None,
+                              json_data=None, excel_mapping=None, symbols=None):
     """
     整合JSON和Excel数据
     
     Args:
         json_file_path: JSON文件路径
-        excel_file_path: Excel文件路径
+        excel_file_path: Excel文件路径，或多个路径的列表
         output_file_path: 输出文件路径
+        report_builder: 可选的AnalysisReportBuilder，整合完成后收集报告统计
+        json_data: 可选，已在内存中的JSON数据（会被原地更新），提供时不再读取json_file_path
+        excel_mapping: 可选，已读取的read_excel_mapping_data()结果（或任意映射记录的可迭代对象），
+            提供时不再读取excel_file_path；未提供时从excel_file_path流式读取，边读边连接
+        symbols: 可选的SymbolTable，模块/实例/DbgBlkId/tile名称在其中登记为整数ID，连接在整数元组上进行
         
     Returns:
         tuple: (integrated_data, unmatched_analysis)
     """
     
     # 读取JSON数据
-    print("📖 读取JSON文件...")
-    if not os.path.isabs(json_file_path):
-        json_file_path = os.path.join(os.path.dirname(__file__), '..', 'output', json_file_path)
-    
-    with open(json_file_path, 'r', encoding='utf-8') as f:
-        json_data = json.load(f)
+    if json_data is None:
+        logger.info("📖 读取JSON文件...")
+        if not os.path.isabs(json_file_path):
+            json_file_path = os.path.join(os.path.dirname(__file__), '..', 'output', json_file_path)
+        
+        with open(json_file_path, 'r', encoding='utf-8') as f:
+            json_data = json.load(f)
     
-    print(f"✅ JSON文件包含 {len(json_data)} 个条目")
+    logger.info(f"✅ JSON文件包含 {len(json_data)} 个条目")
     
-    # 读取Excel数据
-    print("📊 读取Excel mapping数据...")
-    excel_mapping = read_excel_mapping_data(excel_file_path)
+    # Excel数据：未提供时边读边连接，不先读入整个工作簿
+    if excel_mapping is None:
+        logger.info("📊 流式读取Excel mapping数据...")
+        excel_mapping = (entry for entry in iter_mapping_records(excel_file_path) if is_mapping_entry(entry))
+    excel_rows = iter(excel_mapping)
+    first_entry = next(excel_rows, None)
     
-    if not excel_mapping:
-        print("❌ 没有读取到有效的Excel映射数据")
+    if first_entry is None:
+        logger.error("❌ 没有读取到有效的Excel映射数据")
         return None, None
     
-    # 创建Excel数据的查找字典
-    excel_lookup = {}
-    for entry in excel_mapping:
-        key = f"{entry['module']}::{entry['instance']}"
-        if key not in excel_lookup:
-            excel_lookup[key] = []
-        excel_lookup[key].append(entry)
-    
-    print(f"✅ 创建了 {len(excel_lookup)} 个模块::实例映射")
+    if symbols is None:
+        symbols = SymbolTable()
     
-    # 记录匹配情况
-    matched_excel_keys = set()
-    unmatched_excel_entries = []
-    
-    # 整合数据
-    print("🔄 开始数据整合...")
-    updated_count = 0
+    # 第一遍：清理DbgBlkId，并把tile_name为空的pair按 (module_id, instance_id, dbg_blk_id_id) 建立索引
+    logger.info("🔄 开始数据整合...")
     cleaned_count = 0
+    cleaned_cache = {}  # 原始DbgBlkId -> 清理结果，相同的原始字符串只清理一次
+    pending_pairs = {}  # {(module_id, instance_id, dbg_blk_id_id): [pair, ...]}
     
     for json_key, json_entry in json_data.items():
-        module = json_entry.get('module', '')
-        instance = json_entry.get('instance', '')
-        lookup_key = f"{module}::{instance}"
-        
-        # 处理pairs数组
-        if 'pairs' in json_entry:
-            for pair in json_entry['pairs']:
-                # 清理DbgBlkId
-                if 'DbgBlkId' in pair:
-                    original_dbg = pair['DbgBlkId']
-                    cleaned_dbg = clean_dbg_blk_id(original_dbg)
-                    pair['DbgBlkId'] = cleaned_dbg
-                    cleaned_count += 1
-                
-                # 查找匹配的Excel数据
-                if lookup_key in excel_lookup:
-                    for excel_entry in excel_lookup[lookup_key]:
-                        # 匹配DbgBlkId
-                        if cleaned_dbg == excel_entry['dbg_blk_id']:
-                            # 更新tile_name
-                            if excel_entry['tile_name'] and not pair.get('tile_name'):
-                                pair['tile_name'] = excel_entry['tile_name']
-                                updated_count += 1
-                                # 记录已匹配的Excel条目
-                                matched_excel_keys.add(lookup_key)
-                                break
+        entry_key = symbols.key(json_entry.get('module', ''), json_entry.get('instance', ''))
+        for pair in json_entry.get('pairs', ()):
+            # 清理DbgBlkId
+            if 'DbgBlkId' in pair:
+                original_dbg = pair['DbgBlkId']
+                cleaned_dbg = cleaned_cache.get(original_dbg)
+                if cleaned_dbg is None:
+                    cleaned_dbg = cleaned_cache[original_dbg] = symbols.canonical(clean_dbg_blk_id(original_dbg))
+                pair['DbgBlkId'] = cleaned_dbg
+                cleaned_count += 1
+            if not pair.get('tile_name'):
+                pending_pairs.setdefault(entry_key + (symbols.intern(pair.get('DbgBlkId', '')),), []).append(pair)
+    
+    # 第二遍：Excel行到达时直接填充对应的pair。同一 模块::实例::DbgBlkId 有多行时，
+    # 第一条tile_name非空的行填充后即从索引中移除，后续行不再覆盖
+    excel_count = 0
+    updated_count = 0
+    excel_keys = set()
+    matched_excel_keys = set()
+    candidate_unmatched = []  # 读到时其 模块::实例 尚未匹配的行，结束后再筛选一次
+    
+    for entry in chain((first_entry,), excel_rows):
+        excel_count += 1
+        key = symbols.key(entry['module'], entry['instance'])
+        excel_keys.add(key)
+        if entry['tile_name']:
+            pairs = pending_pairs.pop(key + (symbols.intern(entry['dbg_blk_id']),), None)
+            if pairs:
+                tile_name = symbols.canonical(entry['tile_name'])
+                for pair in pairs:
+                    pair['tile_name'] = tile_name
+                updated_count += len(pairs)
+                # 记录已匹配的Excel条目
+                matched_excel_keys.add(key)
+        if key not in matched_excel_keys:
+            candidate_unmatched.append((entry, key))
+    
+    logger.info(f"✅ 读取了 {len(excel_keys)} 个模块::实例映射")
     
     # 找出未匹配的Excel条目
-    for entry in excel_mapping:
-        lookup_key = f"{entry['module']}::{entry['instance']}"
-        if lookup_key not in matched_excel_keys:
-            unmatched_excel_entries.append(entry)
+    unmatched_excel_entries = [entry for entry, key in candidate_unmatched if key not in matched_excel_keys]
+    
+    if report_builder is not None:
+        for json_entry in json_data.values():
+            module = json_entry.get('module', '')
+            instance = json_entry.get('instance', '')
+            for pair in json_entry.get('pairs', ()):
+                report_builder.add_pair(module, instance, pair.get('DbgBlkId', ''), pair.get('tile_name', ''))
     
-    print(f"✅ 清理了 {cleaned_count} 个DbgBlkId")
-    print(f"✅ 更新了 {updated_count} 个tile_name")
-    print(f"📊 Excel总条目: {len(excel_mapping)}")
-    print(f"📊 已匹配条目: {len(matched_excel_keys)}")
-    print(f"📊 未匹配条目: {len(unmatched_excel_entries)}")
+    logger.info(f"✅ 清理了 {cleaned_count} 个DbgBlkId")
+    logger.info(f"✅ 更新了 {updated_count} 个tile_name")
+    logger.info(f"📊 Excel总条目: {excel_count}")
+    logger.info(f"📊 已匹配条目: {len(matched_excel_keys)}")
+    logger.info(f"📊 未匹配条目: {len(unmatched_excel_entries)}")
     
     # 分析未匹配的数据
     unmatched_analysis = analyze_unmatched_data(json_data, unmatched_excel_entries)
+    if report_builder is not None:
+        report_builder.set_match_suggestions(unmatched_analysis['suggestions'])
     
     # 保存整合后的数据
-    print("💾 保存整合后的数据...")
+    logger.info("💾 保存整合后的数据...")
     if not os.path.isabs(output_file_path):
         output_file_path = os.path.join(os.path.dirname(__file__), '..', 'output', output_file_path)
     
     # 确保输出目录存在
     Path(output_file_path).parent.mkdir(parents=True, exist_ok=True)
     
+    # 完整的未匹配列表写入报告文件，控制台只显示摘要
+    save_unmatched_analysis_report(unmatched_analysis, Path(output_file_path).parent)
+    
     with open(output_file_path, 'w', encoding='utf-8') as f:
         json.dump(json_data, f, ensure_ascii=False, indent=2)
     
-    print(f"✅ 整合完成，结果已保存到: {output_file_path}")
+    logger.info(f"✅ 整合完成，结果已保存到: {output_file_path}")
     
     return json_data, unmatched_analysis
 
@@ -305,7 +333,7 @@ def analyze_integration_results(original_json_path, integrated_json_path):
     """
     分析整合结果
     """
-    print("\n📊 分析整合结果...")
+    logger.info("\n📊 分析整合结果...")
     
     # 读取原始JSON
     with open(original_json_path, 'r', encoding='utf-8') as f:
@@ -333,16 +361,16 @@ def analyze_integration_results(original_json_path, integrated_json_path):
                 if pair.get('tile_name'):
                     integrated_filled_tiles += 1
     
-    print(f"📈 统计结果:")
-    print(f"   总配对数: {total_pairs}")
-    print(f"   原始空tile_name: {original_empty_tiles}")
-    print(f"   整合后已填充: {integrated_filled_tiles}")
-    print(f"   填充成功率: {integrated_filled_tiles/total_pairs*100:.1f}%")
+    logger.info(f"📈 统计结果:")
+    logger.info(f"   总配对数: {total_pairs}")
+    logger.info(f"   原始空tile_name: {original_empty_tiles}")
+    logger.info(f"   整合后已填充: {integrated_filled_tiles}")
+    logger.info(f"   填充成功率: {integrated_filled_tiles/total_pairs*100:.1f}%")
 
 def main():
     """主函数"""
-    print("🚀 开始JSON和Excel数据整合...")
-    print("=" * 60)
+    logger.info("🚀 开始JSON和Excel数据整合...")
+    logger.info("=" * 60)
     
     try:
         # 整合数据
@@ -359,13 +387,13 @@ def main():
                 os.path.join(os.path.dirname(__file__), '..', 'output', 'chip_blocks_integrated.json')
             )
             
-            print("\n🎉 数据整合完成！")
-            print(f"📊 未匹配Excel模块数: {unmatched_analysis['unmatched_excel_modules_count']}")
+            logger.info("\n🎉 数据整合完成！")
+            logger.info(f"📊 未匹配Excel模块数: {unmatched_analysis['unmatched_excel_modules_count']}")
         else:
-            print("❌ 数据整合失败")
+            logger.error("❌ 数据整合失败")
             
     except Exception as e:
-        print(f"❌ 整合过程中出错: {e}")
+        logger.error(f"❌ 整合过程中出错: {e}")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tile名称标签层
+    - 向量化计算所有标签的自适应字体大小
+    - 在屏幕坐标网格上检测标签碰撞，碰撞时先缩小字体（不小于MIN_FONT_SIZE），仍碰撞则丢弃
+    - 只绘制最终保留下来的标签
+"""
+
+import numpy as np
+
+MIN_FONT_SIZE = 1.5  # pt
+MAX_FONT_SIZE = 6    # pt
+CHAR_WIDTH_RATIO = 0.6  # 单个字符宽度约为字号的0.6倍
+SHRINK_STEPS = (1.0, 0.8, 0.6)  # 发生碰撞时依次尝试的缩放比例
+
+
+def compute_label_font_sizes(widths, heights, name_lengths):
+    """
+    根据tile尺寸和名称长度计算字体大小（向量化）
+
+    Args:
+        widths, heights: tile包围盒的宽和高（数据坐标）
+        name_lengths: tile名称长度
+
+    Returns:
+        np.ndarray: 字体大小（pt），范围 [MIN_FONT_SIZE, MAX_FONT_SIZE]
+    """
+    min_dimension = np.minimum(np.asarray(widths, dtype=float), np.asarray(heights, dtype=float))
+    base_font_size = np.maximum(2, min_dimension / 400)
+
+    name_lengths = np.asarray(name_lengths)
+    factor = np.select(
+        [name_lengths > 15, name_lengths > 12, name_lengths > 8],
+        [0.5, 0.6, 0.75],
+        default=1.0
+    )
+    return np.clip(base_font_size * factor, MIN_FONT_SIZE, MAX_FONT_SIZE)
+
+
+def _label_boxes(display_xy, font_sizes, name_lengths, dpi):
+    """计算居中标签在屏幕坐标（像素）中的包围盒 [x0, y0, x1, y1]"""
+    pixels = font_sizes * dpi / 72.0
+    half_w = name_lengths * pixels * CHAR_WIDTH_RATIO / 2
+    half_h = pixels / 2
+    return np.column_stack([display_xy[:, 0] - half_w, display_xy[:, 1] - half_h,
+                            display_xy[:, 0] + half_w, display_xy[:, 1] + half_h])
+
+
+def resolve_label_collisions(display_xy, font_sizes, name_lengths, dpi, shrink_steps=SHRINK_STEPS):
+    """
+    基于屏幕坐标网格的贪心碰撞消解
+
+    字号大的标签优先放置；与已放置标签重叠时依次尝试缩小字体，全部失败则丢弃。
+    缩小后的字号不低于MIN_FONT_SIZE，已经是最小字号的标签不再缩小，碰撞时直接丢弃。
+
+    Args:
+        display_xy: 标签中心的屏幕坐标 (n, 2)
+        font_sizes: 期望字号 (n,)
+        name_lengths: 名称长度 (n,)
+        dpi: 图像DPI，用于pt到像素的换算
+        shrink_steps: 依次尝试的缩放比例
+
+    Returns:
+        tuple: (保留标签的下标数组, 对应的最终字号数组)
+    """
+    n = len(font_sizes)
+    if n == 0:
+        return np.array([], dtype=int), np.array([], dtype=float)
+
+    font_sizes = np.asarray(font_sizes, dtype=float)
+    name_lengths = np.asarray(name_lengths, dtype=float)
+    step_sizes = [np.maximum(font_sizes * step, MIN_FONT_SIZE) for step in shrink_steps]
+    candidates = [_label_boxes(display_xy, sizes, name_lengths, dpi) for sizes in step_sizes]
+
+    # 网格单元取最大尺寸标签的典型宽度，使每个标签只落在少量单元中
+    full = candidates[0]
+    cell = max(float(np.median(full[:, 2] - full[:, 0])), float(np.median(full[:, 3] - full[:, 1])), 1.0)
+    grid = {}
+    placed = []
+
+    kept_indices = []
+    kept_sizes = []
+    for i in np.argsort(-font_sizes, kind='stable'):
+        tried = None
+        for sizes, boxes in zip(step_sizes, candidates):
+            if sizes[i] == tried:  # 已缩到最小字号，同样大小的标签不必重复检测
+                continue
+            tried = sizes[i]
+            x0, y0, x1, y1 = boxes[i]
+            cells = [(cx, cy)
+                     for cx in range(int(x0 // cell), int(x1 // cell) + 1)
+                     for cy in range(int(y0 // cell), int(y1 // cell) + 1)]
+            collided = False
+            for key in cells:
+                for j in grid.get(key, ()):
+                    px0, py0, px1, py1 = placed[j]
+                    if x0 < px1 and px0 < x1 and y0 < py1 and py0 < y1:
+                        collided = True
+                        break
+                if collided:
+                    break
+            if not collided:
+                slot = len(placed)
+                placed.append((x0, y0, x1, y1))
+                for key in cells:
+                    grid.setdefault(key, []).append(slot)
+                kept_indices.append(i)
+                kept_sizes.append(sizes[i])
+                break
+
+    return np.asarray(kept_indices, dtype=int), np.asarray(kept_sizes, dtype=float)
+
+
+def draw_tile_labels(ax, names, xs, ys, widths, heights):
+    """
+    在坐标轴上绘制不重叠的tile名称标签
+
+    需要在坐标范围、纵横比和布局确定之后调用，以便得到准确的屏幕坐标。
+
+    Args:
+        ax: matplotlib坐标轴
+        names: tile名称列表
+        xs, ys: 标签锚点（数据坐标）
+        widths, heights: tile包围盒尺寸（数据坐标）
+
+    Returns:
+        tuple: (绘制的标签数, 被丢弃的标签数)
+    """
+    if not len(names):
+        return 0, 0
+
+    name_lengths = np.fromiter((len(name) for name in names), dtype=int, count=len(names))
+    font_sizes = compute_label_font_sizes(widths, heights, name_lengths)
+
+    ax.apply_aspect()
+    display_xy = ax.transData.transform(np.column_stack([xs, ys]))
+    kept, sizes = resolve_label_collisions(display_xy, font_sizes, name_lengths, ax.figure.dpi)
+
+    for i, size in zip(kept, sizes):
+        ax.text(xs[i], ys[i], names[i],
+                fontsize=size,
+                ha='center', va='center',
+                color='black',
+                weight='normal')  # 无背景，简洁显示
+    return len(kept), len(names) - len(kept)
@@ -8,6 +8,9 @@ DFD Automation Tool - 统一主程序
 '''
 
 from dfd_processor import DFDProcessor
+from dfd_logger import get_logger, setup_logging
+
+logger = get_logger('main')
 
 # 用户可在此配置变量展开规则
 expand_dict = {
@@ -20,41 +23,59 @@ expand_dict = {
     "$ucis_right_inst" : [0,1,2,3,4,5,6,7,8,9,10,11,12,13,14,15]
 }
 
+# 日志配置：控制台日志级别（DEBUG/INFO/WARNING/ERROR），以及可选的JSON Lines日志文件（None表示不写）
+log_level = "INFO"
+log_jsonl_file = None  # 例如: "../output/dfd_run.jsonl"
+
 def main():
     """主程序入口 - 整合所有功能"""
-    print("🚀 DFD自动化工具启动")
-    print("=" * 50)
+    setup_logging(level=log_level, jsonl_path=log_jsonl_file)
+    logger.info("🚀 DFD自动化工具启动")
+    logger.info("=" * 50)
     
     # 🔧 用户配置参数
     # 设置为1开启有client的tile上显示tile名称功能，设置为0关闭此功能（默认）
     show_client_tile_names = 1  # 用户可在此修改：0=不显示, 1=显示tile名称
+    # 设置为True时额外导出 output/dfd.sqlite，便于之后用SQL直接查询块、tile和client映射
+    export_sqlite = False
+    # 设置为True时额外导出 output/tiles.geojson 和 output/tiles.geom（二进制几何），供其他工具直接读取tile几何
+    export_geometry = False
+    # client显示方式："markers"=逐个红点, "tile"=按client数量给tile着色, "grid"=网格热力图,
+    # "auto"=client超过1万个时自动使用"tile"热力图（默认）
+    client_display = "auto"
+    # 大于1时把 tiles_high_res.png 切成该数量的水平条带，多进程渲染后流式拼接（多核时更快、内存占用更低），0=单次渲染
+    render_strips = 0
+    # tiles_high_res.png 的分辨率；"auto"=按布局范围和最小tile尺寸选择图像尺寸与DPI（超出内存预算时另输出区域图像）
+    plot_dpi = 1200
     
     # 创建处理器实例
-    processor = DFDProcessor(expand_dict)
+    processor = DFDProcessor(expand_dict, plot_dpi=plot_dpi, client_display=client_display, render_strips=render_strips)
     
     # 运行完整分析流程（传入开关参数）
-    result = processor.run_complete_analysis(show_client_tile_names=show_client_tile_names)
+    result = processor.run_complete_analysis(show_client_tile_names=show_client_tile_names,
+                                            export_sqlite=export_sqlite,
+                                            export_geometry=export_geometry)
     
     # 输出结果
-    print("\n" + "=" * 50)
+    logger.info("\n" + "=" * 50)
     
     if result['success']:
-        print("📋 处理总结:")
-        print(f"   📦 芯片块处理: {result['blocks_count']} 个原始块 → {result['result_count']} 个展开结果")
-        print(f"   🎨 可视化处理: {'✅ 成功' if result['visualization_success'] else '❌ 失败'}")
+        logger.info("📋 处理总结:")
+        logger.info(f"   📦 芯片块处理: {result['blocks_count']} 个原始块 → {result['result_count']} 个展开结果")
+        logger.info(f"   🎨 可视化处理: {'✅ 成功' if result['visualization_success'] else '❌ 失败'}")
         
         # 输出警示信息
         if result['warning_messages']:
-            print("\n🚨 数据分析警告:")
-            for warning in result['warning_messages']:
-                print(f"   {warning}")
-            print("   📄 详细信息请查看: output/data_analysis_report.txt")
+            warning_lines = [f"   {warning}" for warning in result['warning_messages']]
+            logger.warning("\n🚨 数据分析警告:\n" + "\n".join(warning_lines),
+                           extra={'data': {'warnings': result['warning_messages']}})
+            logger.info("   📄 详细信息请查看: output/data_analysis_report.txt")
         else:
-            print("\n✅ 所有数据匹配检查通过，无警告信息")
+            logger.info("\n✅ 所有数据匹配检查通过，无警告信息")
             
-        print("✅ DFD自动化工具处理完成")
+        logger.info("✅ DFD自动化工具处理完成")
     else:
-        print(f"❌ {result['error']}")
+        logger.error(f"❌ {result['error']}")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+区域渲染工具
+对TileParser解析结果的任意矩形区域进行按需渲染（无标题/坐标轴，仅地图内容），
+供交互式浏览服务等需要局部图像的场景使用。
+"""
+
+import io
+
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.collections import PolyCollection
+from matplotlib.figure import Figure
+
+
+class RegionRenderer:
+    """预先整理tile的多边形、颜色和包围盒，按区域快速渲染"""
+
+    def __init__(self, parser, tile_client_mapping=None, highlight_client=None):
+        """
+        Args:
+            parser: 已调用parse_from_csv()的TileParser
+            tile_client_mapping: {tile_name: [client1, client2, ...]} 映射关系
+            highlight_client: 需要标记client的tile列表，默认为映射关系中的全部tile
+        """
+        self.parser = parser
+        self.tile_client_mapping = tile_client_mapping or {}
+        if highlight_client is None:
+            highlight_client = self.tile_client_mapping.keys()
+        self.highlight_client_set = set(highlight_client)
+
+        master_color_map = parser._get_color_map()
+        geometry = parser.geometry
+        drawable = np.nonzero(geometry.valid)[0]
+        self.names = [geometry.names[i] for i in drawable]
+        self.polygons = geometry.polygons(drawable)
+        self.colors = np.asarray([master_color_map[geometry.masters[i]] for i in drawable]).reshape(-1, 4)
+        self.bboxes = geometry.bboxes[drawable]  # xmin, ymin, xmax, ymax
+        self.name_to_index = {name: i for i, name in enumerate(self.names)}
+        # highlight与几何按行号连接（解析器带符号表时名称一次转为ID后查表）
+        rows = geometry.rows(self.highlight_client_set, parser.symbols)
+        highlighted = np.zeros(len(geometry), dtype=bool)
+        highlighted[rows[rows >= 0]] = True
+        self.highlight_mask = highlighted[drawable]
+        # 标记锚点：矩形tile为质心，被标记的非矩形tile使用内部代表点
+        self.anchors = geometry.centroids[drawable].copy()
+        self.anchors[self.highlight_mask] = geometry.interior_points(drawable[self.highlight_mask])[0]
+
+    def extent(self):
+        """整个布局的包围盒 (xmin, ymin, xmax, ymax)"""
+        if not len(self.bboxes):
+            return (0.0, 0.0, 1.0, 1.0)
+        return (self.bboxes[:, 0].min(), self.bboxes[:, 1].min(), self.bboxes[:, 2].max(), self.bboxes[:, 3].max())
+
+    def tiles_in_region(self, xmin, ymin, xmax, ymax):
+        """返回包围盒与区域相交的tile下标数组"""
+        b = self.bboxes
+        mask = (b[:, 0] <= xmax) & (b[:, 2] >= xmin) & (b[:, 1] <= ymax) & (b[:, 3] >= ymin)
+        return np.nonzero(mask)[0]
+
+    def render_png(self, xmin, ymin, xmax, ymax, width=256, height=256, draw_clients=True):
+        """
+        渲染指定区域为PNG
+
+        Args:
+            xmin, ymin, xmax, ymax: 数据坐标区域
+            width, height: 输出像素尺寸
+            draw_clients: 是否绘制client标记
+
+        Returns:
+            bytes: PNG图像数据
+        """
+        dpi = 100
+        fig = Figure(figsize=(width / dpi, height / dpi), dpi=dpi)
+        canvas = FigureCanvasAgg(fig)
+        fig.patch.set_alpha(0)
+        ax = fig.add_axes([0, 0, 1, 1])
+        ax.set_axis_off()
+        ax.set_xlim(xmin, xmax)
+        ax.set_ylim(ymin, ymax)
+
+        indices = self.tiles_in_region(xmin, ymin, xmax, ymax)
+        if len(indices):
+            # 缩小到tile只有几个像素时不再描边，避免整片发黑
+            median_size = np.median(np.minimum(self.bboxes[indices, 2] - self.bboxes[indices, 0],
+                                               self.bboxes[indices, 3] - self.bboxes[indices, 1]))
+            pixels_per_unit = width / max(xmax - xmin, 1e-9)
+            linewidth = 0.3 if median_size * pixels_per_unit > 6 else 0
+
+            collection = PolyCollection([self.polygons[i] for i in indices], closed=True,
+                                        facecolors=self.colors[indices], edgecolors='black',
+                                        linewidths=linewidth, alpha=0.7)
+            ax.add_collection(collection)
+
+            if draw_clients:
+                marked = indices[self.highlight_mask[indices]]
+                if len(marked):
+                    ax.plot(self.anchors[marked, 0], self.anchors[marked, 1], 'o', color='red', markersize=3,
+                            alpha=0.8, markeredgecolor='darkred', markeredgewidth=0.3)
+
+        buffer = io.BytesIO()
+        canvas.print_png(buffer)
+        return buffer.getvalue()
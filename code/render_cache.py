@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+渲染结果缓存
+tiles_high_res.png 只由tile几何和plot()参数决定。以二者的内容哈希为键，把渲染好的PNG保存在
+output/.render_cache/ 中，输入和参数都没有变化时直接复制缓存图像，不再重新绘制。
+缓存最多保留 max_entries 个变体（如不同的dpi、client显示方式），按最近使用顺序淘汰。
+渲染的附带结果（如分辨率规划）作为meta随条目保存在索引中，命中时一并取回。
+
+哈希内容：
+    - tile几何：名称、master、orient、顶点坐标（精确值）
+    - highlight_dbg / highlight_client / highlight_or_gate（集合，与顺序无关）
+    - tile_client_mapping（每个tile上client的顺序会影响标记位置，按原顺序计入）
+    - 其余plot()参数：title、figsize、dpi、show_client_tile_names、client_display 等
+"""
+
+import hashlib
+import json
+import os
+import shutil
+from collections.abc import Mapping
+from datetime import datetime
+from pathlib import Path
+
+from dfd_logger import get_logger
+
+logger = get_logger('render_cache')
+
+RENDER_CACHE_DIR = '.render_cache'
+DEFAULT_MAX_ENTRIES = 8
+CACHE_FORMAT_VERSION = 3  # 图像内容的生成方式变化时递增，使旧缓存失效
+INDEX_FILE = 'index.json'
+_SET_OPTIONS = ('highlight_dbg', 'highlight_client', 'highlight_or_gate')
+
+
+def geometry_digest(geometry):
+    """tile几何的精确内容哈希"""
+    digest = hashlib.blake2b(digest_size=16)
+    for values in (geometry.names, geometry.masters, geometry.orients):
+        digest.update("\n".join(values).encode('utf-8'))
+        digest.update(b'\0')
+    digest.update(geometry.offsets.tobytes())
+    digest.update(geometry.coords.tobytes())
+    return digest.hexdigest()
+
+
+def _normalize_option(name, value):
+    if name in _SET_OPTIONS:
+        if value is None:
+            return []
+        return sorted({value} if isinstance(value, str) else set(value))
+    if isinstance(value, Mapping):
+        return [[key, list(value[key])] for key in sorted(value)]
+    if isinstance(value, tuple):
+        return list(value)
+    return value
+
+
+def render_key(geometry, **plot_options):
+    """
+    由tile几何和plot()参数计算缓存键
+
+    Args:
+        geometry: TileGeometry
+        **plot_options: 传给TileParser.plot()的参数（save_path/show等不影响图像内容的参数不要传入）
+
+    Returns:
+        str: 十六进制哈希
+    """
+    import matplotlib
+
+    payload = {
+        'version': CACHE_FORMAT_VERSION,
+        'matplotlib': matplotlib.__version__,
+        'geometry': geometry_digest(geometry),
+        'options': {name: _normalize_option(name, value) for name, value in sorted(plot_options.items())},
+    }
+    encoded = json.dumps(payload, ensure_ascii=False, sort_keys=True, default=str).encode('utf-8')
+    return hashlib.blake2b(encoded, digest_size=16).hexdigest()
+
+
+class RenderCache:
+    """按键保存渲染好的图像，最近最少使用的变体先被淘汰"""
+
+    def __init__(self, cache_dir, max_entries=DEFAULT_MAX_ENTRIES):
+        """
+        Args:
+            cache_dir: 缓存目录
+            max_entries: 最多保留的变体数
+        """
+        self.cache_dir = Path(cache_dir)
+        self.max_entries = max(1, int(max_entries))
+        self.index_path = self.cache_dir / INDEX_FILE
+
+    def _load_index(self):
+        """返回 [{key, suffix, bytes, last_used}, ...]，按最近使用时间从旧到新"""
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            return []
+        if index.get('version') != CACHE_FORMAT_VERSION:
+            return []
+        return [entry for entry in index.get('entries', []) if self._entry_path(entry).exists()]
+
+    def _save_index(self, entries):
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.index_path.with_name(INDEX_FILE + '.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': CACHE_FORMAT_VERSION, 'entries': entries}, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.index_path)
+
+    def _entry_path(self, entry):
+        return self.cache_dir / f"{entry['key']}{entry['suffix']}"
+
+    def keys(self):
+        """缓存中的键，按最近使用时间从旧到新"""
+        return [entry['key'] for entry in self._load_index()]
+
+    def _touch(self, key, suffix):
+        """返回命中的索引条目并更新使用时间，未命中时返回None"""
+        entries = self._load_index()
+        for position, entry in enumerate(entries):
+            if entry['key'] == key and entry['suffix'] == suffix:
+                break
+        else:
+            return None
+        entry['last_used'] = datetime.now().isoformat(timespec='seconds')
+        entries.append(entries.pop(position))
+        self._save_index(entries)
+        return entry
+
+    def lookup(self, key, suffix):
+        """
+        返回缓存文件路径并更新使用时间，未命中时返回None（直接读取缓存文件而不复制时使用）
+        """
+        entry = self._touch(key, suffix)
+        return None if entry is None else self._entry_path(entry)
+
+    def fetch(self, key, target):
+        """
+        命中时把缓存图像复制到target并更新使用时间
+
+        Returns:
+            dict或None: 命中时返回store()时保存的meta（未保存时为空dict），未命中时返回None
+        """
+        target = Path(target)
+        entry = self._touch(key, target.suffix)
+        if entry is None:
+            return None
+        target.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = target.with_name(target.name + '.tmp')
+        shutil.copyfile(self._entry_path(entry), tmp_path)
+        os.replace(tmp_path, target)
+        return entry.get('meta', {})
+
+    def store(self, key, source, move=False, meta=None):
+        """
+        把渲染好的文件加入缓存，超出max_entries时淘汰最久未使用的变体
+
+        Args:
+            move: 为True时把source移动到缓存目录（须与缓存目录在同一文件系统），否则复制
+            meta: 随条目保存的可JSON序列化的附带结果，fetch()命中时返回
+        """
+        source = Path(source)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        entry = {
+            'key': key,
+            'suffix': source.suffix,
+            'bytes': source.stat().st_size,
+            'last_used': datetime.now().isoformat(timespec='seconds'),
+        }
+        if meta is not None:
+            entry['meta'] = meta
+        if move:
+            os.replace(source, self._entry_path(entry))
+        else:
+            tmp_path = self.cache_dir / f"{key}{source.suffix}.tmp"
+            shutil.copyfile(source, tmp_path)
+            os.replace(tmp_path, self._entry_path(entry))
+
+        entries = [existing for existing in self._load_index() if existing['key'] != key]
+        entries.append(entry)
+        evicted, entries = entries[:-self.max_entries], entries[-self.max_entries:]
+        for old in evicted:
+            try:
+                self._entry_path(old).unlink()
+            except OSError:
+                pass
+        self._save_index(entries)
+        if evicted:
+            logger.info(f"🗑️ 渲染缓存已满（{self.max_entries}个），淘汰 {len(evicted)} 个最久未使用的文件")
@@ -0,0 +1,341 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+数据分析报告构建器
+在JSON-Excel整合的同一遍遍历中增量收集统计数据和有限数量的样本，
+最后由这些聚合结果生成文本报告和对应的JSON报告。
+内存占用只与模块数量相关，与未匹配条目的数量无关。
+"""
+
+import json
+from datetime import datetime
+from pathlib import Path
+
+from fuzzy_index import format_suggestion
+
+# 文本报告中每个模块最多列出的未匹配条目数
+SAMPLES_PER_MODULE = 10
+# 文本报告中最多列出的未匹配条目总数
+MAX_LISTED_ENTRIES = 50
+# 布局检查中最多列出的重叠对/空隙数量（文本报告和JSON报告相同）
+MAX_LISTED_FLOORPLAN_ITEMS = 100
+
+
+class AnalysisReportBuilder:
+    """增量收集数据分析报告所需的计数与样本"""
+
+    def __init__(self, samples_per_module=SAMPLES_PER_MODULE, max_listed_entries=MAX_LISTED_ENTRIES):
+        self.samples_per_module = samples_per_module
+        self.max_listed_entries = max_listed_entries
+
+        self.total_pairs = 0
+        self.filled_pairs = 0
+        self.unmatched_count = 0
+        self.module_unmatched_counts = {}  # {module: 未匹配条目数}，保持首次出现顺序
+        self.module_samples = {}  # {module: [(instance, dbg_blk_id), ...]}，每个模块最多samples_per_module个
+
+        # Tile绘图匹配分析，由set_tile_analysis()填充
+        self.tile_analysis = None
+        # Tile布局重叠/空隙检查，由set_floorplan_check()填充
+        self.floorplan_check = None
+        # 未匹配Excel行的模糊匹配建议，由set_match_suggestions()填充
+        self.match_suggestions = []
+        self.match_suggestion_count = 0  # 建议总数（从JSON报告恢复时只有前max_listed_entries个条目）
+
+    def add_pair(self, module, instance, dbg_blk_id, tile_name):
+        """记录一个DbgBlkId配对的整合结果"""
+        self.total_pairs += 1
+        if tile_name and tile_name.strip():
+            self.filled_pairs += 1
+            return
+
+        self.unmatched_count += 1
+        count = self.module_unmatched_counts.get(module, 0)
+        self.module_unmatched_counts[module] = count + 1
+        if count < self.samples_per_module:
+            self.module_samples.setdefault(module, []).append((instance, dbg_blk_id.strip()))
+
+    def add_json_data(self, json_data):
+        """从已有的JSON数据（未经整合时）收集全部配对"""
+        for json_entry in json_data.values():
+            module = json_entry.get('module', '')
+            instance = json_entry.get('instance', '')
+            for pair in json_entry.get('pairs', []):
+                self.add_pair(module, instance, pair.get('DbgBlkId', ''), pair.get('tile_name', ''))
+        return self
+
+    def set_tile_analysis(self, missing_client_tiles=None, available_tiles_count=0, highlight_client_count=0,
+                          skipped_tiles=None, client_tile_index=None):
+        """
+        记录Tile绘图匹配分析结果
+
+        Args:
+            missing_client_tiles: highlight_client中在绘图数据里不存在的tile集合，None表示未进行可视化
+            available_tiles_count: 可用tile总数
+            highlight_client_count: 请求highlight的tile数量
+            skipped_tiles: 顶点少于3个而未绘制的tile列表
+            client_tile_index: 可选的ClientTileIndex，用于列出映射到不存在tile上的client
+        """
+        missing_client_tiles = None if missing_client_tiles is None else sorted(missing_client_tiles)
+        self.tile_analysis = {
+            'missing_client_tiles': missing_client_tiles,
+            'available_tiles_count': available_tiles_count,
+            'highlight_client_count': highlight_client_count,
+            'skipped_tiles': list(skipped_tiles or []),
+        }
+        if client_tile_index is not None and missing_client_tiles:
+            self.tile_analysis['missing_tile_clients'] = {
+                tile_name: list(client_tile_index.clients(tile_name)) for tile_name in missing_client_tiles
+            }
+
+    def set_match_suggestions(self, suggestions):
+        """记录未匹配Excel行的模糊匹配建议（fuzzy_index.MatchSuggester.suggest_all的返回值）"""
+        self.match_suggestions = list(suggestions or [])
+        self.match_suggestion_count = len(self.match_suggestions)
+
+    def restore_analysis(self, report):
+        """
+        从上一次写出的JSON报告（to_dict的结果）恢复Tile匹配分析、布局检查和模糊匹配建议，
+        只重新统计JSON配对时（cli.py report）使用；报告中的列表已按文本报告的展示数量截断，重新写出的文本一致
+        """
+        self.tile_analysis = report.get('tile_analysis')
+        self.floorplan_check = report.get('floorplan_check')
+        suggestions = report.get('match_suggestions') or {}
+        self.match_suggestions = list(suggestions.get('items', []))
+        self.match_suggestion_count = suggestions.get('count', len(self.match_suggestions))
+        return self
+
+    def set_floorplan_check(self, floorplan_check):
+        """记录Tile布局重叠/空隙检查结果（floorplan_check.check_floorplan的返回值）"""
+        self.floorplan_check = floorplan_check
+
+    def fill_rate(self):
+        """tile_name填充成功率（百分比），无配对时返回None"""
+        if self.total_pairs == 0:
+            return None
+        return self.filled_pairs / self.total_pairs * 100
+
+    def warning_messages(self):
+        """生成控制台摘要使用的警告信息"""
+        warnings = []
+        if self.unmatched_count > 0:
+            warnings.append(f"⚠️ JSON未填充条目: {self.unmatched_count}个")
+        tile_analysis = self.tile_analysis or {}
+        if tile_analysis.get('missing_client_tiles'):
+            warnings.append(f"⚠️ 未匹配Tile数量: {len(tile_analysis['missing_client_tiles'])}个")
+        if tile_analysis.get('skipped_tiles'):
+            warnings.append(f"⚠️ 顶点不足未绘制的Tile: {len(tile_analysis['skipped_tiles'])}个")
+        floorplan_check = self.floorplan_check or {}
+        if floorplan_check.get('overlap_count'):
+            warnings.append(f"⚠️ 重叠的Tile对: {floorplan_check['overlap_count']}对")
+        if floorplan_check.get('gap_count'):
+            warnings.append(f"⚠️ 布局空隙: {floorplan_check['gap_count']}处")
+        return warnings
+
+    def to_dict(self):
+        """报告的机器可读版本"""
+        return {
+            'generated_at': datetime.now().isoformat(timespec='seconds'),
+            'json_pairs': {
+                'total_pairs': self.total_pairs,
+                'filled_pairs': self.filled_pairs,
+                'unmatched_count': self.unmatched_count,
+                'fill_rate': None if self.fill_rate() is None else round(self.fill_rate(), 2),
+                'unmatched_by_module': [
+                    {
+                        'module': module,
+                        'unmatched_count': count,
+                        'samples': [{'instance': inst, 'dbg_blk_id': dbg} for inst, dbg in self.module_samples.get(module, [])]
+                    }
+                    for module, count in self.module_unmatched_counts.items()
+                ],
+            },
+            'match_suggestions': {
+                'count': self.match_suggestion_count,
+                'items': self.match_suggestions[:self.max_listed_entries],
+            },
+            'tile_analysis': self.tile_analysis,
+            'floorplan_check': self._floorplan_summary(),
+            'warnings': self.warning_messages(),
+        }
+
+    def _write_json_section(self, f):
+        """第一部分：JSON未填充条目分析"""
+        f.write("第一部分：JSON中未填充tile_name的条目分析\n")
+        f.write("-" * 50 + "\n")
+
+        f.write(f"JSON数据统计：\n")
+        f.write(f"• 总配对数 (pairs): {self.total_pairs}\n")
+        f.write(f"• 已填充tile_name数: {self.filled_pairs}\n")
+        f.write(f"• 未填充tile_name数: {self.unmatched_count}\n")
+        if self.total_pairs > 0:
+            f.write(f"• 填充成功率: {self.fill_rate():.1f}%\n\n")
+
+        if not self.unmatched_count:
+            return
+
+        f.write(f"未填充tile_name的详细条目 (前{self.max_listed_entries}个):\n")
+        f.write("-" * 30 + "\n")
+
+        # 按模块分组显示
+        count = 0
+        for module, module_count in self.module_unmatched_counts.items():
+            if count >= self.max_listed_entries:
+                break
+            f.write(f"\n模块: {module}\n")
+            for instance, dbg_blk_id in self.module_samples.get(module, []):
+                if count >= self.max_listed_entries:
+                    break
+                f.write(f"  • 实例: {instance}, DbgBlkId: {dbg_blk_id}\n")
+                count += 1
+            if module_count > self.samples_per_module:
+                f.write(f"  ... 该模块还有 {module_count - self.samples_per_module} 个未匹配条目\n")
+
+        if self.unmatched_count > self.max_listed_entries:
+            f.write(f"\n... 总计还有 {self.unmatched_count - self.max_listed_entries} 个未显示的未匹配条目\n")
+
+    def _write_suggestion_section(self, f):
+        """第一部分附：未匹配Excel行的疑似对应项"""
+        if not self.match_suggestions:
+            return
+        f.write(f"\n未匹配Excel行的疑似对应项 (前{self.max_listed_entries}个，括号内为相似度):\n")
+        f.write("-" * 30 + "\n")
+        for suggestion in self.match_suggestions[:self.max_listed_entries]:
+            f.write(f"  • {format_suggestion(suggestion)}\n")
+        if self.match_suggestion_count > self.max_listed_entries:
+            f.write(f"... 还有 {self.match_suggestion_count - self.max_listed_entries} 个，完整列表见 unmatched_analysis_report.txt\n")
+
+    def _write_tile_section(self, f):
+        """第二部分：Tile绘图匹配分析"""
+        f.write("\n第二部分：Tile绘图数据匹配分析\n")
+        f.write("-" * 40 + "\n")
+
+        tile_analysis = self.tile_analysis or {}
+        missing_client_tiles = tile_analysis.get('missing_client_tiles')
+        if missing_client_tiles is not None:
+            f.write(f"总计：{len(missing_client_tiles)} 个highlight_client中的tile在绘图数据中不存在\n\n")
+
+            if missing_client_tiles:
+                f.write("详细列表：\n")
+                missing_tile_clients = tile_analysis.get('missing_tile_clients', {})
+                for i, missing_tile in enumerate(missing_client_tiles, 1):
+                    clients = missing_tile_clients.get(missing_tile)
+                    if clients:
+                        f.write(f"{i:3d}. {missing_tile}  <- {', '.join(clients)}\n")
+                    else:
+                        f.write(f"{i:3d}. {missing_tile}\n")
+
+            highlight_client_count = tile_analysis['highlight_client_count']
+            f.write(f"\n可用tile总数：{tile_analysis['available_tiles_count']}\n")
+            f.write(f"请求highlight数量：{highlight_client_count}\n")
+            matched_count = highlight_client_count - len(missing_client_tiles)
+            f.write(f"匹配成功数量：{matched_count}\n")
+            if highlight_client_count > 0:
+                f.write(f"匹配成功率：{(matched_count / highlight_client_count * 100):.1f}%\n")
+        else:
+            f.write("未找到Tile匹配分析数据\n")
+
+        skipped_tiles = tile_analysis.get('skipped_tiles')
+        if skipped_tiles:
+            f.write(f"\n顶点少于3个、未绘制的tile ({len(skipped_tiles)}个)：\n")
+            for i, tile_name in enumerate(skipped_tiles, 1):
+                f.write(f"{i:3d}. {tile_name}\n")
+
+    def _floorplan_summary(self):
+        """布局检查结果，重叠对和空隙列表截断到MAX_LISTED_FLOORPLAN_ITEMS"""
+        if self.floorplan_check is None:
+            return None
+        summary = dict(self.floorplan_check)
+        summary['overlaps'] = summary['overlaps'][:MAX_LISTED_FLOORPLAN_ITEMS]
+        summary['gaps'] = summary['gaps'][:MAX_LISTED_FLOORPLAN_ITEMS]
+        if 'gap_regions' in summary:
+            summary['gap_regions'] = summary['gap_regions'][:MAX_LISTED_FLOORPLAN_ITEMS]
+        return summary
+
+    def _write_floorplan_section(self, f):
+        """第三部分：Tile布局重叠与空隙检查"""
+        f.write("\n第三部分：Tile布局重叠与空隙检查\n")
+        f.write("-" * 40 + "\n")
+
+        check = self.floorplan_check
+        if check is None:
+            f.write("未进行布局检查\n")
+            return
+
+        xmin, ymin, xmax, ymax = check['outline']
+        f.write(f"检查tile数：{check['tiles_checked']}（分解为 {check['rectangles']} 个矩形，耗时 {check['seconds']:.2f}s）\n")
+        f.write(f"die轮廓：({xmin:g}, {ymin:g}) - ({xmax:g}, {ymax:g})\n")
+        f.write(f"重叠tile对：{check['overlap_count']}，重叠总面积：{check['overlap_area']:g}\n")
+        gap_rectangles = check.get('gap_rectangles', len(check['gaps']))
+        f.write(f"未覆盖空隙：{check['gap_count']} 处（{gap_rectangles} 个矩形），空隙总面积：{check['gap_area']:g}\n")
+        if check['coverage'] is not None:
+            f.write(f"覆盖率：{check['coverage']:.2f}%\n")
+
+        if check['overlaps']:
+            f.write(f"\n重叠的tile对 (前{MAX_LISTED_FLOORPLAN_ITEMS}个)：\n")
+            for i, item in enumerate(check['overlaps'][:MAX_LISTED_FLOORPLAN_ITEMS], 1):
+                f.write(f"{i:3d}. {item['tile_a']} ↔ {item['tile_b']}，重叠面积 {item['area']:g}\n")
+            if check['overlap_count'] > MAX_LISTED_FLOORPLAN_ITEMS:
+                f.write(f"... 还有 {check['overlap_count'] - MAX_LISTED_FLOORPLAN_ITEMS} 对未显示\n")
+
+        # 旧版检查结果没有gap_regions，每个矩形各算一处
+        regions = check.get('gap_regions') or [
+            {'bbox': list(g), 'area': (g[2] - g[0]) * (g[3] - g[1]), 'rectangles': 1} for g in check['gaps']]
+        if regions:
+            f.write(f"\n未覆盖空隙 (前{MAX_LISTED_FLOORPLAN_ITEMS}处，按连通区域的包围盒列出)：\n")
+            for i, region in enumerate(regions[:MAX_LISTED_FLOORPLAN_ITEMS], 1):
+                x0, y0, x1, y1 = region['bbox']
+                f.write(f"{i:3d}. ({x0:g}, {y0:g}) - ({x1:g}, {y1:g})，面积 {region['area']:g}"
+                        f"（{region['rectangles']} 个矩形）\n")
+            if check['gap_count'] > MAX_LISTED_FLOORPLAN_ITEMS:
+                f.write(f"... 还有 {check['gap_count'] - MAX_LISTED_FLOORPLAN_ITEMS} 处未显示\n")
+
+        if check['approximated_tiles']:
+            f.write(f"\n非直角tile按包围盒近似检查 ({len(check['approximated_tiles'])}个)：\n")
+            for i, tile_name in enumerate(check['approximated_tiles'][:MAX_LISTED_FLOORPLAN_ITEMS], 1):
+                f.write(f"{i:3d}. {tile_name}\n")
+
+    def _write_advice_section(self, f):
+        """第四部分：总结和建议"""
+        f.write("\n第四部分：总结和建议\n")
+        f.write("-" * 40 + "\n")
+        f.write("建议处理步骤：\n")
+        f.write("1. 检查Excel文件(Mapping.xlsx)中的模块命名是否与JSON数据一致\n")
+        f.write("2. 检查Excel文件中的instance名称是否与JSON数据匹配\n")
+        f.write("3. 检查Excel文件中的DbgBlkId是否与JSON数据中的DbgBlkId匹配\n")
+        f.write("4. 验证Excel文件F列的Tile名称在MID.csv文件中是否存在\n")
+        f.write("5. 确保数据源之间的同步性\n")
+        f.write("6. 考虑更新数据映射规则以提高匹配率\n")
+        f.write("7. 检查测试数据是否已正确清理\n")
+        f.write("8. 检查MID.csv中重叠或留有空隙的tile坐标\n")
+
+    def write_reports(self, output_dir, base_name="data_analysis_report"):
+        """
+        写出文本报告及其JSON版本
+
+        Args:
+            output_dir: 输出目录
+            base_name: 报告文件名（不含扩展名）
+
+        Returns:
+            tuple: (文本报告路径, JSON报告路径)
+        """
+        output_dir = Path(output_dir)
+        output_dir.mkdir(parents=True, exist_ok=True)
+        txt_file = output_dir / f"{base_name}.txt"
+        json_file = output_dir / f"{base_name}.json"
+
+        with open(txt_file, 'w', encoding='utf-8') as f:
+            f.write("DFD数据分析报告\n")
+            f.write("=" * 60 + "\n")
+            f.write(f"生成时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n")
+            self._write_json_section(f)
+            self._write_suggestion_section(f)
+            self._write_tile_section(f)
+            self._write_floorplan_section(f)
+            self._write_advice_section(f)
+
+        with open(json_file, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
+
+        return txt_file, json_file
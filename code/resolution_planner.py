@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+输出分辨率规划
+固定的 figsize=(12, 8)、dpi=1200 对小布局会生成过大的图像，对很密的布局最小的tile仍然看不清。
+规划器按布局范围和最小tile尺寸选择图像尺寸：
+    - figsize: 宽度固定，高度按布局纵横比确定（坐标轴区域与布局形状一致，不留大片空白）
+    - dpi: 在已完成布局的Figure上测量坐标轴每个数据单位对应的英寸数，使最小tile的短边达到
+      min_tile_pixels 像素；不超过内存预算（RGBA画布字节数），但MIN_DPI（文字清晰）是下限，只受Agg单边像素上限约束
+    - 单张图像无法同时满足两者时：
+        regions  按目标分辨率把布局切成若干区域图像（output/tiles_regions/），总览图使用预算内的最高DPI；
+                 每个区域图像的RGBA画布同样不超过内存预算
+        pyramid  区域图像过多时不再写文件，改用 tile_server.py 按需渲染的瓦片金字塔浏览细节
+    - 预算连MIN_DPI的总览图都容纳不下时，总览图按行条带逐条渲染（strips），每个条带的画布不超过预算
+"""
+
+import json
+import math
+import os
+from pathlib import Path
+
+import numpy as np
+
+from dfd_logger import get_logger
+from tile_server import MAP_TILE_SIZE, MAX_ZOOM
+
+logger = get_logger('resolution_planner')
+
+DEFAULT_MIN_TILE_PIXELS = 12  # 最小tile短边的目标像素数
+DEFAULT_RENDER_MEMORY = 512 * 1024 * 1024  # 单张图像RGBA画布的字节上限
+MIN_DPI = 150
+MAX_IMAGE_SIDE = 65535  # Agg画布每个方向须小于2^16像素
+FIGURE_WIDTH_INCHES = 12
+FIGURE_HEIGHT_RANGE = (4, 24)  # 英寸
+DECORATION_INCHES = (1.5, 1.2)  # 标题、坐标轴标签和刻度大致占用的宽/高
+REGION_SIDE_PIXELS = 4096  # 区域图像的边长上限（内存预算更小时按预算缩小）
+MAX_REGION_IMAGES = 256  # 超过该数量时改为瓦片金字塔
+REGION_DIR = 'tiles_regions'
+
+
+def min_tile_size(geometry):
+    """可绘制tile中最短的边（包围盒宽高的较小值），没有可绘制的tile时返回None"""
+    sizes = np.minimum(geometry.widths(), geometry.heights())[geometry.valid]
+    sizes = sizes[sizes > 0]
+    return float(sizes.min()) if len(sizes) else None
+
+
+def plan_figsize(geometry, width=FIGURE_WIDTH_INCHES):
+    """按布局纵横比选择figsize（宽度固定）"""
+    xmin, ymin, xmax, ymax = geometry.extent()
+    aspect = (ymax - ymin + 2) / max(xmax - xmin + 2, 1e-9)  # 与build_figure的坐标范围一致（两侧各留1）
+    decoration_width, decoration_height = DECORATION_INCHES
+    height = (width - decoration_width) * aspect + decoration_height
+    height = min(max(height, FIGURE_HEIGHT_RANGE[0]), FIGURE_HEIGHT_RANGE[1])
+    return (float(width), round(float(height), 1))
+
+
+def _axes_inches_per_unit(fig):
+    """主坐标轴（第一个Axes）上每个数据单位对应的英寸数（set_aspect('equal')后x、y相同）"""
+    ax = fig.axes[0]
+    ax.apply_aspect()
+    box = ax.get_position()
+    fig_width, fig_height = fig.get_size_inches()
+    x0, x1 = ax.get_xlim()
+    y0, y1 = ax.get_ylim()
+    return min(box.width * fig_width / max(abs(x1 - x0), 1e-12), box.height * fig_height / max(abs(y1 - y0), 1e-12))
+
+
+def _output_inches(fig):
+    """savefig(bbox_inches='tight')的输出尺寸（英寸）；tile集合在坐标轴内且被裁剪，测量时跳过以免遍历所有多边形"""
+    from strip_render import measure_output_bbox
+
+    hidden = [artist for ax in fig.axes for artist in (*ax.collections, *ax.images) if artist.get_visible()]
+    for artist in hidden:
+        artist.set_visible(False)
+    try:
+        bbox, _, _ = measure_output_bbox(fig, 100)
+    finally:
+        for artist in hidden:
+            artist.set_visible(True)
+    return bbox.width, bbox.height
+
+
+def plan_resolution(fig, geometry, min_tile_pixels=None, memory_budget=None):
+    """
+    为已完成布局的Figure选择dpi
+
+    Args:
+        fig: TileParser.build_figure() 构建的Figure
+        geometry: TileGeometry
+        min_tile_pixels: 最小tile短边的目标像素数
+        memory_budget: 单张图像RGBA画布的字节上限
+
+    Returns:
+        dict: {mode, dpi, figsize, width, height, bytes, strips, min_tile, tile_pixels, target_dpi,
+               pixels_per_unit, regions, region_side, zoom}
+              mode为 'single' / 'regions' / 'pyramid'；tile_pixels为所选dpi下最小tile短边的像素数；
+              strips为总览图按预算需要分几个行条带渲染（1为单次渲染）
+    """
+    min_tile_pixels = min_tile_pixels or DEFAULT_MIN_TILE_PIXELS
+    memory_budget = memory_budget or DEFAULT_RENDER_MEMORY
+    width_in, height_in = _output_inches(fig)
+    inches_per_unit = float(_axes_inches_per_unit(fig))
+    smallest = min_tile_size(geometry)
+
+    target_dpi = MIN_DPI if smallest is None else min_tile_pixels / (smallest * inches_per_unit)
+    side_dpi = max(int(MAX_IMAGE_SIDE / max(width_in, height_in)), 1)  # Agg画布的硬上限
+    max_dpi = max(min(int(math.sqrt(memory_budget / 4 / (width_in * height_in))), side_dpi), 1)
+    dpi = min(max(min(int(math.ceil(target_dpi)), max_dpi), MIN_DPI), side_dpi)
+    mode = 'single' if target_dpi <= dpi else 'regions'  # 下限DPI已达到目标时无需区域图像
+
+    # 目标分辨率下的区域划分（数据坐标每单位像素数，区域边长按预算限制）与tile_server中达到该分辨率的缩放级别
+    pixels_per_unit = min_tile_pixels / smallest if smallest else dpi * inches_per_unit
+    region_side = max(min(REGION_SIDE_PIXELS, int(math.sqrt(memory_budget / 4))), 1)
+    xmin, ymin, xmax, ymax = geometry.extent()
+    columns = max(1, math.ceil((xmax - xmin) * pixels_per_unit / region_side))
+    rows = max(1, math.ceil((ymax - ymin) * pixels_per_unit / region_side))
+    world = max(xmax - xmin, ymax - ymin) or 1.0
+    zoom = min(MAX_ZOOM, math.ceil(math.log2(max(world * pixels_per_unit / MAP_TILE_SIZE, 1))))
+    if mode == 'regions' and columns * rows > MAX_REGION_IMAGES:
+        mode = 'pyramid'
+
+    width_px, height_px = int(width_in * dpi), int(height_in * dpi)
+    image_bytes = width_px * height_px * 4
+    return {
+        'mode': mode,
+        'dpi': dpi,
+        'figsize': tuple(float(value) for value in fig.get_size_inches()),
+        'width': width_px,
+        'height': height_px,
+        'bytes': image_bytes,
+        'strips': max(1, math.ceil(image_bytes / memory_budget)),
+        'min_tile': smallest,
+        'tile_pixels': None if smallest is None else smallest * inches_per_unit * dpi,
+        'target_dpi': target_dpi,
+        'pixels_per_unit': pixels_per_unit,
+        'regions': (columns, rows),
+        'region_side': region_side,
+        'zoom': zoom,
+    }
+
+
+def log_plan(plan):
+    """输出规划结果"""
+    achieved = plan['tile_pixels']
+    achieved = f"，最小tile约 {achieved:.1f} 像素" if achieved is not None else ""
+    logger.info(f"📐 分辨率规划: figsize={plan['figsize']}, DPI={plan['dpi']} "
+                f"({plan['width']}x{plan['height']} 像素, {plan['bytes'] / 2 ** 20:.0f}MB){achieved}")
+    if plan['strips'] > 1:
+        logger.info(f"🧵 内存预算容纳不下 {MIN_DPI} DPI 的总览图，按 {plan['strips']} 个行条带逐条渲染")
+    if plan['mode'] == 'regions':
+        columns, rows = plan['regions']
+        logger.info(f"🧩 单张图像超出内存预算，另按目标分辨率输出 {columns}x{rows} 个区域图像")
+    elif plan['mode'] == 'pyramid':
+        columns, rows = plan['regions']
+        logger.info(f"🗺️ 目标分辨率需要 {columns}x{rows} 个区域图像，请用 tile_server.py 浏览细节"
+                    f"（第 {plan['zoom']} 级瓦片达到目标分辨率）")
+
+
+def region_images_current(output_dir, key):
+    """output_dir/tiles_regions/ 中的区域图像是否由同一渲染缓存键写出且文件齐全"""
+    region_dir = Path(output_dir) / REGION_DIR
+    try:
+        with open(region_dir / 'regions.json', 'r', encoding='utf-8') as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        return False
+    return index.get('key') == key and all((region_dir / region['file']).exists() for region in index['regions'])
+
+
+def write_region_images(parser, plan, output_dir, tile_client_mapping=None, highlight_client=None, key=None):
+    """
+    按规划的目标分辨率把布局切成区域图像写入 output_dir/tiles_regions/，并写出区域索引 regions.json
+
+    Args:
+        key: 总览图的渲染缓存键，记录在regions.json中，用于判断区域图像是否过期
+
+    Returns:
+        list: 写出的图像路径
+    """
+    from region_render import RegionRenderer
+
+    region_dir = Path(output_dir) / REGION_DIR
+    region_dir.mkdir(parents=True, exist_ok=True)
+    for stale in region_dir.glob('region_r*_c*.png'):  # 上一次的划分可能不同
+        stale.unlink()
+    renderer = RegionRenderer(parser, tile_client_mapping, highlight_client)
+    xmin, ymin, xmax, ymax = parser.geometry.extent()
+    columns, rows = plan['regions']
+    span_x, span_y = (xmax - xmin) / columns, (ymax - ymin) / rows
+    width = max(1, int(round(span_x * plan['pixels_per_unit'])))
+    height = max(1, int(round(span_y * plan['pixels_per_unit'])))
+
+    paths, index = [], []
+    for row in range(rows):
+        for column in range(columns):
+            # 第0行在布局顶部，与图像的阅读方向一致
+            region = (xmin + column * span_x, ymax - (row + 1) * span_y, xmin + (column + 1) * span_x, ymax - row * span_y)
+            path = region_dir / f"region_r{row:03d}_c{column:03d}.png"
+            tmp_path = path.with_name(path.name + '.tmp')
+            tmp_path.write_bytes(renderer.render_png(*region, width=width, height=height))
+            os.replace(tmp_path, path)
+            paths.append(path)
+            index.append({'file': path.name, 'row': row, 'column': column, 'extent': list(region)})
+
+    with open(region_dir / 'regions.json', 'w', encoding='utf-8') as f:
+        json.dump({'key': key, 'pixels_per_unit': plan['pixels_per_unit'], 'size': [width, height], 'regions': index},
+                  f, ensure_ascii=False, indent=2)
+    logger.info(f"🧩 区域图像已保存到: {region_dir} ({len(paths)} 个, 每个 {width}x{height} 像素)")
+    return paths
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+SQLite导出
+把整合后的数据写入一个带索引的SQLite数据库，之后的临时查询无需重新运行流程：
+    - blocks:        展开后的模块实例 (module, instance)
+    - pairs:         每个实例的DbgBlkId及整合得到的tile_name
+    - excel_mapping: Mapping.xlsx的A/B/C/F列
+    - tiles:         MID.csv中的tile及其包围盒、面积、质心
+    - client_tiles:  client与tile的对应关系
+    - unmatched_pairs（视图）: tile_name未填充的配对
+数据与索引在同一个事务中写入：先用executemany批量插入，再逐条建索引，最后一次提交。
+先写临时文件，完成后替换目标文件；中途出错时回滚并删除临时文件，已有的目标文件保持不变。
+
+查询示例：
+    sqlite3 output/dfd.sqlite "SELECT DISTINCT tile_name FROM client_tiles WHERE module = 'xxx'"
+    sqlite3 output/dfd.sqlite "SELECT instance, COUNT(*) FROM unmatched_pairs GROUP BY instance"
+"""
+
+import os
+import sqlite3
+from datetime import datetime
+from pathlib import Path
+
+from dfd_logger import get_logger
+
+logger = get_logger('sqlite_export')
+
+DEFAULT_DB_NAME = "dfd.sqlite"
+
+SCHEMA = """
+CREATE TABLE meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE blocks (
+    id INTEGER PRIMARY KEY,
+    key TEXT NOT NULL,
+    module TEXT NOT NULL,
+    instance TEXT NOT NULL
+);
+CREATE TABLE pairs (
+    id INTEGER PRIMARY KEY,
+    block_id INTEGER NOT NULL REFERENCES blocks(id),
+    dbg_blk_id TEXT NOT NULL,
+    tile_name TEXT NOT NULL
+);
+CREATE TABLE excel_mapping (
+    id INTEGER PRIMARY KEY,
+    module TEXT NOT NULL,
+    instance TEXT NOT NULL,
+    dbg_blk_id TEXT NOT NULL,
+    tile_name TEXT NOT NULL
+);
+CREATE TABLE tiles (
+    name TEXT PRIMARY KEY,
+    master TEXT,
+    orient TEXT,
+    vertex_count INTEGER,
+    xmin REAL, ymin REAL, xmax REAL, ymax REAL,
+    area REAL,
+    cx REAL, cy REAL
+);
+CREATE TABLE client_tiles (
+    client TEXT NOT NULL,
+    tile_name TEXT NOT NULL,
+    module TEXT,
+    instance TEXT,
+    dbg_blk_id TEXT
+);
+CREATE VIEW unmatched_pairs AS
+    SELECT blocks.module, blocks.instance, pairs.dbg_blk_id
+    FROM pairs JOIN blocks ON blocks.id = pairs.block_id
+    WHERE pairs.tile_name = '';
+"""
+
+# 批量写入之后再建索引，比逐行维护索引快；逐条execute（executescript会先提交当前事务）
+INDEXES = (
+    "CREATE UNIQUE INDEX idx_blocks_key ON blocks(key)",
+    "CREATE INDEX idx_blocks_module_instance ON blocks(module, instance)",
+    "CREATE INDEX idx_blocks_instance ON blocks(instance)",
+    "CREATE INDEX idx_pairs_block ON pairs(block_id)",
+    "CREATE INDEX idx_pairs_dbg ON pairs(dbg_blk_id)",
+    "CREATE INDEX idx_pairs_tile ON pairs(tile_name)",
+    "CREATE INDEX idx_excel_module_instance ON excel_mapping(module, instance)",
+    "CREATE INDEX idx_excel_dbg ON excel_mapping(dbg_blk_id)",
+    "CREATE INDEX idx_excel_tile ON excel_mapping(tile_name)",
+    "CREATE INDEX idx_tiles_master ON tiles(master)",
+    "CREATE INDEX idx_tiles_x ON tiles(xmin, xmax)",
+    "CREATE INDEX idx_tiles_y ON tiles(ymin, ymax)",
+    "CREATE INDEX idx_client_tiles_tile ON client_tiles(tile_name)",
+    "CREATE INDEX idx_client_tiles_client ON client_tiles(client)",
+    "CREATE INDEX idx_client_tiles_module ON client_tiles(module, instance)",
+)
+
+
+def _block_rows(chip_data):
+    for block_id, (key, entry) in enumerate(chip_data.items(), 1):
+        yield block_id, key, entry.get('module', ''), entry.get('instance', '')
+
+
+def _pair_rows(chip_data):
+    for block_id, entry in enumerate(chip_data.values(), 1):
+        for pair in entry.get('pairs', []):
+            yield block_id, pair.get('DbgBlkId', ''), pair.get('tile_name', '') or ''
+
+
+def _tile_rows(parser):
+    geometry = parser.geometry
+    for i, name in enumerate(geometry.names):
+        xmin, ymin, xmax, ymax = (float(v) for v in geometry.bboxes[i])
+        cx, cy = (float(v) for v in geometry.centroids[i])
+        yield (name, geometry.masters[i], geometry.orients[i], int(geometry.counts[i]),
+               xmin, ymin, xmax, ymax, float(geometry.areas[i]), cx, cy)
+
+
+def _client_tile_rows(tile_client_mapping):
+    for tile_name, clients in tile_client_mapping.items():
+        for client in clients:
+            # client标识格式为 module::instance::dbg_blk_id
+            parts = client.split('::', 2)
+            module, instance, dbg_blk_id = parts if len(parts) == 3 else (None, None, None)
+            yield client, tile_name, module, instance, dbg_blk_id
+
+
+def export_sqlite(db_path, chip_data=None, excel_mapping=None, parser=None, tile_client_mapping=None):
+    """
+    导出数据到SQLite数据库（覆盖已有文件）
+
+    Args:
+        db_path: 数据库文件路径
+        chip_data: 整合后的JSON数据 {module::instance: {module, instance, pairs}}
+        excel_mapping: read_excel_mapping_data()的结果
+        parser: 已解析MID.csv的TileParser
+        tile_client_mapping: {tile_name: [client, ...]}
+
+    Returns:
+        dict: 各表写入的行数
+    """
+    db_path = Path(db_path)
+    db_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = db_path.with_name(db_path.name + '.tmp')
+    if tmp_path.exists():
+        tmp_path.unlink()
+
+    counts = {}
+    connection = sqlite3.connect(str(tmp_path))
+    try:
+        # 导出文件是一次性生成的，不需要逐次落盘；回滚日志放在内存中，出错时仍能回滚
+        connection.execute("PRAGMA journal_mode = MEMORY")
+        connection.execute("PRAGMA synchronous = OFF")
+        connection.executescript(SCHEMA)
+
+        tables = (
+            ('blocks', "INSERT INTO blocks VALUES (?, ?, ?, ?)", _block_rows, chip_data),
+            ('pairs', "INSERT INTO pairs (block_id, dbg_blk_id, tile_name) VALUES (?, ?, ?)", _pair_rows, chip_data),
+            ('excel_mapping', "INSERT INTO excel_mapping (module, instance, dbg_blk_id, tile_name) VALUES (?, ?, ?, ?)",
+             lambda rows: ((r['module'], r['instance'], r['dbg_blk_id'], r['tile_name']) for r in rows), excel_mapping),
+            ('tiles', "INSERT INTO tiles VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", _tile_rows, parser),
+            ('client_tiles', "INSERT INTO client_tiles VALUES (?, ?, ?, ?, ?)", _client_tile_rows, tile_client_mapping),
+        )
+
+        with connection:  # 单个事务
+            for table, statement, rows, source in tables:
+                if source is None:
+                    counts[table] = 0
+                    continue
+                connection.executemany(statement, rows(source))
+                counts[table] = connection.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+            connection.executemany("INSERT INTO meta VALUES (?, ?)", [
+                ('generated_at', datetime.now().isoformat(timespec='seconds')),
+                *((f"rows.{table}", str(count)) for table, count in counts.items()),
+            ])
+            for statement in INDEXES:
+                connection.execute(statement)
+        connection.execute("ANALYZE")
+    except BaseException:
+        connection.close()
+        tmp_path.unlink(missing_ok=True)
+        raise
+    else:
+        connection.close()
+
+    os.replace(tmp_path, db_path)
+    logger.info(f"🗄️ SQLite数据库已保存到: {db_path} (" +
+                ", ".join(f"{table} {count}" for table, count in counts.items()) + ")")
+    return counts
@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+条带并行渲染
+单次1200 DPI的savefig在一个核上完成整张画布的光栅化和zlib压缩。条带模式把输出图像按行切成若干水平条带：
+    1. 主进程构建Figure，按savefig(bbox_inches='tight', pad_inches=0.1)的方式测量输出区域（不光栅化）
+    2. 每个工作进程用同样的参数重建同一个Figure，用 bbox_inches=<条带区域> 只光栅化自己的条带；
+       条带边界对齐到整像素，完全落在条带外的tile名称标签不绘制。除坐标网格虚线外与单次渲染逐像素一致；
+       Agg在画虚线前先把路径裁剪到画布，网格虚线的相位会在条带边界处重新开始
+    3. 工作进程对条带做PNG行滤波（逐行选Sub/Up）并独立deflate（非最后一个条带以Z_SYNC_FLUSH结束），
+       主进程按顺序把压缩数据写成IDAT块，并用adler32_combine合成zlib校验和
+主进程和每个工作进程任何时刻只持有一个条带的像素，压缩也随条带并行，墙钟时间随核数下降。
+"""
+
+import os
+import struct
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+
+import numpy as np
+
+from dfd_logger import get_logger
+
+logger = get_logger('strip_render')
+
+PAD_INCHES = 0.1  # 与TileParser.plot中savefig的pad_inches一致
+PNG_COMPRESS_LEVEL = 6
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+IDAT_CHUNK_SIZE = 8 * 1024 * 1024
+_ADLER_BASE = 65521
+
+_worker_state = {}  # 工作进程内: parser / figure_kwargs / figure
+
+
+def adler32_combine(adler1, adler2, length2):
+    """两段数据的adler32合并为拼接后数据的adler32（等价于zlib的adler32_combine）"""
+    a1, b1 = adler1 & 0xffff, adler1 >> 16
+    a2, b2 = adler2 & 0xffff, adler2 >> 16
+    a = (a1 + a2 - 1) % _ADLER_BASE
+    b = (b1 + b2 + (length2 % _ADLER_BASE) * (a1 - 1)) % _ADLER_BASE
+    return (b << 16) | a
+
+
+def measure_output_bbox(fig, dpi, pad_inches=PAD_INCHES):
+    """
+    按savefig(bbox_inches='tight')的方式计算输出区域（英寸），只做布局不光栅化
+
+    Returns:
+        tuple: (bbox, width_px, height_px)
+    """
+    from matplotlib.backends.backend_agg import RendererAgg
+
+    original_dpi = fig.dpi
+    fig.set_dpi(dpi)
+    try:
+        renderer = RendererAgg(1, 1, dpi)  # 只用于按输出分辨率测量文字
+        with renderer._draw_disabled():
+            fig.draw(renderer)
+        bbox = fig.get_tightbbox(renderer).padded(pad_inches)
+    finally:
+        fig.set_dpi(original_dpi)
+    return bbox, int(bbox.width * dpi), int(bbox.height * dpi)
+
+
+def strip_bounds(height_px, strips):
+    """把图像行 [0, height_px) 均分为strips段，返回 [(起始行, 结束行), ...]（自上而下）"""
+    strips = max(1, min(strips, height_px))
+    edges = np.linspace(0, height_px, strips + 1).round().astype(int)
+    return [(int(top), int(bottom)) for top, bottom in zip(edges[:-1], edges[1:]) if bottom > top]
+
+
+def _strip_bbox(bbox, height_px, dpi, row_start, row_end):
+    """图像行 [row_start, row_end) 对应的英寸区域；画布自下而上取整，条带以整像素对齐到底边"""
+    from matplotlib.transforms import Bbox
+
+    bottom = bbox.y0 + (height_px - row_end) / dpi
+    # 高度多留千分之一像素，避免int()截断时少一行
+    top = bottom + (row_end - row_start + 1e-3) / dpi
+    return Bbox([[bbox.x0, bottom], [bbox.x1, top]])
+
+
+def text_row_spans(fig, bbox, height_px, dpi):
+    """
+    坐标轴内文字（tile名称标签）在输出图像中大致占据的行范围，用于按条带剔除
+
+    Returns:
+        list: [(text, 起始行, 结束行), ...]，范围按字号向外放宽
+    """
+    spans = []
+    original_dpi = fig.dpi
+    fig.set_dpi(dpi)
+    try:
+        top = bbox.y0 * dpi + height_px
+        for ax in fig.axes:
+            for text in ax.texts:
+                if not text.get_visible():
+                    continue
+                _, y = text.get_transform().transform(text.get_unitless_position())
+                half = text.get_fontsize() * dpi / 72.0 + 2
+                spans.append((text, top - y - half, top - y + half))
+    finally:
+        fig.set_dpi(original_dpi)
+    return spans
+
+
+@contextmanager
+def _without_layout_engine(fig):
+    """
+    布局已在build_figure中完成；tight_layout()留下的占位布局引擎会让每次savefig先按整幅画布
+    预绘制一遍（分配整幅画布大小的renderer），条带渲染期间临时去掉
+    """
+    engine = fig.get_layout_engine()
+    fig._layout_engine = None
+    try:
+        yield
+    finally:
+        fig._layout_engine = engine
+
+
+def render_strip_rgba(fig, bbox, height_px, dpi, row_start, row_end, text_spans=()):
+    """
+    把Figure中图像行 [row_start, row_end) 光栅化为 (rows, width, 4) 的RGBA数组
+
+    Args:
+        text_spans: text_row_spans()的结果，与条带不相交的文字在本次光栅化中隐藏
+    """
+    import io
+
+    hidden = [text for text, first, last in text_spans if last < row_start or first > row_end]
+    for text in hidden:
+        text.set_visible(False)
+    try:
+        buffer = io.BytesIO()
+        with _without_layout_engine(fig):
+            fig.savefig(buffer, format='raw', dpi=dpi,
+                        bbox_inches=_strip_bbox(bbox, height_px, dpi, row_start, row_end))
+    finally:
+        for text in hidden:
+            text.set_visible(True)
+    rows = row_end - row_start
+    return np.frombuffer(buffer.getbuffer(), dtype=np.uint8).reshape(rows, -1, 4)
+
+
+def encode_strip(rgba, last, level=PNG_COMPRESS_LEVEL, previous_row=None):
+    """
+    PNG行滤波 + 原始deflate：每行在Sub和Up滤波中选非零字节较少的一种（大片同色区域多用Up）
+
+    Args:
+        previous_row: 条带上方一行的RGBA像素，缺省时条带第一行只用Sub滤波
+
+    Returns:
+        tuple: (deflate数据, 滤波后数据的adler32, 滤波后数据长度)
+    """
+    rows, width, _ = rgba.shape
+    flat = rgba.reshape(rows, width * 4)
+    filtered = np.empty((rows, width * 4 + 1), dtype=np.uint8)
+    filtered[:, 0] = 2  # Up滤波：每个字节减去上一行同位置字节
+    np.subtract(flat[1:], flat[:-1], out=filtered[1:, 1:])
+    if previous_row is not None:
+        np.subtract(flat[0], np.asarray(previous_row, dtype=np.uint8).reshape(-1), out=filtered[0, 1:])
+    sub = np.empty((rows, width * 4), dtype=np.uint8)  # Sub滤波：每个字节减去左侧同通道字节
+    sub[:, :4] = flat[:, :4]
+    np.subtract(flat[:, 4:], flat[:, :-4], out=sub[:, 4:])
+    use_sub = np.count_nonzero(sub, axis=1) <= np.count_nonzero(filtered[:, 1:], axis=1)
+    if previous_row is None:
+        use_sub[0] = True
+    filtered[use_sub, 0] = 1
+    filtered[use_sub, 1:] = sub[use_sub]
+    del sub
+    data = filtered.tobytes()
+    compressor = zlib.compressobj(level, zlib.DEFLATED, -15)
+    payload = compressor.compress(data) + compressor.flush(zlib.Z_FINISH if last else zlib.Z_SYNC_FLUSH)
+    return payload, zlib.adler32(data), len(data)
+
+
+def _init_worker(geometry, figure_kwargs):
+    import logging
+    import matplotlib
+    matplotlib.use('Agg')
+    logging.disable(logging.WARNING)  # 绘图告警已在主进程中输出
+    from tile_parser import TileParser
+
+    parser = TileParser()
+    parser.use_geometry(geometry)  # 扁平数组传给子进程，比逐顶点元组的tiles_dict小得多
+    _worker_state.update(parser=parser, figure_kwargs=figure_kwargs, figure=None, text_spans=())
+
+
+def _render_strip_task(bbox, height_px, dpi, row_start, row_end, last):
+    if _worker_state['figure'] is None:
+        fig = _worker_state['parser'].build_figure(**_worker_state['figure_kwargs'])
+        _worker_state.update(figure=fig, text_spans=text_row_spans(fig, bbox, height_px, dpi))
+    rgba = render_strip_rgba(_worker_state['figure'], bbox, height_px, dpi, row_start, row_end,
+                             _worker_state['text_spans'])
+    return encode_strip(rgba, last)
+
+
+def _chunk(handle, kind, data):
+    handle.write(struct.pack('>I', len(data)))
+    handle.write(kind)
+    handle.write(data)
+    handle.write(struct.pack('>I', zlib.crc32(data, zlib.crc32(kind))))
+
+
+def write_png_stream(path, width, height, dpi, encoded_strips):
+    """
+    把按顺序产出的 (deflate数据, adler32, 长度) 条带写成RGBA PNG
+
+    Returns:
+        int: 文件字节数
+    """
+    import matplotlib
+
+    tmp_path = path.with_name(path.name + '.tmp')
+    with open(tmp_path, 'wb') as handle:
+        handle.write(PNG_SIGNATURE)
+        _chunk(handle, b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 6, 0, 0, 0))
+        pixels_per_meter = int(round(dpi / 0.0254))
+        _chunk(handle, b'pHYs', struct.pack('>IIB', pixels_per_meter, pixels_per_meter, 1))
+        _chunk(handle, b'tEXt', f"Software\0Matplotlib version{matplotlib.__version__}, https://matplotlib.org/"
+               .encode('latin-1'))
+
+        checksum, pending = 1, bytearray(b'\x78\x9c')  # zlib头；adler32初值为1
+        for payload, adler, length in encoded_strips:
+            checksum = adler32_combine(checksum, adler, length)
+            pending += payload
+            while len(pending) >= IDAT_CHUNK_SIZE:
+                _chunk(handle, b'IDAT', bytes(pending[:IDAT_CHUNK_SIZE]))
+                del pending[:IDAT_CHUNK_SIZE]
+        pending += struct.pack('>I', checksum)
+        _chunk(handle, b'IDAT', bytes(pending))
+        _chunk(handle, b'IEND', b'')
+        size = handle.tell()
+    os.replace(tmp_path, path)
+    return size
+
+
+def save_png_strips(parser, fig, figure_kwargs, save_path, dpi, strips=None, workers=None):
+    """
+    条带并行渲染并保存PNG，输出区域与 savefig(bbox_inches='tight', pad_inches=0.1) 相同
+
+    Args:
+        parser: TileParser
+        fig: 主进程中由parser.build_figure(**figure_kwargs)构建的Figure（用于测量输出区域）
+        figure_kwargs: 传给build_figure()的参数，工作进程用它重建同样的Figure
+        save_path: PNG路径
+        dpi: 分辨率
+        strips: 条带数，默认等于进程数
+        workers: 进程数，默认为CPU核数；为1时在当前进程中逐条带渲染（仍只持有一个条带的像素）
+
+    Returns:
+        dict: {'width', 'height', 'strips', 'workers', 'bytes', 'seconds'}
+    """
+    from pathlib import Path
+
+    start = time.perf_counter()
+    save_path = Path(save_path)
+    workers = max(1, workers or os.cpu_count() or 1)
+    bbox, width_px, height_px = measure_output_bbox(fig, dpi)
+    bounds = strip_bounds(height_px, strips or workers)
+    workers = min(workers, len(bounds))
+    tasks = [(bbox, height_px, dpi, row_start, row_end, i == len(bounds) - 1)
+             for i, (row_start, row_end) in enumerate(bounds)]
+    logger.info(f"🧵 条带渲染: {width_px}x{height_px} 像素，{len(bounds)} 个条带，{workers} 个进程")
+
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(parser.geometry, figure_kwargs)) as executor:
+            encoded = executor.map(_render_strip_task, *zip(*tasks))
+            size = write_png_stream(save_path, width_px, height_px, dpi, encoded)
+    else:
+        text_spans = text_row_spans(fig, bbox, height_px, dpi)
+        encoded = (encode_strip(render_strip_rgba(fig, *task[:-1], text_spans), task[-1]) for task in tasks)
+        size = write_png_stream(save_path, width_px, height_px, dpi, encoded)
+
+    seconds = time.perf_counter() - start
+    logger.info(f"🧵 条带渲染完成，耗时 {seconds:.2f}s")
+    return {'width': width_px, 'height': height_px, 'strips': len(bounds), 'workers': workers,
+            'bytes': size, 'seconds': seconds}
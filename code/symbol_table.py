@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+名称符号表
+模块名、实例名、tile名、DbgBlkId等字符串在CHIP.txt、Mapping.xlsx、MID.csv中反复出现。
+符号表在读入时把每个不同的名称映射为一个整数ID，并让所有读入方共享同一个字符串对象：
+    - 相同名称在内存中只保存一份
+    - 跨数据源的连接/查找用整数作为键，不再反复拼接或哈希名称：
+        JSON-Excel整合（integrate_json_excel_data）按 (module_id, instance_id, dbg_id) 元组连接；
+        ClientTileIndex 内部以tile/client/模块的ID为键；Mapping.xlsx中的tile与MID.csv几何的连接
+        （highlight、client数量）把名称一次转换为ID数组后，经 TileGeometry.symbol_rows() 的 ID->行号 数组查表
+    对外接口（tiles_dict、ClientTileIndex的Mapping接口、报告）仍以名称出入。
+一个DFDProcessor持有一个符号表，在各阶段之间共享；输入重新加载后重建（见DFDProcessor.invalidate）。
+"""
+
+import sys
+
+import numpy as np
+
+
+class SymbolTable:
+    """字符串 <-> 整数ID 的双向映射"""
+
+    def __init__(self):
+        self._ids = {}  # {name: id}
+        self._names = []  # id -> name
+
+    def __len__(self):
+        return len(self._names)
+
+    def __contains__(self, name):
+        return name in self._ids
+
+    def intern(self, name):
+        """返回名称的ID，首次出现时分配新ID"""
+        symbol_id = self._ids.get(name)
+        if symbol_id is None:
+            name = sys.intern(name)
+            symbol_id = len(self._names)
+            self._ids[name] = symbol_id
+            self._names.append(name)
+        return symbol_id
+
+    def lookup(self, name):
+        """返回已有名称的ID，未登记的名称返回None（不分配新ID）"""
+        return self._ids.get(name)
+
+    def name(self, symbol_id):
+        """ID对应的名称"""
+        return self._names[symbol_id]
+
+    def canonical(self, name):
+        """返回与该名称相等的共享字符串对象"""
+        return self._names[self.intern(name)]
+
+    def key(self, *names):
+        """多个名称组成的整数元组键，如 key(module, instance)"""
+        return tuple(self.intern(name) for name in names)
+
+    def ids(self, names):
+        """名称序列 -> ID数组（int64），未登记的名称为-1（不分配新ID）"""
+        get = self._ids.get
+        return np.fromiter((get(name, -1) for name in names), dtype=np.int64)
+
+    def lookup_key(self, *names):
+        """与key()相同，但任一名称未登记时返回None（该组合必然不存在）"""
+        ids = tuple(self._ids.get(name) for name in names)
+        return None if None in ids else ids
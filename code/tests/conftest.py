@@ -0,0 +1,12 @@
+"""pytest配置：code/ 下的模块按顶层模块导入（与 cd code && python main.py 一致）"""
+
+import sys
+from pathlib import Path
+
+import matplotlib
+
+matplotlib.use('Agg')
+
+CODE_DIR = Path(__file__).resolve().parent.parent
+if str(CODE_DIR) not in sys.path:
+    sys.path.insert(0, str(CODE_DIR))
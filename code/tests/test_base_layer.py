@@ -0,0 +1,55 @@
+"""底图分层渲染：合成结果与直接渲染相差不超过2/255，缓存命中时输出逐字节一致，只改highlight时复用底图"""
+
+import numpy as np
+import matplotlib.pyplot as plt
+
+from tile_parser import TileParser
+
+DPI = 150
+MAX_DIFF = 2  # 8位通道值
+
+
+def parser():
+    result = TileParser()
+    result.tiles_dict.update({
+        f"tile_{i}_{j}": {'master': f"m{(i + j) % 3}", 'orient': ('R0', 'MX', 'R90')[i % 3],
+                          'vertices': [(12 * i, 12 * j), (12 * i + 10, 12 * j), (12 * i + 10, 12 * j + 10),
+                                       (12 * i, 12 * j + 10)]}
+        for i in range(6) for j in range(4)})
+    return result
+
+
+MAPPING = {'tile_0_0': ['c0', 'c1', 'c2'], 'tile_3_2': ['c3'], 'tile_5_1': ['c4', 'c5']}
+
+
+def render(path, highlight, cache_dir=None):
+    parser().plot(save_path=path, dpi=DPI, figsize=(4, 3), show=False, highlight_client=highlight,
+                  highlight_dbg=['tile_1_1'], tile_client_mapping=MAPPING, base_cache_dir=cache_dir)
+    return path
+
+
+def max_diff(a, b):
+    image_a, image_b = (np.round(plt.imread(path) * 255).astype(int) for path in (a, b))
+    assert image_a.shape == image_b.shape
+    return int(np.abs(image_a - image_b).max())
+
+
+def test_layered_render_matches_plain_render(tmp_path):
+    cache_dir = tmp_path / 'cache'
+    first_highlight = ['tile_0_0', 'tile_3_2']
+
+    first = render(tmp_path / 'first.png', first_highlight, cache_dir)
+    cached = sorted(cache_dir.iterdir())
+    assert cached
+    assert max_diff(first, render(tmp_path / 'plain.png', first_highlight)) <= MAX_DIFF
+
+    hit = render(tmp_path / 'hit.png', first_highlight, cache_dir)
+    assert hit.read_bytes() == first.read_bytes()
+    assert sorted(cache_dir.iterdir()) == cached
+
+    # 只改highlight：复用同一底图，只重绘标记图层
+    changed_highlight = ['tile_5_1']
+    changed = render(tmp_path / 'changed.png', changed_highlight, cache_dir)
+    assert sorted(cache_dir.iterdir()) == cached
+    assert changed.read_bytes() != first.read_bytes()
+    assert max_diff(changed, render(tmp_path / 'changed_plain.png', changed_highlight)) <= MAX_DIFF
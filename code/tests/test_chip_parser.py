@@ -0,0 +1,70 @@
+"""CHIP.txt解析与变量展开"""
+
+import pytest
+
+from chip_parser import expand_name, parse_chip_file, parse_chip_tree
+from dfd_processor import DFDProcessor
+
+CHIP_TEXT = """\
+CHIP_MID ssb{$SSB} (
+    wrapper u_client{$CH} (
+        .c0_dbg_client_DbgBlkId(3),
+        .c0_func_port(net_a),
+    )
+    .top_DbgBlkId(7),
+)
+"""
+
+
+@pytest.fixture
+def chip_file(tmp_path):
+    path = tmp_path / 'CHIP.txt'
+    path.write_text(CHIP_TEXT, encoding='utf-8')
+    return path
+
+
+def test_expand_name_cartesian_product():
+    expanded = expand_name('ssb{$SSB}_ch{$CH}', {'$SSB': [0, 1], '$CH': ['a', 'b']})
+    assert expanded == ['ssb0_cha', 'ssb0_chb', 'ssb1_cha', 'ssb1_chb']
+
+
+def test_expand_name_keeps_unknown_variables():
+    assert expand_name('u{$X}_{$SSB}', {'$SSB': [2]}) == ['u{$X}_2']
+    assert expand_name('plain', {'$SSB': [0]}) == ['plain']
+
+
+def test_parse_chip_file_blocks(chip_file):
+    blocks = parse_chip_file(str(chip_file))
+    assert [(block.keyword, block.name) for block in blocks] == [('CHIP_MID', 'ssb{$SSB}')]
+    assert 'DbgBlkId' in blocks[0].content
+
+
+def test_tree_paths_are_expanded(chip_file):
+    tree = parse_chip_tree(str(chip_file), {'$SSB': [0, 1], '$CH': [0, 1]})
+    assert len(tree) == 2 + 4
+    assert tree.children('ssb1') == ['ssb1/u_client0', 'ssb1/u_client1']
+    assert tree.get('ssb1/u_client0').template_path() == 'ssb{$SSB}/u_client{$CH}'
+
+
+def test_dbg_blk_ids_under_subtree(chip_file):
+    tree = parse_chip_tree(str(chip_file), {'$SSB': [0], '$CH': [0, 1]})
+    found = tree.dbg_blk_ids_under('ssb0')
+    assert [path for path, _ in found] == ['ssb0', 'ssb0/u_client0', 'ssb0/u_client1']
+
+
+def test_processor_rebuilds_tree_after_in_place_rule_edit(chip_file):
+    rules = {'$SSB': [0], '$CH': [0]}
+    processor = DFDProcessor(rules, input_dir=chip_file.parent, output_dir=chip_file.parent / 'out', show_plot=False)
+    tree = processor.get_block_tree()
+    assert processor.get_block_tree() is tree
+    rules['$CH'].append(1)
+    rebuilt = processor.get_block_tree()
+    assert rebuilt is not tree
+    assert 'ssb0/u_client1' in rebuilt
+    assert tree.expand_dict == {'$SSB': [0], '$CH': [0]}  # 旧树保存的是副本
+
+
+def test_processor_without_rules_builds_tree_once(chip_file):
+    processor = DFDProcessor(None, input_dir=chip_file.parent, output_dir=chip_file.parent / 'out', show_plot=False)
+    tree = processor.get_block_tree()
+    assert processor.get_block_tree() is tree
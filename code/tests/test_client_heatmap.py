@@ -0,0 +1,70 @@
+"""Client热力图：显示方式解析（含auto阈值）、每个tile的client数量、网格直方图的累加"""
+
+import matplotlib.pyplot as plt
+import numpy as np
+import pytest
+
+import client_heatmap
+from client_heatmap import (HEATMAP_AUTO_THRESHOLD, grid_histogram, resolve_display_mode,
+                            tile_client_counts)
+from client_tile_index import ClientTileIndex
+from symbol_table import SymbolTable
+from tile_geometry import TileGeometry
+from tile_parser import TileParser
+
+
+def square(x0, y0=0):
+    return {'master': 'm', 'orient': 'R0', 'vertices': [(x0, y0), (x0 + 10, y0), (x0 + 10, y0 + 10), (x0, y0 + 10)]}
+
+
+TILES = {'t0': square(0), 't1': square(20), 't2': square(40),
+         'flat': {'master': 'm', 'orient': 'R0', 'vertices': [(60, 0), (70, 0)]}}  # 不可绘制
+PAIRS = [('t0', 'mod_a::u0::d0'), ('t0', 'mod_a::u0::d1'), ('t0', 'mod_b::u0::d2'), ('t2', 'mod_a::u1::d3'),
+         ('flat', 'mod_c::u0::d4')]
+
+
+def test_resolve_display_mode():
+    assert resolve_display_mode('markers', 10 ** 6) == 'markers'
+    assert resolve_display_mode('grid', 0) == 'grid'
+    assert resolve_display_mode('auto', HEATMAP_AUTO_THRESHOLD) == 'markers'
+    assert resolve_display_mode('auto', HEATMAP_AUTO_THRESHOLD + 1) == 'tile'
+    for mode in ('heat', 'Tile', None):
+        with pytest.raises(ValueError):
+            resolve_display_mode(mode, 0)
+
+
+def test_tile_client_counts():
+    geometry = TileGeometry(TILES)
+    highlight = ['t0', 't1', 't2', 'flat', 'missing']
+
+    # 没有映射关系时每个tile计1个client；不可绘制和不存在的tile不计
+    np.testing.assert_array_equal(tile_client_counts(geometry, highlight), [1, 1, 1, 0])
+    np.testing.assert_array_equal(tile_client_counts(geometry, highlight, ClientTileIndex(PAIRS)), [3, 1, 1, 0])
+
+    symbols = SymbolTable()
+    by_id = tile_client_counts(TileGeometry(TILES), highlight, ClientTileIndex(PAIRS, symbols=symbols), symbols)
+    np.testing.assert_array_equal(by_id, [3, 1, 1, 0])
+
+
+def test_grid_histogram_cell_sums():
+    centroids = np.array([[1.0, 1.0], [2.0, 3.0], [9.0, 1.0], [9.0, 4.5]])
+    counts = np.array([2.0, 3.0, 5.0, 7.0])
+    hist, edges_x, edges_y = grid_histogram(centroids, counts, (0, 0, 10, 5), bins=2)
+
+    assert hist.shape == (1, 2)  # 正方形网格：边长5，x方向2格、y方向1格
+    np.testing.assert_array_equal(edges_x, [0, 5, 10])
+    np.testing.assert_array_equal(hist, [[5.0, 12.0]])
+    assert hist.sum() == counts.sum()
+
+
+def test_auto_switches_to_heatmap_above_threshold(monkeypatch):
+    parser = TileParser()
+    parser.tiles_dict.update(TILES)
+    options = dict(highlight_client=['t0', 't2'], tile_client_mapping=ClientTileIndex(PAIRS), client_display='auto')
+
+    plt.close(parser.build_figure(**options))
+    assert parser.client_display_used == 'markers'
+
+    monkeypatch.setattr(client_heatmap, 'HEATMAP_AUTO_THRESHOLD', 3)  # 4个client超过阈值
+    plt.close(parser.build_figure(**options))
+    assert parser.client_display_used == 'tile'
@@ -0,0 +1,37 @@
+"""client标记锚点与排布"""
+
+import numpy as np
+
+from client_layout import compute_client_offsets, marker_boxes
+from tile_geometry import TileGeometry
+from tile_server import _point_in_polygon
+
+L_SHAPE = [(0, 0), (100, 0), (100, 10), (10, 10), (10, 100), (0, 100)]  # 质心 (28.7, 28.7) 在tile外
+
+
+def geometry():
+    return TileGeometry({
+        'L': {'master': 'm', 'orient': 'R0', 'vertices': L_SHAPE},
+        'rect': {'master': 'm', 'orient': 'R0', 'vertices': [(0, 0), (40, 0), (40, 20), (0, 20)]},
+    })
+
+
+def test_centroid_of_l_shape_is_outside():
+    g = geometry()
+    assert not _point_in_polygon(*g.centroids[0], g.polygons([0])[0])
+
+
+def test_rectangle_keeps_centroid_and_bbox():
+    anchors, widths, heights = marker_boxes(geometry(), [1])
+    assert anchors[0].tolist() == [20.0, 10.0]
+    assert (widths[0], heights[0]) == (40.0, 20.0)
+
+
+def test_markers_of_l_shaped_tile_are_inside():
+    g = geometry()
+    polygon = g.polygons([0])[0]
+    anchors, widths, heights = marker_boxes(g, [0])
+    for pattern in ('grid', 'spiral'):
+        _, offset_x, offset_y = compute_client_offsets([30], widths, heights, pattern)
+        points = anchors[0] + np.column_stack([offset_x, offset_y])
+        assert all(_point_in_polygon(x, y, polygon) for x, y in points)
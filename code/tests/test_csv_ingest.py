@@ -0,0 +1,114 @@
+"""MID.csv分块读取：落盘合并与内存中合并结果一致，扫描阶段的峰值内存受预算限制"""
+
+import io
+import random
+import tracemalloc
+
+import numpy as np
+
+from csv_ingest import read_tile_arrays
+from tile_geometry import TileGeometry
+from tile_parser import TileParser
+
+HEADER = 'struct,tile,master,orient,vertex_index,vertex_x,vertex_y\n'
+
+
+def square_rows(tile_count, vertices=4, shuffle=False):
+    rows = []
+    for t in range(tile_count):
+        for v in range(vertices):
+            rows.append((f"t{t}", f"m{t % 3}", 'R0', v, float(t * 10 + v), float(v % 2)))
+    if shuffle:
+        random.Random(0).shuffle(rows)
+    return rows
+
+
+def csv_text(rows, noise=True):
+    lines = [HEADER]
+    for tile, master, orient, index, x, y in rows:
+        lines.append(f"tile,{tile},{master},{orient},{index},{x!r},{y!r}\n")
+        if noise:
+            lines.append(f"pin,{tile},,,0,0,0\n")
+    return ''.join(lines)
+
+
+def read(text, **kwargs):
+    return read_tile_arrays(io.StringIO(text), **kwargs)
+
+
+def test_spilled_read_matches_in_memory_read(tmp_path):
+    text = csv_text(square_rows(300, shuffle=True))
+    in_memory = read(text, chunk_rows=100)
+    spilled = read(text, chunk_rows=100, memory_budget=1024, spill_dir=str(tmp_path))
+
+    assert spilled['names'] == in_memory['names']
+    np.testing.assert_array_equal(spilled['offsets'], in_memory['offsets'])
+    np.testing.assert_array_equal(spilled['coords'], in_memory['coords'])
+    assert list(tmp_path.iterdir()) == []  # 临时文件已删除
+
+    # 每个tile的顶点按vertex_index排序
+    geometry = TileGeometry.from_arrays(**spilled)
+    first = geometry.polygons([geometry.index['t7']])[0]
+    np.testing.assert_array_equal(first, [[70, 0], [71, 1], [72, 0], [73, 1]])
+
+
+def test_parser_builds_tiles_dict_on_demand():
+    text = csv_text(square_rows(5), noise=False)
+    parser = TileParser()
+    parser.use_geometry(TileGeometry.from_arrays(**read(text)))
+
+    assert len(parser) == 5 and parser._tiles_dict is None
+    assert parser.geometry.names == ['t0', 't1', 't2', 't3', 't4']
+    assert parser.tiles_dict['t1'] == {'master': 'm1', 'orient': 'R0',
+                                       'vertices': [(10.0, 0.0), (11.0, 1.0), (12.0, 0.0), (13.0, 1.0)]}
+
+    # 生成tiles_dict之后增删tile，几何随之重建
+    del parser.tiles_dict['t0']
+    assert parser.geometry.names == ['t1', 't2', 't3', 't4']
+
+
+def test_scan_peak_memory_follows_budget():
+    text = csv_text(square_rows(5000, vertices=20), noise=False)  # 10万个顶点
+
+    def peak(budget):
+        file = io.StringIO(text)
+        tracemalloc.start()
+        try:
+            result = read_tile_arrays(file, chunk_rows=2000, memory_budget=budget)
+            return tracemalloc.get_traced_memory()[1], result['coords'].nbytes
+        finally:
+            tracemalloc.stop()
+
+    unbounded, coords_bytes = peak(1 << 30)
+    bounded, _ = peak(64 * 1024)
+    # 不限预算时整份28字节/行的顶点数组与结果同时存在；限定预算时只多出一块Python列表和内存预算
+    assert unbounded > coords_bytes + 28 * 100000
+    assert bounded < coords_bytes + 2 * 1024 * 1024
+
+
+def test_unsorted_merge_matches_lexsort(tmp_path):
+    rows = square_rows(2000, vertices=6, shuffle=True)
+    rows += [('t5', 'm2', 'R0', 0, 999.0, 999.0)]  # 重复的vertex_index保持文件顺序
+    result = read(csv_text(rows), chunk_rows=500, memory_budget=64 * 1024, spill_dir=str(tmp_path))
+
+    names = {}  # tile按首次出现顺序编号
+    tile = np.array([names.setdefault(row[0], len(names)) for row in rows])
+    index = np.array([row[3] for row in rows])
+    order = np.lexsort((index, tile))
+    expected = np.array([row[4:] for row in rows])[order]
+    np.testing.assert_array_equal(result['coords'], expected)
+    five = result['names'].index('t5')
+    assert result['offsets'][five + 1] - result['offsets'][five] == 7 and result['offsets'][-1] == len(rows)
+
+
+def test_unsorted_merge_peak_memory_follows_budget():
+    text = csv_text(square_rows(5000, vertices=20, shuffle=True), noise=False)
+    file = io.StringIO(text)
+    tracemalloc.start()
+    try:
+        result = read_tile_arrays(file, chunk_rows=2000, memory_budget=64 * 1024)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    # 不建立整个数组的排序下标（lexsort需要每行8字节下标和两列排序键的副本）
+    assert peak < result['coords'].nbytes + 2 * 1024 * 1024
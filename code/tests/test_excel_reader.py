@@ -0,0 +1,66 @@
+"""Mapping.xlsx读取：一遍读取得到的三种视图与分别读取一致，缺失值文本与pandas读取一致"""
+
+from openpyxl import Workbook
+
+from excel_reader import iter_mapping_views, read_excel_client_tile_mapping, read_excel_column_f, read_mapping_views
+from json_excel_integrator import read_excel_mapping_data
+from symbol_table import SymbolTable
+
+ROWS = [
+    ('mod_a', 'u0', '.c0_DbgBlkId(1)', '', '', 'tile_0'),
+    ('mod_a', 'u1', '.c0_DbgBlkId(2)', '', '', ''),
+    ('mod_b', 'u0', '.c0_DbgBlkId(3)', '', '', 'tile_0'),
+    ('', '', '', '', '', 'tile_1'),
+    ('mod_c', 'u0', None, '', '', 'tile_2'),
+    ('NA', 'u0', '.c0_DbgBlkId(4)', '', '', 'N/A'),
+]
+
+
+def write_workbook(path):
+    workbook = Workbook()
+    sheet = workbook.active
+    sheet.append(('module', 'instance', 'DbgBlkId', 'flatten_module', 'flatten_instance', 'tile'))
+    for row in ROWS:
+        sheet.append(row)
+    workbook.save(path)
+    return str(path)
+
+
+def test_single_read_matches_separate_readers(tmp_path):
+    path = write_workbook(tmp_path / 'Mapping.xlsx')
+    views = read_mapping_views(path)
+
+    assert views['excel_mapping'] == read_excel_mapping_data(path)
+    assert views['highlight_client_list'] == read_excel_column_f(path) == ['tile_0', 'tile_0', 'tile_1', 'tile_2']
+    separate = read_excel_client_tile_mapping(path)
+    assert dict(views['tile_client_mapping']) == dict(separate)
+    assert list(views['tile_client_mapping']['tile_0']) == ['mod_a::u0::.c0_DbgBlkId(1)', 'mod_b::u0::.c0_DbgBlkId(3)']
+
+
+def test_single_read_shares_symbols(tmp_path):
+    path = write_workbook(tmp_path / 'Mapping.xlsx')
+    symbols = SymbolTable()
+    views = read_mapping_views(path, symbols=symbols)
+
+    tile = views['excel_mapping'][0]['tile_name']
+    assert views['highlight_client_list'][0] is tile
+    assert next(iter(views['tile_client_mapping'])) is tile
+
+
+def test_streamed_views_match_single_read(tmp_path):
+    path = write_workbook(tmp_path / 'Mapping.xlsx')
+    views = {}
+    records = list(iter_mapping_views(path, views))
+    expected = read_mapping_views(path)
+
+    assert records == expected['excel_mapping']
+    assert views['highlight_client_list'] == expected['highlight_client_list']
+    assert dict(views['tile_client_mapping']) == dict(expected['tile_client_mapping'])
+
+
+def test_pandas_na_text_reads_empty(tmp_path):
+    path = write_workbook(tmp_path / 'Mapping.xlsx')
+    views = read_mapping_views(path)
+
+    assert all(record['module'] != 'NA' for record in views['excel_mapping'])
+    assert 'N/A' not in views['highlight_client_list']
@@ -0,0 +1,72 @@
+"""布局检查：重叠tile对、L形tile缺口内的空隙、内部空洞，共享边的空隙矩形合并为一处"""
+
+import numpy as np
+import pytest
+
+from floorplan_check import check_floorplan, find_gaps, gap_regions
+from tile_geometry import TileGeometry
+
+
+def tile(vertices):
+    return {'master': 'm', 'orient': 'R0', 'vertices': vertices}
+
+
+def box(x0, y0, x1, y1):
+    return tile([(x0, y0), (x1, y0), (x1, y1), (x0, y1)])
+
+
+def test_overlapping_pairs():
+    result = check_floorplan(TileGeometry({
+        'a': box(0, 0, 10, 10),
+        'b': box(5, 5, 15, 15),  # 与a重叠5x5
+        'c': box(10, 0, 20, 5),  # 与a只共享边界
+        'd': box(12, 2, 14, 4),  # 完全落在c内
+    }))
+
+    assert result['overlap_count'] == 2
+    assert [(o['tile_a'], o['tile_b'], o['area']) for o in result['overlaps']] == [('a', 'b', 25.0), ('c', 'd', 4.0)]
+
+
+def test_l_shaped_tile_notch_is_a_gap():
+    # L形tile的包围盒即die轮廓，右上角的缺口未被覆盖
+    result = check_floorplan(TileGeometry({
+        'l': tile([(0, 0), (20, 0), (20, 10), (10, 10), (10, 20), (0, 20)]),
+    }))
+
+    assert result['approximated_tiles'] == [] and result['rectangles'] == 2
+    assert result['overlap_count'] == 0
+    assert result['gap_count'] == 1 and result['gaps'] == [[10.0, 10.0, 20.0, 20.0]]
+    assert result['gap_area'] == 100.0 and result['coverage'] == pytest.approx(75.0)
+
+
+def test_interior_l_shaped_hole_counts_once():
+    # 30x30的轮廓，中间留出一个L形空洞：(10,10)-(20,15) 加上 (10,15)-(15,20)
+    tiles = {
+        'bottom': box(0, 0, 30, 10),
+        'top': box(0, 20, 30, 30),
+        'left': box(0, 10, 10, 20),
+        'right': box(20, 10, 30, 20),
+        'plug': box(15, 15, 20, 20),
+    }
+    result = check_floorplan(TileGeometry(tiles))
+
+    assert result['gap_rectangles'] == 2
+    assert result['gap_count'] == 1
+    assert result['gap_regions'] == [{'bbox': [10.0, 10.0, 20.0, 20.0], 'area': 75.0, 'rectangles': 2}]
+    assert result['gap_area'] == 75.0
+
+
+def test_corner_touching_gaps_stay_separate():
+    gaps = [(0.0, 0.0, 5.0, 5.0), (5.0, 5.0, 10.0, 10.0), (5.0, 10.0, 8.0, 12.0)]
+    regions = gap_regions(gaps)
+
+    assert [region['rectangles'] for region in regions] == [1, 2]
+    assert regions[1]['bbox'] == [5.0, 5.0, 10.0, 12.0]
+
+
+def test_gap_coordinates_are_floats():
+    rects = np.array([[0, 0, 10, 4], [0, 6, 10, 10]], dtype=float)
+    gaps = find_gaps(rects, (0, 0, 10, 10))
+
+    assert gaps == [(0.0, 4.0, 10.0, 6.0)]
+    assert all(type(v) is float for v in gaps[0][1::2])
@@ -0,0 +1,86 @@
+"""Floorplan版本对比：tile变化分类、形状哈希与顶点起点/方向无关、client重新映射、变化叠加图"""
+
+from floorplan_diff import diff_client_mappings, diff_floorplans, diff_geometry, render_diff_overlay, tile_keys
+from tile_geometry import TileGeometry
+from tile_parser import TileParser
+
+L_SHAPE = [(0, 0), (20, 0), (20, 10), (10, 10), (10, 20), (0, 20)]
+
+
+def tile(vertices, master='m', orient='R0', dx=0, dy=0):
+    return {'master': master, 'orient': orient, 'vertices': [(x + dx, y + dy) for x, y in vertices]}
+
+
+def square(x0, size=10):
+    return [(x0, 0), (x0 + size, 0), (x0 + size, size), (x0, size)]
+
+
+OLD = {
+    'same': tile(square(0)),
+    'rotated': tile(L_SHAPE, dx=40),
+    'reversed': tile(L_SHAPE, dx=80),
+    'moved': tile(square(120)),
+    'reshaped': tile(square(140)),
+    'retyped': tile(square(160)),
+    'gone': tile(square(180)),
+}
+NEW = {
+    'same': tile(square(0)),
+    'rotated': tile(L_SHAPE[3:] + L_SHAPE[:3], dx=40),  # 换一个起点
+    'reversed': tile(L_SHAPE[::-1], dx=80),  # 反向列出
+    'moved': tile(square(120), dx=5, dy=-2),
+    'reshaped': tile(square(140, size=12)),
+    'retyped': tile(square(160), master='m2'),
+    'added': tile(square(200)),
+}
+
+
+def test_geometry_changes_are_classified():
+    diff = diff_geometry(TileGeometry(OLD), TileGeometry(NEW))
+
+    assert diff['added'] == ['added']
+    assert diff['removed'] == ['gone']
+    assert diff['moved'] == [{'tile': 'moved', 'dx': 5.0, 'dy': -2.0}]
+    assert diff['reshaped'] == ['reshaped']
+    assert diff['retyped'] == ['retyped']
+
+
+def test_shape_key_ignores_start_vertex_and_winding():
+    variants = {f"v{i}": tile(L_SHAPE[i:] + L_SHAPE[:i]) for i in range(len(L_SHAPE))}
+    variants.update({f"r{i}": tile((L_SHAPE[i:] + L_SHAPE[:i])[::-1]) for i in range(len(L_SHAPE))})
+    variants['mirrored'] = tile([(20 - x, y) for x, y in L_SHAPE])  # 镜像是不同的形状
+    shape_keys, _ = tile_keys(TileGeometry(variants))
+
+    assert len(set(shape_keys[:-1].tolist())) == 1
+    assert shape_keys[-1] != shape_keys[0]
+
+
+def test_client_remaps():
+    old = {'t1': ['c0', 'c1'], 't3': ['c3']}
+    new = {'t1': ['c0'], 't2': ['c1', 'c2'], 't3': ['c3']}
+    diff = diff_client_mappings(old, new)
+
+    assert diff['remapped_clients'] == [{'client': 'c1', 'old_tiles': ['t1'], 'new_tiles': ['t2']}]
+    assert diff['added_clients'] == ['c2']
+    assert diff['removed_clients'] == []
+    assert diff['changed_tiles'] == ['t1', 't2']
+
+
+def parser(tiles):
+    result = TileParser()
+    result.tiles_dict.update(tiles)
+    return result
+
+
+def test_overlay_reuses_cached_base_layer(tmp_path):
+    old_parser, new_parser = parser(OLD), parser(NEW)
+    diff = diff_floorplans(old_parser, new_parser, {'same': ['c0']}, {'moved': ['c0']})
+    assert diff['summary']['remapped_clients'] == 1 and diff['summary']['moved'] == 1
+
+    cache_dir = tmp_path / 'cache'
+    first = render_diff_overlay(old_parser, new_parser, diff, tmp_path / 'diff1.png', cache_dir, figsize=(4, 3), dpi=50)
+    cached = list(cache_dir.iterdir())
+    render_diff_overlay(old_parser, new_parser, diff, tmp_path / 'diff2.png', cache_dir, figsize=(4, 3), dpi=50)
+
+    assert first.exists() and (tmp_path / 'diff2.png').read_bytes() == first.read_bytes()
+    assert len(cached) == 1 and list(cache_dir.iterdir()) == cached
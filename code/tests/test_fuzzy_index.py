@@ -0,0 +1,52 @@
+"""模糊匹配索引：前缀过滤的结果与暴力比较一致，模板名中的拼写错误同样能找到"""
+
+import heapq
+import random
+
+from fuzzy_index import MatchSuggester, NGramIndex, ngrams
+
+
+def brute_force(values, text, k=3, min_similarity=0.5):
+    query_grams = ngrams(text)
+    scored = []
+    for value in set(values):
+        if value == text:
+            continue
+        grams = ngrams(value)
+        similarity = 2 * len(query_grams & grams) / (len(query_grams) + len(grams))
+        if similarity >= min_similarity:
+            scored.append((similarity, value))
+    return [(value, similarity) for similarity, value in heapq.nlargest(k, scored)]
+
+
+def test_templated_name_typo_is_found():
+    values = [f"blk_{i:05d}_ctrl" for i in range(20000)]
+    index = NGramIndex(values)
+
+    result = index.query('blk_00017_ctlr')
+    assert result and result[0] == ('blk_00017_ctrl', 0.75)
+    assert result == brute_force(values, 'blk_00017_ctlr')
+
+
+def test_queries_match_brute_force():
+    rng = random.Random(0)
+    values = [f"u_{rng.choice(['pcs', 'phy', 'ctl'])}_{i}" for i in range(3000)] + ['ab', 'abc', 'xyz']
+    index = NGramIndex(values)
+
+    queries = ['ab', 'u_pcs', 'u_phy_17x', 'u_ctl_2999', 'u_pcs_00', 'zz']  # 含短查询
+    for text in queries:
+        assert index.query(text) == brute_force(values, text), text
+
+
+def test_entry_index_is_built_once():
+    json_data = {'e0': {'module': 'mod_a', 'instance': 'u0',
+                        'pairs': [{'DbgBlkId': f"c0_DbgBlkId({i})"} for i in range(50)]}}
+    suggester = MatchSuggester(json_data)
+
+    first = suggester.suggest({'module': 'mod_a', 'instance': 'u0', 'dbg_blk_id': 'c0_DbgBlkId(7'})
+    index = suggester.entry_indexes[('mod_a', 'u0')]
+    suggester.suggest({'module': 'mod_a', 'instance': 'u0', 'dbg_blk_id': 'c0_DbgBlkId(8'})
+
+    assert suggester.entry_indexes[('mod_a', 'u0')] is index
+    assert first['dbg_blk_id_suggestions'][0]['value'] == 'c0_DbgBlkId(7)'
+    assert first['module_suggestions'] == [] and first['instance_suggestions'] == []
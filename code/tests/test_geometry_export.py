@@ -0,0 +1,66 @@
+"""几何导出：二进制几何写出后加载与原几何一致，GeoJSON要素与tile一一对应"""
+
+import json
+
+import numpy as np
+import pytest
+
+from geometry_export import load_binary_geometry, write_binary_geometry, write_geojson
+from tile_geometry import TileGeometry
+
+TILES = {
+    'a': {'master': 'm0', 'orient': 'R0', 'vertices': [(0, 0), (10, 0), (10, 10), (0, 10)]},
+    'b': {'master': 'm1', 'orient': 'MX', 'vertices': [(20, 0), (30, 0), (25, 8)]},
+    'line': {'master': 'm0', 'orient': 'R0', 'vertices': [(40, 0), (50, 0)]},  # 不可绘制
+}
+CLIENTS = {'a': ['c0', 'c1'], 'b': ['c1']}
+
+
+def test_binary_round_trip(tmp_path):
+    geometry = TileGeometry(TILES)
+    path = tmp_path / 'tiles.geom'
+    header = write_binary_geometry(path, geometry, CLIENTS)
+    loaded = load_binary_geometry(path)
+
+    assert header['tile_count'] == len(loaded) == 3
+    assert loaded.names == geometry.names
+    for name in ('coords', 'offsets', 'centroids', 'bboxes', 'areas'):
+        np.testing.assert_array_equal(getattr(loaded, name), getattr(geometry, name))
+    assert isinstance(loaded.coords, np.memmap)
+    assert loaded.header['arrays']['coords']['offset'] % 64 == 0
+    assert [loaded.masters[i] for i in loaded.master_index] == geometry.masters
+    assert [loaded.orients[i] for i in loaded.orient_index] == geometry.orients
+
+    b = loaded.index['b']
+    np.testing.assert_array_equal(loaded.polygon(b), [[20, 0], [30, 0], [25, 8]])
+    assert loaded.tile_clients(loaded.index['a']) == ['c0', 'c1']
+    assert loaded.tile_clients(loaded.index['line']) == []
+
+
+def test_binary_without_clients(tmp_path):
+    path = tmp_path / 'tiles.geom'
+    write_binary_geometry(path, TileGeometry(TILES))
+    loaded = load_binary_geometry(path)
+    assert loaded.clients == [] and len(loaded.client_index) == 0
+    assert all(loaded.tile_clients(i) == [] for i in range(len(loaded)))
+
+
+def test_load_rejects_other_files(tmp_path):
+    path = tmp_path / 'tiles.geom'
+    path.write_bytes(b'not a geometry file')
+    with pytest.raises(ValueError):
+        load_binary_geometry(path)
+
+
+def test_geojson_features(tmp_path):
+    geometry = TileGeometry(TILES)
+    path = tmp_path / 'tiles.geojson'
+    assert write_geojson(path, geometry, CLIENTS) == 3
+    features = {feature['id']: feature for feature in json.loads(path.read_text(encoding='utf-8'))['features']}
+
+    ring = features['a']['geometry']['coordinates'][0]
+    assert ring[0] == ring[-1] and len(ring) == 5  # 闭合环
+    assert features['a']['properties']['clients'] == ['c0', 'c1']
+    assert features['b']['properties']['master'] == 'm1'
+    assert features['b']['properties']['bbox'] == [20, 0, 30, 8]
+    assert features['line']['geometry'] is None
@@ -0,0 +1,29 @@
+"""标签碰撞消解"""
+
+import numpy as np
+
+from label_layer import MIN_FONT_SIZE, resolve_label_collisions
+
+
+def test_shrunk_labels_never_go_below_min_font_size():
+    # 两个紧挨着的标签：第二个需要缩小，但起始字号已接近下限
+    display_xy = np.array([[0.0, 0.0], [14.0, 0.0]])
+    font_sizes = np.array([MIN_FONT_SIZE * 1.1, MIN_FONT_SIZE * 1.1])
+    kept, sizes = resolve_label_collisions(display_xy, font_sizes, np.array([4, 4]), dpi=300)
+    assert len(sizes)
+    assert (sizes >= MIN_FONT_SIZE).all()
+
+
+def test_colliding_min_size_label_is_dropped():
+    display_xy = np.array([[0.0, 0.0], [0.0, 0.0]])
+    font_sizes = np.array([MIN_FONT_SIZE, MIN_FONT_SIZE])
+    kept, sizes = resolve_label_collisions(display_xy, font_sizes, np.array([4, 4]), dpi=300)
+    assert kept.tolist() == [0]
+    assert sizes.tolist() == [MIN_FONT_SIZE]
+
+
+def test_separate_labels_keep_their_size():
+    display_xy = np.array([[0.0, 0.0], [1000.0, 1000.0]])
+    kept, sizes = resolve_label_collisions(display_xy, np.array([4.0, 3.0]), np.array([4, 4]), dpi=100)
+    assert sorted(kept.tolist()) == [0, 1]
+    assert sorted(sizes.tolist()) == [3.0, 4.0]
@@ -0,0 +1,56 @@
+"""渲染缓存：几何与绘图参数变化时键随之变化，命中时取回meta，超出容量时淘汰最久未使用的变体"""
+
+from render_cache import RenderCache, render_key
+from tile_geometry import TileGeometry
+
+
+def geometry(x0=0.0, master='m'):
+    return TileGeometry({
+        'a': {'master': master, 'orient': 'R0', 'vertices': [(x0, 0), (x0 + 10, 0), (x0 + 10, 10), (x0, 10)]},
+        'b': {'master': 'm', 'orient': 'R0', 'vertices': [(20, 0), (30, 0), (30, 10), (20, 10)]},
+    })
+
+
+OPTIONS = dict(dpi=150, highlight_client=['a', 'b'], tile_client_mapping={'a': ['c0', 'c1']})
+
+
+def test_key_changes_with_geometry_and_options():
+    key = render_key(geometry(), **OPTIONS)
+    assert render_key(geometry(), **OPTIONS) == key
+
+    assert render_key(geometry(x0=0.5), **OPTIONS) != key  # 顶点坐标
+    assert render_key(geometry(master='n'), **OPTIONS) != key  # master
+    assert render_key(geometry(), **{**OPTIONS, 'dpi': 300}) != key
+    assert render_key(geometry(), **{**OPTIONS, 'min_tile_pixels': 20}) != key
+    # 同一tile上client的顺序影响标记位置
+    assert render_key(geometry(), **{**OPTIONS, 'tile_client_mapping': {'a': ['c1', 'c0']}}) != key
+    # highlight按集合计入，与顺序和重复无关
+    assert render_key(geometry(), **{**OPTIONS, 'highlight_client': ['b', 'a', 'a']}) == key
+
+
+def test_fetch_returns_stored_meta(tmp_path):
+    cache = RenderCache(tmp_path / 'cache')
+    source = tmp_path / 'image.png'
+    source.write_bytes(b'png')
+    plan = {'mode': 'regions', 'dpi': 150, 'regions': [2, 3]}
+    cache.store('k1', source, meta={'resolution_plan': plan})
+    cache.store('k2', source)
+
+    target = tmp_path / 'out' / 'image.png'
+    assert cache.fetch('k1', target) == {'resolution_plan': plan}
+    assert target.read_bytes() == b'png'
+    assert cache.fetch('k2', target) == {}  # 命中但没有meta
+    assert cache.fetch('missing', target) is None
+
+
+def test_least_recently_used_entry_is_evicted(tmp_path):
+    cache = RenderCache(tmp_path / 'cache', max_entries=2)
+    source = tmp_path / 'image.png'
+    source.write_bytes(b'png')
+    cache.store('k1', source)
+    cache.store('k2', source)
+    assert cache.lookup('k1', '.png') is not None  # k1变为最近使用
+    cache.store('k3', source)
+
+    assert cache.keys() == ['k1', 'k3']
+    assert not (tmp_path / 'cache' / 'k2.png').exists()
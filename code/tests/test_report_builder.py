@@ -0,0 +1,41 @@
+"""数据分析报告：从JSON报告恢复后重新写出"""
+
+import json
+
+from report_builder import AnalysisReportBuilder
+
+
+def build_report():
+    builder = AnalysisReportBuilder()
+    builder.add_pair('mod_a', 'u0', '.c0_DbgBlkId(1)', 'tile_0')
+    builder.add_pair('mod_a', 'u1', '.c0_DbgBlkId(2)', '')
+    builder.set_match_suggestions([{'module': 'mod_b', 'instance': f'u{i}', 'dbg_blk_id': str(i),
+                                    'module_suggestions': [{'value': 'mod_a', 'similarity': 0.8}],
+                                    'instance_suggestions': [], 'dbg_blk_id_suggestions': []}
+                                   for i in range(80)])
+    builder.set_tile_analysis(missing_client_tiles={'ghost'}, available_tiles_count=3, highlight_client_count=2,
+                              skipped_tiles=['flat'])
+    builder.set_floorplan_check({'outline': (0, 0, 10, 10), 'tiles_checked': 3, 'rectangles': 3, 'seconds': 0.01,
+                                 'overlap_count': 0, 'overlap_area': 0, 'gap_count': 1, 'gap_area': 4,
+                                 'coverage': 96.0, 'overlaps': [], 'gaps': [(0, 0, 2, 2)],
+                                 'approximated_tiles': []})
+    return builder
+
+
+def report_body(path):
+    return [line for line in path.read_text(encoding='utf-8').splitlines() if not line.startswith('生成时间')]
+
+
+def test_restored_report_matches_full_report(tmp_path):
+    full_txt, full_json = build_report().write_reports(tmp_path / 'full')
+
+    rebuilt = AnalysisReportBuilder()
+    rebuilt.add_pair('mod_a', 'u0', '.c0_DbgBlkId(1)', 'tile_0')
+    rebuilt.add_pair('mod_a', 'u1', '.c0_DbgBlkId(2)', '')
+    rebuilt.restore_analysis(json.loads(full_json.read_text(encoding='utf-8')))
+    rebuilt_txt, _ = rebuilt.write_reports(tmp_path / 'rebuilt')
+
+    assert report_body(rebuilt_txt) == report_body(full_txt)
+    assert rebuilt.match_suggestion_count == 80
+    assert '未找到Tile匹配分析数据' not in rebuilt_txt.read_text(encoding='utf-8')
+    assert '未进行布局检查' not in rebuilt_txt.read_text(encoding='utf-8')
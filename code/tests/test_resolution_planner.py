@@ -0,0 +1,63 @@
+"""分辨率规划：MIN_DPI是下限，内存预算容纳不下时改为条带/区域，区域图像大小受预算限制"""
+
+import math
+
+import matplotlib.pyplot as plt
+
+from resolution_planner import MIN_DPI, REGION_SIDE_PIXELS, plan_figsize, plan_resolution
+from tile_parser import TileParser
+
+
+def grid_parser(count=20, size=10, gap=2):
+    parser = TileParser()
+    for i in range(count):
+        for j in range(count):
+            x0, y0 = i * (size + gap), j * (size + gap)
+            parser.tiles_dict[f"t{i}_{j}"] = {'master': 'm', 'orient': 'R0',
+                                              'vertices': [(x0, y0), (x0 + size, y0), (x0 + size, y0 + size), (x0, y0 + size)]}
+    return parser
+
+
+def plan(parser, min_tile_pixels=None, memory_budget=None):
+    fig = parser.build_figure(figsize=plan_figsize(parser.geometry))
+    try:
+        return plan_resolution(fig, parser.geometry, min_tile_pixels, memory_budget)
+    finally:
+        plt.close(fig)
+
+
+def test_default_budget_renders_single_image():
+    result = plan(grid_parser())
+    assert result['mode'] == 'single'
+    assert result['dpi'] >= MIN_DPI
+    assert result['strips'] == 1
+    assert result['region_side'] == REGION_SIDE_PIXELS
+
+
+def test_small_budget_keeps_min_dpi_and_renders_strips():
+    budget = 2 * 1024 * 1024
+    result = plan(grid_parser(), memory_budget=budget)
+
+    assert result['dpi'] == MIN_DPI  # 预算不会把总览图压到MIN_DPI以下
+    assert result['strips'] == math.ceil(result['bytes'] / budget) > 1
+    assert result['bytes'] / result['strips'] <= budget
+    assert result['mode'] == 'single'  # MIN_DPI下最小tile已达到默认目标像素数
+
+
+def test_regions_are_sized_from_budget():
+    budget = 2 * 1024 * 1024
+    result = plan(grid_parser(), min_tile_pixels=200, memory_budget=budget)
+
+    assert result['mode'] == 'regions'
+    assert result['region_side'] ** 2 * 4 <= budget
+    columns, rows = result['regions']
+    parser_extent = 20 * 12 - 2
+    # 每个区域图像的边长不超过region_side
+    assert parser_extent * result['pixels_per_unit'] / columns <= result['region_side']
+    assert parser_extent * result['pixels_per_unit'] / rows <= result['region_side']
+
+
+def test_too_many_regions_switch_to_pyramid():
+    result = plan(grid_parser(), min_tile_pixels=2000, memory_budget=64 * 1024)
+    assert result['mode'] == 'pyramid'
+    assert result['dpi'] == MIN_DPI
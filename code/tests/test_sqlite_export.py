@@ -0,0 +1,66 @@
+"""SQLite导出：各表行数、unmatched_pairs视图、索引，以及出错时不留下半成品"""
+
+import sqlite3
+
+import pytest
+
+from client_tile_index import ClientTileIndex
+from sqlite_export import INDEXES, export_sqlite
+from tile_parser import TileParser
+
+CHIP_DATA = {
+    'mod_a::u0': {'module': 'mod_a', 'instance': 'u0',
+                  'pairs': [{'DbgBlkId': 'c0_DbgBlkId(1)', 'tile_name': 'tile_0'},
+                            {'DbgBlkId': 'c0_DbgBlkId(2)', 'tile_name': ''}]},
+    'mod_b::u1': {'module': 'mod_b', 'instance': 'u1',
+                  'pairs': [{'DbgBlkId': 'c1_DbgBlkId(3)'}]},  # 未整合，没有tile_name
+}
+EXCEL_MAPPING = [{'module': 'mod_a', 'instance': 'u0', 'dbg_blk_id': 'c0_DbgBlkId(1)', 'tile_name': 'tile_0'}]
+
+
+def parser():
+    result = TileParser()
+    result.tiles_dict.update({f"tile_{i}": {'master': 'm', 'orient': 'R0',
+                                            'vertices': [(10 * i, 0), (10 * i + 10, 0), (10 * i + 10, 5), (10 * i, 5)]}
+                              for i in range(3)})
+    return result
+
+
+def test_export_rows_view_and_indexes(tmp_path):
+    db_path = tmp_path / 'out' / 'dfd.sqlite'
+    mapping = ClientTileIndex([('tile_0', 'mod_a::u0::c0_DbgBlkId(1)'), ('tile_1', 'mod_a::u0::c0_DbgBlkId(1)')])
+    counts = export_sqlite(db_path, chip_data=CHIP_DATA, excel_mapping=EXCEL_MAPPING, parser=parser(),
+                           tile_client_mapping=mapping)
+
+    assert counts == {'blocks': 2, 'pairs': 3, 'excel_mapping': 1, 'tiles': 3, 'client_tiles': 2}
+    assert not (tmp_path / 'out' / 'dfd.sqlite.tmp').exists()
+
+    connection = sqlite3.connect(str(db_path))
+    try:
+        for table, count in counts.items():
+            assert connection.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0] == count
+        assert sorted(connection.execute("SELECT * FROM unmatched_pairs").fetchall()) == [
+            ('mod_a', 'u0', 'c0_DbgBlkId(2)'), ('mod_b', 'u1', 'c1_DbgBlkId(3)')]
+        assert connection.execute("SELECT module, instance, dbg_blk_id FROM client_tiles WHERE tile_name = 'tile_1'"
+                                  ).fetchall() == [('mod_a', 'u0', 'c0_DbgBlkId(1)')]
+
+        indexes = {name for (name,) in connection.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'index' AND name LIKE 'idx_%'")}
+        assert indexes == {statement.split(' ON ')[0].split()[-1] for statement in INDEXES}
+        assert connection.execute("SELECT value FROM meta WHERE key = 'rows.pairs'").fetchone() == ('3',)
+    finally:
+        connection.close()
+
+
+def test_failed_export_keeps_existing_database(tmp_path):
+    db_path = tmp_path / 'dfd.sqlite'
+    export_sqlite(db_path, chip_data=CHIP_DATA)
+    original = db_path.read_bytes()
+
+    duplicate = {'mod_a::u0': CHIP_DATA['mod_a::u0']}
+    bad_rows = [{'module': 'mod_a', 'instance': 'u0', 'dbg_blk_id': 'x'}]  # 缺少tile_name，写入中途出错
+    with pytest.raises(KeyError):
+        export_sqlite(db_path, chip_data=duplicate, excel_mapping=bad_rows)
+
+    assert db_path.read_bytes() == original
+    assert not (tmp_path / 'dfd.sqlite.tmp').exists()
@@ -0,0 +1,78 @@
+"""符号表：client-tile索引与几何按整数ID连接，结果与按名称一致；输入失效后符号表只保留仍缓存的名称"""
+
+import numpy as np
+
+from client_tile_index import ClientTileIndex
+from dfd_processor import DFDProcessor
+from symbol_table import SymbolTable
+from tile_parser import TileParser
+
+PAIRS = [('tile_0', 'mod_a::u0::d1'), ('tile_0', 'mod_b::u0::d3'), ('tile_2', 'mod_a::u1::d2'),
+         ('tile_9', 'mod_c::u0::d4')]
+
+
+def square(x0):
+    return {'master': 'm', 'orient': 'R0', 'vertices': [(x0, 0), (x0 + 10, 0), (x0 + 10, 10), (x0, 10)]}
+
+
+def parser_with_tiles(symbols=None):
+    parser = TileParser(symbols=symbols)
+    parser.tiles_dict.update({f"tile_{i}": square(20 * i) for i in range(4)})
+    return parser
+
+
+def test_id_keyed_index_matches_name_keyed_index():
+    symbols = SymbolTable()
+    by_id = ClientTileIndex(PAIRS, symbols=symbols)
+    by_name = ClientTileIndex(PAIRS)
+
+    assert all(isinstance(key, int) for key in by_id.tile_keys())
+    assert dict(by_id) == dict(by_name)
+    assert by_id.tiles_of_client('mod_a::u1::d2') == ('tile_2',)
+    assert by_id.tiles_of_module('mod_a') == by_name.tiles_of_module('mod_a') == ('tile_0', 'tile_2')
+    assert by_id.multi_client_tiles() == {'tile_0': 2}
+    assert 'tile_5' not in by_id and by_id.clients('tile_5') == ()
+    assert by_id.client_counts_of_ids(symbols.ids(['tile_0', 'tile_9'])) == [2, 1]
+
+
+def test_geometry_rows_by_id():
+    symbols = SymbolTable()
+    parser = parser_with_tiles(symbols)
+    names = ['tile_3', 'missing', 'tile_0']
+    symbols.intern('registered_later')  # 几何建立ID->行号表之后登记的名称不是tile
+
+    np.testing.assert_array_equal(parser.geometry.rows(names, symbols), [3, -1, 0])
+    np.testing.assert_array_equal(parser.geometry.rows(names), [3, -1, 0])
+    np.testing.assert_array_equal(parser.geometry.rows(['registered_later'], symbols), [-1])
+
+
+def test_client_offsets_join_on_ids():
+    symbols = SymbolTable()
+    parser = parser_with_tiles(symbols)
+    offsets = parser._calculate_client_offsets(ClientTileIndex(PAIRS, symbols=symbols))
+    plain = parser_with_tiles()._calculate_client_offsets(ClientTileIndex(PAIRS))
+
+    assert offsets == plain
+    assert sorted(offsets) == [0, 2]  # tile_9不在几何中
+    assert [client for client, _, _ in offsets[0]] == ['mod_a::u0::d1', 'mod_b::u0::d3']
+
+
+def test_invalidate_drops_stale_names(tmp_path):
+    processor = DFDProcessor({}, input_dir=tmp_path, output_dir=tmp_path)
+    old_symbols = processor.symbols
+    processor.parser = parser_with_tiles(old_symbols)
+    processor.tile_client_mapping = ClientTileIndex(PAIRS, symbols=old_symbols)
+    processor.highlight_client_list = ['tile_0', 'tile_2']
+    old_symbols.intern('renamed_module')  # 改名前的CHIP.txt名称
+    processor.parser.geometry.rows(['tile_0'], old_symbols)
+
+    processor.invalidate('chip')
+
+    symbols = processor.symbols
+    assert symbols is not old_symbols and 'renamed_module' not in symbols
+    assert processor.tile_client_mapping.symbols is symbols and processor.parser.symbols is symbols
+    assert dict(processor.tile_client_mapping) == dict(ClientTileIndex(PAIRS))
+    np.testing.assert_array_equal(processor.parser.geometry.rows(['tile_2', 'tile_9'], symbols), [2, -1])
+
+    processor.invalidate()
+    assert len(processor.symbols) == 0
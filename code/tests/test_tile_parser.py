@@ -0,0 +1,49 @@
+"""TileParser几何缓存"""
+
+import pickle
+
+from tile_parser import TileDict, TileParser
+
+
+def square(x0, size=10):
+    return {'master': 'm', 'orient': 'R0',
+            'vertices': [(x0, 0), (x0 + size, 0), (x0 + size, size), (x0, size)]}
+
+
+def test_geometry_is_cached_until_tiles_change():
+    parser = TileParser()
+    parser.tiles_dict.update({'a': square(0), 'b': square(20)})
+    geometry = parser.geometry
+    assert parser.geometry is geometry
+
+    # 替换一个tile，tile数量不变
+    parser.tiles_dict['b'] = square(50, size=5)
+    assert parser.geometry is not geometry
+    assert parser.geometry.bboxes[1].tolist() == [50, 0, 55, 5]
+
+
+def test_replacing_tiles_dict_with_same_length_rebuilds_geometry():
+    parser = TileParser()
+    parser.tiles_dict = {'a': square(0)}
+    geometry = parser.geometry
+    parser.tiles_dict = {'b': square(100)}
+    assert parser.geometry is not geometry
+    assert parser.geometry.names == ['b']
+
+
+def test_in_place_vertex_edit_needs_invalidate():
+    parser = TileParser()
+    parser.tiles_dict['a'] = square(0)
+    geometry = parser.geometry
+    parser.tiles_dict['a']['vertices'] = square(30)['vertices']
+    parser.invalidate_geometry()
+    assert parser.geometry is not geometry
+    assert parser.geometry.bboxes[0].tolist() == [30, 0, 40, 10]
+
+
+def test_tile_dict_pickle_round_trip():
+    tiles = TileDict({'a': square(0)})
+    restored = pickle.loads(pickle.dumps(tiles))
+    assert restored == tiles
+    restored['b'] = square(10)
+    assert restored.version > 0
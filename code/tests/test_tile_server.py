@@ -0,0 +1,44 @@
+"""TileMapService 坐标查询"""
+
+import pytest
+
+from tile_parser import TileParser
+from tile_server import TileMapService
+
+
+@pytest.fixture
+def service():
+    parser = TileParser()
+    parser.tiles_dict.update({
+        # 2x2 网格排列的四个方块
+        'a': {'master': 'm0', 'orient': 'R0', 'vertices': [(0, 0), (10, 0), (10, 10), (0, 10)]},
+        'b': {'master': 'm0', 'orient': 'R0', 'vertices': [(10, 0), (20, 0), (20, 10), (10, 10)]},
+        'c': {'master': 'm1', 'orient': 'R0', 'vertices': [(0, 10), (10, 10), (10, 20), (0, 20)]},
+        'd': {'master': 'm1', 'orient': 'R0', 'vertices': [(10, 10), (20, 10), (20, 20), (10, 20)]},
+    })
+    return TileMapService(parser)
+
+
+def test_interior_point(service):
+    assert service.tiles_at(5, 5) == ['a']
+    assert service.tiles_at(15, 15) == ['d']
+
+
+@pytest.mark.parametrize('x, y, expected', [
+    (20, 20, ['d']),  # 布局范围的右上角
+    (20, 5, ['b']),  # 右边界
+    (5, 20, ['c']),  # 上边界
+    (0, 0, ['a']),  # 左下角
+])
+def test_extent_boundary_is_inside(service, x, y, expected):
+    assert service.tiles_at(x, y) == expected
+
+
+def test_shared_edge_belongs_to_both_tiles(service):
+    assert sorted(service.tiles_at(10, 5)) == ['a', 'b']
+    assert sorted(service.tiles_at(10, 10)) == ['a', 'b', 'c', 'd']
+
+
+@pytest.mark.parametrize('x, y', [(-1, 5), (21, 5), (5, 25), (1e9, 1e9)])
+def test_outside_extent(service, x, y):
+    assert service.tiles_at(x, y) == []
@@ -0,0 +1,311 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tile几何计算内核
+将所有tile的顶点展平为连续数组（坐标 + 每个tile的起始偏移），用NumPy分段运算一次性计算：
+    - 鞋带公式面积
+    - 按面积加权的真实质心（L形等非矩形tile也正确）
+    - 包围盒
+    - orient方向角标线段
+    - 非矩形tile的内部代表点（距边界最远的点），用于放置标记
+"""
+
+import heapq
+
+import numpy as np
+
+ORIENT_CORNERS = {
+    'R0': (0, 0),    # 左下角
+    'MX': (0, 1),    # 左上角
+    'MY': (1, 0),    # 右下角
+    'R180': (1, 1),  # 右上角
+}
+ORIENT_MARKER_RATIO = 0.1  # 角标长度占较短邻边的比例
+INTERIOR_PRECISION = 0.01  # 内部代表点的搜索精度（占包围盒较长边的比例）
+
+
+class TileGeometry:
+    """所有tile几何属性的向量化表示"""
+
+    def __init__(self, tiles_dict):
+        """
+        Args:
+            tiles_dict: TileParser.tiles_dict，{tile_name: {master, orient, vertices}}
+        """
+        counts = np.fromiter((len(data['vertices']) for data in tiles_dict.values()),
+                             dtype=np.int64, count=len(tiles_dict))
+        offsets = np.zeros(len(tiles_dict) + 1, dtype=np.int64)
+        np.cumsum(counts, out=offsets[1:])
+        coords = np.fromiter((c for data in tiles_dict.values() for v in data['vertices'] for c in v[:2]),
+                             dtype=float, count=int(offsets[-1]) * 2)
+        self._setup(list(tiles_dict.keys()), [data['master'] for data in tiles_dict.values()],
+                    [data['orient'] for data in tiles_dict.values()], coords.reshape(-1, 2), offsets)
+
+    @classmethod
+    def from_arrays(cls, names, masters, orients, coords, offsets):
+        """
+        由扁平坐标数组直接构建，不经过tiles_dict（见csv_ingest.read_tile_arrays）
+
+        Args:
+            names / masters / orients: 每个tile的名称、master、orient
+            coords: (n_vertices, 2) 顶点坐标
+            offsets: (n_tiles + 1,) 每个tile在coords中的起始下标
+        """
+        geometry = cls.__new__(cls)
+        geometry._setup(list(names), list(masters), list(orients),
+                        np.asarray(coords, dtype=float).reshape(-1, 2), np.asarray(offsets, dtype=np.int64))
+        return geometry
+
+    def _setup(self, names, masters, orients, coords, offsets):
+        self.names = names
+        self.index = {name: i for i, name in enumerate(self.names)}
+        self.masters = masters
+        self.orients = orients
+        self.coords = coords
+        self.offsets = offsets
+        self.counts = np.diff(offsets)
+        self.segment = np.repeat(np.arange(len(self.names)), self.counts)  # 每个顶点所属的tile下标
+
+        self.valid = self.counts >= 3  # 可绘制的多边形
+        self._interior = None  # interior_points()的缓存
+        self._symbol_rows = None  # (符号表, ID->行号数组)，见symbol_rows()
+        self._compute()
+
+    def __len__(self):
+        return len(self.names)
+
+    def __getstate__(self):
+        # 传给条带渲染子进程时不带符号表（子进程按名称连接）
+        state = self.__dict__.copy()
+        state['_symbol_rows'] = None
+        return state
+
+    def symbol_rows(self, symbols):
+        """
+        符号表ID -> tile行号的数组（不是tile的ID为-1），按符号表缓存；tile名称尚未登记时在此登记，
+        因此之后新登记的ID都不是tile
+        """
+        if self._symbol_rows is None or self._symbol_rows[0] is not symbols:
+            ids = np.fromiter((symbols.intern(name) for name in self.names), dtype=np.int64, count=len(self.names))
+            rows = np.full(len(symbols), -1, dtype=np.int64)
+            rows[ids] = np.arange(len(self.names))
+            self._symbol_rows = (symbols, rows)
+        return self._symbol_rows[1]
+
+    def rows_of_ids(self, ids, symbols):
+        """符号表ID数组 -> tile行号数组（不存在的tile为-1）"""
+        table = self.symbol_rows(symbols)
+        ids = np.asarray(ids, dtype=np.int64)
+        rows = np.full(len(ids), -1, dtype=np.int64)
+        known = (ids >= 0) & (ids < len(table))
+        rows[known] = table[ids[known]]
+        return rows
+
+    def rows(self, tiles, symbols=None):
+        """
+        tile名称 -> 行号数组（不存在的tile为-1）；给出符号表时名称一次转为ID，再按整数数组查表
+        """
+        tiles = list(tiles)
+        if symbols is not None:
+            self.symbol_rows(symbols)  # 先登记tile名称，查询中的tile名称才有ID
+            return self.rows_of_ids(symbols.ids(tiles), symbols)
+        get = self.index.get
+        return np.fromiter((get(name, -1) for name in tiles), dtype=np.int64, count=len(tiles))
+
+    def _next_vertex(self):
+        """每个顶点在所属多边形中的下一个顶点下标（首尾相接）"""
+        nxt = np.arange(len(self.coords)) + 1
+        ends = self.offsets[1:][self.counts > 0] - 1
+        nxt[ends] = self.offsets[:-1][self.counts > 0]
+        return nxt
+
+    def _segment_sum(self, values):
+        """按tile分段求和"""
+        return np.bincount(self.segment, weights=values, minlength=len(self.names))
+
+    def _compute(self):
+        n = len(self.names)
+        if n == 0 or len(self.coords) == 0:
+            self.areas = np.zeros(n)
+            self.centroids = np.zeros((n, 2))
+            self.bboxes = np.zeros((n, 4))
+            self.orient_segments = np.full((n, 2, 2), np.nan)
+            self.orient_valid = np.zeros(n, dtype=bool)
+            return
+
+        x, y = self.coords[:, 0], self.coords[:, 1]
+        nxt = self._next_vertex()
+        xn, yn = x[nxt], y[nxt]
+
+        # 鞋带公式
+        cross = x * yn - xn * y
+        signed_area = 0.5 * self._segment_sum(cross)
+        self.areas = np.abs(signed_area)
+
+        # 面积加权质心；退化多边形（面积为0）退回顶点均值
+        counts = np.maximum(self.counts, 1)
+        mean_x = self._segment_sum(x) / counts
+        mean_y = self._segment_sum(y) / counts
+        with np.errstate(divide='ignore', invalid='ignore'):
+            cx = self._segment_sum((x + xn) * cross) / (6 * signed_area)
+            cy = self._segment_sum((y + yn) * cross) / (6 * signed_area)
+        degenerate = ~np.isfinite(cx) | ~np.isfinite(cy) | (self.areas <= 1e-12)
+        self.centroids = np.column_stack([np.where(degenerate, mean_x, cx), np.where(degenerate, mean_y, cy)])
+
+        # 包围盒
+        starts = self.offsets[:-1]
+        has_vertices = self.counts > 0
+        self.bboxes = np.zeros((n, 4))
+        for column, (values, reducer) in enumerate(((x, np.minimum), (y, np.minimum), (x, np.maximum), (y, np.maximum))):
+            self.bboxes[has_vertices, column] = reducer.reduceat(values, starts[has_vertices])
+
+        self._compute_orient_segments(x, y, nxt)
+
+    def _compute_orient_segments(self, x, y, nxt):
+        """
+        根据orient在多边形对应角上计算方向角标：
+        取最接近包围盒目标角的顶点，在两条邻边上各取较短边长的10%，连成一条短线
+        """
+        n = len(self.names)
+        corner_sel = np.array([ORIENT_CORNERS.get(o, (-1, -1)) for o in self.orients], dtype=int).reshape(n, 2)
+        has_orient = (corner_sel[:, 0] >= 0) & self.valid
+
+        target_x = np.where(corner_sel[:, 0] == 1, self.bboxes[:, 2], self.bboxes[:, 0])
+        target_y = np.where(corner_sel[:, 1] == 1, self.bboxes[:, 3], self.bboxes[:, 1])
+        dist = (x - target_x[self.segment]) ** 2 + (y - target_y[self.segment]) ** 2
+
+        # 每个tile内距离最小的顶点（稳定排序，距离相同时取顶点顺序靠前者）
+        order = np.lexsort((dist, self.segment))
+        has_vertices = self.counts > 0
+        corner = np.zeros(n, dtype=np.int64)
+        corner[has_vertices] = order[self.offsets[:-1][has_vertices]]
+
+        prev = corner - 1
+        wrap = prev < self.offsets[:-1]
+        prev[wrap] = self.offsets[1:][wrap] - 1
+        nxt_corner = nxt[corner] if len(nxt) else corner
+
+        corner_xy = self.coords[corner]
+        prev_xy = self.coords[prev]
+        next_xy = self.coords[nxt_corner]
+        edge_1 = np.hypot(*(prev_xy - corner_xy).T)
+        edge_2 = np.hypot(*(next_xy - corner_xy).T)
+        length = ORIENT_MARKER_RATIO * np.minimum(edge_1, edge_2)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            p1 = corner_xy + (prev_xy - corner_xy) / edge_1[:, None] * length[:, None]
+            p2 = corner_xy + (next_xy - corner_xy) / edge_2[:, None] * length[:, None]
+
+        self.orient_valid = has_orient & (edge_1 > 0) & (edge_2 > 0)
+        self.orient_segments = np.stack([p1, p2], axis=1)
+        self.orient_segments[~self.orient_valid] = np.nan
+
+    def interior_points(self, indices=None):
+        """
+        tile的内部代表点及其到边界的距离（按需计算并缓存）
+
+        矩形tile直接取质心，距离为较短边的一半；L形、凹形等非矩形tile的质心可能落在tile外，
+        改用距边界最远的内部点（pole of inaccessibility，网格细分搜索，每个tile数毫秒，
+        因此只计算用到的tile）。
+
+        Args:
+            indices: tile下标，None表示全部
+
+        Returns:
+            tuple: (points (n, 2), distances (n,))
+        """
+        if self._interior is None:
+            bbox_areas = self.widths() * self.heights()
+            self._interior = (self.centroids.copy(), np.minimum(self.widths(), self.heights()) / 2,
+                              self.valid & (self.areas < bbox_areas * (1 - 1e-9)))
+        points, distances, pending = self._interior
+        selected = np.arange(len(self.names)) if indices is None else np.asarray(indices, dtype=np.int64)
+        for i in selected[pending[selected]]:
+            points[i], distances[i] = _pole_of_inaccessibility(
+                self.coords[self.offsets[i]:self.offsets[i + 1]], self.centroids[i], self.bboxes[i])
+            pending[i] = False
+        if indices is None:
+            return points, distances
+        return points[selected], distances[selected]
+
+    def tile_items(self):
+        """按tiles_dict的格式逐个产出 (tile_name, {master, orient, vertices})，vertices为 (x, y) 元组列表"""
+        points = list(zip(self.coords[:, 0].tolist(), self.coords[:, 1].tolist()))
+        offsets = self.offsets.tolist()
+        for i, name in enumerate(self.names):
+            yield name, {'master': self.masters[i], 'orient': self.orients[i],
+                         'vertices': points[offsets[i]:offsets[i + 1]]}
+
+    def polygons(self, indices=None):
+        """返回多边形顶点数组列表（视图，不复制数据）"""
+        if indices is None:
+            return np.split(self.coords, self.offsets[1:-1])
+        return [self.coords[self.offsets[i]:self.offsets[i + 1]] for i in indices]
+
+    def widths(self):
+        return self.bboxes[:, 2] - self.bboxes[:, 0]
+
+    def heights(self):
+        return self.bboxes[:, 3] - self.bboxes[:, 1]
+
+    def extent(self):
+        """整个布局的包围盒 (xmin, ymin, xmax, ymax)"""
+        if not len(self.coords):
+            return (0.0, 0.0, 1.0, 1.0)
+        return (float(self.coords[:, 0].min()), float(self.coords[:, 1].min()),
+                float(self.coords[:, 0].max()), float(self.coords[:, 1].max()))
+
+
+def _signed_distance(px, py, polygon):
+    """点到多边形边界的距离，点在多边形外时为负（px、py可为数组）"""
+    px, py = np.asarray(px, dtype=float)[:, None], np.asarray(py, dtype=float)[:, None]
+    ax, ay = polygon[:, 0], polygon[:, 1]
+    bx, by = np.roll(ax, -1), np.roll(ay, -1)
+    dx, dy = bx - ax, by - ay
+    length_sq = dx * dx + dy * dy
+    with np.errstate(divide='ignore', invalid='ignore'):
+        t = np.clip(np.where(length_sq > 0, ((px - ax) * dx + (py - ay) * dy) / length_sq, 0.0), 0.0, 1.0)
+        x_cross = ax + (py - ay) * dx / dy
+    distance = np.sqrt(((ax + t * dx - px) ** 2 + (ay + t * dy - py) ** 2).min(axis=1))
+    crosses = ((ay > py) != (by > py)) & (px < x_cross)
+    inside = np.count_nonzero(crosses, axis=1) % 2 == 1
+    return np.where(inside, distance, -distance)
+
+
+def _pole_of_inaccessibility(polygon, centroid, bbox):
+    """
+    多边形内距边界最远的点（polylabel算法）：从覆盖包围盒的方格开始，按可能达到的最大距离
+    优先细分，直到不可能再改进超过精度为止
+
+    Returns:
+        tuple: (point (2,), distance)
+    """
+    xmin, ymin, xmax, ymax = bbox
+    cell = min(xmax - xmin, ymax - ymin)
+    if cell <= 0:
+        return np.asarray(centroid, dtype=float), 0.0
+    precision = INTERIOR_PRECISION * max(xmax - xmin, ymax - ymin)
+
+    def evaluate(xs, ys, half):
+        distances = _signed_distance(xs, ys, polygon)
+        return [(-(d + half * np.sqrt(2)), float(d), float(x), float(y), half)
+                for x, y, d in zip(xs, ys, distances)]
+
+    half = cell / 2
+    xs, ys = np.meshgrid(np.arange(xmin, xmax, cell) + half, np.arange(ymin, ymax, cell) + half)
+    queue = evaluate(xs.ravel(), ys.ravel(), half)
+    heapq.heapify(queue)
+    # 初始最优点取质心与包围盒中心中较好的一个
+    best = max(evaluate(np.array([centroid[0], (xmin + xmax) / 2]), np.array([centroid[1], (ymin + ymax) / 2]), 0.0),
+               key=lambda item: item[1])
+    while queue:
+        potential, distance, x, y, half = heapq.heappop(queue)
+        if distance > best[1]:
+            best = (potential, distance, x, y, half)
+        if -potential - best[1] <= precision:
+            continue
+        half /= 2
+        for item in evaluate(np.array([x - half, x + half, x - half, x + half]),
+                             np.array([y - half, y - half, y + half, y + half]), half):
+            heapq.heappush(queue, item)
+    return np.array([best[2], best[3]]), max(best[1], 0.0)
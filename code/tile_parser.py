@@ -1,10 +1,23 @@
 import csv
 from collections import defaultdict
 import matplotlib.pyplot as plt
-from matplotlib.patches import Polygon
 import numpy as np
 from pathlib import Path
+import logging
 import pickle
+from dfd_logger import get_logger, log_summary
+from label_layer import draw_tile_labels
+from client_layout import compute_client_offsets, marker_boxes
+from client_tile_index import ClientTileIndex
+from client_heatmap import BASE_FACECOLOR, resolve_display_mode, tile_client_counts, draw_tile_heatmap, draw_grid_heatmap
+from tile_geometry import TileGeometry
+from floorplan_check import check_floorplan
+from csv_ingest import DEFAULT_CHUNK_ROWS, DEFAULT_MEMORY_BUDGET, read_tile_arrays
+from matplotlib.collections import LineCollection, PolyCollection
+
+CSV_ENCODINGS = ('utf-8', 'gbk', 'latin-1')
+
+logger = get_logger('tile_parser')
 
 """
 Tile数据解析与可视化工具
@@ -15,23 +28,164 @@ Tile数据解析与可视化工具
     - 高分辨率图像导出
 """
 
+class TileDict(dict):
+    """
+    tiles_dict：增删tile时递增version，几何缓存据此判断是否需要重建
+    （原地修改某个tile的顶点列表无法被检测，需调用TileParser.invalidate_geometry()）
+    """
+
+    version = 0  # 反序列化时先逐项写入再恢复属性，类属性保证此时已有初值
+
+    def _changed(self):
+        self.version += 1
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self._changed()
+
+    def __delitem__(self, key):
+        super().__delitem__(key)
+        self._changed()
+
+    def __ior__(self, other):
+        result = super().__ior__(other)
+        self._changed()
+        return result
+
+    def update(self, *args, **kwargs):
+        super().update(*args, **kwargs)
+        self._changed()
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self._changed()
+        return super().setdefault(key, default)
+
+    def pop(self, *args):
+        result = super().pop(*args)
+        self._changed()
+        return result
+
+    def popitem(self):
+        result = super().popitem()
+        self._changed()
+        return result
+
+    def clear(self):
+        super().clear()
+        self._changed()
+
+
 class TileParser:
 
 
-    def __init__(self):
-        self.tiles_dict = {}  # {tile_name: {master, orient, vertices}}
+    def __init__(self, symbols=None):
+        """
+        Args:
+            symbols: 可选的SymbolTable，tile/master/orient名称在其中登记并与其他数据源共享字符串对象
+        """
+        self.symbols = symbols
+        self.tiles_dict = TileDict()  # {tile_name: {master, orient, vertices}}
+        self.missing_highlight_tiles = []  # 最近一次plot中不存在的highlight_client tile
+        self.skipped_tiles = []  # 最近一次plot中因顶点少于3个而跳过的tile
+        self.client_display_used = None  # 最近一次plot实际使用的client显示方式（'auto'解析后）
+        self.resolution_plan = None  # 最近一次 plot(dpi='auto') 的分辨率规划
+        self._geometry = None  # 缓存的TileGeometry，见geometry属性
+        self._geometry_version = None  # 构建几何缓存时tiles_dict的version
+
+    @property
+    def tiles_dict(self):
+        # 由数组构建几何（parse_from_csv、use_geometry）后，逐顶点的元组列表在首次访问时才生成
+        if self._tiles_dict is None:
+            self._tiles_dict = TileDict(self._geometry.tile_items())
+            self._geometry_version = self._tiles_dict.version
+        return self._tiles_dict
+
+    @tiles_dict.setter
+    def tiles_dict(self, value):
+        # 整体替换时同样使几何缓存失效（新对象的version从0开始，不能只比较version）
+        self._tiles_dict = value if isinstance(value, TileDict) else TileDict(value)
+        self._geometry = None
+
+    @property
+    def geometry(self):
+        """
+        所有tile的向量化几何属性（面积、质心、包围盒、orient角标），首次访问时计算并缓存，
+        重新解析、替换tiles_dict或增删tile后自动重建
+        """
+        if self._tiles_dict is None:
+            return self._geometry
+        if self._geometry is None or self._geometry_version != self.tiles_dict.version:
+            self._geometry = TileGeometry(self.tiles_dict)
+            self._geometry_version = self.tiles_dict.version
+        return self._geometry
+
+    def invalidate_geometry(self):
+        """原地修改了tile顶点后调用，强制重建几何缓存"""
+        if self._tiles_dict is not None:  # tiles_dict尚未生成时几何就是唯一的数据，不会被原地修改
+            self._geometry = None
+
+    def use_geometry(self, geometry):
+        """
+        以TileGeometry作为数据（如csv_ingest.read_tile_arrays的结果），tiles_dict在首次访问时由几何生成
+
+        Args:
+            geometry: TileGeometry
+        """
+        self._tiles_dict = None
+        self._geometry = geometry
+
+    def check_floorplan(self, outline=None):
+        """
+        检查tile之间的重叠以及die轮廓内未覆盖的空隙
+
+        Args:
+            outline: die轮廓包围盒 (xmin, ymin, xmax, ymax)，默认取所有tile的总包围盒
+
+        Returns:
+            dict: 检查结果，见floorplan_check.check_floorplan
+        """
+        result = check_floorplan(self.geometry, outline=outline)
+        if result['overlap_count']:
+            log_summary(logger, logging.WARNING, "⚠️ 检测到重叠的tile对",
+                        [f"{item['tile_a']} ↔ {item['tile_b']} (面积 {item['area']:g})" for item in result['overlaps']],
+                        detail_hint="data_analysis_report.txt")
+        if result['gap_count']:
+            logger.warning(f"⚠️ die轮廓内有 {result['gap_count']} 处未覆盖空隙，覆盖率 {result['coverage']:.2f}%")
+        if result['approximated_tiles']:
+            logger.info(f"ℹ️ {len(result['approximated_tiles'])} 个非直角tile按包围盒近似检查")
+        logger.info(f"🧩 布局检查完成: {result['tiles_checked']} 个tile，耗时 {result['seconds']:.2f}s")
+        return result
 
     def save_data(self, filepath):
         """保存解析后的数据到文件"""
         with open(filepath, 'wb') as f:
-            pickle.dump(self.tiles_dict, f)
-        print(f"💾 数据已保存至: {filepath}")        
+            pickle.dump(dict(self.tiles_dict), f)
+        logger.info(f"💾 数据已保存至: {filepath}")        
     ## parser.save_data("tiles_data.pkl")
 
-    def parse_from_csv(self, csv_file_path):
-        """解析CSV文件"""
+    def export_geojson(self, filepath, tile_client_mapping=None):
+        """把tile几何（含master/orient/质心/client）流式导出为GeoJSON，见geometry_export"""
+        from geometry_export import write_geojson
+        return write_geojson(filepath, self.geometry, tile_client_mapping)
+
+    def export_geometry(self, filepath, tile_client_mapping=None):
+        """导出扁平坐标数组 + 偏移的二进制几何文件，可用geometry_export.load_binary_geometry零拷贝加载"""
+        from geometry_export import write_binary_geometry
+        return write_binary_geometry(filepath, self.geometry, tile_client_mapping)
+
+    def parse_from_csv(self, csv_file_path, chunk_rows=DEFAULT_CHUNK_ROWS, memory_budget=DEFAULT_MEMORY_BUDGET,
+                       spill_dir=None):
+        """
+        解析CSV文件（分块读取，超出内存预算的顶点数组临时写入磁盘，结果直接构建为TileGeometry，见csv_ingest）
+
+        Args:
+            csv_file_path: MID.csv路径，相对路径按 input/ 目录解析
+            chunk_rows: 每块转换为数组的tile行数
+            memory_budget: 扫描阶段顶点数组的内存上限（字节）
+            spill_dir: 临时文件的父目录，默认为系统临时目录
+        """
         import os
-        from pathlib import Path
         
         # 转换为绝对路径
         if not os.path.isabs(csv_file_path):
@@ -42,49 +196,21 @@ class TileParser:
         if not os.path.exists(csv_file_path):
             raise FileNotFoundError(f"CSV文件不存在: {csv_file_path}")
         
-        self.tiles_dict.clear()
-        try:
-            with open(csv_file_path, mode='r', newline='', encoding='utf-8') as file:
-                reader = csv.DictReader(file)
-                self._process_csv_rows(reader)
-        except UnicodeDecodeError:
-            # 如果UTF-8解码失败，尝试其他编码
+        canonical = self.symbols.canonical if self.symbols is not None else None
+        # 如果UTF-8解码失败，依次尝试其他编码
+        for encoding in CSV_ENCODINGS:
             try:
-                with open(csv_file_path, mode='r', newline='', encoding='gbk') as file:
-                    reader = csv.DictReader(file)
-                    self._process_csv_rows(reader)
+                with open(csv_file_path, mode='r', newline='', encoding=encoding) as file:
+                    arrays = read_tile_arrays(file, canonical, chunk_rows=chunk_rows,
+                                              memory_budget=memory_budget, spill_dir=spill_dir)
+                break
             except UnicodeDecodeError:
-                with open(csv_file_path, mode='r', newline='', encoding='latin-1') as file:
-                    reader = csv.DictReader(file)
-                    self._process_csv_rows(reader)        # 排序并提取 (x, y)
-        for data in self.tiles_dict.values():
-            data['vertices'].sort(key=lambda v: v[0])
-            data['vertices'] = [(x, y) for _, x, y in data['vertices']]
-
-        print(f"✅ 成功解析 {len(self.tiles_dict)} 个 tiles")
-        return self
-
-    def _process_csv_rows(self, reader):
-        """处理CSV行数据"""
-        for row in reader:
-            if row.get('struct') != 'tile':
-                continue
+                if encoding == CSV_ENCODINGS[-1]:
+                    raise
+        self.use_geometry(TileGeometry.from_arrays(**arrays))
 
-            tile_name = row['tile']
-            master = row['master']
-            orient = row['orient']
-            vertex_idx = int(row['vertex_index'])
-            x = float(row['vertex_x'])
-            y = float(row['vertex_y'])
-
-            if tile_name not in self.tiles_dict:
-                self.tiles_dict[tile_name] = {
-                    'master': master,
-                    'orient': orient,
-                    'vertices': []
-                }
-
-            self.tiles_dict[tile_name]['vertices'].append((vertex_idx, x, y))
+        logger.info(f"✅ 成功解析 {len(self)} 个 tiles")
+        return self
 
     def get_data(self):
         """返回数据副本"""
@@ -107,134 +233,174 @@ class TileParser:
                 unique_colors.append(color)
             if len(unique_colors) >= 30:
                 break
-        unique_masters = sorted(set(data['master'] for data in self.tiles_dict.values()))
+        unique_masters = sorted(set(self.geometry.masters))
         colors = [unique_colors[i % len(unique_colors)] for i in range(len(unique_masters))]
         return {master: colors[i] for i, master in enumerate(unique_masters)}
     
-    def _draw_orient_marker(self, ax, vertices, orient):
-        """
-        根据 orient 类型在多边形对应角上绘制方向角标。
-        支持: R0 (左下), MX (左上), MY (右下), R180 (右上)
-        在角的两条邻边上各取最小边长的 10% 长度，连成一条短线作为方向标识。
-        """
-        if orient not in ['R0', 'MX', 'MY', 'R180']:
-            return
-
-        # 获取所有顶点的 x 和 y 坐标
-        xs = [v[0] for v in vertices]
-        ys = [v[1] for v in vertices]
-
-        # 根据 orient 确定目标角的坐标
-        if orient == 'R0':      # 左下角
-            target_x, target_y = min(xs), min(ys)
-        elif orient == 'MX':    # 左上角
-            target_x, target_y = min(xs), max(ys)
-        elif orient == 'MY':    # 右下角
-            target_x, target_y = max(xs), min(ys)
-        elif orient == 'R180':  # 右上角
-            target_x, target_y = max(xs), max(ys)
-
-        # 找到最接近目标角的顶点（可能有多个点接近，取欧氏距离最近的）
-        corner = min(vertices, key=lambda v: (v[0] - target_x)**2 + (v[1] - target_y)**2)
-        corner_idx = vertices.index(corner)
-
-        n = len(vertices)
-        prev_point = vertices[(corner_idx - 1) % n]  # 前一个点
-        next_point = vertices[(corner_idx + 1) % n]  # 后一个点
-
-        # 计算边长
-        edge_length_1 = ((prev_point[0] - corner[0])**2 + (prev_point[1] - corner[1])**2)**0.5
-        edge_length_2 = ((next_point[0] - corner[0])**2 + (next_point[1] - corner[1])**2)**0.5
-
-        # 取最小边长的 10%
-        length = 0.1 * min(edge_length_1, edge_length_2)
-
-        # 计算新的点的位置
-        p1 = (
-            corner[0] + (prev_point[0] - corner[0]) / edge_length_1 * length,
-            corner[1] + (prev_point[1] - corner[1]) / edge_length_1 * length
-        )
-        p2 = (
-            corner[0] + (next_point[0] - corner[0]) / edge_length_2 * length,
-            corner[1] + (next_point[1] - corner[1]) / edge_length_2 * length
-        )
-
-        # 绘制红色短线（角标）
-        #ax.plot([p1[0], p2[0]], [p1[1], p2[1]], color='red', linewidth=2, solid_capstyle='round')
-        ax.plot([p1[0], p2[0]], [p1[1], p2[1]], color='black', linewidth=0.2, alpha=0.5, solid_capstyle='round')
-        #ax.plot([p1[0], p2[0]], [p1[1], p2[1]], color='black', linewidth=0.2)      
-
-    def _calculate_client_offsets(self, tile_client_mapping):
+    def _calculate_client_offsets(self, tile_client_mapping, pattern='grid'):
         """
         计算同一tile中多个client的坐标偏移
-        支持最多5个client的智能偏移布局
+        任意数量的client按网格或螺旋排布，偏移量按tile包围盒缩放，所有tile一次向量化计算
         
         Args:
-            tile_client_mapping: {tile_name: [client1, client2, ...]} 映射关系
+            tile_client_mapping: ClientTileIndex（或 {tile_name: [client1, client2, ...]} 映射关系）
+            pattern: 'grid'（网格）或 'spiral'（螺旋）
             
         Returns:
-            {tile_name: [(client_name, offset_x, offset_y), ...]}
+            {tile行号: [(client_name, offset_x, offset_y), ...]}
             
         偏移布局:
-            Client 1: 中心 (0, 0)
-            Client 2: 右上 (+50, +50) 
-            Client 3: 左上 (-50, +50)
-            Client 4: 左下 (-50, -50)
-            Client 5: 右下 (+50, -50)
+            单个client位于锚点 (0, 0)；多个client在tile包围盒80%的范围内均匀分布
+            （非矩形tile限制在内部代表点处的内切正方形中，见client_layout.marker_boxes）
         """
-        # 定义最多5个client的偏移坐标 (x_offset, y_offset)
-        offset_positions = [
-            (0, 0),         # 第一个client在中心，无偏移
-            (50, 50),       # 第二个client右上
-            (-50, 50),      # 第三个client左下  
-            (-50, -50),     # 第四个client右下
-            (50, -50)       # 第五个client左上
-        ]
-        
+        geometry = self.geometry
+        tile_client_mapping = ClientTileIndex.from_mapping(tile_client_mapping, self.symbols)
+        # 映射与解析器共用符号表时按tile的ID连接几何，否则按名称
+        keys = tile_client_mapping.tile_keys()
+        if self.symbols is not None and tile_client_mapping.symbols is self.symbols:
+            rows = geometry.rows_of_ids(keys, self.symbols)
+        else:
+            rows = geometry.rows(tile_client_mapping, self.symbols)
+        client_counts = np.asarray(tile_client_mapping.client_counts(), dtype=np.int64)
+        selected = np.flatnonzero((rows >= 0) & (client_counts > 0))
+        selected = selected[geometry.counts[rows[selected]] > 0]
+        if not len(selected):
+            return {}
+
+        indices = rows[selected].tolist()
+        _, widths, heights = marker_boxes(geometry, indices)
+        counts = client_counts[selected].tolist()
+
+        tile_index, offset_x, offset_y = compute_client_offsets(counts, widths, heights, pattern)
+
         tile_offsets = {}
-        
-        for tile_name, clients in tile_client_mapping.items():
-            if tile_name not in self.tiles_dict:
-                continue  # 跳过不存在的tile
-                
-            if len(clients) == 1:
-                # 单个client，不需要偏移
-                tile_offsets[tile_name] = [(clients[0], 0, 0)]
-            else:
-                # 多个client，分配偏移坐标
-                client_list = []
-                for i, client in enumerate(clients[:5]):  # 最多处理5个
-                    offset_x, offset_y = offset_positions[i % len(offset_positions)]
-                    client_list.append((client, offset_x, offset_y))
-                tile_offsets[tile_name] = client_list
-                
+        names = list(tile_client_mapping)
+        clients = [client for position in selected for client in tile_client_mapping[names[position]]]
+        for client, i, dx, dy in zip(clients, tile_index.tolist(), offset_x.tolist(), offset_y.tolist()):
+            tile_offsets.setdefault(indices[i], []).append((client, dx, dy))
         return tile_offsets
 
     def plot(self, title="Tile Layout Visualization", figsize=(12, 8), save_path=None, dpi=300, 
-              highlight_dbg=None, highlight_client=None, highlight_or_gate=None, tile_client_mapping=None, show_client_tile_names=0):
+              highlight_dbg=None, highlight_client=None, highlight_or_gate=None, tile_client_mapping=None, show_client_tile_names=0, show=True,
+              client_layout='grid', client_display='markers', heatmap_bins=None, strips=None, render_workers=None,
+              base_cache_dir=None, min_tile_pixels=None, memory_budget=None):
         """
         绘图并可选保存为高分辨率图像
         :param title: 图表标题
         :param figsize: 图像大小
         :param save_path: 图像保存路径（如 'output.png' 或 'output.pdf'), None 表示不保存
-        :param dpi: 分辨率(DPI), 默认 300,适合打印/展示
+        :param dpi: 分辨率(DPI), 默认 300,适合打印/展示；'auto' 时按最小tile尺寸和内存预算选择（见resolution_planner），
+                    规划结果记录在resolution_plan中
+        :param min_tile_pixels: dpi='auto' 时最小tile短边的目标像素数
+        :param memory_budget: dpi='auto' 时单张图像RGBA画布的字节上限
+        :param show: 保存后是否弹出预览窗口（显示2秒后自动关闭），批处理/基准测试时可关闭
+        :param strips: 大于1时PNG按水平条带分多个进程渲染并流式拼接（见strip_render），None/1为单次savefig
+        :param render_workers: 条带渲染的进程数，默认为CPU核数
+        :param base_cache_dir: 指定时PNG按底图图层（tile多边形与orient角标）+ 标记图层分开渲染，底图栅格缓存在该目录，
+                               之后只有highlight/client变化时只重绘标记图层并合成（见base_layer）；条带并行渲染和热力图模式下不使用
+        其余参数见build_figure()
+        """
+        figure_kwargs = dict(title=title, figsize=figsize, highlight_dbg=highlight_dbg,
+                             highlight_client=highlight_client, highlight_or_gate=highlight_or_gate,
+                             tile_client_mapping=tile_client_mapping, show_client_tile_names=show_client_tile_names,
+                             client_layout=client_layout, client_display=client_display, heatmap_bins=heatmap_bins)
+        is_png = save_path is not None and Path(save_path).suffix.lower() == '.png'
+        strip_mode = is_png and strips and strips > 1
+        layered = is_png and base_cache_dir is not None and not strip_mode
+        fig = self.build_figure(**figure_kwargs, draw_base=not layered)
+        if fig is None:
+            return
+        layered = layered and self.client_display_used == 'markers'
+        budget_strips = 1
+        if dpi == 'auto':
+            from resolution_planner import plan_resolution, log_plan
+            self.resolution_plan = plan_resolution(fig, self.geometry, min_tile_pixels, memory_budget)
+            log_plan(self.resolution_plan)
+            dpi = self.resolution_plan['dpi']
+            budget_strips = self.resolution_plan['strips']
+            if budget_strips > 1 and is_png:
+                # 预算容纳不下MIN_DPI的总览图：按行条带渲染，每个进程同一时刻只持有一个条带
+                if strip_mode:
+                    import os
+                    strips = max(strips, budget_strips * (render_workers or os.cpu_count() or 1))
+                elif not layered:
+                    strip_mode, strips, render_workers = True, budget_strips, 1
+
+        # 保存图像
+        if save_path:
+            save_path = Path(save_path)
+            save_path.parent.mkdir(parents=True, exist_ok=True)
+            if strip_mode:
+                from strip_render import save_png_strips
+                save_png_strips(self, fig, figure_kwargs, save_path, dpi, strips=strips, workers=render_workers)
+            elif layered:
+                from base_layer import save_png_layered
+                result = save_png_layered(self, fig, save_path, dpi, base_cache_dir,
+                                          strips=budget_strips)
+                if show and result['base_cached']:
+                    self.draw_base_layer(fig.axes[0])  # 预览窗口需要完整的图
+            else:
+                plt.savefig(save_path, dpi=dpi, bbox_inches='tight', pad_inches=0.1)
+            logger.info(f"💾 图像已保存至: {save_path} (DPI={dpi})")
+
+        # 显示图像（2秒后自动关闭）
+        if show:
+            plt.show(block=False)
+            plt.pause(2)  # 显示2秒
+        plt.close(fig)   # 自动关闭
+
+    def draw_base_layer(self, ax, facecolors=None):
+        """
+        绘制底图图层：所有tile多边形与orient角标，各用一个集合批量绘制
+
+        Args:
+            ax: 目标Axes
+            facecolors: tile填充色，默认按master着色
+
+        Returns:
+            list: 添加的集合
+        """
+        geometry = self.geometry
+        drawable = np.nonzero(geometry.valid)[0]
+        if facecolors is None:
+            master_color_map = self._get_color_map()
+            facecolors = np.array([master_color_map[geometry.masters[i]] for i in drawable]).reshape(-1, 4)
+        artists = [ax.add_collection(PolyCollection(geometry.polygons(drawable), closed=True, edgecolors='black',
+                                                    facecolors=facecolors, alpha=0.7, linewidths=0.2))]
+        orient_segments = geometry.orient_segments[geometry.orient_valid]
+        if len(orient_segments):
+            artists.append(ax.add_collection(LineCollection(orient_segments, colors='black', linewidths=0.2,
+                                                            alpha=0.5, capstyle='round')))
+        return artists
+
+    def build_figure(self, title="Tile Layout Visualization", figsize=(12, 8), highlight_dbg=None,
+                     highlight_client=None, highlight_or_gate=None, tile_client_mapping=None, show_client_tile_names=0,
+                     client_layout='grid', client_display='markers', heatmap_bins=None, draw_base=True):
+        """
+        构建可视化Figure（不保存、不显示、不关闭），无数据时返回None
+        :param title: 图表标题
+        :param figsize: 图像大小
         :param highlight_dbg: 调试标记列表
         :param highlight_client: 客户端标记列表  
         :param highlight_or_gate: OR门标记列表
-        :param tile_client_mapping: tile到client的映射关系 {tile_name: [client1, client2, ...]}
+        :param tile_client_mapping: tile到client的映射关系（ClientTileIndex 或 {tile_name: [client1, client2, ...]}）
         :param show_client_tile_names: 是否在有client的tile上显示tile名称 (0=不显示, 1=显示)
+        :param client_layout: 同一tile上多个client标记的排布方式 ('grid' 或 'spiral')
+        :param client_display: client的显示方式：'markers'（逐个标记）、'tile'（按client数量给tile着色）、
+                               'grid'（空间网格热力图）、'auto'（client很多时自动改用'tile'）
+        :param heatmap_bins: 'grid' 模式下较长边的网格数，None表示按tile中位尺寸自动选择
+        :param draw_base: 为False时标记模式下不绘制tile多边形与orient角标（底图图层由缓存的栅格提供，见base_layer），
+                          热力图模式下忽略；实际使用的显示方式记录在client_display_used中
         """
-        if not self.tiles_dict:
-            print("⚠️ 无数据可绘图，请先调用 parse_from_csv()")
-            return
+        if not self:
+            logger.warning("⚠️ 无数据可绘图，请先调用 parse_from_csv()")
+            return None
 
         fig, ax = plt.subplots(figsize=figsize)
         # 设置spine的线宽
         for spine in ax.spines.values():
             spine.set_linewidth(2.0)  # 将这里改为希望的宽度
 
-        master_color_map = self._get_color_map()
-
         def to_set(x):
             return set() if x is None else {x} if isinstance(x, str) else set(x)
 
@@ -242,97 +408,112 @@ class TileParser:
         highlight_client_set = to_set(highlight_client)
         highlight_or_gate_set = to_set(highlight_or_gate)
         
+        geometry = self.geometry
+
+        def row_mask(names):
+            """名称集合 -> tile行上的布尔掩码（有符号表时按ID连接），以及不存在的名称"""
+            names = list(names)
+            rows = geometry.rows(names, self.symbols)
+            mask = np.zeros(len(geometry), dtype=bool)
+            mask[rows[rows >= 0]] = True
+            return mask, [name for name, row in zip(names, rows) if row < 0]
+
+        is_dbg, _ = row_mask(highlight_dbg_set)
+        is_client, missing_client_tiles = row_mask(highlight_client_set)
+        is_or_gate, _ = row_mask(highlight_or_gate_set)
+
         # 检查highlight_client中不存在的tile
-        available_tiles = set(self.tiles_dict.keys())
-        missing_client_tiles = highlight_client_set - available_tiles
+        self.missing_highlight_tiles = sorted(missing_client_tiles)
         if missing_client_tiles:
-            print("⚠️ 警告：以下highlight_client中的tile在绘图数据中不存在：")
-            for missing_tile in sorted(missing_client_tiles):
-                print(f"   • {missing_tile}")
-            print(f"   总计：{len(missing_client_tiles)} 个未匹配的tile")
+            log_summary(logger, logging.WARNING, "⚠️ 警告：highlight_client中的tile在绘图数据中不存在",
+                        self.missing_highlight_tiles, item_prefix="   • ", detail_hint="data_analysis_report.txt")
         
-        # 计算client标记的偏移坐标
-        tile_offsets = {}
         if tile_client_mapping:
-            tile_offsets = self._calculate_client_offsets(tile_client_mapping)
-
-        def calculate_adaptive_font_size(vertices, tile_name):
-            """根据tile尺寸和名称长度计算合适的字体大小"""
-            # 计算tile的边界框尺寸
-            xs = [v[0] for v in vertices]
-            ys = [v[1] for v in vertices]
-            width = max(xs) - min(xs)
-            height = max(ys) - min(ys)
-            
-            # 计算最小边长
-            min_dimension = min(width, height)
-            
-            # 基于最小边长计算基础字体大小，降低比例因子
-            base_font_size = max(2, min_dimension / 400)  # 更小的基础字体
-            
-            # 根据字符长度调整
-            name_length = len(tile_name)
-            if name_length > 15:
-                font_size = base_font_size * 0.5
-            elif name_length > 12:
-                font_size = base_font_size * 0.6
-            elif name_length > 8:
-                font_size = base_font_size * 0.75
-            else:
-                font_size = base_font_size
-            
-            # 限制字体大小范围，更小的范围
-            return max(1.5, min(6, font_size))  # 最小1.5pt，最大6pt
-
-        for tile_name, data in self.tiles_dict.items():
-            vertices = data['vertices']
-            if len(vertices) < 3:
-                print(f"⚠️  {tile_name} 的顶点少于3个,跳过绘图。")
-                continue
+            tile_client_mapping = ClientTileIndex.from_mapping(tile_client_mapping, self.symbols)
+
+        # 热力图模式下按tile统计client数量，不再逐个计算标记位置
+        client_counts = None
+        if client_display != 'markers' and highlight_client_set:
+            client_counts = tile_client_counts(geometry, highlight_client_set, tile_client_mapping or None,
+                                               self.symbols)
+            client_display = resolve_display_mode(client_display, int(client_counts.sum()))
+            if client_display != 'markers':
+                logger.info(f"🌡️ client热力图模式 ({client_display}): {int(client_counts.sum())} 个client，"
+                            f"{np.count_nonzero(client_counts)} 个tile")
+        heatmap = client_counts is not None and client_display != 'markers'
 
-            color = master_color_map[data['master']]
-            polygon = Polygon(vertices, closed=True, edgecolor='black', facecolor=color, alpha=0.7, linewidth=0.2)
-            ax.add_patch(polygon)
-
-            self._draw_orient_marker(ax, vertices, data['orient'])
-        
-            # 🔹 分类型绘制中心点标记
-            centroid_x = np.mean([v[0] for v in vertices])
-            centroid_y = np.mean([v[1] for v in vertices])
-    
-            # 🔹 先绘制tile名称（如果开关开启），再绘制标记点
-            if show_client_tile_names and tile_name in highlight_client_set:
-                font_size = calculate_adaptive_font_size(vertices, tile_name)
-                
-                # 直接显示黑色文字，无背景
-                ax.text(centroid_x, centroid_y, tile_name, 
-                       fontsize=font_size, 
-                       ha='center', va='center',
-                       color='black', 
-                       weight='normal')  # 无背景，简洁显示
+        # 计算client标记的偏移坐标
+        tile_offsets = {}
+        if tile_client_mapping and not heatmap:
+            tile_offsets = self._calculate_client_offsets(tile_client_mapping, client_layout)
+
+        # 需要显示名称的tile，待坐标范围确定后统一做碰撞消解再绘制
+        label_names, label_xs, label_ys, label_widths, label_heights = [], [], [], [], []
+        dbg_points, client_points, or_gate_points = [], [], []
+
+        self.skipped_tiles = [name for name, valid in zip(geometry.names, geometry.valid) if not valid]
+        drawable = np.nonzero(geometry.valid)[0]
+        widths, heights = geometry.widths(), geometry.heights()
+        marked = drawable[(is_dbg | is_client | is_or_gate)[drawable]].tolist()
+        anchors = dict(zip(marked, geometry.interior_points(marked)[0]))
+
+        heatmap_layer = None
+        if heatmap and client_display == 'tile':
+            heatmap_layer = draw_tile_heatmap(ax, geometry, client_counts)
+        elif heatmap:
+            heatmap_layer = draw_grid_heatmap(ax, geometry, client_counts, bins=heatmap_bins)
+        # 热力图模式下tile只作为浅色底图/轮廓（orient角标在tile热力图之后添加，绘制在其上）；
+        # 标记模式下底图可由缓存的栅格提供（draw_base=False）
+        self.client_display_used = client_display if heatmap else 'markers'
+        if heatmap:
+            self.draw_base_layer(ax, BASE_FACECOLOR if client_display == 'tile' else 'none')
+        elif draw_base:
+            self.draw_base_layer(ax)
+
+        for i in marked:
+            tile_name = geometry.names[i]
+            # 🔹 标记锚点：矩形tile为质心，非矩形tile为内部代表点（L形tile的质心可能在tile外）
+            centroid_x, centroid_y = anchors[i]
     
-            # 🔹 然后绘制标记点，确保在文字之上
-            if tile_name in highlight_dbg_set:
-                ax.plot(centroid_x, centroid_y, 's', color='blue', markersize=3, alpha=0.8, markeredgecolor='darkblue', markeredgewidth=0.5)
-            elif tile_name in highlight_client_set:
-                # 检查是否有多个client需要偏移
-                if tile_name in tile_offsets:
-                    # 有映射关系，绘制所有client标记
-                    for client_name, offset_x, offset_y in tile_offsets[tile_name]:
-                        marker_x = centroid_x + offset_x
-                        marker_y = centroid_y + offset_y
-                        ax.plot(marker_x, marker_y, 'o', color='red', markersize=1, alpha=0.8, markeredgecolor='darkred', markeredgewidth=0.01, zorder=10)
-                else:
-                    # 没有映射关系，使用默认位置
-                    ax.plot(centroid_x, centroid_y, 'o', color='red', markersize=1, alpha=0.8, markeredgecolor='darkred', markeredgewidth=0.01, zorder=10)
-            elif tile_name in highlight_or_gate_set:
-                ax.plot(centroid_x, centroid_y, '^', color='green', markersize=3, alpha=0.8, markeredgecolor='darkgreen', markeredgewidth=0.5)  
+            # 🔹 收集tile名称标签（如果开关开启），绘制在标记点之下
+            if show_client_tile_names and is_client[i]:
+                label_names.append(tile_name)
+                label_xs.append(centroid_x)
+                label_ys.append(centroid_y)
+                label_widths.append(widths[i])
+                label_heights.append(heights[i])
     
+            # 🔹 收集标记点，循环结束后按类型批量绘制
+            if is_dbg[i]:
+                dbg_points.append((centroid_x, centroid_y))
+            elif is_client[i]:
+                if heatmap:
+                    continue
+                # 有映射关系时绘制所有client标记，否则使用默认位置
+                for client_name, offset_x, offset_y in tile_offsets.get(i, [(tile_name, 0, 0)]):
+                    client_points.append((centroid_x + offset_x, centroid_y + offset_y))
+            elif is_or_gate[i]:
+                or_gate_points.append((centroid_x, centroid_y))
+
+        # 🔹 然后绘制标记点，确保在文字之上
+        if dbg_points:
+            xs, ys = zip(*dbg_points)
+            ax.plot(xs, ys, 's', color='blue', markersize=3, alpha=0.8, markeredgecolor='darkblue', markeredgewidth=0.5)
+        if client_points:
+            xs, ys = zip(*client_points)
+            ax.plot(xs, ys, 'o', color='red', markersize=1, alpha=0.8, markeredgecolor='darkred', markeredgewidth=0.01, zorder=10)
+        if or_gate_points:
+            xs, ys = zip(*or_gate_points)
+            ax.plot(xs, ys, '^', color='green', markersize=3, alpha=0.8, markeredgecolor='darkgreen', markeredgewidth=0.5)
+
+        if self.skipped_tiles:
+            log_summary(logger, logging.WARNING, "⚠️  顶点少于3个、跳过绘图的tile",
+                        self.skipped_tiles, item_prefix="   • ", detail_hint="data_analysis_report.txt")
+
         # 设置坐标范围
-        all_x = [v[0] for data in self.tiles_dict.values() for v in data['vertices']]
-        all_y = [v[1] for data in self.tiles_dict.values() for v in data['vertices']]
-        ax.set_xlim(min(all_x) - 1, max(all_x) + 1)
-        ax.set_ylim(min(all_y) - 1, max(all_y) + 1)
+        xmin, ymin, xmax, ymax = geometry.extent()
+        ax.set_xlim(xmin - 1, xmax + 1)
+        ax.set_ylim(ymin - 1, ymax + 1)
 
         ax.set_title(title, fontsize=16)
         ax.set_xlabel("X")
@@ -350,26 +531,28 @@ class TileParser:
             Line2D([0], [0], marker='^', color='w', markerfacecolor='green', markersize=4, 
                    label='OR Gate', markeredgecolor='darkgreen', markeredgewidth=0.3)
         ]
+        if heatmap:
+            # client数量用色标表示
+            del legend_elements[1]
+            if heatmap_layer is not None:
+                colorbar = fig.colorbar(heatmap_layer, ax=ax, shrink=0.6, pad=0.02)
+                colorbar.set_label('Clients per tile' if client_display == 'tile' else 'Clients per cell', fontsize=8)
+                colorbar.ax.tick_params(labelsize=6)
         ax.legend(handles=legend_elements, loc='lower right', fontsize=6, 
                  frameon=True, fancybox=True, shadow=False, framealpha=0.8,
                  handlelength=1, handletextpad=0.5, columnspacing=0.5)
 
         plt.tight_layout()
 
-        # 保存图像
-        if save_path:
-            save_path = Path(save_path)
-            save_path.parent.mkdir(parents=True, exist_ok=True)
-            plt.savefig(save_path, dpi=dpi, bbox_inches='tight', pad_inches=0.1)
-            print(f"💾 图像已保存至: {save_path} (DPI={dpi})")
-
-        # 显示图像（2秒后自动关闭）
-        plt.show(block=False)
-        plt.pause(2)  # 显示2秒
-        plt.close()   # 自动关闭
+        # 布局确定后绘制tile名称标签，重叠的标签会被缩小或丢弃
+        if label_names:
+            drawn, dropped = draw_tile_labels(ax, label_names, label_xs, label_ys, label_widths, label_heights)
+            if dropped:
+                logger.info(f"🏷️ 绘制了 {drawn} 个tile名称，{dropped} 个因与其他名称重叠而省略")
+        return fig
 
     def __len__(self):
-        return len(self.tiles_dict)
+        return len(self.tiles_dict) if self._tiles_dict is not None else len(self._geometry)
 
     def __bool__(self):
-        return bool(self.tiles_dict)
\ No newline at end of file
+        return len(self) > 0
\ No newline at end of file
@@ -0,0 +1,363 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+本地Tile浏览服务
+一次性解析MID.csv / Mapping.xlsx后常驻内存，在浏览器中平移/缩放整个芯片布局：
+    - /                      交互式浏览页面
+    - /map/{z}/{x}/{y}.png   按需渲染的地图瓦片（LRU缓存）
+    - /api/info              布局范围、tile数量等信息
+    - /api/tile?name=...     按名称查询tile
+    - /api/at?x=...&y=...    按坐标查询所在的tile
+    - /api/clients?tile=...  查询tile上的client列表
+    - /api/client?id=...     查询client落在的tile（?module=... 查询整个模块）
+
+用法（在 code/ 目录下）：
+    python tile_server.py --port 8765
+"""
+
+import argparse
+import json
+import math
+import os
+import threading
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+
+from client_tile_index import ClientTileIndex
+from dfd_logger import get_logger
+
+logger = get_logger('tile_server')
+
+MAP_TILE_SIZE = 256  # 地图瓦片像素尺寸
+DEFAULT_CACHE_SIZE = 1024  # 默认缓存的瓦片数量
+MAX_ZOOM = 12
+
+VIEWER_HTML = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>Tile Floorplan Viewer</title>
+<style>
+html, body { margin: 0; height: 100%; overflow: hidden; font-family: sans-serif; background: #f4f4f4; }
+#map { position: absolute; inset: 0; cursor: grab; }
+#map img { position: absolute; width: 256px; height: 256px; user-select: none; -webkit-user-drag: none; }
+#panel { position: absolute; top: 8px; right: 8px; width: 320px; max-height: 90%; overflow: auto;
+         background: rgba(255,255,255,0.92); border: 1px solid #999; padding: 8px; font-size: 12px; }
+#panel input { width: 200px; }
+pre { white-space: pre-wrap; margin: 4px 0; }
+</style></head>
+<body>
+<div id="map"></div>
+<div id="panel">
+  <form id="search"><input id="name" placeholder="tile name"> <button>Go</button></form>
+  <div id="coord"></div><pre id="info">Click a tile to inspect it.</pre>
+</div>
+<script>
+const T = 256, map = document.getElementById('map');
+let info, z = 0, cx = 0, cy = 0;   // cx/cy: view centre in level-0 pixel space
+const cache = new Map();
+function worldToL0(x, y) { return [(x - info.origin[0]) / info.size * T, (info.origin[1] + info.size - y) / info.size * T]; }
+function l0ToWorld(px, py) { return [info.origin[0] + px / T * info.size, info.origin[1] + info.size - py / T * info.size]; }
+function render() {
+  const s = Math.pow(2, z), w = map.clientWidth, h = map.clientHeight;
+  const left = cx * s - w / 2, top = cy * s - h / 2, n = s;
+  const keep = new Set();
+  for (let ty = Math.floor(top / T); ty <= Math.floor((top + h) / T); ty++) {
+    for (let tx = Math.floor(left / T); tx <= Math.floor((left + w) / T); tx++) {
+      if (tx < 0 || ty < 0 || tx >= n || ty >= n) continue;
+      const key = z + '/' + tx + '/' + ty; keep.add(key);
+      let img = cache.get(key);
+      if (!img) { img = new Image(); img.src = '/map/' + key + '.png'; cache.set(key, img); map.appendChild(img); }
+      img.style.left = (tx * T - left) + 'px'; img.style.top = (ty * T - top) + 'px';
+    }
+  }
+  for (const [key, img] of cache) { if (!keep.has(key)) { img.remove(); cache.delete(key); } }
+}
+function eventWorld(e) {
+  const s = Math.pow(2, z), r = map.getBoundingClientRect();
+  return l0ToWorld(cx + (e.clientX - r.left - map.clientWidth / 2) / s, cy + (e.clientY - r.top - map.clientHeight / 2) / s);
+}
+function show(data) { document.getElementById('info').textContent = JSON.stringify(data, null, 2); }
+let drag = null, moved = false;
+map.onmousedown = e => { drag = [e.clientX, e.clientY]; moved = false; };
+window.onmouseup = e => {
+  if (drag && !moved) { const [x, y] = eventWorld(e); fetch('/api/at?x=' + x + '&y=' + y).then(r => r.json()).then(show); }
+  drag = null;
+};
+window.onmousemove = e => {
+  if (info) { const [x, y] = eventWorld(e); document.getElementById('coord').textContent = 'x=' + x.toFixed(1) + '  y=' + y.toFixed(1); }
+  if (!drag) return;
+  const s = Math.pow(2, z); cx -= (e.clientX - drag[0]) / s; cy -= (e.clientY - drag[1]) / s;
+  drag = [e.clientX, e.clientY]; moved = true; render();
+};
+map.onwheel = e => {
+  e.preventDefault();
+  const nz = Math.max(0, Math.min(info.max_zoom, z + (e.deltaY < 0 ? 1 : -1)));
+  if (nz !== z) { z = nz; for (const img of cache.values()) img.remove(); cache.clear(); render(); }
+};
+document.getElementById('search').onsubmit = e => {
+  e.preventDefault();
+  fetch('/api/tile?name=' + encodeURIComponent(document.getElementById('name').value)).then(r => r.json()).then(d => {
+    show(d);
+    if (d.centroid) { [cx, cy] = worldToL0(d.centroid[0], d.centroid[1]); z = Math.max(z, Math.min(info.max_zoom, 6));
+      for (const img of cache.values()) img.remove(); cache.clear(); render(); }
+  });
+};
+window.onresize = render;
+fetch('/api/info').then(r => r.json()).then(d => { info = d; cx = cy = T / 2; render(); });
+</script></body></html>
+"""
+
+
+class MapTileCache:
+    """线程安全的LRU缓存"""
+
+    def __init__(self, capacity=DEFAULT_CACHE_SIZE):
+        self.capacity = capacity
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            value = self._items.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > self.capacity:
+                self._items.popitem(last=False)
+
+    def __len__(self):
+        return len(self._items)
+
+
+class TileMapService:
+    """常驻内存的tile数据、空间索引与瓦片渲染"""
+
+    def __init__(self, parser, tile_client_mapping=None, highlight_client=None, cache_size=DEFAULT_CACHE_SIZE):
+        from region_render import RegionRenderer
+
+        self.parser = parser
+        self.tile_client_mapping = ClientTileIndex.from_mapping(tile_client_mapping)
+        self.renderer = RegionRenderer(parser, self.tile_client_mapping, highlight_client)
+        self.cache = MapTileCache(cache_size)
+        self._render_lock = threading.Lock()  # matplotlib渲染不保证线程安全
+
+        # level-0 瓦片覆盖的正方形世界范围
+        xmin, ymin, xmax, ymax = self.renderer.extent()
+        self.size = max(xmax - xmin, ymax - ymin) or 1.0
+        self.origin = (xmin, ymin)
+        self._build_spatial_index()
+
+    def _build_spatial_index(self):
+        """按网格分桶的包围盒索引，用于坐标查询"""
+        bboxes = self.renderer.bboxes
+        count = max(1, len(bboxes))
+        self.grid_cells = max(1, int(math.sqrt(count)))
+        self.cell_size = self.size / self.grid_cells
+        self.buckets = {}
+        if not len(bboxes):
+            return
+        x0, y0 = self.origin
+        cells = np.floor((bboxes - [x0, y0, x0, y0]) / self.cell_size).astype(int)
+        cells = np.clip(cells, 0, self.grid_cells - 1)
+        for index, (cx0, cy0, cx1, cy1) in enumerate(cells):
+            for cx in range(cx0, cx1 + 1):
+                for cy in range(cy0, cy1 + 1):
+                    self.buckets.setdefault((cx, cy), []).append(index)
+
+    def info(self):
+        return {
+            'origin': list(self.origin),
+            'size': self.size,
+            'extent': list(self.renderer.extent()),
+            'tile_count': len(self.renderer.names),
+            'client_tile_count': int(self.renderer.highlight_mask.sum()),
+            'map_tile_size': MAP_TILE_SIZE,
+            'max_zoom': MAX_ZOOM,
+            'cache': {'size': len(self.cache), 'hits': self.cache.hits, 'misses': self.cache.misses},
+        }
+
+    def map_tile(self, z, x, y):
+        """返回第z级(x, y)位置的PNG瓦片（y自上而下）"""
+        key = (z, x, y)
+        png = self.cache.get(key)
+        if png is not None:
+            return png
+
+        span = self.size / (2 ** z)
+        xmin = self.origin[0] + x * span
+        ymax = self.origin[1] + self.size - y * span
+        with self._render_lock:
+            png = self.renderer.render_png(xmin, ymax - span, xmin + span, ymax, MAP_TILE_SIZE, MAP_TILE_SIZE)
+        self.cache.put(key, png)
+        return png
+
+    def tile_details(self, tile_name):
+        """tile的几何信息与client列表"""
+        geometry = self.parser.geometry
+        i = geometry.index.get(tile_name)
+        if i is None:
+            return None
+        details = {
+            'name': tile_name,
+            'master': geometry.masters[i],
+            'orient': geometry.orients[i],
+            'vertices': geometry.polygons([i])[0].tolist(),
+            'clients': list(self.tile_client_mapping.get(tile_name, [])),
+        }
+        index = self.renderer.name_to_index.get(tile_name)
+        if index is not None:
+            details['bbox'] = self.renderer.bboxes[index].tolist()
+            details['centroid'] = self.renderer.anchors[index].tolist()
+        return details
+
+    def tiles_at(self, x, y):
+        """返回包含坐标点(x, y)的所有tile名称"""
+        # 与建索引时一样裁剪到网格内，落在范围右/上边界上的点属于最后一列/行
+        cx = min(max(int((x - self.origin[0]) // self.cell_size), 0), self.grid_cells - 1)
+        cy = min(max(int((y - self.origin[1]) // self.cell_size), 0), self.grid_cells - 1)
+        found = []
+        for index in self.buckets.get((cx, cy), []):
+            xmin, ymin, xmax, ymax = self.renderer.bboxes[index]
+            if xmin <= x <= xmax and ymin <= y <= ymax and _point_in_polygon(x, y, self.renderer.polygons[index]):
+                found.append(self.renderer.names[index])
+        return found
+
+
+def _point_in_polygon(x, y, points):
+    """射线法判断点是否在多边形内，落在边上的点算作在内"""
+    xs, ys = points[:, 0], points[:, 1]
+    xs_next, ys_next = np.roll(xs, -1), np.roll(ys, -1)
+    cross = (xs_next - xs) * (y - ys) - (ys_next - ys) * (x - xs)
+    scale = np.maximum(np.abs(xs_next - xs) + np.abs(ys_next - ys), 1.0)
+    on_edge = (np.abs(cross) <= 1e-9 * scale * scale) \
+        & (np.minimum(xs, xs_next) <= x) & (x <= np.maximum(xs, xs_next)) \
+        & (np.minimum(ys, ys_next) <= y) & (y <= np.maximum(ys, ys_next))
+    if on_edge.any():
+        return True
+    crosses = (ys > y) != (ys_next > y)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        x_cross = xs + (y - ys) * (xs_next - xs) / (ys_next - ys)
+    return bool(np.count_nonzero(crosses & (x < x_cross)) % 2)
+
+
+class TileRequestHandler(BaseHTTPRequestHandler):
+    """HTTP请求处理，service由make_server注入"""
+
+    service = None
+
+    def log_message(self, format, *args):
+        logger.debug("🌐 " + format % args)
+
+    def _send(self, status, body, content_type, cache=False):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        if cache:
+            self.send_header('Cache-Control', 'max-age=3600')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_json(self, data, status=200):
+        self._send(status, json.dumps(data, ensure_ascii=False).encode('utf-8'), 'application/json; charset=utf-8')
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = {k: v[0] for k, v in parse_qs(url.query).items()}
+        parts = [p for p in url.path.split('/') if p]
+        try:
+            if not parts:
+                self._send(200, VIEWER_HTML.encode('utf-8'), 'text/html; charset=utf-8')
+            elif parts[0] == 'map' and len(parts) == 4 and parts[3].endswith('.png'):
+                z, x, y = int(parts[1]), int(parts[2]), int(parts[3][:-4])
+                if not (0 <= z <= MAX_ZOOM and 0 <= x < 2 ** z and 0 <= y < 2 ** z):
+                    self._send_json({'error': 'map tile out of range'}, 404)
+                    return
+                self._send(200, self.service.map_tile(z, x, y), 'image/png', cache=True)
+            elif url.path == '/api/info':
+                self._send_json(self.service.info())
+            elif url.path == '/api/tile':
+                details = self.service.tile_details(query.get('name', ''))
+                if details is None:
+                    self._send_json({'error': f"tile不存在: {query.get('name', '')}"}, 404)
+                else:
+                    self._send_json(details)
+            elif url.path == '/api/at':
+                x, y = float(query['x']), float(query['y'])
+                names = self.service.tiles_at(x, y)
+                self._send_json({'x': x, 'y': y, 'tiles': [self.service.tile_details(n) for n in names]})
+            elif url.path == '/api/clients':
+                tile_name = query.get('tile', '')
+                self._send_json({'tile': tile_name,
+                                 'clients': list(self.service.tile_client_mapping.clients(tile_name))})
+            elif url.path == '/api/client':
+                # client（或整个模块）落在哪些tile上
+                index = self.service.tile_client_mapping
+                if 'module' in query:
+                    self._send_json({'module': query['module'], 'tiles': list(index.tiles_of_module(query['module']))})
+                else:
+                    self._send_json({'client': query['id'], 'tiles': list(index.tiles_of_client(query['id']))})
+            else:
+                self._send_json({'error': 'not found'}, 404)
+        except (KeyError, ValueError) as e:
+            self._send_json({'error': f"参数错误: {e}"}, 400)
+
+
+def make_server(service, host='127.0.0.1', port=8765):
+    """创建绑定到service的HTTP服务器"""
+    handler = type('BoundTileRequestHandler', (TileRequestHandler,), {'service': service})
+    return ThreadingHTTPServer((host, port), handler)
+
+
+def load_service(csv_file='MID.csv', mapping_file='Mapping.xlsx', cache_size=DEFAULT_CACHE_SIZE):
+    """解析输入文件并创建常驻的TileMapService"""
+    from tile_parser import TileParser
+
+    parser = TileParser().parse_from_csv(csv_file)
+
+    tile_client_mapping = ClientTileIndex()
+    highlight_client = None
+    mapping_path = mapping_file if os.path.isabs(mapping_file) else \
+        os.path.join(os.path.dirname(__file__), '..', 'input', mapping_file)
+    if os.path.exists(mapping_path):
+        from excel_reader import read_excel_client_tile_mapping, read_excel_column_f
+        tile_client_mapping = read_excel_client_tile_mapping(mapping_file)
+        highlight_client = read_excel_column_f(mapping_file)
+    else:
+        logger.info(f"💡 未找到 {mapping_path}，仅显示tile布局")
+
+    return TileMapService(parser, tile_client_mapping, highlight_client, cache_size)
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="本地Tile浏览服务")
+    arg_parser.add_argument('--csv', default='MID.csv', help="Tile数据文件（相对路径基于input/）")
+    arg_parser.add_argument('--mapping', default='Mapping.xlsx', help="Excel映射文件（相对路径基于input/）")
+    arg_parser.add_argument('--host', default='127.0.0.1')
+    arg_parser.add_argument('--port', type=int, default=8765)
+    arg_parser.add_argument('--cache-size', type=int, default=DEFAULT_CACHE_SIZE, help="缓存的瓦片数量")
+    args = arg_parser.parse_args()
+
+    service = load_service(args.csv, args.mapping, args.cache_size)
+    server = make_server(service, args.host, args.port)
+    logger.info(f"🌐 Tile浏览服务已启动: http://{args.host}:{args.port}/  (Ctrl+C 退出)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        logger.info("👋 服务已停止")
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Watch模式
+常驻一个DFDProcessor，轮询输入文件（CHIP.txt / Mapping.xlsx / MID.csv）以及main.py中的expand_dict，
+文件变化后只重新解析变化的输入并只重跑受影响的阶段：
+    - CHIP.txt 或 expand_dict 变化 -> 芯片块展开 + Excel整合 + 报告
+    - Mapping.xlsx 变化            -> Excel整合 + 可视化 + 报告
+    - MID.csv 变化                 -> 可视化 + 报告
+解析结果（芯片块、tile几何、映射表）和已导入的openpyxl/matplotlib在多次运行之间保留在内存中。
+只使用标准库轮询文件的修改时间和大小，不依赖操作系统的文件监听机制。
+
+用法（在 code/ 目录下）：
+    python watch.py                 # 默认每0.5秒检查一次
+    python watch.py --no-render     # 只更新JSON和报告，不重新绘图
+"""
+
+import argparse
+import ast
+import os
+import time
+from pathlib import Path
+
+from dfd_logger import get_logger, setup_logging
+from dfd_processor import DFDProcessor
+
+logger = get_logger('watch')
+
+DEFAULT_INTERVAL = 0.5  # 秒
+DEFAULT_WATCH_DPI = 300  # watch模式下默认使用较低的分辨率，缩短每次重绘的时间
+
+# 输入文件 -> DFDProcessor.invalidate()使用的名称
+WATCHED_INPUTS = {
+    'CHIP.txt': 'chip',
+    'Mapping.xlsx': 'mapping',
+    'MID.csv': 'mid',
+}
+# 每个输入变化后需要重跑的阶段
+AFFECTED_STAGES = {
+    'chip': {'blocks'},
+    'expand': {'blocks'},
+    'mapping': {'blocks', 'visualization'},
+    'mid': {'visualization'},
+}
+
+
+def load_expand_dict(config_file):
+    """
+    从main.py中读取expand_dict的字面量（不执行main.py）
+
+    Returns:
+        dict: expand_dict；文件中没有可解析的expand_dict时返回None
+    """
+    try:
+        tree = ast.parse(Path(config_file).read_text(encoding='utf-8'))
+    except (OSError, SyntaxError) as e:
+        logger.warning(f"⚠️ 无法解析 {config_file}: {e}")
+        return None
+
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and any(isinstance(t, ast.Name) and t.id == 'expand_dict' for t in node.targets):
+            try:
+                return ast.literal_eval(node.value)
+            except ValueError as e:
+                logger.warning(f"⚠️ expand_dict不是字面量，忽略本次修改: {e}")
+                return None
+    return None
+
+
+def _file_signature(path):
+    """文件的 (修改时间, 大小)，文件不存在时为None"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+class WatchSession:
+    """常驻处理器 + 输入文件轮询"""
+
+    def __init__(self, processor, config_file=None, interval=DEFAULT_INTERVAL, show_client_tile_names=0, render=True):
+        """
+        Args:
+            processor: 常驻的DFDProcessor
+            config_file: 包含expand_dict的配置文件（main.py），None表示不监视expand_dict
+            interval: 轮询间隔（秒）
+            show_client_tile_names: 传给可视化阶段的开关
+            render: 是否在Mapping.xlsx / MID.csv变化后重新绘图
+        """
+        self.processor = processor
+        self.config_file = Path(config_file) if config_file else None
+        self.interval = interval
+        self.show_client_tile_names = show_client_tile_names
+        self.render = render
+        self.signatures = {}
+        self.visualization_result = (False, None, 0, 0)  # 最近一次可视化的返回值，报告阶段复用
+        self.runs = 0
+
+    def _watched_paths(self):
+        paths = {name: self.processor.input_dir / filename for filename, name in WATCHED_INPUTS.items()}
+        if self.config_file is not None:
+            paths['expand'] = self.config_file
+        return paths
+
+    def snapshot(self):
+        """所有被监视文件的当前签名"""
+        return {name: _file_signature(path) for name, path in self._watched_paths().items()}
+
+    def changed_inputs(self):
+        """
+        返回自上次检查以来发生变化的输入
+
+        签名变化后再等待一个轮询间隔，直到连续两次签名一致，避免读到Excel等程序正在写入的文件。
+        """
+        current = self.snapshot()
+        changed = {name for name, signature in current.items() if self.signatures.get(name) != signature}
+        while changed:
+            time.sleep(self.interval)
+            settled = self.snapshot()
+            if settled == current:
+                break
+            changed |= {name for name, signature in settled.items() if current.get(name) != signature}
+            current = settled
+        self.signatures = current
+        return changed
+
+    def run_stages(self, changed):
+        """
+        按变化的输入丢弃缓存并重跑受影响的阶段
+
+        Args:
+            changed: 变化的输入名称集合（'chip'、'mapping'、'mid'、'expand'）
+
+        Returns:
+            dict: 与DFDProcessor.run_complete_analysis()相同结构的结果
+        """
+        processor = self.processor
+        start = time.perf_counter()
+
+        if 'expand' in changed:
+            expand_dict = load_expand_dict(self.config_file)
+            if expand_dict is None or expand_dict == processor.expand_dict:
+                changed = changed - {'expand'}
+            else:
+                processor.expand_dict = expand_dict
+                logger.info("🔁 expand_dict已更新")
+
+        processor.invalidate(*(name for name in changed if name in processor.INPUT_CACHES))
+        stages = set().union(*(AFFECTED_STAGES[name] for name in changed)) if changed else set()
+        if not stages:
+            return None
+        if not self.render:
+            stages.discard('visualization')
+
+        try:
+            processor.load_inputs()  # 变化的输入并发重新读取
+            blocks_count = result_count = None
+            if 'blocks' in stages:
+                blocks_count, result_count = processor.process_chip_blocks()
+            if 'visualization' in stages:
+                self.visualization_result = processor.process_visualization(self.show_client_tile_names)
+
+            _, missing_client_tiles, available_tiles_count, highlight_client_count = self.visualization_result
+            warning_messages = processor.generate_analysis_report(
+                missing_client_tiles=missing_client_tiles,
+                available_tiles_count=available_tiles_count,
+                highlight_client_count=highlight_client_count
+            )
+        except Exception as e:
+            # 常驻模式下单次失败（如文件写到一半）不退出，等待下一次修改
+            logger.error(f"❌ 运行错误: {e}")
+            return {'success': False, 'error': f"运行错误: {e}", 'error_type': type(e).__name__}
+
+        elapsed = time.perf_counter() - start
+        self.runs += 1
+        logger.info(f"⚡ 第{self.runs}次更新完成 ({', '.join(sorted(changed))} -> {', '.join(sorted(stages))})，"
+                    f"耗时 {elapsed:.2f}s")
+        for warning in warning_messages:
+            logger.warning(f"   {warning}")
+        return {
+            'success': True,
+            'blocks_count': blocks_count,
+            'result_count': result_count,
+            'visualization_success': self.visualization_result[0],
+            'warning_messages': warning_messages,
+            'stages': sorted(stages),
+            'elapsed': elapsed,
+        }
+
+    def poll_once(self):
+        """检查一次输入文件，有变化时运行受影响的阶段"""
+        changed = self.changed_inputs()
+        if changed:
+            return self.run_stages(changed)
+        return None
+
+    def run(self, max_runs=None):
+        """
+        持续监视，直到Ctrl+C（或完成max_runs次更新）
+
+        第一次检查时所有输入都视为已变化，即先完整运行一次。
+        """
+        logger.info(f"👀 开始监视 {self.processor.input_dir}（每{self.interval}s检查一次，Ctrl+C 退出）")
+        try:
+            while max_runs is None or self.runs < max_runs:
+                self.poll_once()
+                time.sleep(self.interval)
+        except KeyboardInterrupt:
+            logger.info("👋 已停止监视")
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="DFD watch模式：输入变化后增量更新输出")
+    arg_parser.add_argument('--config', default=str(Path(__file__).with_name('main.py')),
+                            help="读取expand_dict的配置文件，默认为main.py")
+    arg_parser.add_argument('--input-dir', help="输入目录，默认为 input/")
+    arg_parser.add_argument('--output-dir', help="输出目录，默认为 output/")
+    arg_parser.add_argument('--interval', type=float, default=DEFAULT_INTERVAL, help="轮询间隔（秒）")
+    arg_parser.add_argument('--dpi', type=int, default=DEFAULT_WATCH_DPI, help="tiles_high_res.png 的分辨率")
+    arg_parser.add_argument('--show-client-tile-names', type=int, default=0, choices=(0, 1))
+    arg_parser.add_argument('--client-display', default='auto', choices=('markers', 'tile', 'grid', 'auto'),
+                            help="client显示方式：逐个标记 / tile热力图 / 网格热力图 / 自动")
+    arg_parser.add_argument('--no-render', action='store_true', help="只更新JSON和报告，不重新绘图")
+    arg_parser.add_argument('--base-layer-cache', action='store_true',
+                            help="缓存tile多边形底图栅格，只有Mapping.xlsx变化时只重绘标记（占用较多磁盘）")
+    arg_parser.add_argument('--log-level', default='INFO')
+    args = arg_parser.parse_args()
+
+    setup_logging(level=args.log_level)
+    expand_dict = load_expand_dict(args.config) or {}
+    processor = DFDProcessor(expand_dict, input_dir=args.input_dir, output_dir=args.output_dir,
+                             show_plot=False, plot_dpi=args.dpi, client_display=args.client_display,
+                             base_layer_cache=args.base_layer_cache)
+    WatchSession(processor, config_file=args.config, interval=args.interval,
+                 show_client_tile_names=args.show_client_tile_names, render=not args.no_render).run()
+
+
+if __name__ == "__main__":
+    main()